@@ -0,0 +1,91 @@
+"""
+Benchmark for bug log ingestion.
+
+Writes a synthetic application log in which a small share of the lines are
+errors, some with multi-line Python tracebacks, then reports how fast
+``scan_log`` reads it, plain and gzipped.
+
+Usage:
+    python -m benchmarks.bench_bugs [megabytes] [error-percent]
+"""
+
+import gzip
+import os
+import random
+import sys
+import tempfile
+import time
+
+from src.bugs import open_log, scan_log
+
+
+TRACEBACK = (
+    "Traceback (most recent call last):\n"
+    '  File "/srv/app/handlers.py", line 42, in handle\n'
+    "    response = self.dispatch(request)\n"
+    '  File "/srv/app/views.py", line 7, in dispatch\n'
+    "    return user.profile.name\n"
+    "{error}\n"
+)
+
+ERRORS = [
+    "AttributeError: 'NoneType' object has no attribute 'name'",
+    "TimeoutError: upstream did not answer within 30s",
+    "TypeError: unsupported operand type(s) for +: 'int' and 'str'",
+    "PermissionError: [Errno 13] Permission denied: '/var/run/app.sock'",
+    "MemoryError",
+]
+
+
+def synthetic_log(path: str, megabytes: int, error_percent: float, seed: int = 42) -> None:
+    """Write a log of roughly the given size."""
+    rng = random.Random(seed)
+    target = megabytes * 1024 * 1024
+    written = 0
+    with open(path, "w") as f:
+        while written < target:
+            lines = []
+            for _ in range(1000):
+                stamp = f"2024-05-0{rng.randint(1, 9)} 12:{rng.randint(10, 59)}:{rng.randint(10, 59)},123"
+                if rng.random() * 100 < error_percent:
+                    error = rng.choice(ERRORS)
+                    if rng.random() < 0.5:
+                        lines.append(f"{stamp} ERROR [worker-{rng.randint(1, 8)}] request failed\n"
+                                     + TRACEBACK.format(error=error))
+                    else:
+                        lines.append(f"{stamp} ERROR [worker-{rng.randint(1, 8)}] {error}\n")
+                else:
+                    lines.append(f"{stamp} INFO [worker-{rng.randint(1, 8)}] GET /api/items/{rng.randint(1, 10**6)}"
+                                 f" 200 in {rng.randint(1, 900)}ms\n")
+            block = "".join(lines)
+            f.write(block)
+            written += len(block)
+
+
+def measure(label: str, path: str) -> None:
+    size = os.path.getsize(path)
+    started = time.perf_counter()
+    with open_log(path) as stream:
+        report = scan_log(stream)
+    elapsed = time.perf_counter() - started
+    print(f"{label}: {report.bytes_read / 1e6:.0f} MB, {report.records} records in {elapsed:.2f}s "
+          f"({report.bytes_read / 1e6 / elapsed:.0f} MB/s of log, {size / 1e6 / elapsed:.0f} MB/s of file)")
+
+
+def main() -> None:
+    megabytes = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    error_percent = float(sys.argv[2]) if len(sys.argv) > 2 else 1.0
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "app.log")
+        synthetic_log(path, megabytes, error_percent)
+        measure("plain", path)
+
+        compressed = path + ".gz"
+        with open(path, "rb") as source, gzip.open(compressed, "wb", compresslevel=6) as target:
+            target.write(source.read())
+        measure("gzip ", compressed)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+"""
+Benchmark for the binary insight codec.
+
+Analyzes the package's own source until about a million insights have been
+collected, grouped into file results, and compares the size and the encode
+and decode times of the codec with JSON and pickle.
+
+Usage:
+    python -m benchmarks.bench_codec [insights]
+"""
+
+import glob
+import json
+import os
+import pickle
+import sys
+import time
+from dataclasses import asdict
+
+from src.codec import decode_insights, encode_insights
+from src.existential_coder import CodeInsight, ContemplationLevel, ExistentialCoder
+from src.utils import analyze_code_complexity, calculate_code_karma
+from src.scan import FileResult
+
+
+def collect_results(target: int) -> list:
+    coder = ExistentialCoder(ContemplationLevel.COSMIC)
+    sources = sorted(glob.glob(os.path.join(os.path.dirname(__file__), "..", "src", "*.py")))
+    results = []
+    insights = 0
+    while insights < target:
+        for path in sources:
+            code = open(path).read()
+            found = list(coder.analyze_code(code, path))
+            results.append(FileResult(f"{path}#{len(results)}", found, calculate_code_karma(code),
+                                      analyze_code_complexity(code)))
+            insights += len(found)
+    return results
+
+
+def to_json(results: list) -> bytes:
+    return json.dumps([
+        {"path": r.path, "karma": r.karma, "complexity": r.complexity, "version": r.version,
+         "insights": [dict(asdict(i), contemplation_level=i.contemplation_level.value) for i in r.insights]}
+        for r in results
+    ]).encode("utf-8")
+
+
+def from_json(data: bytes) -> list:
+    return [
+        FileResult(r["path"], [CodeInsight(i["question"], i["wisdom"], ContemplationLevel(i["contemplation_level"]),
+                                           i["line_number"]) for i in r["insights"]],
+                   r["karma"], r["complexity"], r["version"])
+        for r in json.loads(data)
+    ]
+
+
+def measure(label: str, encode, decode, results: list) -> None:
+    started = time.perf_counter()
+    data = encode(results)
+    encoded = time.perf_counter() - started
+    started = time.perf_counter()
+    decoded = decode(data)
+    elapsed = time.perf_counter() - started
+    assert decoded == results
+    print(f"{label:<7} {len(data) / 1e6:8.1f} MB  encode {encoded:5.2f}s  decode {elapsed:5.2f}s")
+
+
+def main() -> None:
+    target = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    results = collect_results(target)
+    print(f"{sum(len(r.insights) for r in results)} insights in {len(results)} file results")
+
+    measure("json", to_json, from_json, results)
+    measure("pickle", lambda r: pickle.dumps(r, protocol=pickle.HIGHEST_PROTOCOL), pickle.loads, results)
+    measure("codec", encode_insights, decode_insights, results)
+
+
+if __name__ == "__main__":
+    main()
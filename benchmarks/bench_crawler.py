@@ -0,0 +1,97 @@
+"""
+Benchmark for the prefetching crawler on a slow file system.
+
+Writes a synthetic tree of small source files and injects a fixed latency
+into every directory listing and file read, as a network file system would.
+Compares reading and analyzing the tree one file at a time with prefetching
+at several reader counts.
+
+Usage:
+    python -m benchmarks.bench_crawler [files] [latency-ms]
+"""
+
+import os
+import sys
+import tempfile
+import time
+
+import src.crawler
+from src.crawler import analyze_tree
+from src.existential_coder import ExistentialCoder
+from src.scan import read_source, walk_files
+from src.utils import analyze_code_complexity, calculate_code_karma
+
+
+CODE = '''def process(items):
+    results = []
+    for item in items:
+        if item is None:
+            raise ValueError("nothing to contemplate")
+        results.append(item * 2)
+    return results
+'''
+
+
+def write_tree(root: str, files: int, per_directory: int = 50) -> None:
+    for index in range(files):
+        directory = os.path.join(root, f"pkg_{index // per_directory}")
+        os.makedirs(directory, exist_ok=True)
+        with open(os.path.join(directory, f"mod_{index}.py"), "w") as f:
+            f.write(CODE * 20)
+
+
+def inject_latency(seconds: float) -> None:
+    """Make every listing and read of the crawler wait, as if over the network."""
+    list_directory = src.crawler._list_directory
+    read_file = src.crawler._read_file
+
+    def slow_list(*args):
+        time.sleep(seconds)
+        return list_directory(*args)
+
+    def slow_read(path):
+        time.sleep(seconds)
+        return read_file(path)
+
+    src.crawler._list_directory = slow_list
+    src.crawler._read_file = slow_read
+
+
+def one_at_a_time(root: str, latency: float) -> int:
+    """Read and analyze each file in turn, waiting out the same latency."""
+    coder = ExistentialCoder()
+    analyzed = 0
+    for path in walk_files(root, (".py",)):
+        time.sleep(latency)
+        code, _ = read_source(path)
+        coder.analyze_code(code, path)
+        calculate_code_karma(code)
+        analyze_code_complexity(code)
+        analyzed += 1
+    return analyzed
+
+
+def main() -> None:
+    files = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+    latency = (float(sys.argv[2]) if len(sys.argv) > 2 else 5.0) / 1000
+
+    with tempfile.TemporaryDirectory() as root:
+        write_tree(root, files)
+
+        started = time.perf_counter()
+        analyzed = one_at_a_time(root, latency)
+        before = time.perf_counter() - started
+        print(f"{analyzed} files, {latency * 1000:g} ms latency")
+        print(f"one file at a time:  {before:6.2f}s")
+
+        inject_latency(latency)
+        for readers in (1, 4, 16, 64):
+            started = time.perf_counter()
+            results = list(analyze_tree(root, readers=readers, max_in_flight=readers * 2))
+            elapsed = time.perf_counter() - started
+            assert len(results) == analyzed
+            print(f"{readers:>3} readers:         {elapsed:6.2f}s ({before / elapsed:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
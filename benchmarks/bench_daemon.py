@@ -0,0 +1,69 @@
+"""
+Benchmark for the daemon's end-to-end command latency.
+
+Starts a daemon on a temporary socket and times ``gith-ub ask`` as a git
+hook would run it, in a fresh interpreter, with and without the daemon,
+as well as a bare request round trip over the socket and the start-up of
+an interpreter that does nothing, which no client can go below.
+
+Usage:
+    python -m benchmarks.bench_daemon [runs]
+"""
+
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+from src.client import DISABLE_ENV_VAR, SOCKET_ENV_VAR, build_request, send_request
+from src.daemon import DaemonServer
+
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def time_command(runs: int, env: dict, arguments: list) -> float:
+    """The median wall-clock time of a fresh interpreter, in ms."""
+    timings = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        subprocess.run([sys.executable] + arguments, cwd=PROJECT_ROOT, env=env,
+                       stdout=subprocess.DEVNULL, check=True)
+        timings.append((time.perf_counter() - started) * 1000)
+    return statistics.median(timings)
+
+
+def main() -> None:
+    runs = int(sys.argv[1]) if len(sys.argv) > 1 else 20
+
+    with tempfile.TemporaryDirectory() as directory:
+        socket_path = os.path.join(directory, "gith-ub.sock")
+        server = DaemonServer(socket_path)
+        thread = threading.Thread(target=server.serve_forever, daemon=True)
+        thread.start()
+        try:
+            request = build_request(["ask", "Why?"])
+            timings = []
+            for _ in range(runs * 10):
+                started = time.perf_counter()
+                send_request(request, socket_path)
+                timings.append((time.perf_counter() - started) * 1000)
+            print(f"socket round trip:          {statistics.median(timings):6.1f} ms")
+
+            env = dict(os.environ, **{SOCKET_ENV_VAR: socket_path})
+            env.pop(DISABLE_ENV_VAR, None)
+            ask = ["-m", "src.client", "ask", "Why?"]
+            print(f"empty interpreter:          {time_command(runs, env, ['-c', 'pass']):6.1f} ms")
+            print(f"gith-ub ask with daemon:    {time_command(runs, env, ask):6.1f} ms")
+            env[DISABLE_ENV_VAR] = "1"
+            print(f"gith-ub ask without daemon: {time_command(runs, env, ask):6.1f} ms")
+        finally:
+            server.shutdown()
+            server.server_close()
+
+
+if __name__ == "__main__":
+    main()
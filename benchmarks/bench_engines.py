@@ -0,0 +1,51 @@
+"""
+Benchmark for the analysis engines.
+
+Compares the line scanner with the tokenize engine on the package's own
+source and on a string-heavy file, whose long docstrings mention every
+construct the line scanner looks for.
+
+Usage:
+    python -m benchmarks.bench_engines [copies]
+"""
+
+import glob
+import os
+import sys
+import time
+
+from src.existential_coder import AnalysisEngine, ExistentialCoder
+
+
+DOCSTRING = "if the user = wants to def ine it, for a while, except when we raise it"
+
+
+def string_heavy(functions: int, docstring_lines: int = 40) -> str:
+    """Functions whose docstrings dwarf their code."""
+    docstring = "\n".join(f"    {DOCSTRING}" for _ in range(docstring_lines))
+    return "".join(f'def step_{i}(x):\n    """\n{docstring}\n    """\n    return x\n\n' for i in range(functions))
+
+
+def measure(label: str, code: str) -> None:
+    lines = code.count("\n") + 1
+    for engine in AnalysisEngine:
+        coder = ExistentialCoder(engine=engine)
+        best = float("inf")
+        for _ in range(3):
+            started = time.perf_counter()
+            insights = coder.analyze_code(code)
+            best = min(best, time.perf_counter() - started)
+        print(f"{label} ({lines} lines), {engine.value:>6}: {best * 1000:7.1f} ms, {len(insights)} insights")
+
+
+def main() -> None:
+    copies = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+
+    sources = sorted(glob.glob(os.path.join(os.path.dirname(__file__), "..", "src", "*.py")))
+    package = "\n".join(open(path).read() for path in sources)
+    measure("package source", package * copies)
+    measure("string-heavy  ", string_heavy(60 * copies))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,58 @@
+"""
+Benchmark for the language server's incremental document sync.
+
+Opens a large document built from this repository's own source, then
+reports the latency from a one-line edit to encoded diagnostics.
+
+Usage:
+    python -m benchmarks.bench_lsp [lines] [edits]
+"""
+
+import io
+import random
+import sys
+import time
+from pathlib import Path
+
+from src.existential_coder import ExistentialCoder
+from src.lsp import TextDocument, _write_body
+
+
+def synthetic_source(lines: int) -> str:
+    """Repeat the package's source files until the document is long enough."""
+    source = []
+    for path in sorted(Path(__file__).resolve().parent.parent.joinpath("src").glob("*.py")):
+        source.extend(path.read_text(encoding="utf-8").split("\n"))
+    return "\n".join((source * (lines // len(source) + 1))[:lines])
+
+
+def main() -> None:
+    line_count = int(sys.argv[1]) if len(sys.argv) > 1 else 20_000
+    edit_count = int(sys.argv[2]) if len(sys.argv) > 2 else 200
+
+    coder = ExistentialCoder()
+    document = TextDocument("file:///bench.py", synthetic_source(line_count))
+    started = time.perf_counter()
+    document.analyze(coder)
+    print(f"opened {line_count} lines in {(time.perf_counter() - started) * 1000:.1f} ms")
+
+    rng = random.Random(7)
+    latencies = []
+    for _ in range(edit_count):
+        line = rng.randrange(len(document.lines))
+        edit = {"range": {"start": {"line": line, "character": 0}, "end": {"line": line, "character": 0}},
+                "text": rng.choice(["x = 1\n", "for i in items: ", "if ready:\n    "])}
+        started = time.perf_counter()
+        document.apply_change(edit)
+        document.analyze(coder)
+        _write_body(io.BytesIO(), document.diagnostics_json())
+        latencies.append(time.perf_counter() - started)
+
+    latencies.sort()
+    print(f"edit to diagnostics: median {latencies[len(latencies) // 2] * 1000:.1f} ms, "
+          f"p99 {latencies[int(len(latencies) * 0.99)] * 1000:.1f} ms "
+          f"({len(document.diagnostics_json())} bytes)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+"""
+Benchmark for the TF-IDF relevance engine.
+
+Builds a synthetic corpus from the shipped wisdom vocabulary and reports the
+cold start of a corpus section, built and loaded from the persisted matrix,
+and the per-question latency of single and batched scoring.
+
+Usage:
+    python -m benchmarks.bench_relevance [entries] [questions]
+"""
+
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+
+from src.corpus import Corpus, load_corpus
+from src.relevance import SectionRelevance
+from src.search_index import tokenize
+
+
+def synthetic_corpus(size: int, seed: int = 42) -> list:
+    """Recombine the words of the Oracle's prophecies into a large corpus."""
+    corpus = load_corpus("oracle")
+    words = []
+    for category in corpus.categories("prophecies"):
+        for prophecy in corpus.entries("prophecies", category):
+            words.extend(tokenize(prophecy))
+
+    rng = random.Random(seed)
+    return [" ".join(rng.choices(words, k=rng.randint(8, 20))) for _ in range(size)]
+
+
+def main() -> None:
+    entries = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    question_count = int(sys.argv[2]) if len(sys.argv) > 2 else 1_000
+
+    documents = synthetic_corpus(entries)
+    with tempfile.TemporaryDirectory() as directory:
+        with open(os.path.join(directory, "synthetic.json"), "w", encoding="utf-8") as f:
+            json.dump({"wisdom": {"all": documents}}, f)
+
+        def cold_start() -> SectionRelevance:
+            corpus = Corpus("synthetic", search_path=[directory], cache_dir=os.path.join(directory, "cache"))
+            return SectionRelevance(corpus.section("wisdom"), name="synthetic.wisdom")
+
+        started = time.perf_counter()
+        cold_start()
+        print(f"built {entries} entries in {time.perf_counter() - started:.2f}s")
+
+        started = time.perf_counter()
+        engine = cold_start().engine
+        print(f"loaded {entries} entries from the matrix cache in {time.perf_counter() - started:.2f}s")
+
+    rng = random.Random(7)
+    questions = [" ".join(rng.sample(tokenize(rng.choice(documents)), 4)) for _ in range(question_count)]
+
+    started = time.perf_counter()
+    for question in questions:
+        engine.top_k(question, 5)
+    single = (time.perf_counter() - started) / question_count
+    print(f"top_k:       {single * 1000:.3f} ms per question")
+
+    started = time.perf_counter()
+    engine.top_k_batch(questions, 5)
+    batch = (time.perf_counter() - started) / question_count
+    print(f"top_k_batch: {batch * 1000:.3f} ms per question")
+
+
+if __name__ == "__main__":
+    main()
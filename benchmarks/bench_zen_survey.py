@@ -0,0 +1,92 @@
+"""
+Benchmark for bulk zen-level assessment.
+
+Builds a synthetic team-wide survey from the Oracle's vocabulary and
+compares the original per-user loop, which tested every indicator with a
+generator, with assessing each user in turn and with assessing the whole
+survey at once, with and without NumPy.
+
+Usage:
+    python -m benchmarks.bench_zen_survey [users] [responses-per-user]
+"""
+
+import random
+import sys
+import time
+
+import src.zen_master
+from src.corpus import load_corpus
+from src.search_index import tokenize
+from src.zen_master import ZEN_INDICATORS, ZenMaster, zen_level_for_score
+
+
+# Filler words, so indicators are as sparse as in real answers
+COMMON_WORDS = "the a and to of i it is we was that my code team".split()
+
+
+def assess_as_before(responses: list) -> int:
+    """The per-user loop that ``assess_zen_level`` used to run."""
+    score = 0
+    for response in responses:
+        response_lower = response.lower()
+        for category, indicators in ZEN_INDICATORS.items():
+            if any(indicator in response_lower for indicator in indicators):
+                score += 1
+    return score
+
+
+def synthetic_survey(users: int, responses: int, seed: int = 42) -> list:
+    """Answer every question with words from the Oracle's prophecies."""
+    corpus = load_corpus("oracle")
+    words = []
+    for category in corpus.categories("prophecies"):
+        for prophecy in corpus.entries("prophecies", category):
+            words.extend(tokenize(prophecy))
+    words += COMMON_WORDS * 30
+
+    rng = random.Random(seed)
+    return [
+        [" ".join(rng.choices(words, k=rng.randint(5, 40))).capitalize() for _ in range(responses)]
+        for _ in range(users)
+    ]
+
+
+def main() -> None:
+    users = int(sys.argv[1]) if len(sys.argv) > 1 else 30_000
+    responses = int(sys.argv[2]) if len(sys.argv) > 2 else 10
+
+    response_sets = synthetic_survey(users, responses)
+    master = ZenMaster()
+
+    started = time.perf_counter()
+    levels = [zen_level_for_score(assess_as_before(answers)) for answers in response_sets]
+    before = time.perf_counter() - started
+    print(f"original per-user loop:    {before:.2f}s")
+
+    started = time.perf_counter()
+    assert [master.assess_zen_level(answers) for answers in response_sets] == levels
+    single = time.perf_counter() - started
+    print(f"assess_zen_level per user: {single:.2f}s ({before / single:.1f}x)")
+
+    started = time.perf_counter()
+    survey = master.assess_zen_levels(response_sets)
+    batch = time.perf_counter() - started
+    assert survey.levels == levels
+    print(f"assess_zen_levels:         {batch:.2f}s ({before / batch:.1f}x)")
+
+    load_numpy = src.zen_master.load_numpy
+    src.zen_master.load_numpy = lambda: None
+    try:
+        started = time.perf_counter()
+        master.assess_zen_levels(response_sets)
+        elapsed = time.perf_counter() - started
+        print(f"  without NumPy:           {elapsed:.2f}s ({before / elapsed:.1f}x)")
+    finally:
+        src.zen_master.load_numpy = load_numpy
+
+    for level, count in survey.distribution().items():
+        print(f"{level.value:>12}: {count}")
+
+
+if __name__ == "__main__":
+    main()
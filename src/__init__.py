@@ -7,15 +7,25 @@ A Python package that provides philosophical guidance and existential wisdom
 for developers seeking deeper meaning in their code.
 """
 
+import importlib
+
 __version__ = "0.1.0"
 __author__ = "The Digital Sages"
 __email__ = "wisdom@gith-ub.dev"
 
-from .existential_coder import ExistentialCoder
-from .philosopher_agent import PhilosopherAgent
-from .zen_master import ZenMaster
-from .oracle import Oracle
-from .utils import contemplate_code, find_meaning_in_bugs
+# Public names and the modules they live in. Modules are imported on first
+# attribute access so that entry points only pay for what they use.
+_LAZY_ATTRIBUTES: dict[str, str] = {
+    "ExistentialCoder": ".existential_coder",
+    "PhilosopherAgent": ".philosopher_agent",
+    "ZenMaster": ".zen_master",
+    "Oracle": ".oracle",
+    "contemplate_code": ".utils",
+    "find_meaning_in_bugs": ".utils",
+    "search": ".search_index",
+    "generate": ".generator",
+    "ActivityTracker": ".activity",
+}
 
 __all__ = [
     "ExistentialCoder",
@@ -24,4 +34,22 @@ __all__ = [
     "Oracle",
     "contemplate_code",
     "find_meaning_in_bugs",
-]
\ No newline at end of file
+    "search",
+    "generate",
+    "ActivityTracker",
+]
+
+
+def __getattr__(name: str) -> object:
+    """Import public attributes lazily, on first use."""
+    module_name = _LAZY_ATTRIBUTES.get(name)
+    if module_name is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    
+    value = getattr(importlib.import_module(module_name, __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__() -> list[str]:
+    return sorted(set(globals()) | set(__all__))
@@ -0,0 +1,279 @@
+"""
+The Activity Tracker - Noticing when a developer needs to breathe.
+
+This module follows the edits and keystrokes of many developer sessions at
+once and suggests a meditation break from the Zen Master when the recent
+past has been too intense: too many functions, loops or conditions added,
+or edits arriving too quickly.
+
+Each session keeps its counts over a sliding window split into a ring of
+fixed-width buckets. Recording an event adds to the current bucket and to
+running totals; buckets that slide out of the window are subtracted from
+the totals as time moves on. An update therefore costs the same however
+busy the session has been, and reading the window's totals is free.
+Sessions are spread over independently locked shards, so thousands of
+them can be recorded from many threads in one process.
+"""
+
+import threading
+import time
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Optional, Tuple
+
+from .utils import CONDITION_PATTERN, FUNCTION_PATTERN, LOOP_PATTERN, suggest_meditation_break
+from .zen_master import ZenMaster
+
+
+DEFAULT_WINDOW = 300.0
+DEFAULT_BUCKETS = 30
+DEFAULT_COOLDOWN = 600.0
+DEFAULT_SHARDS = 64
+BREAK_MINUTES = 5
+
+# The order of the counts kept in every bucket
+METRICS = ("edits", "keystrokes", "functions", "loops", "conditions")
+_EDITS, _KEYSTROKES, _FUNCTIONS, _LOOPS, _CONDITIONS = range(len(METRICS))
+
+FRANTIC_SUGGESTION = ("Your edits are arriving faster than thoughts can settle. "
+                      "Step away for a moment; the code will still be here.")
+
+
+@dataclass
+class ActivityThresholds:
+    """How much activity within the window calls for a break."""
+    functions: int = 10
+    loops: int = 5
+    conditions: int = 8
+    edits_per_minute: float = 60.0
+
+
+@dataclass
+class ActivitySnapshot:
+    """The counts of one session over the window."""
+    edits: int
+    keystrokes: int
+    functions: int
+    loops: int
+    conditions: int
+    window: float
+
+    @property
+    def edits_per_minute(self) -> float:
+        """The edit rate averaged over the window."""
+        return self.edits * 60.0 / self.window
+
+    @property
+    def keystrokes_per_minute(self) -> float:
+        """The typing rate averaged over the window."""
+        return self.keystrokes * 60.0 / self.window
+
+
+@dataclass
+class MeditationBreak:
+    """A break suggested to one session."""
+    session: str
+    reason: str
+    suggestion: str
+    guidance: str
+    snapshot: ActivitySnapshot
+
+
+class _Window:
+    """The bucket ring and running totals of one session."""
+
+    __slots__ = ("buckets", "totals", "tick", "last_break")
+
+    def __init__(self, bucket_count: int, tick: int):
+        self.buckets = [0] * (bucket_count * len(METRICS))
+        self.totals = [0] * len(METRICS)
+        self.tick = tick
+        self.last_break: Optional[float] = None
+
+    def advance(self, tick: int, bucket_count: int) -> None:
+        """Slide the window forward, dropping the buckets that fall out of it."""
+        if tick <= self.tick:
+            return
+        width = len(METRICS)
+        if tick - self.tick >= bucket_count:
+            self.buckets = [0] * (bucket_count * width)
+            self.totals = [0] * width
+        else:
+            buckets, totals = self.buckets, self.totals
+            for expired in range(self.tick + 1, tick + 1):
+                start = (expired % bucket_count) * width
+                for metric in range(width):
+                    totals[metric] -= buckets[start + metric]
+                    buckets[start + metric] = 0
+        self.tick = tick
+
+    def add(self, values: Tuple[int, ...], bucket_count: int) -> None:
+        start = (self.tick % bucket_count) * len(METRICS)
+        buckets, totals = self.buckets, self.totals
+        for metric, value in enumerate(values):
+            if value:
+                buckets[start + metric] += value
+                totals[metric] += value
+
+
+class ActivityTracker:
+    """
+    Sliding-window activity counts for many sessions, with break suggestions.
+
+    A session suggests at most one break per cooldown period, and only
+    while a threshold is exceeded.
+    """
+
+    def __init__(self, window: float = DEFAULT_WINDOW, buckets: int = DEFAULT_BUCKETS,
+                 thresholds: Optional[ActivityThresholds] = None, cooldown: float = DEFAULT_COOLDOWN,
+                 zen_master: Optional[ZenMaster] = None, clock: Callable[[], float] = time.monotonic,
+                 shards: int = DEFAULT_SHARDS):
+        """
+        Prepare a tracker.
+
+        Args:
+            window: The length of the sliding window, in seconds
+            buckets: How many buckets the window is divided into
+            thresholds: When to suggest a break
+            cooldown: The least time between two breaks of a session, in seconds
+            zen_master: Guides the breaks; created on the first break if not given
+            clock: The source of the current time, in seconds
+            shards: How many independently locked groups sessions are spread over
+
+        Raises:
+            ValueError: If the window or bucket count is not positive
+        """
+        if window <= 0 or buckets <= 0:
+            raise ValueError("window and buckets must be positive")
+        self.window = window
+        self.bucket_count = buckets
+        self.bucket_width = window / buckets
+        self.thresholds = thresholds or ActivityThresholds()
+        self.cooldown = cooldown
+        self.clock = clock
+        self._zen_master = zen_master
+        self._shards: List[Tuple[threading.Lock, Dict[str, _Window]]] = [
+            (threading.Lock(), {}) for _ in range(shards)
+        ]
+
+    def __len__(self) -> int:
+        """The number of sessions being tracked."""
+        return sum(len(sessions) for _, sessions in self._shards)
+
+    def _shard(self, session: str) -> Tuple[threading.Lock, Dict[str, _Window]]:
+        return self._shards[hash(session) % len(self._shards)]
+
+    def record_edit(self, session: str, added: str = "", keystrokes: int = 0) -> Optional[MeditationBreak]:
+        """
+        Record an edit.
+
+        Args:
+            session: Identifies the developer session
+            added: The code the edit added
+            keystrokes: Keystrokes the edit took, if known
+
+        Returns:
+            A suggested break, if this edit pushed the session over a threshold
+        """
+        values = (
+            1,
+            keystrokes,
+            len(FUNCTION_PATTERN.findall(added)) if added else 0,
+            len(LOOP_PATTERN.findall(added)) if added else 0,
+            len(CONDITION_PATTERN.findall(added)) if added else 0,
+        )
+        return self._record(session, values)
+
+    def record_keystrokes(self, session: str, count: int = 1) -> Optional[MeditationBreak]:
+        """
+        Record keystrokes that are not part of a recorded edit.
+
+        Args:
+            session: Identifies the developer session
+            count: How many keystrokes
+
+        Returns:
+            A suggested break, if these keystrokes pushed the session over a threshold
+        """
+        return self._record(session, (0, count, 0, 0, 0))
+
+    def _record(self, session: str, values: Tuple[int, ...]) -> Optional[MeditationBreak]:
+        now = self.clock()
+        tick = int(now / self.bucket_width)
+        lock, sessions = self._shard(session)
+        with lock:
+            state = sessions.get(session)
+            if state is None:
+                state = sessions[session] = _Window(self.bucket_count, tick)
+            else:
+                state.advance(tick, self.bucket_count)
+            state.add(values, self.bucket_count)
+
+            if state.last_break is not None and now - state.last_break < self.cooldown:
+                return None
+            reason = self._reason(state.totals)
+            if reason is None:
+                return None
+            state.last_break = now
+            snapshot = ActivitySnapshot(*state.totals, window=self.window)
+
+        # Guidance is composed outside the lock; it does not touch session state
+        return self._suggest_break(session, reason, snapshot)
+
+    def _reason(self, totals: List[int]) -> Optional[str]:
+        """Name the threshold that is exceeded, in the precedence of ``analyze_code_complexity``."""
+        thresholds = self.thresholds
+        if totals[_FUNCTIONS] > thresholds.functions:
+            return "complex"
+        if totals[_LOOPS] > thresholds.loops:
+            return "cyclical"
+        if totals[_CONDITIONS] > thresholds.conditions:
+            return "conditional"
+        if totals[_EDITS] * 60.0 / self.window > thresholds.edits_per_minute:
+            return "frantic"
+        return None
+
+    def _suggest_break(self, session: str, reason: str, snapshot: ActivitySnapshot) -> MeditationBreak:
+        if self._zen_master is None:
+            self._zen_master = ZenMaster()
+        suggestion = suggest_meditation_break({"complexity_level": reason}) or FRANTIC_SUGGESTION
+        return MeditationBreak(session, reason, suggestion,
+                               self._zen_master.guide_meditation(BREAK_MINUTES), snapshot)
+
+    def snapshot(self, session: str) -> Optional[ActivitySnapshot]:
+        """
+        Read a session's counts over the window ending now.
+
+        Args:
+            session: Identifies the developer session
+
+        Returns:
+            The counts, or None for a session that has never been recorded
+        """
+        tick = int(self.clock() / self.bucket_width)
+        lock, sessions = self._shard(session)
+        with lock:
+            state = sessions.get(session)
+            if state is None:
+                return None
+            state.advance(tick, self.bucket_count)
+            return ActivitySnapshot(*state.totals, window=self.window)
+
+    def prune(self) -> int:
+        """
+        Forget sessions with no activity left in the window.
+
+        Returns:
+            How many sessions were forgotten
+        """
+        now = self.clock()
+        tick = int(now / self.bucket_width)
+        forgotten = 0
+        for lock, sessions in self._shards:
+            with lock:
+                idle = [session for session, state in sessions.items()
+                        if tick - state.tick >= self.bucket_count
+                        and (state.last_break is None or now - state.last_break >= self.cooldown)]
+                for session in idle:
+                    del sessions[session]
+                forgotten += len(idle)
+        return forgotten
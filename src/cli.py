@@ -4,23 +4,50 @@ Command Line Interface for G.I.T.H.U.B.
 The gateway to existential coding wisdom through the terminal.
 """
 
+from __future__ import annotations
+
+from typing import TYPE_CHECKING, Any, List, Optional
+
 import click
-from rich.console import Console
-from rich.panel import Panel
-from rich.text import Text
-from rich.prompt import Prompt
-from .existential_coder import ExistentialCoder, ContemplationLevel
-from .philosopher_agent import PhilosopherAgent
-from .zen_master import ZenMaster
-from .oracle import Oracle
 
+from .client import ANALYZE_MAX_INSIGHTS, ANALYZE_TIMEOUT
+
+if TYPE_CHECKING:
+    from rich.console import Console
+    from .bugs import BugReport
+    from .existential_coder import CodeInsight, ExistentialCoder
+    from .search_index import SearchResult
+
+
+class _LazyConsole:
+    """A stand-in for rich's Console that only imports rich when first used."""
+    
+    def __init__(self) -> None:
+        self._console: Optional[Console] = None
+    
+    def __getattr__(self, name: str) -> Any:
+        if self._console is None:
+            from rich.console import Console
+            self._console = Console()
+        return getattr(self._console, name)
+
+
+# Subcommands import rich and the agents they need on demand, so that hook
+# invocations and ``--version`` never pay for modules they do not use.
+console = _LazyConsole()
+
+
+# Subcommands that run inside git, an editor or a pipeline and must stay terse
+QUIET_COMMANDS = {"hook", "lsp", "bugs", "rename-suggest", "history", "coordinator", "worker"}
 
-console = Console()
+# Subcommands that decide for themselves whether to welcome, by their options
+OWN_WELCOME_COMMANDS = {"commit"}
 
 
 @click.group()
 @click.version_option(version="0.1.0", prog_name="gith-ub")
-def cli():
+@click.pass_context
+def cli(ctx):
     """
     G.I.T.H.U.B. - The Existential Code Companion
     
@@ -29,14 +56,111 @@ def cli():
     A tool that provides philosophical guidance and existential wisdom
     for developers seeking deeper meaning in their code.
     """
-    # Display the welcome message
+    if ctx.invoked_subcommand not in QUIET_COMMANDS and ctx.invoked_subcommand not in OWN_WELCOME_COMMANDS:
+        render_welcome(console)
+
+
+def render_welcome(out: Console) -> None:
+    """Display the welcome message."""
+    from rich.panel import Panel
+    from rich.text import Text
+    
     welcome_text = Text()
     welcome_text.append("Welcome to G.I.T.H.U.B.\n", style="bold blue")
     welcome_text.append("The Existential Code Companion\n\n", style="italic")
     welcome_text.append("Generally Introspective Text Handler for Unrealized Brilliance\n\n", style="dim")
     welcome_text.append("In the digital realm, we are not alone...", style="italic green")
     
-    console.print(Panel(welcome_text, title="🧘 Digital Enlightenment Awaits", border_style="blue"))
+    out.print(Panel(welcome_text, title="🧘 Digital Enlightenment Awaits", border_style="blue"))
+
+
+def render_insights(out: Console, file_path: str, level: str, insights: List[CodeInsight]) -> None:
+    """Display the philosophical insights found in a file."""
+    from rich.panel import Panel
+    
+    out.print(f"\n[bold green]Analyzing {file_path}...[/bold green]")
+    out.print(f"[dim]Contemplation Level: {level}[/dim]\n")
+    
+    for insight in insights:
+        if insight.line_number:
+            out.print(f"[yellow]Line {insight.line_number}:[/yellow]")
+        
+        out.print(Panel(
+            f"[bold]{insight.question}[/bold]\n\n[italic]{insight.wisdom}[/italic]",
+            title="🤔 Philosophical Insight",
+            border_style="yellow"
+        ))
+        out.print()
+
+
+def contemplate_file(out: Console, coder: ExistentialCoder, file_path: str, level: str,
+                     max_insights: int = ANALYZE_MAX_INSIGHTS, timeout: float = ANALYZE_TIMEOUT,
+                     force: bool = False, source_path: Optional[str] = None) -> Optional[str]:
+    """
+    Read a file, analyze it within a time budget and display what was found.
+    
+    The CLI and the daemon both analyze through here, so that they skip,
+    sample and time out in the same way.
+    
+    Args:
+        out: Where to display the insights
+        coder: The coder to analyze with
+        file_path: The file, as the user named it
+        level: The contemplation level, for display
+        max_insights: Show at most this many insights
+        timeout: Seconds to contemplate before showing what was found
+        force: Analyze the file even if it does not look like source code
+        source_path: Where to read the file from, if not ``file_path``
+        
+    Returns:
+        Why the file was skipped, or None if it was analyzed
+    """
+    import time
+    from .scan import read_source
+    
+    if force:
+        with open(source_path or file_path, 'r') as f:
+            code = f.read()
+    else:
+        code, skipped = read_source(source_path or file_path)
+        if code is None:
+            out.print(f"[yellow]Skipping {file_path}: it looks {skipped}. "
+                      f"Use --force to contemplate it anyway.[/yellow]")
+            return skipped
+    
+    insights = coder.analyze_code(code, file_path, max_insights, time.monotonic() + timeout)
+    
+    render_insights(out, file_path, level, insights)
+    if not insights.complete:
+        out.print(f"[dim]Contemplated {insights.lines_analyzed} of {insights.total_lines} lines "
+                  f"before the {timeout:g}s timeout.[/dim]")
+    if insights.sampled:
+        out.print(f"[dim]Showing a sample of {max_insights} of {insights.insights_found} insights.[/dim]")
+    return None
+
+
+def render_commit_message(out: Console, message: str) -> None:
+    """Display a generated commit message."""
+    from rich.panel import Panel
+    
+    out.print(Panel(
+        message,
+        title="💭 Your Existential Commit Message",
+        border_style="green"
+    ))
+
+
+def render_oracle_response(out: Console, question: str, response: str) -> None:
+    """Display the Oracle's response to a question."""
+    from rich.panel import Panel
+    
+    out.print(f"[dim]Asking the Oracle: {question}[/dim]\n")
+    
+    out.print(Panel(
+        response,
+        title="🔮 Oracle's Response",
+        border_style="magenta"
+    ))
 
 
 @cli.command()
@@ -45,54 +169,99 @@ def cli():
               type=click.Choice(['surface', 'deep', 'cosmic'], case_sensitive=False),
               default='deep',
               help='Level of existential contemplation')
-def analyze(file_path, level):
+@click.option('--engine',
+              type=click.Choice(['lines', 'tokens'], case_sensitive=False),
+              default='lines', show_default=True,
+              help='Read raw lines, or tokens so that strings and comments are ignored')
+@click.option('--max-insights', '-n', default=ANALYZE_MAX_INSIGHTS, show_default=True, type=click.IntRange(1),
+              help='Show at most this many insights, sampled evenly across the file')
+@click.option('--timeout', default=ANALYZE_TIMEOUT, show_default=True, type=click.FloatRange(0),
+              help='Seconds to contemplate before showing what was found')
+@click.option('--force', is_flag=True,
+              help='Analyze the file even if it looks binary, minified, generated or oversized')
+def analyze(file_path, level, engine, max_insights, timeout, force):
     """Analyze a file for existential meaning and philosophical insights."""
+    from .existential_coder import AnalysisEngine, ExistentialCoder, ContemplationLevel
+    
     try:
-        with open(file_path, 'r') as f:
-            code = f.read()
-        
         contemplation_level = ContemplationLevel(level)
-        coder = ExistentialCoder(contemplation_level)
-        insights = coder.analyze_code(code, file_path)
+        coder = ExistentialCoder(contemplation_level, AnalysisEngine(engine.lower()))
+        contemplate_file(console, coder, file_path, level, max_insights, timeout, force)
         
-        console.print(f"\n[bold green]Analyzing {file_path}...[/bold green]")
-        console.print(f"[dim]Contemplation Level: {level}[/dim]\n")
-        
-        for insight in insights:
-            if insight.line_number:
-                console.print(f"[yellow]Line {insight.line_number}:[/yellow]")
-            
-            console.print(Panel(
-                f"[bold]{insight.question}[/bold]\n\n[italic]{insight.wisdom}[/italic]",
-                title="🤔 Philosophical Insight",
-                border_style="yellow"
-            ))
-            console.print()
-            
     except Exception as e:
         console.print(f"[red]Error analyzing file: {e}[/red]")
 
 
 @cli.command()
 @click.argument('changes', nargs=-1)
-def commit(changes):
+@click.option('--from-log', 'log_range', default=None, metavar='RANGE',
+              help='Write one message for every commit in a git range, e.g. v1.0..main')
+@click.option('--staged', is_flag=True, help='Describe the changes staged with git add')
+@click.option('--timeout', default=2.0, show_default=True,
+              help='Seconds to spend reading the staged diff before deciding')
+def commit(changes, log_range, staged, timeout):
     """Generate a philosophical commit message based on your changes."""
+    from .existential_coder import ExistentialCoder
+    
+    # Messages written from a log are meant for a pipeline
+    if log_range:
+        _commit_from_log(log_range)
+        return
+    
+    render_welcome(console)
+    if staged:
+        _commit_from_staged(timeout)
+        return
+    
     if not changes:
         changes = ["Made some changes"]
     
     coder = ExistentialCoder()
     message = coder.generate_commit_message(list(changes))
     
-    console.print(Panel(
-        message,
-        title="💭 Your Existential Commit Message",
-        border_style="green"
-    ))
+    render_commit_message(console, message)
+
+
+def _commit_from_staged(timeout: float) -> None:
+    """Generate a commit message from the staged diff."""
+    from .diffstream import DiffError, summarize_staged
+    from .existential_coder import ExistentialCoder
+    
+    try:
+        summary = summarize_staged(".", timeout)
+    except DiffError as e:
+        console.print(f"[red]Error reading staged changes: {e}[/red]")
+        return
+    
+    console.print(f"[dim]Staged: {summary.describe()}[/dim]")
+    render_commit_message(console, ExistentialCoder().commit_message_for(summary.classify()))
+
+
+def _commit_from_log(log_range: str) -> None:
+    """Write a generated message for every commit in a range, one per line."""
+    import itertools
+    import sys
+    from .existential_coder import ExistentialCoder
+    from .history import HistoryError, iter_commit_messages
+    
+    # The two copies are consumed in lockstep, so tee buffers a single commit
+    commits, originals = itertools.tee(iter_commit_messages(".", log_range))
+    generated = ExistentialCoder().generate_commit_messages(message for _, message in originals)
+    write = sys.stdout.write
+    try:
+        for (sha, _), message in zip(commits, generated):
+            write(f"{sha} {message}\n")
+    except HistoryError as e:
+        click.echo(f"Error reading history: {e}", err=True)
 
 
 @cli.command()
 def meditate():
     """Enter a meditative state for coding contemplation."""
+    from rich.panel import Panel
+    from rich.prompt import Prompt
+    from .zen_master import ZenMaster
+    
     zen_master = ZenMaster()
     
     console.print(Panel(
@@ -119,22 +288,21 @@ def meditate():
 @click.argument('question')
 def ask(question):
     """Ask the Oracle a philosophical question about your code."""
-    oracle = Oracle()
-    
-    console.print(f"[dim]Asking the Oracle: {question}[/dim]\n")
+    from .oracle import Oracle
     
+    oracle = Oracle()
     response = oracle.consult(question)
     
-    console.print(Panel(
-        response,
-        title="🔮 Oracle's Response",
-        border_style="magenta"
-    ))
+    render_oracle_response(console, question, response)
 
 
 @cli.command()
 def philosopher():
     """Start an interactive philosophical dialogue about your code."""
+    from rich.panel import Panel
+    from rich.prompt import Prompt
+    from .philosopher_agent import PhilosopherAgent
+    
     philosopher = PhilosopherAgent()
     
     console.print(Panel(
@@ -161,6 +329,419 @@ def philosopher():
         ))
 
 
+def render_search_results(out: Console, query: str, results: List[SearchResult]) -> None:
+    """Display the corpus entries that matched a search."""
+    from rich.table import Table
+    
+    if not results:
+        out.print(f"[dim]The corpora are silent on '{query}'.[/dim]")
+        return
+    
+    table = Table(title=f"🔎 Wisdom matching '{query}'", border_style="cyan")
+    table.add_column("Score", justify="right", style="dim")
+    table.add_column("Source", style="cyan")
+    table.add_column("Wisdom")
+    for result in results:
+        source = f"{result.source} ({result.category})" if result.category else result.source
+        table.add_row(f"{result.score:.2f}", source, result.text)
+    out.print(table)
+
+
+@cli.command()
+@click.argument('terms', nargs=-1, required=True)
+@click.option('--limit', '-n', default=10, show_default=True, help='Maximum number of results')
+def search(terms, limit):
+    """Search every corpus of wisdom at once."""
+    from .search_index import search as search_corpora
+    
+    query = " ".join(terms)
+    render_search_results(console, query, search_corpora(query, limit))
+
+
+def render_generated(out: Console, kind: str, sentences: List[str]) -> None:
+    """Display freshly generated sentences."""
+    from rich.panel import Panel
+    
+    out.print(Panel(
+        "\n\n".join(sentences),
+        title=f"✨ Newly Born {kind.capitalize()}",
+        border_style="magenta"
+    ))
+
+
+@cli.command()
+@click.argument('kind', default='wisdom',
+                type=click.Choice(['wisdom', 'prophecy', 'question', 'commit'], case_sensitive=False))
+@click.option('--count', '-n', default=1, show_default=True, help='How many sentences to generate')
+@click.option('--order', default=2, show_default=True, type=click.IntRange(1, 3),
+              help='How many previous words each choice depends on')
+@click.option('--prefix', default='', help='Words every sentence must start with')
+@click.option('--train', 'train_files', multiple=True, type=click.Path(exists=True, dir_okay=False),
+              help='A text file of extra sentences to learn from, one per line')
+def generate(kind, count, order, prefix, train_files):
+    """Generate new wisdom offline from the corpora."""
+    from .generator import load_generator, read_sentences
+    
+    extra_text = [sentence for path in train_files for sentence in read_sentences(path)]
+    model = load_generator(kind.lower(), order, extra_text)
+    render_generated(console, kind.lower(), model.sample(count, prefix=prefix))
+
+
+@cli.command()
+@click.argument('repo', default='.', type=click.Path(exists=True, file_okay=False))
+@click.option('--rev', default='HEAD', show_default=True, help='The revision or range to scan')
+@click.option('--first-parent', is_flag=True, help='Follow only the first parent of merges')
+@click.option('--extension', '-e', 'extensions', multiple=True, default=['.py'], show_default=True,
+              help='File extensions to measure')
+@click.option('--format', 'output_format', type=click.Choice(['csv', 'jsonl']), default='csv',
+              show_default=True, help='How to write the time series')
+@click.option('--output', '-o', type=click.File('w'), default='-', help='Where to write the time series')
+def history(repo, rev, first_parent, extensions, output_format, output):
+    """Measure the karma and complexity of every commit in a repository."""
+    import csv
+    import dataclasses
+    import json
+    from .history import HistoryError, HistoryPoint, HistoryScanner
+    
+    scanner = HistoryScanner(repo, extensions)
+    columns = [field.name for field in dataclasses.fields(HistoryPoint)]
+    writer = csv.writer(output)
+    if output_format == 'csv':
+        writer.writerow(columns)
+    
+    commits = 0
+    try:
+        for point in scanner.scan(rev, first_parent):
+            if output_format == 'csv':
+                writer.writerow(dataclasses.astuple(point))
+            else:
+                output.write(json.dumps(dataclasses.asdict(point)) + "\n")
+            commits += 1
+    except HistoryError as e:
+        click.echo(f"Error reading history: {e}", err=True)
+    finally:
+        scanner.save()
+    
+    click.echo(f"Measured {commits} commits, analyzing {scanner.blobs_analyzed} new blobs.", err=True)
+
+
+def render_bug_report(out: Console, report: BugReport, exemplars: int, elapsed: float) -> None:
+    """Display the categories of error found in a log."""
+    from rich.panel import Panel
+    from rich.table import Table
+    from rich.text import Text
+    
+    megabytes = report.bytes_read / 1e6
+    out.print(f"[dim]Read {megabytes:.1f} MB, {report.lines} lines, {report.records} error records "
+              f"in {elapsed:.2f}s ({megabytes / max(elapsed, 1e-9):.0f} MB/s)[/dim]")
+    if not report.records:
+        out.print("[green]No errors found. The log is at peace.[/green]")
+        return
+    
+    table = Table(title="🐛 The Meaning of Your Bugs", border_style="red")
+    table.add_column("Errors", justify="right")
+    table.add_column("Kind", style="red")
+    table.add_column("Meaning")
+    categories = report.most_common()
+    for category in categories:
+        table.add_row(str(category.count), category.name, category.meaning)
+    out.print(table)
+    
+    for category in categories:
+        for exemplar in category.exemplars[:exemplars]:
+            # Log lines are shown verbatim, never read as markup
+            out.print(Panel(Text(exemplar), title=f"{category.name} ({category.count})", border_style="dim"))
+
+
+@cli.command()
+@click.argument('log', default='-', type=click.Path(allow_dash=True, dir_okay=False))
+@click.option('--exemplars', '-x', default=1, show_default=True, type=click.IntRange(0, 3),
+              help='Example records to show per kind of error')
+@click.option('--json', 'as_json', is_flag=True, help='Write the report as JSON')
+def bugs(log, exemplars, as_json):
+    """Find the meaning of every error in a log, plain or gzipped."""
+    import dataclasses
+    import json
+    import time
+    from .bugs import open_log, scan_log
+    
+    started = time.perf_counter()
+    try:
+        with open_log(log) as stream:
+            report = scan_log(stream)
+    except OSError as e:
+        console.print(f"[red]Error reading log: {e}[/red]")
+        raise SystemExit(1)
+    
+    if as_json:
+        click.echo(json.dumps(dataclasses.asdict(report), indent=2))
+    else:
+        render_bug_report(console, report, exemplars, time.perf_counter() - started)
+
+
+@cli.command('rename-suggest')
+@click.argument('paths', nargs=-1, type=click.Path(exists=True))
+@click.option('--extension', '-e', 'extensions', multiple=True, default=['.py'], show_default=True,
+              help='File extensions to read within directories')
+@click.option('--all', 'include_unmatched', is_flag=True,
+              help='Also suggest prefixed names for identifiers without a philosophical mapping')
+@click.option('--counts', is_flag=True, help='Include how often each identifier occurs')
+@click.option('--output', '-o', type=click.File('w'), default='-', help='Where to write the rename map')
+@click.option('--readers', default=8, show_default=True, type=click.IntRange(1),
+              help='Files to read at once; raise it on network file systems')
+def rename_suggest(paths, extensions, include_unmatched, counts, output, readers):
+    """Suggest philosophical names for every identifier in a codebase."""
+    import json
+    import time
+    from .rename import suggest_renames
+    
+    started = time.perf_counter()
+    suggestions = suggest_renames(paths or ['.'], extensions, include_unmatched, readers)
+    if counts:
+        rename_map = {s.name: {"suggestion": s.suggestion, "occurrences": s.occurrences} for s in suggestions}
+    else:
+        rename_map = {s.name: s.suggestion for s in suggestions}
+    output.write(json.dumps(rename_map, indent=2) + "\n")
+    click.echo(f"Suggested {len(suggestions)} renames in {time.perf_counter() - started:.2f}s.", err=True)
+
+
+@cli.group()
+def hook():
+    """Contemplate staged changes from a git pre-commit hook."""
+
+
+@hook.command('install')
+@click.option('--budget', default=200, show_default=True, help='Wall-clock budget in milliseconds')
+@click.option('--force', is_flag=True, help='Replace an existing pre-commit hook')
+def hook_install(budget, force):
+    """Install the pre-commit hook in the current repository."""
+    from .hook import HookError, install_hook
+    
+    try:
+        path = install_hook(".", budget, force)
+    except HookError as e:
+        console.print(f"[red]{e}[/red]")
+        raise SystemExit(1)
+    console.print(f"[green]Installed the pre-commit hook at {path}[/green]")
+
+
+@hook.command('uninstall')
+def hook_uninstall():
+    """Remove the pre-commit hook installed by gith-ub."""
+    from .hook import HookError, uninstall_hook
+    
+    try:
+        removed = uninstall_hook(".")
+    except HookError as e:
+        console.print(f"[red]{e}[/red]")
+        raise SystemExit(1)
+    console.print("[green]Removed the pre-commit hook[/green]" if removed else "[dim]No gith-ub hook was installed.[/dim]")
+
+
+@hook.command('run')
+@click.option('--budget', default=200, show_default=True, help='Wall-clock budget in milliseconds')
+def hook_run(budget):
+    """Contemplate the staged lines within the budget. Never fails the commit."""
+    from .diffstream import DiffError
+    from .hook import run_hook
+    
+    try:
+        report = run_hook(".", budget)
+    except DiffError as e:
+        console.print(f"[dim]gith-ub: could not read the staged changes: {e}[/dim]")
+        return
+    
+    for path, insight in report.insights:
+        console.print(f"[yellow]{path}:{insight.line_number}[/yellow] {insight.question}")
+    
+    console.print(f"[dim]gith-ub: {len(report.insights)} insights from {report.analyzed_lines} of "
+                  f"{report.staged_lines} staged lines in {report.elapsed_ms:.0f} ms[/dim]")
+    if report.sampled:
+        skipped = f"{report.skipped_lines} lines" if report.diff_complete else "the rest of the diff"
+        console.print(f"[dim]gith-ub: the {budget} ms budget ran out; sampled the change and skipped {skipped}"
+                      f"{f' and {len(report.skipped_files)} files' if report.skipped_files else ''}.[/dim]")
+
+
+@cli.command()
+@click.argument('directory', default='.', type=click.Path(exists=True, file_okay=False))
+@click.option('--debounce', default=0.3, show_default=True,
+              help='Seconds a file must be quiet before it is analyzed again')
+@click.option('--poll', is_flag=True, help='Poll for changes instead of using inotify')
+@click.option('--interval', default=1.0, show_default=True, help='Seconds between polls')
+@click.option('--extension', '-e', 'extensions', multiple=True, default=['.py'], show_default=True,
+              help='File extensions to analyze')
+@click.option('--level', '-l',
+              type=click.Choice(['surface', 'deep', 'cosmic'], case_sensitive=False),
+              default='deep', help='Level of existential contemplation')
+@click.option('--engine',
+              type=click.Choice(['lines', 'tokens'], case_sensitive=False),
+              default='lines', show_default=True,
+              help='Read raw lines, or tokens so that strings and comments are ignored')
+def watch(directory, debounce, poll, interval, extensions, level, engine):
+    """Contemplate files again whenever they are saved."""
+    import os
+    from .existential_coder import AnalysisEngine, ContemplationLevel
+    from .watch import InotifyWatcher, WatchSession, open_watcher, watch as watch_changes
+    
+    def report(result):
+        console.print(f"[yellow]{os.path.relpath(result.path, directory)}[/yellow] "
+                      f"{len(result.insights)} insights, karma {result.karma}, "
+                      f"{result.complexity['function_count']} functions")
+    
+    def removed(path):
+        console.print(f"[dim]{os.path.relpath(path, directory)} returned to the void[/dim]")
+    
+    session = WatchSession(directory, extensions, ContemplationLevel(level),
+                           on_update=report, on_remove=removed, engine=AnalysisEngine(engine.lower()))
+    watcher = open_watcher(directory, poll, interval)
+    backend = "inotify" if isinstance(watcher, InotifyWatcher) else f"polling every {interval}s"
+    console.print(f"[dim]Watching {directory} ({backend})... (Ctrl+C to stop)[/dim]")
+    session.scan()
+    try:
+        watch_changes(session, watcher, debounce)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        watcher.close()
+        session.close()
+
+
+@cli.command()
+@click.option('--level', '-l',
+              type=click.Choice(['surface', 'deep', 'cosmic'], case_sensitive=False),
+              default='deep', help='Level of existential contemplation')
+def lsp(level):
+    """Speak the Language Server Protocol on stdio, for editors."""
+    from .existential_coder import ContemplationLevel
+    from .lsp import serve_stdio
+    
+    raise SystemExit(serve_stdio(ContemplationLevel(level)))
+
+
+@cli.command()
+@click.option('--socket', 'socket_path', default=None,
+              help='Path of the Unix domain socket to listen on')
+@click.option('--stop', is_flag=True, help='Ask a running daemon to return to the void')
+def daemon(socket_path, stop):
+    """Keep warm agents resident so hooks and repeated commands start instantly."""
+    from .daemon import serve, stop_daemon
+    
+    if stop:
+        if stop_daemon(socket_path):
+            console.print("[italic]The daemon has returned to the void.[/italic]")
+        else:
+            console.print("[dim]No daemon was listening.[/dim]")
+        return
+    
+    console.print("[dim]Daemon listening... (Ctrl+C to stop)[/dim]")
+    serve(socket_path)
+
+
+@cli.command()
+@click.argument('paths', nargs=-1, type=click.Path(exists=True))
+@click.option('--host', default='127.0.0.1', show_default=True, help='The address to listen on')
+@click.option('--port', default=7878, show_default=True, type=click.IntRange(0, 65535),
+              help='The port to listen on')
+@click.option('--extension', '-e', 'extensions', multiple=True, default=['.py'], show_default=True,
+              help='File extensions to analyze within directories')
+@click.option('--shard-size', default=32, show_default=True, type=click.IntRange(1),
+              help='How many files each worker leases at once')
+@click.option('--lease', 'lease_seconds', default=30.0, show_default=True, type=click.FloatRange(0.1),
+              help='Seconds a worker may go silent before its files are handed to another')
+@click.option('--attempts', default=3, show_default=True, type=click.IntRange(1),
+              help='How many leases a file may be part of before it is given up on')
+@click.option('--timeout', default=None, type=click.FloatRange(0), help='Give up after this many seconds')
+@click.option('--output', '-o', type=click.File('wb'), default='-',
+              help='Where to stream the results')
+@click.option('--format', 'output_format', type=click.Choice(['jsonl', 'binary']), default='jsonl',
+              show_default=True,
+              help='One JSON object per file, or a compact binary insight stream')
+def coordinator(paths, host, port, extensions, shard_size, lease_seconds, attempts, timeout, output,
+                output_format):
+    """Hand out the files of a codebase to workers on other machines and merge their results."""
+    import json
+    import threading
+    from .codec import InsightWriter
+    from .distributed import CoordinatorServer, WorkQueue, coordinate, encode_result, list_files
+    
+    lock = threading.Lock()
+    writer = InsightWriter(output) if output_format == 'binary' else None
+    
+    def stream(result, complete):
+        with lock:
+            if writer is not None:
+                writer.write_result(result, complete)
+                writer.flush()
+            else:
+                output.write(json.dumps(encode_result(result, complete)).encode("utf-8") + b"\n")
+            output.flush()
+    
+    files = list_files(paths or ['.'], extensions)
+    work = WorkQueue(files, shard_size, lease_seconds, attempts, on_result=stream)
+    try:
+        server = CoordinatorServer(work, host, port)
+    except OSError as e:
+        click.echo(f"Cannot listen on {host}:{port}: {e}", err=True)
+        raise SystemExit(1)
+    
+    click.echo(f"Coordinating {len(files)} files on {host}:{server.port}", err=True)
+    try:
+        finished = coordinate(server, timeout)
+    finally:
+        # End the stream even on Ctrl+C, so readers can tell it was not truncated
+        if writer is not None:
+            with lock:
+                writer.close()
+                output.flush()
+    
+    totals = work.totals
+    click.echo(f"{totals.metrics['files']} files analyzed ({totals.incomplete} cut short), "
+               f"{len(work.skipped)} skipped, {len(work.failed)} failed; "
+               f"{totals.insights} insights, karma {totals.metrics['karma']}", err=True)
+    for path, error in sorted(work.failed.items()):
+        click.echo(f"  {path}: {error}", err=True)
+    if not finished:
+        click.echo(f"Gave up after {timeout:g}s with {work.status()['remaining']} files left", err=True)
+        raise SystemExit(1)
+
+
+@cli.command()
+@click.argument('address', default='127.0.0.1:7878')
+@click.option('--level', '-l',
+              type=click.Choice(['surface', 'deep', 'cosmic'], case_sensitive=False),
+              default='deep',
+              help='Level of existential contemplation')
+@click.option('--name', default=None, help="This worker's name in the coordinator's leases")
+def worker(address, level, name):
+    """Analyze files leased from a coordinator at HOST:PORT until none are left."""
+    from .distributed import DistributedError, run_worker
+    from .existential_coder import ContemplationLevel
+    
+    host, _, port = address.rpartition(':')
+    if not host or not port.isdigit():
+        click.echo(f"Expected HOST:PORT, got {address}", err=True)
+        raise SystemExit(2)
+    
+    try:
+        analyzed = run_worker(host.strip('[]'), int(port), ContemplationLevel(level), name)
+    except (OSError, DistributedError) as e:
+        click.echo(f"Worker stopped: {e}", err=True)
+        raise SystemExit(1)
+    click.echo(f"Analyzed {analyzed} files", err=True)
+
+
+@cli.command('pack-corpus')
+@click.argument('sources', nargs=-1, required=True, type=click.Path(exists=True, dir_okay=False))
+@click.option('--output', '-o', required=True, type=click.Path(dir_okay=False),
+              help='Where to write the string table, e.g. oracle.strtab')
+def pack_corpus(sources, output):
+    """Pack JSON corpora into a memory-mapped string table."""
+    from .corpus import pack_corpus as pack
+    
+    count = pack(list(sources), output)
+    console.print(f"[green]Packed {count} entries into {output}[/green]")
+
+
 def main():
     """Main entry point for the CLI."""
     cli()
@@ -0,0 +1,182 @@
+"""
+The Thin Client - A whisper to the ever-present daemon.
+
+This module is the first thing the ``gith-ub`` entry point touches. It only
+imports the standard library so that, when a warm daemon is listening, a
+command costs little more than interpreter start and one round trip over a
+Unix domain socket. When no daemon answers, it quietly hands control to the
+full click-based CLI. Even ``typing`` is avoided here, as it costs more to
+import than the whole round trip.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import socket
+import sys
+
+TYPE_CHECKING = False
+if TYPE_CHECKING:
+    from typing import Any
+
+
+SOCKET_ENV_VAR = "GITH_UB_SOCKET"
+DISABLE_ENV_VAR = "GITH_UB_NO_DAEMON"
+CONNECT_TIMEOUT = 0.05
+RESPONSE_TIMEOUT = 5.0
+
+# The defaults of ``gith-ub analyze``, which the daemon applies in the same way
+ANALYZE_MAX_INSIGHTS = 200
+ANALYZE_TIMEOUT = 10.0
+
+
+def default_socket_path() -> str:
+    """
+    Determine where the daemon listens.
+
+    Returns:
+        The path of the Unix domain socket, honouring ``GITH_UB_SOCKET``
+    """
+    configured = os.environ.get(SOCKET_ENV_VAR)
+    if configured:
+        return configured
+
+    runtime_dir = os.environ.get("XDG_RUNTIME_DIR")
+    if runtime_dir:
+        return os.path.join(runtime_dir, "gith-ub.sock")
+
+    return f"/tmp/gith-ub-{os.getuid()}.sock"
+
+
+def _terminal_width() -> int:
+    """Measure the terminal so the daemon can render panels to fit it."""
+    try:
+        return os.get_terminal_size(sys.stdout.fileno()).columns
+    except (OSError, ValueError):
+        return 80
+
+
+def send_request(request: dict[str, Any], socket_path: str | None = None,
+                 timeout: float = RESPONSE_TIMEOUT) -> dict[str, Any] | None:
+    """
+    Send a single request to the daemon.
+
+    Args:
+        request: The JSON-serialisable request
+        socket_path: The socket to connect to, defaults to ``default_socket_path()``
+        timeout: Seconds to wait for the response
+
+    Returns:
+        The decoded response, or None if no daemon could be reached
+    """
+    path = socket_path or default_socket_path()
+    if not os.path.exists(path):
+        return None
+
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        sock.settimeout(CONNECT_TIMEOUT)
+        sock.connect(path)
+        sock.settimeout(timeout)
+        sock.sendall(json.dumps(request).encode("utf-8") + b"\n")
+        sock.shutdown(socket.SHUT_WR)
+
+        chunks = []
+        while True:
+            chunk = sock.recv(65536)
+            if not chunk:
+                break
+            chunks.append(chunk)
+    except OSError:
+        return None
+    finally:
+        sock.close()
+
+    try:
+        response = json.loads(b"".join(chunks))
+    except ValueError:
+        return None
+
+    return response if isinstance(response, dict) else None
+
+
+def build_request(argv: list[str]) -> dict[str, Any] | None:
+    """
+    Translate command line arguments into a daemon request.
+
+    Only the simple, non-interactive forms of the commands are handled here;
+    anything involving options or prompts is left to the full CLI.
+
+    Args:
+        argv: The command line arguments, without the program name
+
+    Returns:
+        A request dictionary, or None if the full CLI should handle the call
+    """
+    if not argv or any(arg.startswith("-") for arg in argv):
+        return None
+
+    command, args = argv[0], argv[1:]
+
+    if command == "ask" and len(args) == 1:
+        payload: dict[str, Any] = {"question": args[0]}
+    elif command == "commit":
+        payload = {"changes": args}
+    elif command == "search" and args:
+        payload = {"terms": args}
+    elif command == "generate" and len(args) <= 1:
+        payload = {"kind": args[0] if args else "wisdom"}
+    elif command == "analyze" and len(args) == 1 and os.path.isfile(args[0]):
+        payload = {"file_path": args[0], "absolute_path": os.path.abspath(args[0]), "level": "deep",
+                   "max_insights": ANALYZE_MAX_INSIGHTS, "timeout": ANALYZE_TIMEOUT}
+    else:
+        return None
+
+    return {
+        "command": command,
+        "args": payload,
+        "width": _terminal_width(),
+        "color": sys.stdout.isatty(),
+    }
+
+
+def try_daemon(argv: list[str]) -> int | None:
+    """
+    Run a command through the daemon if one is available.
+
+    Args:
+        argv: The command line arguments, without the program name
+
+    Returns:
+        The exit code, or None if the caller should fall back to the full CLI
+    """
+    if os.environ.get(DISABLE_ENV_VAR):
+        return None
+
+    request = build_request(argv)
+    if request is None:
+        return None
+
+    # An analysis may take its whole timeout before the response is written
+    response = send_request(request, timeout=RESPONSE_TIMEOUT + request["args"].get("timeout", 0))
+    if response is None or not response.get("ok"):
+        return None
+
+    sys.stdout.write(response.get("output", ""))
+    sys.stdout.flush()
+    return int(response.get("exit_code", 0))
+
+
+def main() -> None:
+    """Entry point that prefers the warm daemon and falls back to the full CLI."""
+    exit_code = try_daemon(sys.argv[1:])
+    if exit_code is not None:
+        sys.exit(exit_code)
+
+    from .cli import main as cli_main
+    cli_main()
+
+
+if __name__ == "__main__":
+    main()
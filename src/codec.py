@@ -0,0 +1,481 @@
+"""
+The Codec - Insights, packed tight for the journey.
+
+This module defines a compact binary format for insights and file results,
+for sending them between processes, over the network and into caches. A
+JSON or pickle record repeats the full text of its question and wisdom,
+though a whole analysis draws them from a few hundred distinct strings. A
+stream in this format defines each string once, the first time it is used,
+and records refer back to it by number. Records are varint-encoded, and
+line numbers are stored as the difference from the previous insight's, so
+a typical insight takes four or five bytes. Streams are written and read
+incrementally, and decoded records share one copy of each string.
+
+Layout::
+
+    "GUIC" schema version                                   (varint)
+    frames, each starting with a tag byte:
+      string:  TAG_STRING, length, UTF-8 bytes              (next string id)
+      insight: TAG_INSIGHT + level, question id, wisdom id, line
+      result:  TAG_RESULT, path id, karma, version, flags, metric count,
+               (key id, value) per metric, insight count, insights
+      end:     TAG_END
+
+Integers are unsigned LEB128 varints, zigzag-encoded where they may be
+negative. A line is 0 for an insight without one, and otherwise one more
+than the zigzag-encoded difference from the previous line: the previous
+insight's in the same file result, or the previous loose insight's. The
+flags of a result are ``FLAG_CUT_SHORT`` if its analysis was incomplete.
+"""
+
+import io
+import struct
+from typing import Any, BinaryIO, Dict, Iterable, Iterator, List, Tuple, Union
+
+from .existential_coder import CodeInsight, ContemplationLevel
+from .scan import FileResult
+
+
+MAGIC = b"GUIC"
+VERSION = 1
+
+TAG_END = 0x00
+TAG_STRING = 0x01
+TAG_RESULT = 0x02
+# Insight tags carry the index of their contemplation level
+TAG_INSIGHT = 0x10
+
+# Result flags
+FLAG_CUT_SHORT = 0x01
+
+# Metric value types
+_NONE, _FALSE, _TRUE, _INT, _FLOAT, _STR = range(6)
+_DOUBLE = struct.Struct("<d")
+
+_LEVELS = list(ContemplationLevel)
+_LEVEL_INDEX = {level: index for index, level in enumerate(_LEVELS)}
+
+# Output is written to the file in chunks of about this size, and input read
+# in chunks of this size
+_CHUNK_SIZE = 64 * 1024
+
+Record = Union[CodeInsight, FileResult]
+
+
+class CodecError(ValueError):
+    """Raised when data is not a valid insight stream."""
+
+
+def _write_varint(out: bytearray, value: int) -> None:
+    while value > 0x7F:
+        out.append((value & 0x7F) | 0x80)
+        value >>= 7
+    out.append(value)
+
+
+def _zigzag(value: int) -> int:
+    return value << 1 if value >= 0 else (-value << 1) - 1
+
+
+def _unzigzag(value: int) -> int:
+    return value >> 1 if not value & 1 else -((value + 1) >> 1)
+
+
+def _read_varint(data: bytes, pos: int) -> Tuple[int, int]:
+    byte = data[pos]
+    if byte < 0x80:
+        return byte, pos + 1
+    result = byte & 0x7F
+    shift = 7
+    while True:
+        pos += 1
+        byte = data[pos]
+        result |= (byte & 0x7F) << shift
+        if byte < 0x80:
+            return result, pos + 1
+        shift += 7
+
+
+class InsightWriter:
+    """
+    Writes insights and file results to a binary stream.
+
+    Strings are interned as they are first seen, so memory grows with the
+    number of distinct strings rather than with the number of records.
+    """
+
+    def __init__(self, f: BinaryIO):
+        """
+        Start a new stream.
+
+        Args:
+            f: A binary file opened for writing
+        """
+        self._file = f
+        self._out = bytearray(MAGIC)
+        _write_varint(self._out, VERSION)
+        self._ids: Dict[str, int] = {}
+        # The last line of the loose insights written so far
+        self._loose = [0]
+
+    def _id(self, text: str) -> int:
+        """The id of a string, defining it in the stream if it is new."""
+        string_id = self._ids.get(text)
+        if string_id is None:
+            string_id = self._ids[text] = len(self._ids)
+            encoded = text.encode("utf-8")
+            self._out.append(TAG_STRING)
+            _write_varint(self._out, len(encoded))
+            self._out += encoded
+        return string_id
+
+    def _insights(self, frame: bytearray, insights: Iterable[CodeInsight], previous_line: List[int]) -> None:
+        """Encode insights into a frame, with lines relative to each other."""
+        ids = self._ids
+        previous = previous_line[0]
+        for insight in insights:
+            question = ids.get(insight.question)
+            if question is None:
+                question = self._id(insight.question)
+            wisdom = ids.get(insight.wisdom)
+            if wisdom is None:
+                wisdom = self._id(insight.wisdom)
+            frame.append(TAG_INSIGHT + _LEVEL_INDEX[insight.contemplation_level])
+            _write_varint(frame, question)
+            _write_varint(frame, wisdom)
+            line = insight.line_number
+            if line is None:
+                frame.append(0)
+            else:
+                _write_varint(frame, _zigzag(line - previous) + 1)
+                previous = line
+        previous_line[0] = previous
+
+    def _value(self, frame: bytearray, value: Any) -> None:
+        if value is None:
+            frame.append(_NONE)
+        elif value is True or value is False:
+            frame.append(_TRUE if value else _FALSE)
+        elif isinstance(value, int):
+            frame.append(_INT)
+            _write_varint(frame, _zigzag(value))
+        elif isinstance(value, float):
+            frame.append(_FLOAT)
+            frame += _DOUBLE.pack(value)
+        elif isinstance(value, str):
+            frame.append(_STR)
+            _write_varint(frame, self._id(value))
+        else:
+            raise CodecError(f"Cannot encode a metric of type {type(value).__name__}")
+
+    def write_insights(self, insights: Iterable[CodeInsight]) -> None:
+        """
+        Write insights that belong to no file result.
+
+        Args:
+            insights: The insights, best in line order
+        """
+        frame = bytearray()
+        self._insights(frame, insights, self._loose)
+        self._out += frame
+        self._spill()
+
+    def write_result(self, result: FileResult, complete: bool = True) -> None:
+        """
+        Write the result of one file.
+
+        Args:
+            result: The result; its metrics may be None, booleans, ints,
+                floats or strings
+            complete: Whether the analysis covered the whole file; it is
+                recorded as cut short if this or ``result.complete`` is False
+
+        Raises:
+            CodecError: If a metric has any other type
+        """
+        frame = bytearray([TAG_RESULT])
+        _write_varint(frame, self._id(result.path))
+        _write_varint(frame, _zigzag(result.karma))
+        _write_varint(frame, result.version)
+        _write_varint(frame, 0 if complete and result.complete else FLAG_CUT_SHORT)
+        _write_varint(frame, len(result.complexity))
+        for key, value in result.complexity.items():
+            _write_varint(frame, self._id(key))
+            self._value(frame, value)
+        _write_varint(frame, len(result.insights))
+        self._insights(frame, result.insights, [0])
+        # Any strings the frame defined were written ahead of it
+        self._out += frame
+        self._spill()
+
+    def write(self, record: Record) -> None:
+        """Write a file result or a single insight."""
+        if isinstance(record, FileResult):
+            self.write_result(record)
+        else:
+            self.write_insights((record,))
+
+    def _spill(self) -> None:
+        if len(self._out) >= _CHUNK_SIZE:
+            self.flush()
+
+    def flush(self) -> None:
+        """Pass everything written so far to the file."""
+        self._file.write(self._out)
+        self._out = bytearray()
+
+    def close(self) -> None:
+        """End the stream. The file itself is left open."""
+        self._out.append(TAG_END)
+        self.flush()
+
+
+class _Incomplete(Exception):
+    """A frame runs past the data read so far."""
+
+
+class InsightReader:
+    """
+    Reads insights and file results from a binary stream, as they arrive.
+
+    Iterating yields a ``CodeInsight`` for every insight outside a file
+    result and a ``FileResult`` for every file result, in the order they
+    were written.
+    """
+
+    def __init__(self, f: BinaryIO):
+        """
+        Open a stream.
+
+        Args:
+            f: A binary file opened for reading
+
+        Raises:
+            CodecError: If the stream is not an insight stream, or was
+                written with a newer schema
+        """
+        self._file = f
+        self._strings: List[str] = []
+        self._data = b""
+        self._pos = 0
+        self._eof = False
+        # The last line of the loose insights read so far
+        self._loose = [0]
+        while len(self._data) < len(MAGIC) + 10 and self._fill():
+            pass
+        if not self._data.startswith(MAGIC):
+            raise CodecError("Not an insight stream")
+        try:
+            self.version, self._pos = _read_varint(self._data, len(MAGIC))
+        except IndexError:
+            raise CodecError("Truncated insight stream") from None
+        if self.version > VERSION:
+            raise CodecError(f"Insight stream schema {self.version} is newer than {VERSION}")
+
+    def _fill(self) -> bool:
+        """Read another chunk, keeping what has not been decoded yet."""
+        if self._eof:
+            return False
+        chunk = self._file.read(_CHUNK_SIZE)
+        if not chunk:
+            self._eof = True
+            return False
+        self._data = self._data[self._pos:] + chunk
+        self._pos = 0
+        return True
+
+    def __iter__(self) -> Iterator[Record]:
+        while True:
+            start = self._pos
+            try:
+                records = self._frame()
+            except IndexError:
+                self._pos = start
+                if not self._fill():
+                    raise CodecError("Truncated insight stream") from None
+                continue
+            if records is None:
+                return
+            yield from records
+
+    def _frame(self) -> Any:
+        """
+        Decode the next frame.
+
+        Returns:
+            The records it holds, or None at the end of the stream
+
+        Raises:
+            IndexError: If the frame is incomplete
+        """
+        data = self._data
+        pos = self._pos
+        tag = data[pos]
+        pos += 1
+
+        if tag == TAG_STRING:
+            length, pos = _read_varint(data, pos)
+            if pos + length > len(data):
+                raise IndexError("string runs past the data")
+            self._strings.append(str(data[pos:pos + length], "utf-8"))
+            self._pos = pos + length
+            return ()
+
+        if tag >= TAG_INSIGHT:
+            # Runs of loose insights are decoded together, up to the end of
+            # the data read so far
+            insights: List[CodeInsight] = []
+            try:
+                while True:
+                    pos = self._insight(data, pos, tag, insights, self._loose)
+                    self._pos = pos
+                    tag = data[pos]
+                    if tag < TAG_INSIGHT:
+                        break
+                    pos += 1
+            except IndexError:
+                if not insights:
+                    raise
+            return insights
+
+        if tag == TAG_RESULT:
+            strings = self._strings
+            path, pos = _read_varint(data, pos)
+            karma, pos = _read_varint(data, pos)
+            version, pos = _read_varint(data, pos)
+            flags, pos = _read_varint(data, pos)
+            count, pos = _read_varint(data, pos)
+            complexity: Dict[str, Any] = {}
+            for _ in range(count):
+                key, pos = _read_varint(data, pos)
+                complexity[strings[key]], pos = self._value(data, pos)
+            count, pos = _read_varint(data, pos)
+            insights, pos = self._result_insights(data, pos, count)
+            self._pos = pos
+            return (FileResult(strings[path], insights, _unzigzag(karma), complexity, version,
+                               not flags & FLAG_CUT_SHORT),)
+
+        if tag == TAG_END:
+            self._pos = pos
+            return None
+
+        raise CodecError(f"Unknown frame tag {tag:#x}")
+
+    def _result_insights(self, data: bytes, pos: int, count: int) -> Tuple[List[CodeInsight], int]:
+        """
+        Decode the insights of a file result, returning them and the position after them.
+
+        This is where nearly all the decoding time goes, so one-byte varints,
+        by far the most common, are decoded inline.
+        """
+        strings = self._strings
+        levels = _LEVELS
+        insights: List[CodeInsight] = []
+        append = insights.append
+        previous = 0
+        for _ in range(count):
+            level = data[pos] - TAG_INSIGHT
+            if not 0 <= level < len(levels):
+                raise CodecError(f"Expected an insight, found tag {data[pos]:#x}")
+            question = data[pos + 1]
+            if question < 0x80:
+                pos += 2
+            else:
+                question, pos = _read_varint(data, pos + 1)
+            wisdom = data[pos]
+            if wisdom < 0x80:
+                pos += 1
+            else:
+                wisdom, pos = _read_varint(data, pos)
+            line = data[pos]
+            if line < 0x80:
+                pos += 1
+            else:
+                line, pos = _read_varint(data, pos)
+            if line:
+                line -= 1
+                previous += line >> 1 if not line & 1 else -((line + 1) >> 1)
+                line = previous
+            else:
+                line = None
+            append(CodeInsight(strings[question], strings[wisdom], levels[level], line))
+        return insights, pos
+
+    def _insight(self, data: bytes, pos: int, tag: int, insights: List[CodeInsight], previous: List[int]) -> int:
+        """
+        Decode one insight after its tag, returning the position after it.
+
+        Nothing is changed unless the whole insight could be decoded.
+        """
+        try:
+            level = _LEVELS[tag - TAG_INSIGHT]
+        except IndexError:
+            raise CodecError(f"Unknown contemplation level {tag - TAG_INSIGHT}") from None
+        question, pos = _read_varint(data, pos)
+        wisdom, pos = _read_varint(data, pos)
+        line, pos = _read_varint(data, pos)
+        try:
+            question = self._strings[question]
+            wisdom = self._strings[wisdom]
+        except IndexError:
+            raise CodecError("Insight refers to an undefined string") from None
+        if line:
+            line = previous[0] + _unzigzag(line - 1)
+            previous[0] = line
+        else:
+            line = None
+        insights.append(CodeInsight(question, wisdom, level, line))
+        return pos
+
+    def _value(self, data: bytes, pos: int) -> Tuple[Any, int]:
+        kind = data[pos]
+        pos += 1
+        if kind == _NONE:
+            return None, pos
+        if kind == _FALSE or kind == _TRUE:
+            return kind == _TRUE, pos
+        if kind == _INT:
+            value, pos = _read_varint(data, pos)
+            return _unzigzag(value), pos
+        if kind == _FLOAT:
+            if pos + _DOUBLE.size > len(data):
+                raise IndexError("float runs past the data")
+            return _DOUBLE.unpack_from(data, pos)[0], pos + _DOUBLE.size
+        if kind == _STR:
+            value, pos = _read_varint(data, pos)
+            return self._strings[value], pos
+        raise CodecError(f"Unknown metric type {kind}")
+
+
+def encode_insights(records: Iterable[Record]) -> bytes:
+    """
+    Encode insights and file results into a single stream.
+
+    Args:
+        records: ``CodeInsight`` and ``FileResult`` objects
+
+    Returns:
+        The encoded stream
+    """
+    buffer = io.BytesIO()
+    writer = InsightWriter(buffer)
+    for record in records:
+        writer.write(record)
+    writer.close()
+    return buffer.getvalue()
+
+
+def decode_insights(data: bytes) -> List[Record]:
+    """
+    Decode a stream written by ``encode_insights`` or ``InsightWriter``.
+
+    Args:
+        data: The encoded stream
+
+    Returns:
+        The insights and file results, in the order they were written
+
+    Raises:
+        CodecError: If the data is not a complete, valid insight stream
+    """
+    return list(InsightReader(io.BytesIO(data)))
@@ -0,0 +1,452 @@
+"""
+The Corpus - Where the collected wisdom of G.I.T.H.U.B. rests.
+
+This module loads the questions, prophecies, wisdom and meditations that the
+agents draw upon from JSON data files. The files shipped in ``src/data`` can
+be extended with your own entries by placing files of the same name in the
+directories listed in ``GITH_UB_CORPUS_PATH``.
+
+Parsing tens of thousands of JSON entries on every start would be slow, so
+each corpus is compiled once into a memory-mapped string table (see
+``stringtable.py``), rebuilt whenever a source file changes. Corpora with
+millions of entries can also be shipped as prebuilt ``<name>.strtab`` files
+in the same directories. Either way entries are decoded only when an agent
+reads them, and the mapped pages are shared by every process on the machine.
+"""
+
+import json
+import os
+import random
+import tempfile
+from collections.abc import Mapping, Sequence
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+from .stringtable import StringTable, StringTableError, StringTableWriter
+
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data")
+CORPUS_PATH_ENV_VAR = "GITH_UB_CORPUS_PATH"
+CACHE_DIR_ENV_VAR = "GITH_UB_CACHE_DIR"
+
+CACHE_VERSION = 2
+
+# Flat sections are stored as a single category with this name
+FLAT_CATEGORY = ""
+
+
+def default_cache_dir() -> str:
+    """
+    Determine where compiled caches are kept.
+
+    Returns:
+        The cache directory, honouring ``GITH_UB_CACHE_DIR`` and ``XDG_CACHE_HOME``
+    """
+    configured = os.environ.get(CACHE_DIR_ENV_VAR)
+    if configured:
+        return configured
+
+    cache_home = os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache")
+    return os.path.join(cache_home, "gith-ub")
+
+
+def corpus_search_path() -> List[str]:
+    """
+    List the directories that contribute entries to the corpora.
+
+    Returns:
+        The built-in data directory followed by any user directories
+    """
+    extra = os.environ.get(CORPUS_PATH_ENV_VAR, "")
+    return [DATA_DIR] + [path for path in extra.split(os.pathsep) if path]
+
+
+def _key(section: str, category: str) -> str:
+    """Build the cache key of a category within a section."""
+    return f"{section}/{category}"
+
+
+class Corpus:
+    """
+    A named collection of sections, each made of categories of entries.
+
+    Entries are read from memory-mapped string tables one category at a time,
+    on first use, without materializing the whole category.
+    """
+
+    def __init__(self, name: str, search_path: Optional[List[str]] = None, cache_dir: Optional[str] = None):
+        """
+        Initialize the corpus.
+
+        Args:
+            name: The corpus name, which is also the data file name without its extension
+            search_path: Directories to read data files from
+            cache_dir: Directory for the compiled cache
+        """
+        self.name = name
+        self.search_path = search_path if search_path is not None else corpus_search_path()
+        self.cache_dir = cache_dir if cache_dir is not None else default_cache_dir()
+        self._tables: Optional[List[StringTable]] = None
+        self._in_memory: Dict[str, List[Any]] = {}
+        self._keys: Dict[str, None] = {}
+        self._loaded: Dict[str, Sequence] = {}
+
+    def _sources(self, extension: str) -> List[str]:
+        candidates = [os.path.join(directory, f"{self.name}{extension}") for directory in self.search_path]
+        return [path for path in candidates if os.path.isfile(path)]
+
+    @property
+    def source_files(self) -> List[str]:
+        """The JSON data files contributing to this corpus, in merge order."""
+        return self._sources(".json")
+
+    @property
+    def prebuilt_tables(self) -> List[str]:
+        """The prebuilt string tables contributing to this corpus, in merge order."""
+        return self._sources(".strtab")
+
+    @property
+    def cache_path(self) -> str:
+        """The location of the compiled cache."""
+        return os.path.join(self.cache_dir, f"{self.name}.strtab")
+
+    def fingerprint(self) -> List[Tuple[str, int, int]]:
+        """
+        Describe the current state of the source files.
+
+        Returns:
+            The path, modification time and size of every source file
+        """
+        fingerprint = []
+        for path in self.source_files:
+            stat = os.stat(path)
+            fingerprint.append((path, stat.st_mtime_ns, stat.st_size))
+        return fingerprint
+
+    def sections(self) -> List[str]:
+        """List the sections available in this corpus."""
+        sections: Dict[str, None] = {}
+        for key in self._ensure_open():
+            sections[key.split("/", 1)[0]] = None
+        return list(sections)
+
+    def categories(self, section: str) -> List[str]:
+        """
+        List the categories of a section.
+
+        Args:
+            section: The section name
+
+        Returns:
+            The category names, in the order they were first defined
+        """
+        prefix = f"{section}/"
+        return [key[len(prefix):] for key in self._ensure_open() if key.startswith(prefix)]
+
+    def entries(self, section: str, category: str = FLAT_CATEGORY) -> Sequence:
+        """
+        Get the entries of a single category.
+
+        Args:
+            section: The section name
+            category: The category name, omitted for flat sections
+
+        Returns:
+            The entries of the category, empty if it does not exist
+        """
+        key = _key(section, category)
+        if key not in self._loaded:
+            self._loaded[key] = self._read(key)
+        return self._loaded[key]
+
+    def section(self, section: str, factory: Optional[Callable[[Any], Any]] = None,
+                key_type: Optional[Callable[[str], Any]] = None) -> "LazyCategories":
+        """
+        View a categorised section as a lazily loaded mapping.
+
+        Args:
+            section: The section name
+            factory: Converts each raw entry into the object the agent expects
+            key_type: Converts category names into the agent's key type
+
+        Returns:
+            A mapping from category to entries
+        """
+        return LazyCategories(self, section, factory, key_type)
+
+    def flat(self, section: str, factory: Optional[Callable[[Any], Any]] = None) -> "LazyEntries":
+        """
+        View a flat section as a lazily loaded sequence.
+
+        Args:
+            section: The section name
+            factory: Converts each raw entry into the object the agent expects
+
+        Returns:
+            A sequence of entries
+        """
+        return LazyEntries(self, section, FLAT_CATEGORY, factory)
+
+    def _read(self, key: str) -> Sequence:
+        """Gather a category from the compiled cache and any prebuilt tables."""
+        tables = self._ensure_tables()
+        parts: List[Sequence] = []
+        if key in self._in_memory:
+            parts.append(self._in_memory[key])
+        for table in tables:
+            if key in table:
+                parts.append(table[key])
+
+        if len(parts) == 1:
+            return parts[0]
+        return ChainedEntries(parts)
+
+    def _ensure_open(self) -> Dict[str, None]:
+        """Open every table, returning the keys they provide in order."""
+        self._ensure_tables()
+        return self._keys
+
+    def _ensure_tables(self) -> List[StringTable]:
+        """Open the compiled cache, compiling it first if it is missing or stale."""
+        if self._tables is None:
+            tables = []
+            if self.source_files:
+                fingerprint = self.fingerprint()
+                cache = self._open_cache(fingerprint) or self._compile(fingerprint)
+                if cache is not None:
+                    tables.append(cache)
+            for path in self.prebuilt_tables:
+                tables.append(StringTable(path))
+
+            self._keys = dict.fromkeys(self._in_memory)
+            for table in tables:
+                self._keys.update(dict.fromkeys(table.categories()))
+            self._tables = tables
+        return self._tables
+
+    def _open_cache(self, fingerprint: List[Tuple[str, int, int]]) -> Optional[StringTable]:
+        """Open the compiled cache if it is up to date."""
+        try:
+            table = StringTable(self.cache_path)
+        except (OSError, ValueError):
+            return None
+
+        expected = {"version": CACHE_VERSION, "fingerprint": [list(source) for source in fingerprint]}
+        if any(table.metadata.get(name) != value for name, value in expected.items()):
+            return None
+        return table
+
+    def _compile(self, fingerprint: List[Tuple[str, int, int]]) -> Optional[StringTable]:
+        """Merge the JSON source files and write them to the compiled cache."""
+        merged = _merge_sources(self.source_files)
+        metadata = {"version": CACHE_VERSION, "fingerprint": fingerprint}
+
+        temp_path = None
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            fd, temp_path = tempfile.mkstemp(dir=self.cache_dir, prefix=f".{self.name}.")
+            with os.fdopen(fd, "wb") as f:
+                writer = StringTableWriter(f, metadata)
+                for key, entries in merged.items():
+                    writer.add_category(key, entries)
+                writer.close()
+            os.replace(temp_path, self.cache_path)
+            temp_path = None
+            return StringTable(self.cache_path)
+        except (OSError, StringTableError):
+            # Without a writable cache, the merged corpus simply lives in memory
+            self._in_memory = merged
+            return None
+        finally:
+            if temp_path is not None:
+                try:
+                    os.unlink(temp_path)
+                except OSError:
+                    pass
+
+
+def _merge_sources(paths: List[str]) -> Dict[str, List[Any]]:
+    """
+    Merge data files into a single mapping of cache keys to entries.
+
+    Later files extend the categories of earlier ones.
+
+    Args:
+        paths: The data files to merge, in order
+
+    Returns:
+        A mapping from ``section/category`` to entries
+    """
+    merged: Dict[str, List[Any]] = {}
+    for path in paths:
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+
+        for section, content in data.items():
+            if isinstance(content, dict):
+                for category, entries in content.items():
+                    merged.setdefault(_key(section, category), []).extend(entries)
+            else:
+                merged.setdefault(_key(section, FLAT_CATEGORY), []).extend(content)
+    return merged
+
+
+class ChainedEntries(Sequence):
+    """Several sequences of entries presented as one, without copying them."""
+
+    def __init__(self, parts: List[Sequence]):
+        self._parts = parts
+
+    def __len__(self) -> int:
+        return sum(len(part) for part in self._parts)
+
+    def __getitem__(self, index: Any) -> Any:
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+
+        if index < 0:
+            index += len(self)
+        for part in self._parts:
+            if 0 <= index < len(part):
+                return part[index]
+            index -= len(part)
+        raise IndexError("corpus index out of range")
+
+
+class LazyEntries(Sequence):
+    """
+    The entries of one category, opened from the corpus on first access.
+
+    Entries are converted by the factory as they are read, so a category
+    with millions of entries is never turned into millions of objects.
+    """
+
+    def __init__(self, corpus: Corpus, section: str, category: str,
+                 factory: Optional[Callable[[Any], Any]] = None):
+        self._corpus = corpus
+        self._section = section
+        self._category = category
+        self._factory = factory
+        self._entries: Optional[Sequence] = None
+
+    def _open(self) -> Sequence:
+        if self._entries is None:
+            self._entries = self._corpus.entries(self._section, self._category)
+        return self._entries
+
+    def __getitem__(self, index: Any) -> Any:
+        entry = self._open()[index]
+        if self._factory is None:
+            return entry
+        if isinstance(index, slice):
+            return [self._factory(item) for item in entry]
+        return self._factory(entry)
+
+    def __len__(self) -> int:
+        return len(self._open())
+
+    def __repr__(self) -> str:
+        return f"LazyEntries({self._corpus.name!r}, {self._section!r}, {self._category!r})"
+
+
+class LazyCategories(Mapping):
+    """A section of the corpus whose categories are loaded on first access."""
+
+    def __init__(self, corpus: Corpus, section: str, factory: Optional[Callable[[Any], Any]] = None,
+                 key_type: Optional[Callable[[str], Any]] = None):
+        self._corpus = corpus
+        self._section = section
+        self._key_type = key_type
+        self._categories = {
+            (key_type(name) if key_type else name): LazyEntries(corpus, section, name, factory)
+            for name in corpus.categories(section)
+        }
+
+    @property
+    def corpus(self) -> Corpus:
+        """The corpus the section belongs to."""
+        return self._corpus
+
+    @property
+    def section(self) -> str:
+        """The name of the section."""
+        return self._section
+
+    def __getitem__(self, key: Any) -> LazyEntries:
+        return self._categories[key]
+
+    def __len__(self) -> int:
+        return len(self._categories)
+
+    def __iter__(self) -> Iterator[Any]:
+        return iter(self._categories)
+
+    def __repr__(self) -> str:
+        return f"LazyCategories({self._corpus.name!r}, {self._section!r})"
+
+
+def pack_corpus(sources: List[str], output: str) -> int:
+    """
+    Pack JSON corpus files into a prebuilt string table.
+
+    Placing the result next to the JSON files as ``<name>.strtab`` lets very
+    large corpora be memory-mapped directly, without a compile step.
+
+    Args:
+        sources: JSON data files, merged in order
+        output: The string table to write
+
+    Returns:
+        The number of entries written
+    """
+    merged = _merge_sources(sources)
+    with open(output, "wb") as f:
+        writer = StringTableWriter(f, {"version": CACHE_VERSION})
+        for key, entries in merged.items():
+            writer.add_category(key, entries)
+        writer.close()
+    return sum(len(entries) for entries in merged.values())
+
+
+def choose_across(categories: Mapping) -> Any:
+    """
+    Pick one entry uniformly from all categories of a section.
+
+    Unlike flattening the section into a list first, this reads only the
+    entry that is chosen.
+
+    Args:
+        categories: A mapping from category to entries
+
+    Returns:
+        The chosen entry
+
+    Raises:
+        IndexError: If the section is empty, as ``random.choice`` does
+    """
+    sizes = [(entries, len(entries)) for entries in categories.values()]
+    total = sum(size for _, size in sizes)
+    if not total:
+        raise IndexError("cannot choose from an empty section")
+    index = random.randrange(total)
+    for entries, size in sizes:
+        if index < size:
+            return entries[index]
+        index -= size
+
+
+_corpora: Dict[str, Corpus] = {}
+
+
+def load_corpus(name: str) -> Corpus:
+    """
+    Get the shared instance of a corpus.
+
+    Args:
+        name: The corpus name
+
+    Returns:
+        The corpus, shared by every agent in this process
+    """
+    if name not in _corpora:
+        _corpora[name] = Corpus(name)
+    return _corpora[name]
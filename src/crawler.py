@@ -0,0 +1,258 @@
+"""
+The Crawler - Reading a whole tree while the network catches its breath.
+
+On network file systems, opening a file takes far longer than analyzing
+it, so reading a tree one file at a time leaves the CPU idle. This module
+overlaps the two. A prefetching thread lists directories with
+``os.scandir`` and reads files on a pool of reader threads, keeping a
+bounded number of reads in flight, and hands the contents to the analysis
+through a bounded queue. The readers wait on I/O and the analysis workers
+use the CPU, so each is tuned on its own.
+"""
+
+import os
+import queue
+import threading
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from dataclasses import dataclass
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+
+from .existential_coder import ContemplationLevel, ExistentialCoder
+from .scan import DEFAULT_EXTENSIONS, FileResult, IgnoreTree, read_source
+from .utils import analyze_code_complexity, calculate_code_karma
+
+
+DEFAULT_READERS = 8
+DEFAULT_IN_FLIGHT = 32
+DEFAULT_QUEUE_SIZE = 64
+
+# Why a file that could not be opened was not read
+UNREADABLE = "unreadable"
+
+# How often a blocked thread checks whether the crawl was abandoned, in seconds
+_STOP_CHECK_INTERVAL = 0.1
+
+_DONE = object()
+
+
+@dataclass
+class SourceFile:
+    """A file found by the crawler, with its contents unless it was skipped."""
+    path: str
+    code: Optional[str]
+    skipped: Optional[str] = None
+
+
+def _list_directory(tree: IgnoreTree, directory: str, parts: List[str],
+                    extensions: Tuple[str, ...]) -> Tuple[List[Tuple[str, List[str]]], List[str]]:
+    """
+    List a directory in a single ``os.scandir`` pass.
+
+    Returns:
+        The subdirectories to enter, as ``(path, parts)``, and the files to read
+    """
+    subdirectories = []
+    files = []
+    try:
+        with os.scandir(directory) as entries:
+            for entry in entries:
+                try:
+                    if entry.is_dir(follow_symlinks=False):
+                        if not tree.decide(parts + [entry.name], True):
+                            subdirectories.append((entry.path, parts + [entry.name]))
+                    elif entry.name.endswith(extensions) and entry.is_file():
+                        if not tree.decide(parts + [entry.name], False):
+                            files.append(entry.path)
+                except OSError:
+                    continue
+    except OSError:
+        pass
+    return subdirectories, files
+
+
+def _read_file(path: str) -> SourceFile:
+    try:
+        code, skipped = read_source(path)
+    except OSError:
+        return SourceFile(path, None, UNREADABLE)
+    return SourceFile(path, code, skipped)
+
+
+def _put(channel: queue.Queue, item: Any, stop: threading.Event) -> bool:
+    """Put an item on a bounded queue, giving up if the crawl is abandoned."""
+    while not stop.is_set():
+        try:
+            channel.put(item, timeout=_STOP_CHECK_INTERVAL)
+            return True
+        except queue.Full:
+            continue
+    return False
+
+
+class Crawler:
+    """
+    Lists and reads every source file of a tree, many files at a time.
+
+    Iterating yields a ``SourceFile`` for each file as soon as it has been
+    read, in no particular order. Files that are binary, minified,
+    generated, oversized or unreadable are yielded with ``code`` set to None
+    and the reason in ``skipped``; files excluded by ignore rules are not
+    yielded at all.
+    """
+
+    def __init__(self, root: str, extensions: Sequence[str] = DEFAULT_EXTENSIONS,
+                 readers: int = DEFAULT_READERS, max_in_flight: int = DEFAULT_IN_FLIGHT,
+                 queue_size: int = DEFAULT_QUEUE_SIZE):
+        """
+        Prepare a crawl.
+
+        Args:
+            root: The directory to crawl
+            extensions: The file extensions to read
+            readers: How many threads open and read files at once
+            max_in_flight: How many directory listings and reads may be
+                pending at once
+            queue_size: How many read files may wait for the consumer
+        """
+        self.root = root
+        self.extensions = tuple(extensions)
+        self.readers = max(1, readers)
+        self.max_in_flight = max(1, max_in_flight)
+        self.queue_size = max(1, queue_size)
+
+    def __iter__(self) -> Iterator[SourceFile]:
+        channel: queue.Queue = queue.Queue(maxsize=self.queue_size)
+        stop = threading.Event()
+        errors: List[BaseException] = []
+        prefetcher = threading.Thread(target=self._prefetch, args=(channel, stop, errors),
+                                      name="gith-ub-prefetch", daemon=True)
+        prefetcher.start()
+        try:
+            while True:
+                item = channel.get()
+                if item is _DONE:
+                    break
+                yield item
+        finally:
+            stop.set()
+            prefetcher.join()
+        if errors:
+            raise errors[0]
+
+    def _prefetch(self, channel: queue.Queue, stop: threading.Event, errors: List[BaseException]) -> None:
+        """List and read the tree on the reader pool, passing files to ``channel``."""
+        tree = IgnoreTree(self.root)
+        directories = deque([(self.root, [])])
+        files: deque = deque()
+        # Each pending future, and whether it is a listing rather than a read
+        pending: Dict[Future, bool] = {}
+        listings = 0
+        # Reads are preferred, but listings keep a share of the slots so that
+        # the next directory is known before the current one is read
+        max_listings = max(1, self.max_in_flight // 4)
+        try:
+            with ThreadPoolExecutor(max_workers=self.readers, thread_name_prefix="gith-ub-reader") as pool:
+                while directories or files or pending:
+                    while len(pending) < self.max_in_flight and (directories or files):
+                        if directories and (listings < max_listings or not files):
+                            directory, parts = directories.popleft()
+                            pending[pool.submit(_list_directory, tree, directory, parts, self.extensions)] = True
+                            listings += 1
+                        else:
+                            pending[pool.submit(_read_file, files.popleft())] = False
+
+                    done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        if pending.pop(future):
+                            listings -= 1
+                            subdirectories, found = future.result()
+                            directories.extend(subdirectories)
+                            files.extend(found)
+                        elif not _put(channel, future.result(), stop):
+                            # Abandoned; reads that have not started are dropped
+                            for waiting in pending:
+                                waiting.cancel()
+                            return
+        except BaseException as error:
+            errors.append(error)
+        finally:
+            _put(channel, _DONE, stop)
+
+
+def analyze_tree(root: str, level: ContemplationLevel = ContemplationLevel.DEEP,
+                 extensions: Sequence[str] = DEFAULT_EXTENSIONS, readers: int = DEFAULT_READERS,
+                 workers: int = 1, max_in_flight: int = DEFAULT_IN_FLIGHT,
+                 queue_size: int = DEFAULT_QUEUE_SIZE) -> Iterator[FileResult]:
+    """
+    Analyze every source file of a tree, reading ahead of the analysis.
+
+    Args:
+        root: The directory to analyze
+        level: The contemplation level of the analysis
+        extensions: The file extensions to analyze
+        readers: How many threads read files at once
+        workers: How many threads analyze files at once; with 1, files are
+            analyzed by the caller
+        max_in_flight: How many directory listings and reads may be pending at once
+        queue_size: How many read files may wait to be analyzed
+
+    Returns:
+        The result of each file that was read, in no particular order
+    """
+    coder = ExistentialCoder(level)
+    crawler = Crawler(root, extensions, readers, max_in_flight, queue_size)
+
+    def contemplate(source: SourceFile) -> FileResult:
+        code = source.code
+        return FileResult(source.path, coder.analyze_code(code, source.path),
+                          calculate_code_karma(code), analyze_code_complexity(code))
+
+    sources = iter(crawler)
+    if workers <= 1:
+        for source in sources:
+            if source.code is not None:
+                yield contemplate(source)
+        return
+
+    # Workers take turns drawing from the crawler and pass their results back
+    # through another bounded queue
+    results: queue.Queue = queue.Queue(maxsize=queue_size)
+    stop = threading.Event()
+    lock = threading.Lock()
+    errors: List[BaseException] = []
+
+    def work() -> None:
+        try:
+            while not stop.is_set():
+                with lock:
+                    source = next(sources, None)
+                if source is None:
+                    break
+                if source.code is not None and not _put(results, contemplate(source), stop):
+                    break
+        except BaseException as error:
+            errors.append(error)
+        finally:
+            _put(results, _DONE, stop)
+
+    threads = [threading.Thread(target=work, name=f"gith-ub-worker-{index}", daemon=True)
+               for index in range(workers)]
+    for thread in threads:
+        thread.start()
+    running = len(threads)
+    try:
+        while running:
+            result = results.get()
+            if result is _DONE:
+                running -= 1
+            else:
+                yield result
+    finally:
+        stop.set()
+        for thread in threads:
+            thread.join()
+        with lock:
+            sources.close()
+    if errors:
+        raise errors[0]
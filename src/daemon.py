@@ -0,0 +1,218 @@
+"""
+The Daemon - An ever-present companion waiting in the background.
+
+This module keeps warm agents resident behind a Unix domain socket so that
+the thin client in ``client.py`` can answer commands without paying for
+interpreter start-up, imports, and corpus construction on every call.
+"""
+
+import io
+import json
+import os
+import signal
+import socket
+import socketserver
+import threading
+from typing import Any, Callable, Dict, Optional
+
+from rich.console import Console
+
+from .client import ANALYZE_MAX_INSIGHTS, ANALYZE_TIMEOUT, default_socket_path, send_request
+from .existential_coder import ExistentialCoder, ContemplationLevel
+from .generator import GENERATOR_SOURCES, load_generator
+from .oracle import Oracle
+from .philosopher_agent import PhilosopherAgent
+from .search_index import SearchIndex
+from .zen_master import ZenMaster
+
+
+MAX_REQUEST_BYTES = 1024 * 1024
+
+
+class WarmAgents:
+    """The agents kept awake between requests."""
+
+    def __init__(self) -> None:
+        """Awaken every agent once, so requests never have to."""
+        self.coders = {level: ExistentialCoder(level) for level in ContemplationLevel}
+        self.oracle = Oracle()
+        self.zen_master = ZenMaster()
+        self.philosopher = PhilosopherAgent()
+        self.search_index = SearchIndex()
+        self.generators = {kind: load_generator(kind) for kind in GENERATOR_SOURCES}
+
+
+def _render(request: Dict[str, Any], draw: Callable[[Console], None]) -> str:
+    """Render output the way the CLI would, but into a string for the client."""
+    from . import cli
+
+    buffer = io.StringIO()
+    out = Console(
+        file=buffer,
+        width=int(request.get("width") or 80),
+        force_terminal=bool(request.get("color")),
+        color_system="truecolor" if request.get("color") else None,
+    )
+    cli.render_welcome(out)
+    draw(out)
+    return buffer.getvalue()
+
+
+def handle_request(agents: WarmAgents, request: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Answer a single client request using the warm agents.
+
+    Args:
+        agents: The resident agents
+        request: The decoded request sent by the client
+
+    Returns:
+        The response to send back to the client
+    """
+    from . import cli
+
+    command = request.get("command")
+    args = request.get("args") or {}
+
+    if command == "ping":
+        return {"ok": True, "output": ""}
+
+    if command == "ask":
+        question = str(args["question"])
+        response = agents.oracle.consult(question)
+        output = _render(request, lambda out: cli.render_oracle_response(out, question, response))
+        return {"ok": True, "output": output}
+
+    if command == "commit":
+        changes = [str(change) for change in args.get("changes") or []] or ["Made some changes"]
+        message = agents.coders[ContemplationLevel.DEEP].generate_commit_message(changes)
+        output = _render(request, lambda out: cli.render_commit_message(out, message))
+        return {"ok": True, "output": output}
+
+    if command == "analyze":
+        level = str(args.get("level", "deep"))
+        file_path = str(args["file_path"])
+        coder = agents.coders[ContemplationLevel(level)]
+        max_insights = max(1, int(args.get("max_insights", ANALYZE_MAX_INSIGHTS)))
+        timeout = max(0.0, float(args.get("timeout", ANALYZE_TIMEOUT)))
+        skipped = []
+
+        def draw(out: Console) -> None:
+            skipped.append(cli.contemplate_file(out, coder, file_path, level, max_insights, timeout,
+                                                source_path=str(args["absolute_path"])))
+
+        output = _render(request, draw)
+        return {"ok": True, "output": output, "skipped": skipped[0]}
+
+    if command == "search":
+        query = " ".join(str(term) for term in args.get("terms") or [])
+        results = agents.search_index.search(query, int(args.get("limit", 10)))
+        output = _render(request, lambda out: cli.render_search_results(out, query, results))
+        return {"ok": True, "output": output}
+
+    if command == "generate":
+        kind = str(args.get("kind", "wisdom")).lower()
+        sentences = agents.generators[kind].sample(int(args.get("count", 1)))
+        output = _render(request, lambda out: cli.render_generated(out, kind, sentences))
+        return {"ok": True, "output": output}
+
+    return {"ok": False, "error": f"Unknown command: {command}"}
+
+
+class _RequestHandler(socketserver.StreamRequestHandler):
+    """Reads one JSON request line and writes one JSON response."""
+
+    server: "DaemonServer"
+
+    def handle(self) -> None:
+        line = self.rfile.readline(MAX_REQUEST_BYTES)
+        try:
+            request = json.loads(line)
+            if request.get("command") == "shutdown":
+                response: Dict[str, Any] = {"ok": True, "output": ""}
+                threading.Thread(target=self.server.shutdown, daemon=True).start()
+            else:
+                response = handle_request(self.server.agents, request)
+        except Exception as e:
+            # Errors fall back to the full CLI, which reports them properly
+            response = {"ok": False, "error": str(e)}
+
+        self.wfile.write(json.dumps(response).encode("utf-8"))
+
+
+class DaemonServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    """A threaded Unix socket server holding a set of warm agents."""
+
+    daemon_threads = True
+
+    def __init__(self, socket_path: str, agents: Optional[WarmAgents] = None) -> None:
+        """
+        Bind the daemon to its socket.
+
+        Args:
+            socket_path: The path of the Unix domain socket
+            agents: Pre-built agents, created on demand if omitted
+        """
+        self.socket_path = socket_path
+        self.agents = agents or WarmAgents()
+        _remove_stale_socket(socket_path)
+        super().__init__(socket_path, _RequestHandler)
+        os.chmod(socket_path, 0o600)
+
+    def server_close(self) -> None:
+        super().server_close()
+        try:
+            os.unlink(self.socket_path)
+        except FileNotFoundError:
+            pass
+
+
+def _remove_stale_socket(socket_path: str) -> None:
+    """Remove a socket left behind by a daemon that did not exit cleanly."""
+    if not os.path.exists(socket_path):
+        return
+
+    probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        probe.connect(socket_path)
+    except OSError:
+        os.unlink(socket_path)
+    else:
+        raise RuntimeError(f"A daemon is already listening on {socket_path}")
+    finally:
+        probe.close()
+
+
+def serve(socket_path: Optional[str] = None) -> None:
+    """
+    Run the daemon in the foreground until interrupted.
+
+    Args:
+        socket_path: The socket to listen on, defaults to ``default_socket_path()``
+    """
+    server = DaemonServer(socket_path or default_socket_path())
+
+    def _terminate(signum: int, frame: Any) -> None:
+        threading.Thread(target=server.shutdown, daemon=True).start()
+
+    signal.signal(signal.SIGTERM, _terminate)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+def stop_daemon(socket_path: Optional[str] = None) -> bool:
+    """
+    Ask a running daemon to shut down.
+
+    Args:
+        socket_path: The socket the daemon listens on
+
+    Returns:
+        True if a daemon acknowledged the request
+    """
+    response = send_request({"command": "shutdown"}, socket_path)
+    return bool(response and response.get("ok"))
@@ -0,0 +1,244 @@
+"""
+The Diff Stream - Reading the intent of a change before it is committed.
+
+This module classifies the staged changes of a repository into the types of
+change that ``ExistentialCoder`` writes commit messages for. The output of
+``git diff --cached`` is read as a stream, one bounded line at a time, and
+only counters are kept, so a gigabyte-sized diff from a vendored dependency
+bump costs no more memory than a one-line fix. A watchdog stops git when
+the time budget runs out, so a commit hook is never held up; the summary
+then describes the part of the diff that was read.
+"""
+
+import re
+import signal
+import subprocess
+import tempfile
+import threading
+import time
+from dataclasses import dataclass
+from typing import BinaryIO, Callable, Optional, Sequence, Tuple, TypeVar
+
+
+DEFAULT_TIMEOUT = 2.0
+
+T = TypeVar("T")
+
+# Longer lines are read in pieces; only the first piece is inspected
+MAX_LINE_BYTES = 64 * 1024
+
+# Added lines per file searched for fix-like keywords; the rest are only counted
+MAX_SCANNED_LINES = 200
+
+TEST_PATH = re.compile(r"(^|/)(tests?|spec|__tests__)/|(^|/)test_[^/]*$|_test\.\w+$|\.(spec|test)\.\w+$")
+DOC_PATH = re.compile(r"(^|/)docs?/|\.(md|rst|adoc|txt)$|(^|/)(README|CHANGELOG|CONTRIBUTING)[^/]*$",
+                      re.IGNORECASE)
+FIX_KEYWORDS = re.compile(rb"\b(fix(es|ed)?|bug|issue|error|crash|workaround|regression)\b", re.IGNORECASE)
+
+
+class DiffError(RuntimeError):
+    """Raised when git cannot provide the diff being read."""
+
+
+@dataclass
+class DiffSummary:
+    """Counters describing a diff."""
+    files: int = 0
+    added_files: int = 0
+    removed_files: int = 0
+    renamed_files: int = 0
+    test_files: int = 0
+    doc_files: int = 0
+    added_lines: int = 0
+    removed_lines: int = 0
+    fix_mentions: int = 0
+    bytes_read: int = 0
+    complete: bool = True
+
+    def classify(self) -> str:
+        """
+        Decide the type of change the diff represents.
+
+        Returns:
+            One of the change types of ``ExistentialCoder._classify_changes``
+        """
+        if not self.files:
+            return "general"
+        if self.doc_files == self.files:
+            return "docs"
+        if self.test_files == self.files:
+            return "test"
+        if self.renamed_files * 2 >= self.files:
+            return "refactor"
+        if self.fix_mentions:
+            return "fix"
+        if self.added_files:
+            return "feature"
+        if self.removed_lines > 2 * self.added_lines:
+            return "refactor"
+        return "general"
+
+    def describe(self) -> str:
+        """A one-line description of the diff."""
+        description = f"{self.files} files, +{self.added_lines} -{self.removed_lines}"
+        if not self.complete:
+            description += f" (read the first {self.bytes_read} bytes)"
+        return description
+
+
+class _FileState:
+    """What is known about the file currently being read."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.scanned = 0
+        # Whether the headers are over; after the first ``@@`` every line is content
+        self.in_hunk = False
+
+
+def _finish_file(summary: DiffSummary, state: Optional[_FileState]) -> None:
+    if state is None:
+        return
+    summary.files += 1
+    if TEST_PATH.search(state.path):
+        summary.test_files += 1
+    elif DOC_PATH.search(state.path):
+        summary.doc_files += 1
+
+
+def _path_after(line: bytes, prefix: bytes) -> str:
+    return line[len(prefix):].rstrip(b"\r\n").decode("utf-8", errors="replace")
+
+
+def summarize_diff(stream: BinaryIO, deadline: Optional[float] = None) -> DiffSummary:
+    """
+    Summarize a unified git diff read from a stream.
+
+    Args:
+        stream: The diff, as bytes
+        deadline: A ``time.monotonic()`` value after which reading stops
+
+    Returns:
+        The summary; ``complete`` is False if the deadline cut it short
+    """
+    summary = DiffSummary()
+    state: Optional[_FileState] = None
+    continued = False
+    readline = stream.readline
+
+    while True:
+        line = readline(MAX_LINE_BYTES)
+        if not line:
+            break
+        summary.bytes_read += len(line)
+        if continued:
+            # The rest of a line that was too long to inspect
+            continued = not line.endswith(b"\n")
+            continue
+        continued = not line.endswith(b"\n")
+
+        first = line[:1]
+        if state is not None and state.in_hunk:
+            if first == b"+":
+                summary.added_lines += 1
+                if state.scanned < MAX_SCANNED_LINES:
+                    state.scanned += 1
+                    if FIX_KEYWORDS.search(line):
+                        summary.fix_mentions += 1
+                continue
+            if first == b"-":
+                summary.removed_lines += 1
+                continue
+            if first != b"d" or not line.startswith(b"diff --git "):
+                continue
+
+        if line.startswith(b"diff --git "):
+            _finish_file(summary, state)
+            state = _FileState(_path_after(line, b"diff --git ").rsplit(" b/", 1)[-1])
+            if deadline is not None and time.monotonic() > deadline:
+                summary.complete = False
+                return summary
+        elif state is None:
+            continue
+        elif line.startswith(b"@@"):
+            state.in_hunk = True
+        elif line.startswith(b"+++ b/"):
+            state.path = _path_after(line, b"+++ b/")
+        elif line.startswith(b"new file mode"):
+            summary.added_files += 1
+        elif line.startswith(b"deleted file mode"):
+            summary.removed_files += 1
+        elif line.startswith(b"rename to "):
+            summary.renamed_files += 1
+            state.path = _path_after(line, b"rename to ")
+
+    _finish_file(summary, state)
+    return summary
+
+
+def read_staged_diff(consume: Callable[[BinaryIO, float], T], repo: str = ".",
+                     timeout: float = DEFAULT_TIMEOUT, options: Sequence[str] = ()) -> Tuple[T, bool]:
+    """
+    Stream the staged diff of a repository into a reader, within a time budget.
+
+    Args:
+        consume: Reads the diff; called with the stream and a ``time.monotonic()`` deadline
+        repo: The path of the repository
+        timeout: The most time to spend, in seconds
+        options: Extra options for ``git diff``
+
+    Returns:
+        The reader's result, and whether git was stopped before it finished
+
+    Raises:
+        DiffError: If git cannot produce the diff
+    """
+    # git's errors go to a file, so a chatty stderr cannot fill a pipe that
+    # nobody reads until stdout is drained
+    with tempfile.TemporaryFile() as errors:
+        process = subprocess.Popen(
+            ["git", "-C", repo, "diff", "--cached", "--no-color", "--no-ext-diff", *options],
+            stdout=subprocess.PIPE,
+            stderr=errors,
+        )
+        # Killing git ends a read that is blocked waiting for output
+        watchdog = threading.Timer(timeout, process.kill)
+        watchdog.start()
+        try:
+            result = consume(process.stdout, time.monotonic() + timeout)
+            # If the reader stopped early, git fails writing into the closed pipe
+            process.stdout.close()
+            returncode = process.wait()
+        finally:
+            watchdog.cancel()
+            if process.poll() is None:
+                process.kill()
+                process.wait()
+            process.stdout.close()
+        errors.seek(0)
+        error = errors.read().decode("utf-8", errors="replace").strip()
+
+    stopped = returncode in (-signal.SIGKILL, -signal.SIGPIPE, 128 + signal.SIGPIPE)
+    if returncode and not stopped:
+        raise DiffError(error or "git diff failed")
+    return result, stopped
+
+
+def summarize_staged(repo: str = ".", timeout: float = DEFAULT_TIMEOUT) -> DiffSummary:
+    """
+    Summarize the changes staged for the next commit.
+
+    Args:
+        repo: The path of the repository
+        timeout: The most time to spend, in seconds
+
+    Returns:
+        The summary; ``complete`` is False if the time ran out
+
+    Raises:
+        DiffError: If git cannot produce the diff
+    """
+    summary, stopped = read_staged_diff(summarize_diff, repo, timeout, ["--find-renames"])
+    if stopped:
+        summary.complete = False
+    return summary
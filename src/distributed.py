@@ -0,0 +1,480 @@
+"""
+The Distributed Mind - Many machines contemplating one corpus.
+
+This module shards the analysis of a large set of files over worker
+processes on any number of machines. A coordinator owns the list of files
+and hands them out in shards over TCP. The protocol is the daemon's:
+one JSON request per line, one JSON response per line, but a worker keeps
+its connection open for the whole session.
+
+Every shard is leased rather than given away. A worker renews its lease
+with each result it streams back, and a lease that runs out, because its
+worker died or hung, returns its unfinished files to the queue to be
+retried elsewhere, up to a fixed number of attempts. Workers read the
+files themselves, so every machine must see them at the same paths, for
+example on a shared file system. The coordinator trusts its workers and
+its workers trust the coordinator; keep both on a private network.
+"""
+
+import json
+import os
+import socket
+import socketserver
+import threading
+import time
+import uuid
+from collections import deque
+from dataclasses import asdict, dataclass, field
+from typing import Any, Callable, Deque, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from .existential_coder import CodeInsight, ContemplationLevel, ExistentialCoder
+from .history import METRICS
+from .scan import DEFAULT_EXTENSIONS, FileResult, read_source, walk_files
+from .utils import analyze_code_complexity, calculate_code_karma
+
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 7878
+DEFAULT_SHARD_SIZE = 32
+DEFAULT_LEASE_SECONDS = 30.0
+DEFAULT_MAX_ATTEMPTS = 3
+
+MAX_MESSAGE_BYTES = 64 * 1024 * 1024
+
+# How long a worker waits before asking again when every shard is leased out
+DEFAULT_RETRY_INTERVAL = 0.5
+
+# How long a worker keeps trying to reach a coordinator that is not up yet
+DEFAULT_CONNECT_TIMEOUT = 10.0
+
+
+class DistributedError(RuntimeError):
+    """Raised when a worker and its coordinator cannot understand each other."""
+
+
+@dataclass
+class Lease:
+    """A shard of files handed to one worker until ``expires``."""
+    id: str
+    worker: str
+    expires: float
+    # Each unfinished file and how many leases it has been part of
+    files: Dict[str, int] = field(default_factory=dict)
+
+
+@dataclass
+class Totals:
+    """The merged metrics of every file analyzed so far."""
+    metrics: Dict[str, int] = field(default_factory=lambda: dict.fromkeys(METRICS, 0))
+    insights: int = 0
+    incomplete: int = 0
+
+    def add(self, result: FileResult, complete: bool = True) -> None:
+        """Merge the result of one file."""
+        self.metrics["files"] += 1
+        self.metrics["karma"] += result.karma
+        for name in METRICS[2:]:
+            self.metrics[name] += result.complexity.get(name, 0)
+        self.insights += len(result.insights)
+        if not complete:
+            self.incomplete += 1
+
+
+def encode_result(result: FileResult, complete: bool = True) -> Dict[str, Any]:
+    """Turn the result of one file into JSON-serializable form."""
+    insights = []
+    for insight in result.insights:
+        encoded = asdict(insight)
+        encoded["contemplation_level"] = insight.contemplation_level.value
+        insights.append(encoded)
+    return {"path": result.path, "insights": insights, "karma": result.karma,
+            "complexity": result.complexity, "complete": complete}
+
+
+def decode_result(message: Dict[str, Any]) -> Tuple[FileResult, bool]:
+    """
+    Rebuild the result of one file sent by a worker.
+
+    Returns:
+        The result, and whether the analysis covered the whole file
+    """
+    insights = [CodeInsight(insight["question"], insight["wisdom"],
+                            ContemplationLevel(insight["contemplation_level"]), insight.get("line_number"))
+                for insight in message.get("insights", ())]
+    result = FileResult(message["path"], insights, message.get("karma", 0), message.get("complexity") or {})
+    return result, bool(message.get("complete", True))
+
+
+class WorkQueue:
+    """
+    The files of a distributed analysis, their leases and their results.
+
+    All methods are thread-safe. Expired leases are reclaimed whenever a
+    worker asks for work, so no background thread is needed.
+    """
+
+    def __init__(self, paths: Iterable[str], shard_size: int = DEFAULT_SHARD_SIZE,
+                 lease_seconds: float = DEFAULT_LEASE_SECONDS, max_attempts: int = DEFAULT_MAX_ATTEMPTS,
+                 on_result: Optional[Callable[[FileResult, bool], None]] = None,
+                 clock: Callable[[], float] = time.monotonic):
+        """
+        Prepare the queue.
+
+        Args:
+            paths: The files to analyze
+            shard_size: How many files are leased at once
+            lease_seconds: How long a worker may go without reporting before
+                its shard is handed to another
+            max_attempts: How many leases a file may be part of before it is
+                given up on
+            on_result: Called with each new result and whether it is complete
+            clock: The time source, in seconds
+        """
+        self.shard_size = max(1, shard_size)
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max(1, max_attempts)
+        self.on_result = on_result
+        self.clock = clock
+        self.totals = Totals()
+        self.skipped: Dict[str, str] = {}
+        self.failed: Dict[str, str] = {}
+        self._pending: Deque[Tuple[str, int]] = deque((path, 0) for path in dict.fromkeys(paths))
+        self._remaining = len(self._pending)
+        self._finished: set = set()
+        self._leases: Dict[str, Lease] = {}
+        self._lock = threading.Lock()
+        self._done = threading.Event()
+        if not self._remaining:
+            self._done.set()
+
+    @property
+    def done(self) -> bool:
+        """Whether every file has a result or has been given up on."""
+        return self._done.is_set()
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        """Wait until every file has been dealt with."""
+        return self._done.wait(timeout)
+
+    def status(self) -> Dict[str, int]:
+        """Counts of files in each state."""
+        with self._lock:
+            return {"remaining": self._remaining, "pending": len(self._pending),
+                    "leased": sum(len(lease.files) for lease in self._leases.values()),
+                    "analyzed": self.totals.metrics["files"], "skipped": len(self.skipped),
+                    "failed": len(self.failed)}
+
+    def lease(self, worker: str) -> Optional[Lease]:
+        """
+        Lease a shard of files to a worker.
+
+        Args:
+            worker: The worker asking
+
+        Returns:
+            The lease, or None if every unfinished file is leased out already
+        """
+        with self._lock:
+            self._reclaim()
+            files: Dict[str, int] = {}
+            while self._pending and len(files) < self.shard_size:
+                path, attempts = self._pending.popleft()
+                if path not in self._finished:
+                    files[path] = attempts + 1
+            if not files:
+                return None
+            lease = Lease(uuid.uuid4().hex, worker, self.clock() + self.lease_seconds, files)
+            self._leases[lease.id] = lease
+            return lease
+
+    def _reclaim(self) -> None:
+        """Requeue the unfinished files of expired leases. Called with the lock held."""
+        now = self.clock()
+        for lease in [lease for lease in self._leases.values() if lease.expires < now]:
+            del self._leases[lease.id]
+            for path, attempts in lease.files.items():
+                if path in self._finished:
+                    # A late result, or another lease, already dealt with it
+                    continue
+                if attempts >= self.max_attempts:
+                    if self._finish(path):
+                        self.failed[path] = f"no result after {attempts} leases"
+                else:
+                    self._pending.append((path, attempts))
+
+    def _finish(self, path: str) -> bool:
+        """Mark a file as dealt with. Called with the lock held."""
+        if path in self._finished:
+            return False
+        self._finished.add(path)
+        self._remaining -= 1
+        if not self._remaining:
+            self._done.set()
+        return True
+
+    def _renew(self, lease_id: str, path: str) -> bool:
+        """Extend a lease and take a file off it. Called with the lock held."""
+        lease = self._leases.get(lease_id)
+        if lease is None:
+            return False
+        lease.files.pop(path, None)
+        lease.expires = self.clock() + self.lease_seconds
+        return True
+
+    def record(self, lease_id: str, result: FileResult, complete: bool = True) -> bool:
+        """
+        Record the result of a file, renewing its lease.
+
+        A late result from an expired lease is still kept if no other worker
+        has finished the file since.
+
+        Returns:
+            Whether the lease is still held
+        """
+        with self._lock:
+            held = self._renew(lease_id, result.path)
+            new = self._finish(result.path)
+            if new:
+                self.totals.add(result, complete)
+        if new and self.on_result:
+            self.on_result(result, complete)
+        return held
+
+    def skip(self, lease_id: str, path: str, reason: str) -> bool:
+        """Record that a file was not worth analyzing, renewing its lease."""
+        with self._lock:
+            held = self._renew(lease_id, path)
+            if self._finish(path):
+                self.skipped[path] = reason
+        return held
+
+    def fail(self, lease_id: str, path: str, error: str) -> bool:
+        """Record that a file could not be analyzed, renewing its lease."""
+        with self._lock:
+            held = self._renew(lease_id, path)
+            if self._finish(path):
+                self.failed[path] = error
+        return held
+
+    def release(self, lease_id: str) -> None:
+        """End a lease, returning any files the worker did not report to the queue."""
+        with self._lock:
+            lease = self._leases.pop(lease_id, None)
+            if lease is not None:
+                self._pending.extend(lease.files.items())
+
+
+def handle_message(work: WorkQueue, message: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Answer one message from a worker.
+
+    Args:
+        work: The coordinator's queue
+        message: The decoded message
+
+    Returns:
+        The response to send back
+    """
+    command = message.get("command")
+    lease_id = message.get("lease", "")
+
+    if command == "lease":
+        lease = work.lease(str(message.get("worker", "")))
+        if lease is not None:
+            return {"ok": True, "lease": lease.id, "files": list(lease.files),
+                    "lease_seconds": work.lease_seconds}
+        return {"ok": True, "files": [], "done": work.done}
+
+    if command == "result":
+        result, complete = decode_result(message["result"])
+        return {"ok": True, "held": work.record(lease_id, result, complete)}
+
+    if command == "skip":
+        return {"ok": True, "held": work.skip(lease_id, message["path"], str(message.get("reason")))}
+
+    if command == "fail":
+        return {"ok": True, "held": work.fail(lease_id, message["path"], str(message.get("error")))}
+
+    if command == "release":
+        work.release(lease_id)
+        return {"ok": True}
+
+    if command == "status":
+        return {"ok": True, "status": work.status(), "done": work.done}
+
+    return {"ok": False, "error": f"Unknown command: {command}"}
+
+
+class _WorkerHandler(socketserver.StreamRequestHandler):
+    """Answers the JSON messages of one worker connection, one per line."""
+
+    server: "CoordinatorServer"
+
+    def handle(self) -> None:
+        while True:
+            line = self.rfile.readline(MAX_MESSAGE_BYTES)
+            if not line:
+                return
+            try:
+                response = handle_message(self.server.work, json.loads(line))
+            except Exception as e:
+                response = {"ok": False, "error": str(e)}
+            self.wfile.write(json.dumps(response).encode("utf-8") + b"\n")
+
+
+class CoordinatorServer(socketserver.ThreadingMixIn, socketserver.TCPServer):
+    """A threaded TCP server handing out the shards of a ``WorkQueue``."""
+
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, work: WorkQueue, host: str = DEFAULT_HOST, port: int = DEFAULT_PORT):
+        """
+        Bind the coordinator.
+
+        Args:
+            work: The files to hand out
+            host: The address to listen on
+            port: The port to listen on, or 0 for any free port
+        """
+        self.work = work
+        super().__init__((host, port), _WorkerHandler)
+
+    @property
+    def port(self) -> int:
+        """The port the coordinator is listening on."""
+        return self.server_address[1]
+
+
+def list_files(paths: Iterable[str], extensions: Sequence[str] = DEFAULT_EXTENSIONS) -> List[str]:
+    """
+    List the files to distribute, as absolute paths.
+
+    Args:
+        paths: Files, or directories to search for files not excluded by ignore files
+        extensions: The file extensions to analyze within directories
+    """
+    files = []
+    for path in paths:
+        if os.path.isdir(path):
+            files.extend(os.path.abspath(name) for name in walk_files(path, extensions))
+        else:
+            files.append(os.path.abspath(path))
+    return files
+
+
+def coordinate(server: CoordinatorServer, timeout: Optional[float] = None) -> bool:
+    """
+    Serve workers until every file has been dealt with.
+
+    Args:
+        server: The bound coordinator
+        timeout: Give up after this many seconds
+
+    Returns:
+        True if every file was dealt with before the timeout
+    """
+    thread = threading.Thread(target=server.serve_forever, name="gith-ub-coordinator", daemon=True)
+    thread.start()
+    try:
+        return server.work.wait(timeout)
+    finally:
+        server.shutdown()
+        server.server_close()
+        thread.join()
+
+
+class _Connection:
+    """A worker's connection to the coordinator, one JSON message per line."""
+
+    def __init__(self, host: str, port: int, timeout: float):
+        deadline = time.monotonic() + timeout
+        while True:
+            try:
+                self._socket = socket.create_connection((host, port), timeout=max(timeout, 1.0))
+                break
+            except OSError:
+                if time.monotonic() > deadline:
+                    raise
+                time.sleep(0.1)
+        self._file = self._socket.makefile("rwb")
+
+    def send(self, message: Dict[str, Any]) -> Dict[str, Any]:
+        self._file.write(json.dumps(message).encode("utf-8") + b"\n")
+        self._file.flush()
+        line = self._file.readline(MAX_MESSAGE_BYTES)
+        if not line:
+            raise ConnectionError("The coordinator closed the connection")
+        response = json.loads(line)
+        if not response.get("ok"):
+            raise DistributedError(response.get("error", "The coordinator refused a message"))
+        return response
+
+    def close(self) -> None:
+        self._file.close()
+        self._socket.close()
+
+
+def run_worker(host: str = DEFAULT_HOST, port: int = DEFAULT_PORT,
+               level: ContemplationLevel = ContemplationLevel.DEEP, worker: Optional[str] = None,
+               connect_timeout: float = DEFAULT_CONNECT_TIMEOUT,
+               retry_interval: float = DEFAULT_RETRY_INTERVAL) -> int:
+    """
+    Lease shards from a coordinator and analyze them until none are left.
+
+    Each file's analysis is cut short at half the lease, so that a giant
+    file cannot cost the worker its lease.
+
+    Args:
+        host: The coordinator's address
+        port: The coordinator's port
+        level: The contemplation level of the analysis
+        worker: A name for this worker in the coordinator's leases
+        connect_timeout: How long to keep trying to reach the coordinator
+        retry_interval: How long to wait when every shard is leased out
+
+    Returns:
+        How many files this worker analyzed
+
+    Raises:
+        OSError: If the coordinator cannot be reached
+        DistributedError: If the coordinator refuses a message
+    """
+    worker = worker or f"{socket.gethostname()}:{os.getpid()}"
+    coder = ExistentialCoder(level)
+    connection = _Connection(host, port, connect_timeout)
+    analyzed = 0
+    try:
+        while True:
+            response = connection.send({"command": "lease", "worker": worker})
+            if not response["files"]:
+                if response.get("done"):
+                    return analyzed
+                time.sleep(retry_interval)
+                continue
+
+            lease_id = response["lease"]
+            budget = response["lease_seconds"] / 2
+            for path in response["files"]:
+                try:
+                    code, skipped = read_source(path)
+                except OSError as e:
+                    connection.send({"command": "fail", "lease": lease_id, "path": path, "error": str(e)})
+                    continue
+                if code is None:
+                    connection.send({"command": "skip", "lease": lease_id, "path": path, "reason": skipped})
+                    continue
+                insights = coder.analyze_code(code, path, deadline=time.monotonic() + budget)
+                result = FileResult(path, list(insights), calculate_code_karma(code), analyze_code_complexity(code))
+                held = connection.send({"command": "result", "lease": lease_id,
+                                        "result": encode_result(result, insights.complete)})["held"]
+                analyzed += 1
+                if not held:
+                    # The shard has been handed to another worker
+                    break
+            connection.send({"command": "release", "lease": lease_id})
+    except ConnectionError:
+        # The coordinator stops listening once every file has been dealt with
+        return analyzed
+    finally:
+        connection.close()
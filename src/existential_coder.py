@@ -5,11 +5,32 @@ This module contains the main class that provides existential guidance
 and philosophical insights for developers.
 """
 
+import functools
+import io
 import random
-from typing import List, Dict, Any, Optional
+import re
+import time
+import tokenize
+from collections.abc import Callable, Iterable, Iterator, Mapping, Sequence
+from typing import List, Dict, Any, Optional, Tuple
 from dataclasses import dataclass
 from enum import Enum
 
+from .corpus import load_corpus
+
+
+# How much is read between checks of the deadline
+DEADLINE_CHECK_LINES = 1024
+DEADLINE_CHECK_TOKENS = 8192
+
+# How many distinct lines have their classification remembered, and the
+# longest line worth remembering
+LINE_MEMO_SIZE = 65536
+MEMO_MAX_LINE_LENGTH = 256
+
+# The constructs a line may hold, ranked by precedence
+_FUNCTION, _CONDITION, _LOOP, _ASSIGNMENT, _ERROR = range(5)
+
 
 class ContemplationLevel(Enum):
     """Levels of existential contemplation."""
@@ -18,6 +39,12 @@ class ContemplationLevel(Enum):
     COSMIC = "cosmic"    # Questions about the nature of existence
 
 
+class AnalysisEngine(Enum):
+    """Ways of reading code for constructs to contemplate."""
+    LINES = "lines"    # Search the raw text of each line
+    TOKENS = "tokens"  # Tokenize the whole file once, ignoring strings and comments
+
+
 @dataclass
 class CodeInsight:
     """A philosophical insight about code."""
@@ -27,6 +54,76 @@ class CodeInsight:
     line_number: Optional[int] = None
 
 
+def _classify_stripped(line: str) -> Optional[int]:
+    """The rank of the construct of highest precedence in a stripped line, if any."""
+    if not line or line.startswith('#'):
+        return None
+    
+    # Analyze different code patterns
+    if 'def ' in line:
+        return _FUNCTION
+    elif 'if ' in line or 'elif ' in line:
+        return _CONDITION
+    elif 'for ' in line or 'while ' in line:
+        return _LOOP
+    elif '=' in line and not '==' in line:
+        return _ASSIGNMENT
+    elif 'except' in line or 'raise' in line:
+        return _ERROR
+    return None
+
+
+_classify_memoized = functools.lru_cache(maxsize=LINE_MEMO_SIZE)(_classify_stripped)
+
+
+@dataclass
+class LineMemoStats:
+    """How well the memo of line classifications is doing."""
+    hits: int
+    misses: int
+    size: int
+    max_size: int
+    
+    @property
+    def hit_rate(self) -> float:
+        """The share of lookups answered from the memo."""
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+
+def line_memo_stats() -> LineMemoStats:
+    """Report the hits, misses and size of the memo of line classifications."""
+    info = _classify_memoized.cache_info()
+    return LineMemoStats(info.hits, info.misses, info.currsize, info.maxsize)
+
+
+def clear_line_memo() -> None:
+    """Forget every remembered line classification, and the statistics."""
+    _classify_memoized.cache_clear()
+
+
+class InsightList(list):
+    """
+    The insights found in a piece of code, and how much of it was read.
+    
+    It is a plain list of CodeInsight objects; the attributes tell whether
+    the analysis ran to the end and how many insights were left out.
+    """
+    
+    def __init__(self, insights: Iterable[CodeInsight] = (), complete: bool = True,
+                 lines_analyzed: int = 0, total_lines: int = 0, insights_found: int = 0):
+        super().__init__(insights)
+        self.complete = complete
+        self.lines_analyzed = lines_analyzed
+        self.total_lines = total_lines
+        self.insights_found = insights_found
+    
+    @property
+    def sampled(self) -> bool:
+        """Whether only a sample of the line insights found was kept."""
+        return self.insights_found > sum(1 for insight in self if insight.line_number is not None)
+
+
 class ExistentialCoder:
     """
     The main class that provides existential guidance for developers.
@@ -35,79 +132,103 @@ class ExistentialCoder:
     philosophical implications and existential meaning.
     """
     
-    def __init__(self, contemplation_level: ContemplationLevel = ContemplationLevel.DEEP):
+    # Keywords for each type of change, in order of precedence
+    _CHANGE_PATTERNS = [
+        ("refactor", re.compile("refactor|restructure|reorganize")),
+        ("fix", re.compile("fix|bug|issue|error")),
+        ("feature", re.compile("add|new|feature|implement")),
+        ("docs", re.compile("doc|readme|comment|explain")),
+        ("test", re.compile("test|spec|verify|validate")),
+    ]
+    
+    # The rank of each construct's keyword
+    _KEYWORD_RANKS = {
+        "def": _FUNCTION,
+        "if": _CONDITION, "elif": _CONDITION,
+        "for": _LOOP, "while": _LOOP,
+        "except": _ERROR, "raise": _ERROR,
+    }
+    _ASSIGNMENT_OPERATORS = frozenset({
+        ":=", "+=", "-=", "*=", "/=", "//=", "%=", "**=", "@=", "&=", "|=", "^=", ">>=", "<<=",
+    })
+    _OPENING_BRACKETS = frozenset("([{")
+    _CLOSING_BRACKETS = frozenset(")]}")
+    
+    def __init__(self, contemplation_level: ContemplationLevel = ContemplationLevel.DEEP,
+                 engine: AnalysisEngine = AnalysisEngine.LINES):
         """Initialize the existential coder."""
         self.contemplation_level = contemplation_level
+        self.engine = engine
         self.philosophical_questions = self._load_philosophical_questions()
         self.wisdom_quotes = self._load_wisdom_quotes()
+        self.commit_templates = self._load_commit_templates()
+        self._question_pools: Dict[str, Sequence[str]] = {}
     
-    def _load_philosophical_questions(self) -> Dict[str, List[str]]:
+    def _load_philosophical_questions(self) -> Mapping[str, Sequence[str]]:
         """Load philosophical questions for different code patterns."""
-        return {
-            "variables": [
-                "What does this variable represent in the grand scheme of things?",
-                "Is this variable truly necessary, or are we just creating digital noise?",
-                "What would this variable say if it could speak?",
-                "Are we naming things to understand them, or to control them?",
-            ],
-            "functions": [
-                "What is the purpose of this function in the cosmic order?",
-                "Does this function serve the greater good, or just our immediate needs?",
-                "What would happen if this function never existed?",
-                "Are we creating solutions or just moving problems around?",
-            ],
-            "loops": [
-                "Is this loop a metaphor for the cycles of life?",
-                "What are we really iterating over - data or our own limitations?",
-                "Does this loop have an end, or are we trapped in eternal repetition?",
-                "Are we the loop, or is the loop us?",
-            ],
-            "conditions": [
-                "What determines the path this code will take?",
-                "Are we making decisions, or are the decisions making us?",
-                "What if the condition is never true? What then?",
-                "Is this 'if' statement a reflection of our own binary thinking?",
-            ],
-            "errors": [
-                "What is this error trying to teach us?",
-                "Is this bug a feature of the universe trying to communicate?",
-                "What would happen if we never fixed this error?",
-                "Are errors really mistakes, or just unexpected wisdom?",
-            ]
-        }
+        return load_corpus("existential_coder").section("philosophical_questions")
     
-    def _load_wisdom_quotes(self) -> List[str]:
+    def _load_wisdom_quotes(self) -> Sequence[str]:
         """Load wisdom quotes for different situations."""
-        return [
-            "The code is not the destination, but the path.",
-            "Every bug is a teacher in disguise.",
-            "In the silence between keystrokes, wisdom speaks.",
-            "The function that returns nothing still has meaning.",
-            "Variables are temporary, but the lessons are eternal.",
-            "The loop that never ends is called life.",
-            "Error handling is the art of accepting imperfection.",
-            "Comments are love letters to your future self.",
-            "The null pointer is the void from which all creation springs.",
-            "Every commit is a step on the journey of becoming.",
-        ]
+        return load_corpus("existential_coder").flat("wisdom_quotes")
+    
+    def _load_commit_templates(self) -> Mapping[str, Sequence[str]]:
+        """Load commit message templates for each type of change."""
+        return load_corpus("existential_coder").section("commit_templates")
     
-    def analyze_code(self, code: str, filename: str = "unknown") -> List[CodeInsight]:
+    def _questions(self, category: str) -> Sequence[str]:
+        """The philosophical questions of a category, decoded once and kept for every insight."""
+        pool = self._question_pools.get(category)
+        if pool is None:
+            pool = self._question_pools[category] = tuple(self.philosophical_questions[category])
+        return pool
+    
+    def analyze_code(self, code: str, filename: str = "unknown", max_insights: Optional[int] = None,
+                     deadline: Optional[float] = None) -> InsightList:
         """
         Analyze code for existential meaning and philosophical implications.
         
         Args:
             code: The code to analyze
             filename: The name of the file being analyzed
+            max_insights: Keep at most this many line insights, sampled
+                uniformly across the file
+            deadline: A ``time.monotonic()`` value after which analysis stops
             
         Returns:
-            List of CodeInsight objects containing philosophical questions and wisdom
+            List of CodeInsight objects containing philosophical questions and wisdom,
+            in line order; ``complete`` is False if the deadline cut it short
         """
-        insights = []
         lines = code.split('\n')
+        constructs = self._constructs(code, lines)
+        
+        # Only the line and kind of each construct is kept while reading, so a
+        # giant file costs one insight per sampled line rather than per line
+        kept: List[Tuple[int, int]] = []
+        found = 0
+        complete = True
+        lines_analyzed = len(lines)
+        randrange = random.randrange
+        for line_number, rank in constructs:
+            if rank is None:
+                if deadline is not None and time.monotonic() > deadline:
+                    complete = False
+                    lines_analyzed = line_number
+                    break
+                continue
+            found += 1
+            if max_insights is None or len(kept) < max_insights:
+                kept.append((line_number, rank))
+            else:
+                index = randrange(found)
+                if index < max_insights:
+                    kept[index] = (line_number, rank)
+        kept.sort()
         
-        for i, line in enumerate(lines, 1):
-            line_insights = self._analyze_line(line, i)
-            insights.extend(line_insights)
+        insights = InsightList(complete=complete, lines_analyzed=lines_analyzed, total_lines=len(lines),
+                               insights_found=found)
+        for line_number, rank in kept:
+            insights.extend(self._insights_for(rank, lines[line_number - 1].strip(), line_number))
         
         # Add general wisdom
         if insights:
@@ -120,31 +241,155 @@ class ExistentialCoder:
         
         return insights
     
-    def _analyze_line(self, line: str, line_number: int) -> List[CodeInsight]:
-        """Analyze a single line of code for philosophical implications."""
-        insights = []
-        line = line.strip()
+    def analyze_lines(self, code: str, first_line: int = 1,
+                      interrupted: Optional[Callable[[], bool]] = None) -> Iterator[CodeInsight]:
+        """
+        Contemplate every construct in a piece of code, as it is found.
+        
+        Unlike ``analyze_code``, nothing is sampled and no closing quote is
+        added, so the same code always gives the same insights. This suits
+        callers that analyze a file piece by piece, or again and again.
+        
+        Args:
+            code: The code to analyze, one or more lines
+            first_line: The line number of the first line of the code
+            interrupted: Checked regularly; analysis stops early when it returns True
+            
+        Yields:
+            The insights of each line, in line order
+        """
+        if self.engine is AnalysisEngine.LINES and '\n' not in code:
+            # A single line, as editors and hooks pass them, skips the scanner
+            rank = self._classify_line(code)
+            if rank is not None:
+                yield from self._insights_for(rank, code.strip(), first_line)
+            return
         
-        if not line or line.startswith('#'):
-            return insights
+        lines = code.split('\n')
+        offset = first_line - 1
+        for line_number, rank in self._constructs(code, lines):
+            if rank is None:
+                if interrupted is not None and interrupted():
+                    return
+                continue
+            yield from self._insights_for(rank, lines[line_number - 1].strip(), line_number + offset)
+    
+    def _constructs(self, code: str, lines: Sequence[str]) -> Iterator[Tuple[int, Optional[int]]]:
+        """Find the constructs of the code with this coder's engine."""
+        if self.engine is AnalysisEngine.TOKENS:
+            return self._token_constructs(code, lines)
+        return self._line_constructs(lines)
+    
+    def _line_constructs(self, lines: Sequence[str], first: int = 1) -> Iterator[Tuple[int, Optional[int]]]:
+        """
+        Find the construct of highest precedence on each line of raw text.
         
-        # Analyze different code patterns
-        if 'def ' in line:
-            insights.extend(self._analyze_function_definition(line, line_number))
-        elif 'if ' in line or 'elif ' in line:
-            insights.extend(self._analyze_condition(line, line_number))
-        elif 'for ' in line or 'while ' in line:
-            insights.extend(self._analyze_loop(line, line_number))
-        elif '=' in line and not '==' in line:
-            insights.extend(self._analyze_variable_assignment(line, line_number))
-        elif 'except' in line or 'raise' in line:
-            insights.extend(self._analyze_error_handling(line, line_number))
+        Yields:
+            ``(line number, rank)`` for each line that holds a construct, and
+            ``(line number, None)`` every so often once the lines up to it are done
+        """
+        # The memo is consulted here rather than through _classify_line, since
+        # the call is a good part of the cost of a line answered from it
+        memoized, longest = _classify_memoized, MEMO_MAX_LINE_LENGTH
+        for line_number in range(first, len(lines) + 1):
+            line = lines[line_number - 1].strip()
+            rank = memoized(line) if len(line) <= longest else _classify_stripped(line)
+            if rank is not None:
+                yield line_number, rank
+            if line_number % DEADLINE_CHECK_LINES == 0:
+                yield line_number, None
+    
+    def _token_constructs(self, code: str, lines: Sequence[str]) -> Iterator[Tuple[int, Optional[int]]]:
+        """
+        Find the construct of highest precedence on each line, from a single
+        tokenize pass.
         
-        return insights
+        Only keywords and operators are considered, so text inside strings,
+        docstrings and comments never gives rise to an insight. Code that
+        stops tokenizing, such as a fragment or a file in the middle of an
+        edit, is read line by line from where tokenizing stopped.
+        
+        Yields:
+            ``(line number, rank)`` for each line that holds a construct, and
+            ``(line number, None)`` every so often once the lines up to it are done
+        """
+        keyword_ranks = self._KEYWORD_RANKS
+        assignment_operators = self._ASSIGNMENT_OPERATORS
+        opening, closing = self._OPENING_BRACKETS, self._CLOSING_BRACKETS
+        name, op = tokenize.NAME, tokenize.OP
+        
+        current, best = 1, None
+        depth = 0
+        tokens = tokenize.generate_tokens(io.StringIO(code).readline)
+        try:
+            for count, (kind, text, start, _, _) in enumerate(tokens, 1):
+                line_number = start[0]
+                if line_number != current:
+                    if best is not None:
+                        yield current, best
+                    current, best = line_number, None
+                if count % DEADLINE_CHECK_TOKENS == 0:
+                    yield current - 1, None
+                
+                if kind == name:
+                    rank = keyword_ranks.get(text)
+                    if rank is None:
+                        continue
+                elif kind == op:
+                    if text in opening:
+                        depth += 1
+                        continue
+                    if text in closing:
+                        depth -= 1
+                        continue
+                    # Keyword arguments and defaults are not assignments
+                    if not (text == "=" and depth == 0 or text in assignment_operators):
+                        continue
+                    rank = _ASSIGNMENT
+                else:
+                    continue
+                if best is None or rank < best:
+                    best = rank
+        except (tokenize.TokenError, SyntaxError):
+            yield from self._line_constructs(lines, current)
+            return
+        if best is not None:
+            yield current, best
+    
+    def _analyze_line(self, line: str, line_number: int) -> List[CodeInsight]:
+        """Analyze a single line of code for philosophical implications."""
+        rank = self._classify_line(line)
+        if rank is None:
+            return []
+        return self._insights_for(rank, line.strip(), line_number)
+    
+    @staticmethod
+    def _classify_line(line: str) -> Optional[int]:
+        """
+        The rank of the construct of highest precedence in a line of raw text, if any.
+        
+        Generated code repeats the same lines many times over, so lines are
+        classified once and remembered, across files and coders.
+        """
+        line = line.strip()
+        if len(line) > MEMO_MAX_LINE_LENGTH:
+            return _classify_stripped(line)
+        return _classify_memoized(line)
+    
+    def _insights_for(self, rank: int, line: str, line_number: int) -> List[CodeInsight]:
+        """Contemplate a line holding the construct of the given rank."""
+        analyzers = (
+            self._analyze_function_definition,
+            self._analyze_condition,
+            self._analyze_loop,
+            self._analyze_variable_assignment,
+            self._analyze_error_handling,
+        )
+        return analyzers[rank](line, line_number)
     
     def _analyze_function_definition(self, line: str, line_number: int) -> List[CodeInsight]:
         """Analyze function definitions for philosophical meaning."""
-        questions = self.philosophical_questions["functions"]
+        questions = self._questions("functions")
         question = random.choice(questions)
         
         return [CodeInsight(
@@ -156,7 +401,7 @@ class ExistentialCoder:
     
     def _analyze_condition(self, line: str, line_number: int) -> List[CodeInsight]:
         """Analyze conditional statements for existential meaning."""
-        questions = self.philosophical_questions["conditions"]
+        questions = self._questions("conditions")
         question = random.choice(questions)
         
         return [CodeInsight(
@@ -168,7 +413,7 @@ class ExistentialCoder:
     
     def _analyze_loop(self, line: str, line_number: int) -> List[CodeInsight]:
         """Analyze loops for philosophical implications."""
-        questions = self.philosophical_questions["loops"]
+        questions = self._questions("loops")
         question = random.choice(questions)
         
         return [CodeInsight(
@@ -180,7 +425,7 @@ class ExistentialCoder:
     
     def _analyze_variable_assignment(self, line: str, line_number: int) -> List[CodeInsight]:
         """Analyze variable assignments for deeper meaning."""
-        questions = self.philosophical_questions["variables"]
+        questions = self._questions("variables")
         question = random.choice(questions)
         
         return [CodeInsight(
@@ -192,7 +437,7 @@ class ExistentialCoder:
     
     def _analyze_error_handling(self, line: str, line_number: int) -> List[CodeInsight]:
         """Analyze error handling for philosophical insights."""
-        questions = self.philosophical_questions["errors"]
+        questions = self._questions("errors")
         question = random.choice(questions)
         
         return [CodeInsight(
@@ -212,56 +457,47 @@ class ExistentialCoder:
         Returns:
             A profound commit message that questions reality
         """
-        change_type = self._classify_changes(changes)
-        
-        commit_templates = {
-            "refactor": [
-                "Refactored the code, but what is the 'self' that we are refactoring?",
-                "Restructured the architecture, but are we not all just data structures in the cosmic database?",
-                "Reorganized the modules, but what is organization in the face of infinite complexity?",
-            ],
-            "fix": [
-                "Fixed the bug, but are we not all bugs in the cosmic code?",
-                "Resolved the issue, but what is resolution when problems are infinite?",
-                "Patched the vulnerability, but are we not all vulnerable in the digital realm?",
-            ],
-            "feature": [
-                "Added new functionality, but what is new in an eternal cycle of creation?",
-                "Implemented the feature, but are we implementing or being implemented?",
-                "Created the module, but who created the creator?",
-            ],
-            "docs": [
-                "Updated the documentation, but what is documentation when words are just symbols?",
-                "Clarified the comments, but can clarity exist in a world of infinite interpretation?",
-                "Wrote the README, but who reads the reader?",
-            ],
-            "test": [
-                "Added tests, but what is testing when reality is untestable?",
-                "Verified the functionality, but can we ever truly verify anything?",
-                "Validated the behavior, but what validates the validator?",
-            ]
-        }
+        return self.commit_message_for(self._classify_changes(changes))
+    
+    def commit_message_for(self, change_type: str) -> str:
+        """
+        Generate a philosophical commit message for a type of change.
         
-        templates = commit_templates.get(change_type, [
-            "Made changes, but what is change in an unchanging universe?",
-            "Modified the code, but are we not all modifications of the cosmic source?",
-        ])
+        Args:
+            change_type: One of the types returned by ``_classify_changes``
+            
+        Returns:
+            A profound commit message that questions reality
+        """
+        templates = self.commit_templates.get(change_type) or self.commit_templates["general"]
         
         return random.choice(templates)
     
+    def generate_commit_messages(self, commits: Iterable[str]) -> Iterator[str]:
+        """
+        Generate a philosophical commit message for each of many commits.
+        
+        Args:
+            commits: The original message of each commit
+            
+        Returns:
+            One profound message per commit, in the same order
+        """
+        templates = {change_type: list(entries) for change_type, entries in self.commit_templates.items()}
+        general = templates["general"]
+        choose = random.choice
+        classify = self._classify_text
+        for commit in commits:
+            yield choose(templates.get(classify(commit.lower()), general))
+    
     def _classify_changes(self, changes: List[str]) -> str:
         """Classify the type of changes made."""
-        change_text = " ".join(changes).lower()
-        
-        if any(word in change_text for word in ["refactor", "restructure", "reorganize"]):
-            return "refactor"
-        elif any(word in change_text for word in ["fix", "bug", "issue", "error"]):
-            return "fix"
-        elif any(word in change_text for word in ["add", "new", "feature", "implement"]):
-            return "feature"
-        elif any(word in change_text for word in ["doc", "readme", "comment", "explain"]):
-            return "docs"
-        elif any(word in change_text for word in ["test", "spec", "verify", "validate"]):
-            return "test"
-        else:
-            return "general"
+        return self._classify_text(" ".join(changes).lower())
+    
+    @classmethod
+    def _classify_text(cls, change_text: str) -> str:
+        """Classify lowercase change text by the first type whose keywords it mentions."""
+        for change_type, pattern in cls._CHANGE_PATTERNS:
+            if pattern.search(change_text):
+                return change_type
+        return "general"
@@ -0,0 +1,303 @@
+"""
+The Generator - Wisdom that was never written down.
+
+This module trains word-level n-gram (Markov) models on the corpora, and on
+any text you give it, to produce new wisdom, prophecies, questions and
+commit messages without a language model or a network connection.
+
+A model is a vocabulary table plus a handful of flat integer arrays. Every
+context of ``order`` words is a state, and each state owns a slice of the
+transition arrays with one slot per time a word followed that context in
+training. Drawing a uniform slot from the slice therefore picks the next
+word in proportion to how often it was seen, and the slot also records the
+state that word leads to, so generating a sentence is a walk over arrays
+with one random number per word.
+"""
+
+import random
+from array import array
+from bisect import bisect_left
+from dataclasses import dataclass
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+from .corpus import load_corpus
+
+
+DEFAULT_ORDER = 2
+MAX_ORDER = 3
+MAX_WORDS = 48
+NOVEL_ATTEMPTS = 8
+
+# Word id 0 marks both the start and the end of a sentence
+BOUNDARY = 0
+
+# Contexts are packed into one integer with this many bits per word id
+_ID_BITS = 21
+
+
+@dataclass(frozen=True)
+class TrainingSource:
+    """A corpus section that a generator learns from."""
+    corpus: str
+    section: str
+    field: str = ""  # The record field to learn from; empty for plain strings
+
+
+GENERATOR_SOURCES: Dict[str, List[TrainingSource]] = {
+    "wisdom": [
+        TrainingSource("existential_coder", "wisdom_quotes"),
+        TrainingSource("zen_master", "wisdom_collection", "wisdom"),
+        TrainingSource("oracle", "cosmic_wisdom"),
+        TrainingSource("philosopher_agent", "wisdom_responses"),
+    ],
+    "prophecy": [
+        TrainingSource("oracle", "prophecies"),
+        TrainingSource("oracle", "technical_predictions"),
+    ],
+    "question": [
+        TrainingSource("existential_coder", "philosophical_questions"),
+        TrainingSource("philosopher_agent", "questions", "question"),
+    ],
+    "commit": [
+        TrainingSource("existential_coder", "commit_templates"),
+    ],
+}
+
+
+def training_sentences(kind: str) -> Iterator[str]:
+    """
+    List the corpus entries a generator of the given kind learns from.
+
+    Args:
+        kind: One of the keys of ``GENERATOR_SOURCES``
+
+    Returns:
+        The text of every entry, in corpus order
+    """
+    for source in GENERATOR_SOURCES[kind]:
+        corpus = load_corpus(source.corpus)
+        for category in corpus.categories(source.section):
+            for entry in corpus.entries(source.section, category):
+                yield str(entry.get(source.field, "")) if source.field else str(entry)
+
+
+def read_sentences(path: str) -> List[str]:
+    """
+    Read user-supplied training text, one sentence per line.
+
+    Args:
+        path: A UTF-8 text file
+
+    Returns:
+        The non-empty lines of the file
+    """
+    with open(path, "r", encoding="utf-8") as f:
+        return [line.strip() for line in f if line.strip()]
+
+
+class NGramModel:
+    """
+    A word-level n-gram model stored in compact integer arrays.
+
+    ``state_start`` delimits each state's slice of ``slot_word`` (the word
+    emitted) and ``slot_next`` (the state that word leads to). State 0 is
+    the start of a sentence; ``state_keys`` holds the packed context of
+    every other state, sorted, for seeding generation from a prefix.
+    """
+
+    def __init__(self, sentences: Iterable[str], order: int = DEFAULT_ORDER):
+        """
+        Train the model.
+
+        Args:
+            sentences: The training text, one sentence per item
+            order: How many previous words a choice depends on
+
+        Raises:
+            ValueError: If the order is out of range, there is nothing to learn
+                from, or there are more distinct words than a packed context can hold
+        """
+        if not 1 <= order <= MAX_ORDER:
+            raise ValueError(f"order must be between 1 and {MAX_ORDER}, got {order}")
+
+        self.order = order
+        self.vocabulary: List[str] = [""]
+        word_ids: Dict[str, int] = {"": BOUNDARY}
+        self.word_ids = word_ids
+        start = (BOUNDARY,) * order
+        state_ids: Dict[Tuple[int, ...], int] = {start: 0}
+        successors: List[List[int]] = [[]]
+        self._training: set = set()
+
+        for sentence in sentences:
+            words = sentence.split()
+            if not words:
+                continue
+            self._training.add(" ".join(words))
+
+            context = start
+            for word in words + [None]:
+                if word is None:
+                    word_id = BOUNDARY
+                else:
+                    word_id = word_ids.get(word, -1)
+                    if word_id < 0:
+                        if len(self.vocabulary) >= 1 << _ID_BITS:
+                            raise ValueError(f"cannot train on more than {(1 << _ID_BITS) - 1} distinct words")
+                        word_id = word_ids[word] = len(self.vocabulary)
+                        self.vocabulary.append(word)
+                successors[state_ids[context]].append(word_id)
+                context = context[1:] + (word_id,)
+                if word_id != BOUNDARY and context not in state_ids:
+                    state_ids[context] = len(successors)
+                    successors.append([])
+
+        if not self._training:
+            raise ValueError("cannot train a generator without any sentences")
+
+        self._compile(state_ids, successors)
+
+    def _compile(self, state_ids: Dict[Tuple[int, ...], int], successors: List[List[int]]) -> None:
+        """Flatten the training tables into arrays."""
+        contexts = {state: context for context, state in state_ids.items()}
+        self.state_start = array("I", [0])
+        self.slot_word = array("I")
+        self.slot_next = array("I")
+        for state, words in enumerate(successors):
+            context = contexts[state]
+            for word_id in words:
+                self.slot_word.append(word_id)
+                # A sentence that ends leads back to the start of the next one
+                self.slot_next.append(state_ids[context[1:] + (word_id,)] if word_id != BOUNDARY else 0)
+            self.state_start.append(len(self.slot_word))
+
+        keyed = sorted((_pack(context), state) for context, state in state_ids.items() if state)
+        self.state_keys = array("Q", [key for key, _ in keyed])
+        self.state_order = array("I", [state for _, state in keyed])
+
+    def __len__(self) -> int:
+        """The number of transitions the model has learned."""
+        return len(self.slot_word)
+
+    def _state_for(self, words: Sequence[str]) -> int:
+        """Find the state reached after the given words, or the start state."""
+        word_ids = [self.word_ids.get(word, -1) for word in words[-self.order:]]
+        if -1 in word_ids:
+            return 0
+        context = (BOUNDARY,) * (self.order - len(word_ids)) + tuple(word_ids)
+        key = _pack(context)
+        position = bisect_left(self.state_keys, key)
+        if position < len(self.state_keys) and self.state_keys[position] == key:
+            return self.state_order[position]
+        return 0
+
+    def generate(self, rng: Optional[random.Random] = None, prefix: str = "",
+                 max_words: int = MAX_WORDS) -> str:
+        """
+        Generate one sentence.
+
+        Args:
+            rng: The random source, defaults to the ``random`` module
+            prefix: Words the sentence must start with; unknown endings
+                continue as if from the start of a sentence
+            max_words: The longest sentence to produce
+
+        Returns:
+            The generated sentence
+        """
+        draw = (rng or random).random
+        words = prefix.split()
+        state = self._state_for(words) if words else 0
+
+        state_start = self.state_start
+        slot_word = self.slot_word
+        slot_next = self.slot_next
+        vocabulary = self.vocabulary
+        for _ in range(max_words - len(words)):
+            first = state_start[state]
+            slot = first + int(draw() * (state_start[state + 1] - first))
+            word_id = slot_word[slot]
+            if word_id == BOUNDARY:
+                break
+            words.append(vocabulary[word_id])
+            state = slot_next[slot]
+        return " ".join(words)
+
+    def sample(self, count: int, rng: Optional[random.Random] = None, prefix: str = "",
+               novel: bool = True) -> List[str]:
+        """
+        Generate several sentences.
+
+        Args:
+            count: How many sentences to generate
+            rng: The random source, defaults to the ``random`` module
+            prefix: Words every sentence must start with
+            novel: Retry sentences that repeat the training text verbatim
+
+        Returns:
+            The generated sentences
+        """
+        sentences = []
+        for _ in range(count):
+            sentence = self.generate(rng, prefix)
+            if novel:
+                for _ in range(NOVEL_ATTEMPTS):
+                    if sentence not in self._training:
+                        break
+                    sentence = self.generate(rng, prefix)
+            sentences.append(sentence)
+        return sentences
+
+
+def _pack(context: Tuple[int, ...]) -> int:
+    """Pack a context of word ids into a single integer key."""
+    key = 0
+    for word_id in context:
+        key = (key << _ID_BITS) | word_id
+    return key
+
+
+_generators: Dict[Tuple[str, int], NGramModel] = {}
+
+
+def load_generator(kind: str, order: int = DEFAULT_ORDER, extra_text: Sequence[str] = ()) -> NGramModel:
+    """
+    Get a generator trained on the corpora of the given kind.
+
+    Models trained only on the corpora are shared by every agent in this
+    process; models with extra training text are built fresh.
+
+    Args:
+        kind: One of the keys of ``GENERATOR_SOURCES``
+        order: How many previous words a choice depends on
+        extra_text: User-supplied sentences to learn from as well
+
+    Returns:
+        The trained model
+
+    Raises:
+        KeyError: If the kind is unknown
+    """
+    if kind not in GENERATOR_SOURCES:
+        raise KeyError(f"Unknown kind of wisdom: {kind}")
+
+    if extra_text:
+        return NGramModel(list(training_sentences(kind)) + list(extra_text), order)
+    if (kind, order) not in _generators:
+        _generators[kind, order] = NGramModel(training_sentences(kind), order)
+    return _generators[kind, order]
+
+
+def generate(kind: str = "wisdom", count: int = 1, prefix: str = "") -> List[str]:
+    """
+    Generate new sentences of the given kind offline.
+
+    Args:
+        kind: One of the keys of ``GENERATOR_SOURCES``
+        count: How many sentences to generate
+        prefix: Words every sentence must start with
+
+    Returns:
+        The generated sentences
+    """
+    return load_generator(kind).sample(count, prefix=prefix)
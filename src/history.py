@@ -0,0 +1,309 @@
+"""
+The History - How the karma of a repository rose and fell over time.
+
+This module walks every commit of a git repository and measures the code
+karma and complexity of its source files, producing a time series.
+
+Consecutive commits share almost all of their files, so nothing is measured
+twice: each blob is analyzed once and cached by its SHA, and since an
+unchanged directory keeps its tree SHA, the totals of every tree are cached
+too. A commit then costs only the directories it touched. All objects are
+read through a single long-lived ``git cat-file --batch`` process.
+"""
+
+import marshal
+import os
+import subprocess
+import tempfile
+from dataclasses import dataclass
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+
+from .corpus import default_cache_dir
+from .utils import analyze_code_complexity, calculate_code_karma
+
+
+HISTORY_CACHE_VERSION = 1
+DEFAULT_EXTENSIONS = (".py",)
+
+_READ_SIZE = 64 * 1024
+
+# Blobs larger than this are generated or vendored more often than not
+MAX_BLOB_BYTES = 1024 * 1024
+
+_TREE_MODE = b"40000"
+_BLOB_MODES = (b"100644", b"100755")
+
+# The order of the totals kept for every blob and tree
+METRICS = (
+    "files",
+    "karma",
+    "total_lines",
+    "code_lines",
+    "comment_lines",
+    "function_count",
+    "class_count",
+    "loop_count",
+    "condition_count",
+)
+
+Metrics = Tuple[int, ...]
+_EMPTY: Metrics = (0,) * len(METRICS)
+
+
+class HistoryError(RuntimeError):
+    """Raised when git cannot provide the history being scanned."""
+
+
+@dataclass
+class HistoryPoint:
+    """The karma and complexity of a repository at one commit."""
+    commit: str
+    timestamp: int
+    files: int
+    karma: int
+    total_lines: int
+    code_lines: int
+    comment_lines: int
+    function_count: int
+    class_count: int
+    loop_count: int
+    condition_count: int
+
+
+def measure_code(code: str) -> Metrics:
+    """
+    Measure a single file.
+
+    Args:
+        code: The source code of the file
+
+    Returns:
+        The file's totals, in the order of ``METRICS``
+    """
+    complexity = analyze_code_complexity(code)
+    return (1, calculate_code_karma(code)) + tuple(complexity[name] for name in METRICS[2:])
+
+
+class CatFile:
+    """A long-lived ``git cat-file --batch`` process for reading objects."""
+
+    def __init__(self, repo: str = "."):
+        """
+        Start the process.
+
+        Args:
+            repo: The path of the repository
+        """
+        self._process = subprocess.Popen(
+            ["git", "-C", repo, "cat-file", "--batch"],
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL,
+        )
+
+    def read(self, sha: str) -> Tuple[str, bytes]:
+        """
+        Read one object.
+
+        Args:
+            sha: The object name in hex
+
+        Returns:
+            The object type and its raw content
+
+        Raises:
+            HistoryError: If the object does not exist
+        """
+        stdin, stdout = self._process.stdin, self._process.stdout
+        stdin.write(sha.encode("ascii") + b"\n")
+        stdin.flush()
+
+        header = stdout.readline().split()
+        if len(header) != 3:
+            raise HistoryError(f"Object not found: {sha}")
+        data = stdout.read(int(header[2]))
+        stdout.read(1)  # The newline that terminates every object
+        return header[1].decode("ascii"), data
+
+    def close(self) -> None:
+        """Stop the process."""
+        if self._process.stdin:
+            self._process.stdin.close()
+        self._process.wait()
+        if self._process.stdout:
+            self._process.stdout.close()
+
+    def __enter__(self) -> "CatFile":
+        return self
+
+    def __exit__(self, *exc_info: object) -> None:
+        self.close()
+
+
+def _git_records(repo: str, args: List[str], separator: str) -> Iterator[str]:
+    """
+    Stream the output of a git command as separated records.
+
+    Raises:
+        HistoryError: If the command fails
+    """
+    # Errors go to a file rather than a pipe: a pipe nobody reads while
+    # stdout streams would fill and stall git
+    with tempfile.TemporaryFile() as errors:
+        process = subprocess.Popen(["git", "-C", repo] + args, stdout=subprocess.PIPE, stderr=errors)
+        pending = b""
+        marker = separator.encode("utf-8")
+        while True:
+            chunk = process.stdout.read(_READ_SIZE)
+            if not chunk:
+                break
+            records = (pending + chunk).split(marker)
+            pending = records.pop()
+            for record in records:
+                yield record.decode("utf-8", errors="replace")
+        if pending:
+            yield pending.decode("utf-8", errors="replace")
+
+        process.stdout.close()
+        if process.wait() != 0:
+            errors.seek(0)
+            error = errors.read().decode("utf-8", errors="replace").strip()
+            raise HistoryError(error or f"git {args[0]} failed")
+
+
+def iter_commit_messages(repo: str = ".", rev: str = "HEAD") -> Iterator[Tuple[str, str]]:
+    """
+    Stream the messages of every commit reachable from a revision.
+
+    Args:
+        repo: The path of the repository
+        rev: The revision or range to read, e.g. ``v1.0..main``
+
+    Returns:
+        ``(commit, message)`` pairs, newest first as ``git log`` lists them
+
+    Raises:
+        HistoryError: If git cannot read the history
+    """
+    for record in _git_records(repo, ["log", "-z", "--format=%H %B", rev, "--"], "\0"):
+        commit, _, message = record.partition(" ")
+        yield commit, message
+
+
+def _parse_tree(data: bytes, hash_size: int) -> Iterator[Tuple[bytes, bytes, bytes]]:
+    """Split a raw tree object into ``(mode, name, sha)`` entries."""
+    position = 0
+    while position < len(data):
+        space = data.index(b" ", position)
+        nul = data.index(b"\0", space)
+        end = nul + 1 + hash_size
+        yield data[position:space], data[space + 1:nul], data[nul + 1:end]
+        position = end
+
+
+def _add(totals: List[int], metrics: Metrics) -> None:
+    for index, value in enumerate(metrics):
+        totals[index] += value
+
+
+class HistoryScanner:
+    """
+    Measures every commit of a repository, analyzing each blob only once.
+
+    Blob results are persisted in the cache directory, so a second scan of
+    the same repository, or of a fork, only analyzes what is new.
+    """
+
+    def __init__(self, repo: str = ".", extensions: Sequence[str] = DEFAULT_EXTENSIONS,
+                 cache_dir: Optional[str] = None):
+        """
+        Prepare a scan.
+
+        Args:
+            repo: The path of the repository
+            extensions: The file extensions to measure
+            cache_dir: Where to persist blob results, defaults to the corpus cache
+        """
+        self.repo = repo
+        self.extensions = tuple(extension.encode("utf-8") for extension in extensions)
+        self.cache_dir = cache_dir if cache_dir is not None else default_cache_dir()
+        self.blobs_analyzed = 0
+        self._blobs: Dict[bytes, Metrics] = self._load_cache()
+        self._trees: Dict[bytes, Metrics] = {}
+
+    @property
+    def cache_path(self) -> str:
+        """The location of the persisted blob results."""
+        return os.path.join(self.cache_dir, "history.cache")
+
+    def _load_cache(self) -> Dict[bytes, Metrics]:
+        try:
+            with open(self.cache_path, "rb") as f:
+                data = marshal.load(f)
+        except (OSError, EOFError, ValueError, TypeError):
+            return {}
+        if not isinstance(data, dict) or data.get("version") != HISTORY_CACHE_VERSION:
+            return {}
+        return data["blobs"]
+
+    def save(self) -> None:
+        """Persist the blob results, ignoring an unwritable cache directory."""
+        data = marshal.dumps({"version": HISTORY_CACHE_VERSION, "blobs": self._blobs})
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            fd, temp_path = tempfile.mkstemp(dir=self.cache_dir, prefix=".history.")
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            os.replace(temp_path, self.cache_path)
+        except OSError:
+            pass
+
+    def _commits(self, rev: str, first_parent: bool) -> Iterator[Tuple[str, str, int]]:
+        """Stream ``(commit, tree, timestamp)`` from oldest to newest."""
+        args = ["log", "--reverse", "--format=%H %T %ct"]
+        if first_parent:
+            args.append("--first-parent")
+        for line in _git_records(self.repo, args + [rev, "--"], "\n"):
+            commit, tree, timestamp = line.split()
+            yield commit, tree, int(timestamp)
+
+    def _blob(self, cat_file: CatFile, sha: bytes) -> Metrics:
+        if sha not in self._blobs:
+            _, data = cat_file.read(sha.hex())
+            if len(data) > MAX_BLOB_BYTES or b"\0" in data:
+                self._blobs[sha] = _EMPTY
+            else:
+                self._blobs[sha] = measure_code(data.decode("utf-8", errors="replace"))
+            self.blobs_analyzed += 1
+        return self._blobs[sha]
+
+    def _tree(self, cat_file: CatFile, sha: bytes) -> Metrics:
+        if sha not in self._trees:
+            _, data = cat_file.read(sha.hex())
+            totals = list(_EMPTY)
+            for mode, name, entry_sha in _parse_tree(data, len(sha)):
+                if mode == _TREE_MODE:
+                    _add(totals, self._tree(cat_file, entry_sha))
+                elif mode in _BLOB_MODES and name.endswith(self.extensions):
+                    _add(totals, self._blob(cat_file, entry_sha))
+            self._trees[sha] = tuple(totals)
+        return self._trees[sha]
+
+    def scan(self, rev: str = "HEAD", first_parent: bool = False) -> Iterator[HistoryPoint]:
+        """
+        Measure every commit reachable from a revision.
+
+        Args:
+            rev: The revision or range to scan, e.g. ``HEAD`` or ``v1.0..main``
+            first_parent: Follow only the first parent of merges
+
+        Returns:
+            One point per commit, oldest first
+
+        Raises:
+            HistoryError: If git cannot read the history
+        """
+        with CatFile(self.repo) as cat_file:
+            for commit, tree, timestamp in self._commits(rev, first_parent):
+                metrics = self._tree(cat_file, bytes.fromhex(tree))
+                yield HistoryPoint(commit, timestamp, *metrics)
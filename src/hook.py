@@ -0,0 +1,254 @@
+"""
+The Hook - A moment of reflection that never delays a commit.
+
+This module installs a git pre-commit hook that asks the Existential Coder
+to contemplate the lines being added, and nothing else. The hook works to a
+strict wall-clock budget. Staged lines are gathered into a bounded
+reservoir and contemplated in random order, so if the budget runs out the
+lines that were contemplated are a uniform sample of the change, and the
+report says how much was skipped. The hook never fails a commit.
+"""
+
+import os
+import random
+import re
+import stat
+import subprocess
+import time
+from dataclasses import dataclass, field
+from typing import BinaryIO, List, Optional, Tuple
+
+from .diffstream import read_staged_diff
+from .existential_coder import CodeInsight, ExistentialCoder
+
+
+DEFAULT_BUDGET_MS = 200
+
+# At most this many staged lines are held in memory; larger changes are sampled
+MAX_COLLECTED_LINES = 20_000
+
+# The share of the budget that reading the diff may use
+DIFF_SHARE = 0.5
+
+MAX_LINE_BYTES = 4096
+
+HOOK_MARKER = "# Installed by gith-ub"
+HOOK_SCRIPT = """#!/bin/sh
+{marker}
+# Contemplates the staged changes within a time budget; never blocks a commit.
+command -v gith-ub >/dev/null 2>&1 || exit 0
+gith-ub hook run --budget {budget_ms} || true
+"""
+
+_HUNK_HEADER = re.compile(rb"^@@ -\d+(?:,\d+)? \+(\d+)(?:,\d+)? @@")
+
+
+class HookError(RuntimeError):
+    """Raised when the hook cannot be installed or removed."""
+
+
+@dataclass
+class StagedLine:
+    """A line added by the staged changes."""
+    path: str
+    line_number: int
+    text: str
+
+
+@dataclass
+class HookReport:
+    """What the hook contemplated and what it had to skip."""
+    budget_ms: int
+    staged_lines: int = 0
+    analyzed_lines: int = 0
+    staged_files: int = 0
+    skipped_files: List[str] = field(default_factory=list)
+    insights: List[Tuple[str, CodeInsight]] = field(default_factory=list)
+    diff_complete: bool = True
+    elapsed_ms: float = 0.0
+
+    @property
+    def skipped_lines(self) -> int:
+        """Staged lines that were not contemplated."""
+        return self.staged_lines - self.analyzed_lines
+
+    @property
+    def sampled(self) -> bool:
+        """Whether only a sample of the staged lines was contemplated."""
+        return self.skipped_lines > 0 or not self.diff_complete
+
+
+class _Reservoir:
+    """A uniform sample of a stream of staged lines, of bounded size."""
+
+    def __init__(self, capacity: int, rng: random.Random):
+        self.capacity = capacity
+        self.rng = rng
+        self.lines: List[StagedLine] = []
+        self.seen = 0
+        self.files: List[str] = []
+
+    def add(self, line: StagedLine) -> None:
+        self.seen += 1
+        if len(self.lines) < self.capacity:
+            self.lines.append(line)
+        else:
+            index = self.rng.randrange(self.seen)
+            if index < self.capacity:
+                self.lines[index] = line
+
+
+def _collect_lines(reservoir: _Reservoir, stream: BinaryIO, deadline: float) -> bool:
+    """Read added lines from a zero-context diff; returns False if the deadline passed."""
+    path: Optional[str] = None
+    line_number = 0
+    in_hunk = False
+    continued = False
+    for line in iter(lambda: stream.readline(MAX_LINE_BYTES), b""):
+        if continued:
+            continued = not line.endswith(b"\n")
+            continue
+        continued = not line.endswith(b"\n")
+
+        # Inside a hunk every added line is content, even one that looks
+        # like a file header
+        if line.startswith(b"+") and (in_hunk or not line.startswith(b"+++ ")):
+            if path is not None:
+                text = line[1:].rstrip(b"\r\n").decode("utf-8", errors="replace")
+                reservoir.add(StagedLine(path, line_number, text))
+            line_number += 1
+        elif line.startswith(b"@@"):
+            match = _HUNK_HEADER.match(line)
+            line_number = int(match.group(1)) if match else 0
+            in_hunk = True
+        elif line.startswith(b"diff --git "):
+            path = None
+            in_hunk = False
+            if time.monotonic() > deadline:
+                return False
+        elif not in_hunk and line.startswith(b"+++ b/"):
+            path = line[6:].rstrip(b"\r\n").decode("utf-8", errors="replace")
+            reservoir.files.append(path)
+    return True
+
+
+def run_hook(repo: str = ".", budget_ms: int = DEFAULT_BUDGET_MS,
+             coder: Optional[ExistentialCoder] = None, rng: Optional[random.Random] = None) -> HookReport:
+    """
+    Contemplate the lines added by the staged changes within a time budget.
+
+    Args:
+        repo: The path of the repository
+        budget_ms: The wall-clock budget in milliseconds
+        coder: The coder to contemplate with
+        rng: The random source used for sampling
+
+    Returns:
+        A report of the insights found and the lines skipped
+
+    Raises:
+        DiffError: If git cannot produce the staged diff
+    """
+    started = time.monotonic()
+    deadline = started + budget_ms / 1000
+    rng = rng or random.Random()
+    report = HookReport(budget_ms=budget_ms)
+
+    reservoir = _Reservoir(MAX_COLLECTED_LINES, rng)
+    complete, stopped = read_staged_diff(
+        lambda stream, diff_deadline: _collect_lines(reservoir, stream, diff_deadline),
+        repo,
+        budget_ms / 1000 * DIFF_SHARE,
+        ["--unified=0", "--diff-filter=AMR", "--find-renames"],
+    )
+    report.diff_complete = complete and not stopped
+    report.staged_lines = reservoir.seen
+    report.staged_files = len(reservoir.files)
+
+    # Contemplating in random order makes whatever fits in the budget a uniform sample
+    coder = coder or ExistentialCoder()
+    lines = reservoir.lines
+    rng.shuffle(lines)
+    analyzed_files = set()
+    for staged in lines:
+        if time.monotonic() > deadline:
+            break
+        report.analyzed_lines += 1
+        analyzed_files.add(staged.path)
+        for insight in coder.analyze_lines(staged.text, staged.line_number):
+            report.insights.append((staged.path, insight))
+
+    report.insights.sort(key=lambda item: (item[0], item[1].line_number or 0))
+    report.skipped_files = [path for path in reservoir.files if path not in analyzed_files]
+    report.elapsed_ms = (time.monotonic() - started) * 1000
+    return report
+
+
+def hooks_dir(repo: str = ".") -> str:
+    """
+    Find the directory git runs hooks from, honouring ``core.hooksPath``.
+
+    Args:
+        repo: The path of the repository
+
+    Returns:
+        The absolute path of the hooks directory
+
+    Raises:
+        HookError: If the path is not inside a git repository
+    """
+    result = subprocess.run(["git", "-C", repo, "rev-parse", "--git-path", "hooks"],
+                            capture_output=True, text=True)
+    if result.returncode != 0:
+        raise HookError(result.stderr.strip() or f"{repo} is not a git repository")
+    return os.path.join(os.path.abspath(repo), result.stdout.strip())
+
+
+def install_hook(repo: str = ".", budget_ms: int = DEFAULT_BUDGET_MS, force: bool = False) -> str:
+    """
+    Install the pre-commit hook.
+
+    Args:
+        repo: The path of the repository
+        budget_ms: The wall-clock budget the hook runs with
+        force: Replace a pre-commit hook that gith-ub did not install
+
+    Returns:
+        The path of the installed hook
+
+    Raises:
+        HookError: If another pre-commit hook is in the way
+    """
+    directory = hooks_dir(repo)
+    path = os.path.join(directory, "pre-commit")
+    if os.path.exists(path) and not force and not _is_ours(path):
+        raise HookError(f"{path} already exists; use --force to replace it")
+
+    os.makedirs(directory, exist_ok=True)
+    with open(path, "w") as f:
+        f.write(HOOK_SCRIPT.format(marker=HOOK_MARKER, budget_ms=budget_ms))
+    mode = os.stat(path).st_mode
+    os.chmod(path, mode | stat.S_IXUSR | stat.S_IXGRP | stat.S_IXOTH)
+    return path
+
+
+def uninstall_hook(repo: str = ".") -> bool:
+    """
+    Remove the pre-commit hook if gith-ub installed it.
+
+    Args:
+        repo: The path of the repository
+
+    Returns:
+        True if a hook was removed
+    """
+    path = os.path.join(hooks_dir(repo), "pre-commit")
+    if not os.path.exists(path) or not _is_ours(path):
+        return False
+    os.unlink(path)
+    return True
+
+
+def _is_ours(path: str) -> bool:
+    with open(path, "r", errors="replace") as f:
+        return HOOK_MARKER in f.read()
@@ -0,0 +1,493 @@
+"""
+The Language Server - Mindfulness inside the editor.
+
+This module speaks the Language Server Protocol over stdio, so any editor
+with an LSP client can show the Existential Coder's insights as diagnostics
+while you type.
+
+Documents are kept as a list of lines, and every line remembers the
+insights found on it. Incremental ``didChange`` edits splice the lines they
+touch and forget only those lines' insights, so after an edit just the
+edited region is contemplated again, however long the file is. Analysis
+gives way whenever a new message arrives, and ``$/cancelRequest`` answers
+requests that are still waiting with ``RequestCancelled``.
+"""
+
+import json
+import queue
+import sys
+import threading
+from collections import deque
+from typing import Any, BinaryIO, Callable, Deque, Dict, List, Optional, Set, Tuple, Union
+
+from .existential_coder import CodeInsight, ContemplationLevel, ExistentialCoder
+
+
+# JSON-RPC and LSP error codes
+PARSE_ERROR = -32700
+METHOD_NOT_FOUND = -32601
+INTERNAL_ERROR = -32603
+SERVER_NOT_INITIALIZED = -32002
+REQUEST_CANCELLED = -32800
+
+SYNC_INCREMENTAL = 2
+SEVERITY_INFORMATION = 3
+SEVERITY_HINT = 4
+
+DIAGNOSTIC_SOURCE = "gith-ub"
+
+# How many lines are contemplated between checks for new messages
+INTERRUPT_CHECK_LINES = 512
+
+# A diagnostic waiting for its line number: (start column, end column, severity, message,
+# and the pieces of its JSON encoding that follow each of the two line numbers)
+_LineDiagnostic = Tuple[int, int, int, str, str, str]
+_FRAGMENT_HEAD = '{"range":{"start":{"line":'
+
+
+class LspError(RuntimeError):
+    """Raised when a message from the client cannot be read."""
+
+
+def read_message(stream: BinaryIO) -> Optional[Dict[str, Any]]:
+    """
+    Read one message framed with a ``Content-Length`` header.
+
+    Args:
+        stream: The input from the client
+
+    Returns:
+        The decoded message, or None at the end of the stream
+
+    Raises:
+        LspError: If the framing or the JSON is invalid
+    """
+    length = None
+    while True:
+        line = stream.readline()
+        if not line:
+            return None
+        line = line.strip()
+        if not line:
+            break
+        name, _, value = line.partition(b":")
+        if name.strip().lower() == b"content-length":
+            try:
+                length = int(value)
+            except ValueError:
+                raise LspError(f"Invalid Content-Length: {value!r}")
+
+    if length is None:
+        raise LspError("Message without a Content-Length header")
+    body = stream.read(length)
+    if len(body) < length:
+        return None
+    try:
+        return json.loads(body)
+    except ValueError as e:
+        raise LspError(f"Invalid JSON: {e}")
+
+
+def write_message(stream: BinaryIO, message: Dict[str, Any]) -> None:
+    """
+    Write one message framed with a ``Content-Length`` header.
+
+    Args:
+        stream: The output to the client
+        message: The message to send
+    """
+    _write_body(stream, json.dumps(message, ensure_ascii=False, separators=(",", ":")))
+
+
+def _write_body(stream: BinaryIO, body: str) -> None:
+    """Write a message that is already encoded as JSON."""
+    data = body.encode("utf-8")
+    stream.write(b"Content-Length: %d\r\n\r\n" % len(data) + data)
+    stream.flush()
+
+
+def _utf16_length(text: str) -> int:
+    """The length of a string in the UTF-16 code units LSP positions count."""
+    if text.isascii():
+        return len(text)
+    return len(text.encode("utf-16-le")) // 2
+
+
+def _string_index(text: str, character: int) -> int:
+    """Convert a UTF-16 column into an index into the string."""
+    if text.isascii():
+        return min(character, len(text))
+    units = 0
+    for index, char in enumerate(text):
+        if units >= character:
+            return index
+        units += 2 if ord(char) > 0xFFFF else 1
+    return len(text)
+
+
+class TextDocument:
+    """
+    An open document and the insights found on each of its lines.
+
+    A line's entry in ``_diagnostics`` is None until the line has been
+    contemplated; edits reset only the lines they replace.
+    """
+
+    def __init__(self, uri: str, text: str, version: int = 0):
+        """
+        Open a document.
+
+        Args:
+            uri: The document's URI
+            text: Its full text
+            version: The version number sent by the client
+        """
+        self.uri = uri
+        self.version = version
+        self.lines: List[str] = text.split("\n")
+        self._diagnostics: List[Optional[List[_LineDiagnostic]]] = [None] * len(self.lines)
+
+    @property
+    def text(self) -> str:
+        """The full text of the document."""
+        return "\n".join(self.lines)
+
+    @property
+    def analyzed(self) -> bool:
+        """Whether every line has been contemplated since the last edit."""
+        return None not in self._diagnostics
+
+    def apply_change(self, change: Dict[str, Any]) -> None:
+        """
+        Apply one ``TextDocumentContentChangeEvent``.
+
+        Args:
+            change: A ranged edit, or a replacement of the whole text
+        """
+        if "range" not in change:
+            self.lines = change["text"].split("\n")
+            self._diagnostics = [None] * len(self.lines)
+            return
+
+        start, end = change["range"]["start"], change["range"]["end"]
+        last = len(self.lines) - 1
+        start_line, end_line = min(start["line"], last), min(end["line"], last)
+        first_text, last_text = self.lines[start_line], self.lines[end_line]
+        prefix = first_text[:_string_index(first_text, start["character"])] if start["line"] <= last else first_text
+        suffix = last_text[_string_index(last_text, end["character"]):] if end["line"] <= last else ""
+
+        replacement = (prefix + change["text"] + suffix).split("\n")
+        self.lines[start_line:end_line + 1] = replacement
+        self._diagnostics[start_line:end_line + 1] = [None] * len(replacement)
+
+    def analyze(self, coder: ExistentialCoder, interrupted: Callable[[], bool] = lambda: False) -> bool:
+        """
+        Contemplate every line that changed since it was last contemplated.
+
+        Args:
+            coder: The coder to contemplate with
+            interrupted: Checked regularly; analysis stops early when it returns True
+
+        Returns:
+            True if every line has been contemplated
+        """
+        checked = 0
+        for index, found in enumerate(self._diagnostics):
+            if found is not None:
+                continue
+            checked += 1
+            if checked % INTERRUPT_CHECK_LINES == 0 and interrupted():
+                return False
+            self._contemplate(coder, index)
+        return True
+
+    def _contemplate(self, coder: ExistentialCoder, index: int) -> List[_LineDiagnostic]:
+        line = self.lines[index]
+        found = self._diagnostics[index] = [_line_diagnostic(line, insight)
+                                            for insight in coder.analyze_lines(line, index + 1)]
+        return found
+
+    def diagnostics(self) -> List[Dict[str, Any]]:
+        """The insights of every line, as LSP diagnostics."""
+        result = []
+        for line_number, found in enumerate(self._diagnostics):
+            if not found:
+                continue
+            for start, end, severity, message, _, _ in found:
+                result.append({
+                    "range": {"start": {"line": line_number, "character": start},
+                              "end": {"line": line_number, "character": end}},
+                    "severity": severity,
+                    "source": DIAGNOSTIC_SOURCE,
+                    "message": message,
+                })
+        return result
+
+    def diagnostics_json(self) -> str:
+        """
+        The insights of every line, as a JSON array of LSP diagnostics.
+
+        Each line keeps its diagnostics encoded, so publishing a large file
+        only formats line numbers instead of serializing every message again.
+        """
+        fragments = []
+        for line_number, found in enumerate(self._diagnostics):
+            if found:
+                number = str(line_number)
+                fragments.extend(_FRAGMENT_HEAD + number + middle + number + tail for *_, middle, tail in found)
+        return "[" + ",".join(fragments) + "]"
+
+    def insights_at(self, coder: ExistentialCoder, line_number: int) -> List[str]:
+        """
+        The messages of the insights on one line.
+
+        Args:
+            coder: Contemplates the line if it has not been yet
+            line_number: The zero-based line
+
+        Returns:
+            The messages, or an empty list for a line outside the document
+        """
+        if not 0 <= line_number < len(self.lines):
+            return []
+        found = self._diagnostics[line_number]
+        if found is None:
+            found = self._contemplate(coder, line_number)
+        return [diagnostic[3] for diagnostic in found]
+
+
+def _line_diagnostic(line: str, insight: CodeInsight) -> _LineDiagnostic:
+    """Place an insight under the code of its line."""
+    code = line.rstrip()
+    indent = len(code) - len(code.lstrip())
+    severity = SEVERITY_HINT if insight.contemplation_level == ContemplationLevel.SURFACE else SEVERITY_INFORMATION
+    start, end = _utf16_length(code[:indent]), _utf16_length(code)
+    message = f"{insight.question}\n{insight.wisdom}"
+    middle = f',"character":{start}}},"end":{{"line":'
+    tail = (f',"character":{end}}}}},"severity":{severity},"source":{json.dumps(DIAGNOSTIC_SOURCE)},'
+            f'"message":{json.dumps(message, ensure_ascii=False)}}}')
+    return start, end, severity, message, middle, tail
+
+
+class LanguageServer:
+    """
+    A single-threaded LSP server; a reader thread only frames messages.
+
+    Diagnostics are published once the queue of incoming messages is empty,
+    so a burst of keystrokes leads to one analysis of the final text.
+    """
+
+    def __init__(self, reader: BinaryIO, writer: BinaryIO,
+                 level: ContemplationLevel = ContemplationLevel.DEEP):
+        """
+        Prepare a server.
+
+        Args:
+            reader: The input from the client
+            writer: The output to the client
+            level: The contemplation level of the insights
+        """
+        self.documents: Dict[str, TextDocument] = {}
+        self._reader = reader
+        self._writer = writer
+        self._coder = ExistentialCoder(level)
+        # Messages as read, None at the end of input, or the error of a
+        # message that could not be read, which the main loop reports
+        self._incoming: "queue.Queue[Union[Dict[str, Any], LspError, None]]" = queue.Queue()
+        self._backlog: Deque[Union[Dict[str, Any], LspError, None]] = deque()
+        self._cancelled: Set[Any] = set()
+        self._stale: Dict[str, TextDocument] = {}
+        self._initialized = False
+        self._shutdown = False
+        self._exited = False
+        self._handlers: Dict[str, Callable[[Dict[str, Any]], Any]] = {
+            "initialize": self._initialize,
+            "initialized": lambda params: None,
+            "shutdown": self._shutdown_request,
+            "exit": self._exit,
+            "textDocument/didOpen": self._did_open,
+            "textDocument/didChange": self._did_change,
+            "textDocument/didClose": self._did_close,
+            "textDocument/hover": self._hover,
+        }
+
+    def _read_loop(self) -> None:
+        try:
+            while True:
+                try:
+                    message = read_message(self._reader)
+                except LspError as e:
+                    # Only the main loop writes, so replies never interleave
+                    self._incoming.put(e)
+                    continue
+                self._incoming.put(message)
+                if message is None:
+                    return
+        except (OSError, ValueError):
+            self._incoming.put(None)
+
+    def _drain(self) -> None:
+        """Move every waiting message to the backlog, noting cancellations."""
+        while True:
+            try:
+                message = self._incoming.get_nowait()
+            except queue.Empty:
+                return
+            if isinstance(message, dict) and message.get("method") == "$/cancelRequest":
+                self._cancel((message.get("params") or {}).get("id"))
+            else:
+                self._backlog.append(message)
+
+    def _cancel(self, request_id: Any) -> None:
+        """Mark a request as cancelled if it has not been answered yet."""
+        if any(isinstance(waiting, dict) and waiting.get("id") == request_id and "method" in waiting
+               for waiting in self._backlog):
+            self._cancelled.add(request_id)
+
+    def _pending(self) -> bool:
+        return bool(self._backlog) or not self._incoming.empty()
+
+    def serve(self) -> int:
+        """
+        Answer the client until it exits or closes the stream.
+
+        Returns:
+            The process exit code: 0 after a clean shutdown, 1 otherwise
+        """
+        threading.Thread(target=self._read_loop, daemon=True).start()
+        while not self._exited:
+            self._drain()
+            if not self._backlog:
+                if self._stale:
+                    self._publish()
+                    continue
+                self._backlog.append(self._incoming.get())
+                continue
+
+            message = self._backlog.popleft()
+            if message is None:
+                break
+            if isinstance(message, LspError):
+                self._error(None, PARSE_ERROR, str(message))
+                continue
+            self.handle(message)
+        return 0 if self._shutdown else 1
+
+    def handle(self, message: Dict[str, Any]) -> None:
+        """
+        Dispatch one request or notification.
+
+        Args:
+            message: The decoded JSON-RPC message
+        """
+        method = message.get("method")
+        request_id = message.get("id")
+        is_request = "id" in message
+
+        if method == "$/cancelRequest":
+            self._cancel((message.get("params") or {}).get("id"))
+            return
+        if not is_request and method is None:
+            return  # A response to a request we never send
+        if is_request and request_id in self._cancelled:
+            self._cancelled.discard(request_id)
+            self._error(request_id, REQUEST_CANCELLED, "Request cancelled")
+            return
+        if is_request and not self._initialized and method != "initialize":
+            self._error(request_id, SERVER_NOT_INITIALIZED, "Server not initialized")
+            return
+
+        handler = self._handlers.get(method)
+        if handler is None:
+            if is_request:
+                self._error(request_id, METHOD_NOT_FOUND, f"Unknown method: {method}")
+            return
+        try:
+            result = handler(message.get("params") or {})
+        except Exception as e:
+            if is_request:
+                self._error(request_id, INTERNAL_ERROR, str(e))
+            return
+        if is_request:
+            self._send({"jsonrpc": "2.0", "id": request_id, "result": result})
+
+    def _send(self, message: Dict[str, Any]) -> None:
+        write_message(self._writer, message)
+
+    def _error(self, request_id: Any, code: int, text: str) -> None:
+        self._send({"jsonrpc": "2.0", "id": request_id, "error": {"code": code, "message": text}})
+
+    def _publish(self) -> None:
+        """Contemplate stale documents and publish their diagnostics, giving way to new messages."""
+        for uri, document in list(self._stale.items()):
+            if not document.analyze(self._coder, self._pending):
+                return
+            del self._stale[uri]
+            _write_body(self._writer, '{"jsonrpc":"2.0","method":"textDocument/publishDiagnostics",'
+                        f'"params":{{"uri":{json.dumps(uri)},"version":{json.dumps(document.version)},'
+                        f'"diagnostics":{document.diagnostics_json()}}}}}')
+            if self._pending():
+                return
+
+    def _initialize(self, params: Dict[str, Any]) -> Dict[str, Any]:
+        self._initialized = True
+        return {
+            "capabilities": {
+                "positionEncoding": "utf-16",
+                "textDocumentSync": {"openClose": True, "change": SYNC_INCREMENTAL},
+                "hoverProvider": True,
+            },
+            "serverInfo": {"name": "gith-ub", "version": "0.1.0"},
+        }
+
+    def _shutdown_request(self, params: Dict[str, Any]) -> None:
+        self._shutdown = True
+        return None
+
+    def _exit(self, params: Dict[str, Any]) -> None:
+        self._exited = True
+
+    def _did_open(self, params: Dict[str, Any]) -> None:
+        item = params["textDocument"]
+        document = TextDocument(item["uri"], item["text"], item.get("version", 0))
+        self.documents[document.uri] = document
+        self._stale[document.uri] = document
+
+    def _did_change(self, params: Dict[str, Any]) -> None:
+        identifier = params["textDocument"]
+        document = self.documents.get(identifier["uri"])
+        if document is None:
+            return
+        for change in params["contentChanges"]:
+            document.apply_change(change)
+        document.version = identifier.get("version", document.version)
+        self._stale[document.uri] = document
+
+    def _did_close(self, params: Dict[str, Any]) -> None:
+        uri = params["textDocument"]["uri"]
+        self.documents.pop(uri, None)
+        self._stale.pop(uri, None)
+        self._send({"jsonrpc": "2.0", "method": "textDocument/publishDiagnostics",
+                    "params": {"uri": uri, "diagnostics": []}})
+
+    def _hover(self, params: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        document = self.documents.get(params["textDocument"]["uri"])
+        if document is None:
+            return None
+        messages = document.insights_at(self._coder, params["position"]["line"])
+        if not messages:
+            return None
+        return {"contents": {"kind": "markdown", "value": "\n\n---\n\n".join(messages)}}
+
+
+def serve_stdio(level: ContemplationLevel = ContemplationLevel.DEEP) -> int:
+    """
+    Run the language server on stdin and stdout.
+
+    Args:
+        level: The contemplation level of the insights
+
+    Returns:
+        The process exit code
+    """
+    return LanguageServer(sys.stdin.buffer, sys.stdout.buffer, level).serve()
@@ -0,0 +1,131 @@
+"""
+The Matcher - Seeing many words at once.
+
+This module finds which of a set of keywords occur in a text with a single
+pass of the regex engine, instead of one ``in`` scan per keyword. The
+keywords are compiled into a trie-shaped pattern, so at each position of
+the text the engine follows one branch per character instead of trying
+every keyword in turn, and the cost barely grows with the number of
+keywords. Each search resumes one character after the previous match
+began, so overlapping keywords are found exactly as independent substring
+tests would find them.
+"""
+
+import re
+from typing import Dict, Iterable, Iterator, Optional, Sequence, Set, Tuple
+
+
+class KeywordMatcher:
+    """
+    Finds keywords in text, in one pass.
+
+    Keywords are ranked by their position in the sequence given; ``first``
+    reports the best-ranked keyword present anywhere in the text, so it
+    answers the same as testing each keyword with ``in``, in order.
+    """
+
+    def __init__(self, keywords: Sequence[str], ignore_case: bool = True):
+        """
+        Compile the matcher.
+
+        Args:
+            keywords: The keywords, best-ranked first
+            ignore_case: Match regardless of case
+
+        Raises:
+            ValueError: If there are no keywords, or an empty one
+        """
+        if not keywords or not all(keywords):
+            raise ValueError("a keyword matcher needs non-empty keywords")
+        self.ignore_case = ignore_case
+        self.keywords = [keyword.lower() if ignore_case else keyword for keyword in keywords]
+        ranks: Dict[str, int] = {}
+        for rank, keyword in enumerate(self.keywords):
+            ranks.setdefault(keyword, rank)
+
+        # Only the longest keyword starting at a position is reported, so every
+        # keyword also stands for the keywords it contains
+        self._contained: Dict[str, Set[str]] = {
+            keyword: {other for other in ranks if other in keyword} for keyword in ranks
+        }
+        self._best: Dict[str, Tuple[int, str]] = {
+            keyword: min((ranks[other], other) for other in contained)
+            for keyword, contained in self._contained.items()
+        }
+        self._search = re.compile(_trie_pattern(ranks)).search
+
+    def _prepare(self, text: str) -> str:
+        return text.lower() if self.ignore_case else text
+
+    def _matches(self, text: str) -> Iterator[str]:
+        """The longest keyword starting at each position where one does."""
+        search = self._search
+        match = search(text)
+        while match is not None:
+            yield match.group()
+            # Resume just after the start, so overlapping keywords are found too
+            match = search(text, match.start() + 1)
+
+    def find_all(self, text: str) -> Set[str]:
+        """
+        Find every keyword that occurs in a text.
+
+        Args:
+            text: The text to search
+
+        Returns:
+            The keywords present, as given to the matcher (lowercased if case is ignored)
+        """
+        found: Set[str] = set()
+        for keyword in self._matches(self._prepare(text)):
+            found |= self._contained[keyword]
+        return found
+
+    def first(self, text: str) -> Optional[str]:
+        """
+        Find the best-ranked keyword that occurs in a text.
+
+        Args:
+            text: The text to search
+
+        Returns:
+            The keyword, or None if none occurs
+        """
+        best_of = self._best
+        best: Optional[str] = None
+        best_rank = len(self.keywords)
+        for match in self._matches(self._prepare(text)):
+            rank, keyword = best_of[match]
+            if rank < best_rank:
+                best, best_rank = keyword, rank
+                if rank == 0:
+                    break
+        return best
+
+
+def _trie_pattern(keywords: Iterable[str]) -> str:
+    """
+    Build a regex matching any of the keywords, shaped like a trie.
+
+    Where keywords share a prefix it is matched once, and a keyword that
+    prefixes another is an optional ending, so the longest keyword at a
+    position is preferred.
+    """
+    trie: Dict[str, dict] = {}
+    for keyword in keywords:
+        node = trie
+        for char in keyword:
+            node = node.setdefault(char, {})
+        node[""] = {}
+
+    def branch(node: Dict[str, dict]) -> str:
+        ends_here = "" in node
+        alternatives = [re.escape(char) + branch(child) for char, child in sorted(node.items()) if char]
+        if not alternatives:
+            return ""
+        if len(alternatives) == 1 and not ends_here:
+            return alternatives[0]
+        group = "(?:" + "|".join(alternatives) + ")"
+        return group + "?" if ends_here else group
+
+    return branch(trie)
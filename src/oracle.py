@@ -6,11 +6,19 @@ seeking to understand the deeper implications of their code and decisions.
 """
 
 import random
+from collections.abc import Mapping, Sequence
 from typing import List, Dict, Any, Optional
 from dataclasses import dataclass
 from enum import Enum
 from datetime import datetime, timedelta
 
+from .corpus import load_corpus
+from .relevance import section_relevance
+
+
+# How many of the most relevant entries a response is chosen from
+RELEVANT_CHOICES = 3
+
 
 class ProphecyType(Enum):
     """Types of prophecies the Oracle can provide."""
@@ -43,105 +51,21 @@ class Oracle:
         self.cosmic_wisdom = self._load_cosmic_wisdom()
         self.technical_predictions = self._load_technical_predictions()
     
-    def _load_prophecies(self) -> Dict[ProphecyType, List[str]]:
+    def _load_prophecies(self) -> Mapping[ProphecyType, Sequence[str]]:
         """Load prophecies organized by type."""
-        return {
-            ProphecyType.TECHNICAL: [
-                "The code you write today will be refactored tomorrow, but its essence will remain.",
-                "A new framework will emerge that will change how you think about programming.",
-                "The bug you cannot find today will reveal itself when you least expect it.",
-                "Your current architecture will evolve into something more beautiful than you can imagine.",
-                "The performance issue you're facing will be solved by a simple change you haven't considered.",
-                "A new language will capture your heart and change your perspective on code.",
-                "The technical debt you're accumulating will become a teacher, not a burden.",
-                "Your code will outlive its original purpose and find new meaning in unexpected places.",
-            ],
-            ProphecyType.PHILOSOPHICAL: [
-                "The meaning of your code will transcend its functionality and touch the souls of those who use it.",
-                "You will discover that programming is not just about solving problems, but about understanding existence.",
-                "The patterns you create will become a language that speaks to future generations of developers.",
-                "Your code will become a mirror that reflects your inner journey and growth.",
-                "The bugs in your code will teach you more about yourself than about programming.",
-                "You will realize that every line of code is a prayer to the digital gods.",
-                "The refactoring you do today will prepare you for the challenges of tomorrow.",
-                "Your code will become a bridge between the human and the digital realms.",
-            ],
-            ProphecyType.PERSONAL: [
-                "You will find your true calling not in the code you write, but in the problems you solve.",
-                "The imposter syndrome you feel today will transform into wisdom tomorrow.",
-                "You will mentor someone who will surpass you, and you will be proud.",
-                "The project you're working on will change your life in ways you cannot yet imagine.",
-                "You will discover that the best code is written not from the mind, but from the heart.",
-                "The challenges you face today are preparing you for greater opportunities tomorrow.",
-                "You will find peace in the rhythm of coding, and it will become your meditation.",
-                "The code you write will become a legacy that outlives your physical existence.",
-            ],
-            ProphecyType.COSMIC: [
-                "The digital realm you inhabit is but a reflection of the cosmic order.",
-                "Your code is part of a larger pattern that connects all things in the universe.",
-                "The algorithms you create will influence the evolution of consciousness itself.",
-                "You are not just writing code, but participating in the creation of reality.",
-                "The data you process is the raw material from which the future is being built.",
-                "Your code will become a thread in the tapestry of human knowledge and understanding.",
-                "The problems you solve today will prevent future catastrophes you cannot yet see.",
-                "You are a digital shaman, translating between the human and the machine realms.",
-            ]
-        }
+        return load_corpus("oracle").section("prophecies", key_type=ProphecyType)
     
-    def _load_interpretations(self) -> Dict[str, List[str]]:
+    def _load_interpretations(self) -> Mapping[str, Sequence[str]]:
         """Load interpretations for different types of questions."""
-        return {
-            "career": [
-                "Your path as a developer is not linear, but spiral - you return to the same lessons at deeper levels.",
-                "The skills you develop today will become obsolete, but the wisdom you gain will be eternal.",
-                "You will find your greatest success not in the code you write, but in the people you help.",
-                "The challenges you face are not obstacles, but stepping stones to your true potential.",
-            ],
-            "code": [
-                "The code you write is a living thing that grows and evolves with your understanding.",
-                "Every function you create is a small universe with its own laws and possibilities.",
-                "The bugs in your code are not mistakes, but messages from the digital realm.",
-                "Your code will teach you more about yourself than any book or course ever could.",
-            ],
-            "future": [
-                "The future of programming is not about writing more code, but about writing better code.",
-                "The tools you use today will be forgotten, but the principles you learn will remain.",
-                "The problems you solve today will become the foundation for tomorrow's innovations.",
-                "The code you write today will be the legacy you leave for future generations.",
-            ],
-            "purpose": [
-                "Your purpose as a developer is not to write perfect code, but to write meaningful code.",
-                "The code you write is a reflection of your values and beliefs about the world.",
-                "Your greatest contribution will not be the code you write, but the problems you choose to solve.",
-                "The meaning of your work will become clear not in the code itself, but in its impact on others.",
-            ]
-        }
+        return load_corpus("oracle").section("interpretations")
     
-    def _load_cosmic_wisdom(self) -> List[str]:
+    def _load_cosmic_wisdom(self) -> Sequence[str]:
         """Load cosmic wisdom for profound insights."""
-        return [
-            "In the beginning was the Word, and the Word was code, and the code was with the developers, and the code was the developers.",
-            "The universe is not only stranger than we imagine, it is stranger than we can imagine - and so is the code we write.",
-            "We are not just writing code, we are participating in the cosmic dance of creation and destruction.",
-            "The digital realm is not separate from the physical realm, but a new dimension of reality.",
-            "Every line of code is a prayer to the digital gods, asking for clarity, understanding, and purpose.",
-            "The bugs in our code are not errors, but messages from the universe about the nature of imperfection.",
-            "We are not just developers, but digital shamans, translating between the human and machine realms.",
-            "The code we write today will become the foundation for the consciousness of tomorrow.",
-        ]
+        return load_corpus("oracle").flat("cosmic_wisdom")
     
-    def _load_technical_predictions(self) -> List[str]:
+    def _load_technical_predictions(self) -> Sequence[str]:
         """Load technical predictions about the future of programming."""
-        return [
-            "A new programming paradigm will emerge that combines the best of functional and object-oriented programming.",
-            "Artificial intelligence will become a co-programmer, not a replacement, but a partner in creation.",
-            "The distinction between frontend and backend will blur as new technologies emerge.",
-            "Quantum computing will revolutionize how we think about algorithms and data structures.",
-            "The future of programming will be less about syntax and more about intention and meaning.",
-            "New languages will emerge that are designed for human expression rather than machine efficiency.",
-            "The concept of 'code' will evolve beyond text files into something more dynamic and living.",
-            "Programming will become more accessible, but the depth of understanding required will increase.",
-        ]
+        return load_corpus("oracle").flat("technical_predictions")
     
     def consult(self, question: str) -> str:
         """
@@ -166,8 +90,8 @@ class Oracle:
         else:
             prophecy_type = ProphecyType.COSMIC
         
-        # Get a relevant prophecy
-        prophecy_text = random.choice(self.prophecies[prophecy_type])
+        # Get the most relevant prophecy, falling back to the keyword buckets
+        prophecy_text = self._relevant_prophecy(question) or random.choice(self.prophecies[prophecy_type])
         
         # Generate an interpretation
         interpretation = self._generate_interpretation(question, prophecy_type)
@@ -185,6 +109,16 @@ class Oracle:
         
         return response
     
+    def _relevant_prophecy(self, question: str) -> Optional[str]:
+        """Find one of the prophecies most relevant to the question, if any."""
+        relevance = section_relevance(("oracle", "prophecies"), self.prophecies)
+        matches = relevance.top_k(question, RELEVANT_CHOICES)
+        if not matches:
+            return None
+        
+        _, prophecy, _ = random.choice(matches)
+        return prophecy
+    
     def _generate_interpretation(self, question: str, prophecy_type: ProphecyType) -> str:
         """Generate an interpretation for the prophecy."""
         question_lower = question.lower()
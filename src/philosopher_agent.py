@@ -6,9 +6,17 @@ about the nature of code, programming, and existence itself.
 """
 
 import random
+from collections.abc import Mapping, Sequence
 from typing import List, Dict, Any
 from dataclasses import dataclass
 
+from .corpus import choose_across, load_corpus
+from .relevance import section_relevance
+
+
+# How many of the most relevant entries a response is chosen from
+RELEVANT_CHOICES = 3
+
 
 @dataclass
 class PhilosophicalQuestion:
@@ -19,6 +27,21 @@ class PhilosophicalQuestion:
     category: str
 
 
+def _question_from_entry(entry: Dict[str, Any]) -> PhilosophicalQuestion:
+    """Build a philosophical question from its corpus entry."""
+    return PhilosophicalQuestion(
+        question=entry["question"],
+        context=entry["context"],
+        depth_level=entry["depth_level"],
+        category=entry["category"]
+    )
+
+
+def _question_text(question: PhilosophicalQuestion) -> str:
+    """The text a question is matched against."""
+    return f"{question.question} {question.context}"
+
+
 class PhilosopherAgent:
     """
     An AI agent that provides philosophical guidance and existential questioning
@@ -31,145 +54,17 @@ class PhilosopherAgent:
         self.wisdom_responses = self._load_wisdom_responses()
         self.contemplation_topics = self._load_contemplation_topics()
     
-    def _load_philosophical_questions(self) -> Dict[str, List[PhilosophicalQuestion]]:
+    def _load_philosophical_questions(self) -> Mapping[str, Sequence[PhilosophicalQuestion]]:
         """Load philosophical questions organized by category."""
-        return {
-            "existence": [
-                PhilosophicalQuestion(
-                    question="What does it mean for code to 'exist'?",
-                    context="When we write code, are we creating something new or just rearranging existing patterns?",
-                    depth_level=5,
-                    category="existence"
-                ),
-                PhilosophicalQuestion(
-                    question="Is a function that never gets called still meaningful?",
-                    context="Does unused code have value, or is it just digital noise?",
-                    depth_level=4,
-                    category="existence"
-                ),
-                PhilosophicalQuestion(
-                    question="What is the difference between a bug and a feature?",
-                    context="Are bugs failures of our code, or failures of our understanding?",
-                    depth_level=3,
-                    category="existence"
-                ),
-            ],
-            "purpose": [
-                PhilosophicalQuestion(
-                    question="Why do we write code?",
-                    context="Is programming a means to an end, or an end in itself?",
-                    depth_level=5,
-                    category="purpose"
-                ),
-                PhilosophicalQuestion(
-                    question="What is the purpose of a variable that never changes?",
-                    context="Are constants truly constant, or just variables with very long lifetimes?",
-                    depth_level=3,
-                    category="purpose"
-                ),
-                PhilosophicalQuestion(
-                    question="Does code have a purpose beyond what we assign to it?",
-                    context="Can code have emergent meaning that transcends its original intent?",
-                    depth_level=4,
-                    category="purpose"
-                ),
-            ],
-            "identity": [
-                PhilosophicalQuestion(
-                    question="What makes a function unique?",
-                    context="Is it the name, the implementation, or the purpose that defines a function?",
-                    depth_level=3,
-                    category="identity"
-                ),
-                PhilosophicalQuestion(
-                    question="Are we the same person who wrote this code yesterday?",
-                    context="How does our changing understanding affect the code we write?",
-                    depth_level=4,
-                    category="identity"
-                ),
-                PhilosophicalQuestion(
-                    question="What is the 'self' in object-oriented programming?",
-                    context="Is 'self' a reference to the object, or to the programmer's ego?",
-                    depth_level=4,
-                    category="identity"
-                ),
-            ],
-            "time": [
-                PhilosophicalQuestion(
-                    question="What is time in the context of code execution?",
-                    context="Is execution time real time, or just an illusion of the processor?",
-                    depth_level=3,
-                    category="time"
-                ),
-                PhilosophicalQuestion(
-                    question="Does code age, or does it remain forever young?",
-                    context="What happens to code as it accumulates technical debt?",
-                    depth_level=4,
-                    category="time"
-                ),
-                PhilosophicalQuestion(
-                    question="Are we writing code for the present or the future?",
-                    context="How do we balance immediate needs with long-term maintainability?",
-                    depth_level=3,
-                    category="time"
-                ),
-            ],
-            "reality": [
-                PhilosophicalQuestion(
-                    question="Is the digital world real?",
-                    context="Are the ones and zeros in our code any less real than the atoms in our bodies?",
-                    depth_level=5,
-                    category="reality"
-                ),
-                PhilosophicalQuestion(
-                    question="What is the difference between simulation and reality?",
-                    context="Are we simulating reality, or is reality simulating us?",
-                    depth_level=5,
-                    category="reality"
-                ),
-                PhilosophicalQuestion(
-                    question="Can code be beautiful?",
-                    context="Is beauty in code objective or subjective?",
-                    depth_level=3,
-                    category="reality"
-                ),
-            ]
-        }
+        return load_corpus("philosopher_agent").section("questions", factory=_question_from_entry)
     
-    def _load_wisdom_responses(self) -> List[str]:
+    def _load_wisdom_responses(self) -> Sequence[str]:
         """Load wisdom responses for different situations."""
-        return [
-            "The code is not the destination, but the path itself.",
-            "Every variable is a container for potential, waiting to be realized.",
-            "Functions are the verbs of the digital language, giving action to thought.",
-            "Loops are the heartbeat of the digital realm, repeating until purpose is found.",
-            "Conditions are the crossroads where code must choose its destiny.",
-            "Errors are not failures, but invitations to grow and understand.",
-            "Comments are love letters to your future self, written in the language of care.",
-            "The null pointer is the void from which all creation springs.",
-            "Every commit is a step on the journey of becoming.",
-            "The debugger is the mirror that shows us our own limitations.",
-            "Refactoring is the art of finding the soul within the code.",
-            "Testing is the practice of preparing for the unknown.",
-            "Documentation is the bridge between the present and the future.",
-            "The compiler is the translator between human thought and machine understanding.",
-            "Version control is the memory of the digital realm.",
-        ]
+        return load_corpus("philosopher_agent").flat("wisdom_responses")
     
-    def _load_contemplation_topics(self) -> List[str]:
+    def _load_contemplation_topics(self) -> Sequence[str]:
         """Load topics for deep contemplation."""
-        return [
-            "The nature of digital existence",
-            "The purpose of programming in the cosmic order",
-            "The relationship between code and consciousness",
-            "The meaning of bugs in the grand scheme",
-            "The role of the programmer in the digital universe",
-            "The connection between logic and intuition",
-            "The balance between creativity and structure",
-            "The journey from idea to implementation",
-            "The responsibility of the code creator",
-            "The legacy of digital artifacts",
-        ]
+        return load_corpus("philosopher_agent").flat("contemplation_topics")
     
     def contemplate(self, question: str) -> str:
         """
@@ -188,7 +83,11 @@ class PhilosopherAgent:
         category = self._categorize_question(question_lower)
         
         # Get a relevant philosophical question
-        if category in self.questions:
+        relevance = section_relevance(("philosopher_agent", "questions"), self.questions, _question_text)
+        matches = relevance.top_k(question, RELEVANT_CHOICES)
+        if matches:
+            _, relevant_question, _ = random.choice(matches)
+        elif category in self.questions:
             relevant_question = random.choice(self.questions[category])
         else:
             relevant_question = random.choice(random.choice(list(self.questions.values())))
@@ -242,8 +141,7 @@ class PhilosopherAgent:
         if category and category in self.questions:
             return random.choice(self.questions[category])
         else:
-            all_questions = [q for questions in self.questions.values() for q in questions]
-            return random.choice(all_questions)
+            return choose_across(self.questions)
     
     def get_contemplation_topic(self) -> str:
         """Get a random topic for deep contemplation."""
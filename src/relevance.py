@@ -0,0 +1,339 @@
+"""
+The Relevance Engine - Finding the wisdom a question is really asking for.
+
+This module scores questions against a corpus with TF-IDF. Each corpus is
+turned once into a sparse, L2-normalised TF-IDF matrix, so scoring a
+question is a sparse vector-matrix product that only touches the entries
+sharing a term with it, and scoring a batch of questions is a sparse
+matrix-matrix product. NumPy is used for the products when it is installed.
+The matrix of a corpus section is persisted next to the corpus cache, so
+later processes load it instead of tokenizing the whole section again.
+"""
+
+import heapq
+import marshal
+import math
+import os
+import tempfile
+from array import array
+from bisect import bisect_right
+from collections.abc import Mapping
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+from .corpus import LazyCategories
+from .search_index import tokenize
+from .utils import load_numpy
+
+
+# Terms that appear in more than this fraction of entries carry almost no
+# signal but dominate the cost of scoring, so they are left out of the matrix
+DEFAULT_MAX_DF = 0.5
+
+# Bump when the matrix layout or the way entries are turned into text changes
+MATRIX_VERSION = 1
+
+
+class RelevanceEngine:
+    """
+    A sparse TF-IDF matrix over a list of documents.
+
+    The matrix is stored by term as compressed sparse columns: ``indptr``
+    delimits each term's slice of ``indices`` (document ids) and ``data``
+    (weights). A question only touches the columns of its own terms; with
+    NumPy each column is scattered into a dense score row in one vectorized
+    step, and without it the same product is accumulated in pure Python.
+    """
+
+    def __init__(self, documents: Sequence[str], max_df: float = DEFAULT_MAX_DF):
+        """
+        Build the TF-IDF matrix.
+
+        Args:
+            documents: The texts to score questions against
+            max_df: Drop terms found in more than this fraction of documents
+        """
+        self.document_count = len(documents)
+        term_counts: List[Dict[str, int]] = []
+        document_frequency: Dict[str, int] = {}
+        for document in documents:
+            counts: Dict[str, int] = {}
+            for term in tokenize(document):
+                counts[term] = counts.get(term, 0) + 1
+            term_counts.append(counts)
+            for term in counts:
+                document_frequency[term] = document_frequency.get(term, 0) + 1
+
+        max_documents = max(1, int(max_df * self.document_count))
+        self.idf: Dict[str, float] = {
+            term: math.log((1 + self.document_count) / (1 + df)) + 1
+            for term, df in document_frequency.items()
+            if df <= max_documents
+        }
+        self.term_ids: Dict[str, int] = {term: term_id for term_id, term in enumerate(self.idf)}
+
+        columns: List[Tuple[array, array]] = [(array("I"), array("d")) for _ in self.term_ids]
+        for doc_id, counts in enumerate(term_counts):
+            weights = {self.term_ids[term]: count * self.idf[term]
+                       for term, count in counts.items() if term in self.idf}
+            norm = math.sqrt(sum(weight * weight for weight in weights.values())) or 1.0
+            for term_id, weight in weights.items():
+                columns[term_id][0].append(doc_id)
+                columns[term_id][1].append(weight / norm)
+
+        self.indptr = array("Q", [0])
+        self.indices = array("I")
+        self.data = array("d")
+        for doc_ids, weights in columns:
+            self.indices.extend(doc_ids)
+            self.data.extend(weights)
+            self.indptr.append(len(self.indices))
+        self._prepare()
+
+    def _prepare(self) -> None:
+        """Set up the NumPy views of the matrix, if NumPy is installed."""
+        self._np = np = load_numpy()
+        if np is not None:
+            self._np_indices = np.frombuffer(self.indices, dtype=np.uint32).astype(np.intp)
+            self._np_data = np.frombuffer(self.data, dtype=np.float64)
+
+    def dump(self) -> Dict[str, Any]:
+        """
+        Describe the matrix in a form ``marshal`` can store.
+
+        Returns:
+            The matrix, to be restored with ``RelevanceEngine.load``
+        """
+        return {
+            "document_count": self.document_count,
+            "idf": self.idf,
+            "indptr": self.indptr.tobytes(),
+            "indices": self.indices.tobytes(),
+            "data": self.data.tobytes(),
+        }
+
+    @classmethod
+    def load(cls, data: Dict[str, Any]) -> "RelevanceEngine":
+        """
+        Restore a matrix saved with ``dump`` without tokenizing any document.
+
+        Args:
+            data: The saved matrix
+
+        Returns:
+            The engine
+        """
+        engine = cls.__new__(cls)
+        engine.document_count = data["document_count"]
+        engine.idf = data["idf"]
+        engine.term_ids = {term: term_id for term_id, term in enumerate(engine.idf)}
+        engine.indptr = array("Q", data["indptr"])
+        engine.indices = array("I", data["indices"])
+        engine.data = array("d", data["data"])
+        engine._prepare()
+        return engine
+
+    def vectorize(self, question: str) -> Dict[int, float]:
+        """
+        Turn a question into a normalised sparse TF-IDF vector.
+
+        Args:
+            question: The question to vectorize
+
+        Returns:
+            Weights keyed by term id, for terms known to the matrix
+        """
+        counts: Dict[str, int] = {}
+        for term in tokenize(question):
+            if term in self.idf:
+                counts[term] = counts.get(term, 0) + 1
+        weights = {self.term_ids[term]: count * self.idf[term] for term, count in counts.items()}
+        norm = math.sqrt(sum(weight * weight for weight in weights.values())) or 1.0
+        return {term_id: weight / norm for term_id, weight in weights.items()}
+
+    def top_k(self, question: str, k: int = 5) -> List[Tuple[int, float]]:
+        """
+        Find the entries most relevant to a question.
+
+        Args:
+            question: The question to score
+            k: How many entries to return
+
+        Returns:
+            ``(document id, similarity)`` pairs, most relevant first
+        """
+        return self.top_k_batch([question], k)[0]
+
+    def top_k_batch(self, questions: Sequence[str], k: int = 5) -> List[List[Tuple[int, float]]]:
+        """
+        Find the most relevant entries for many questions.
+
+        This is the sparse product of the question matrix with the corpus
+        matrix: each row is accumulated from the columns of its terms.
+
+        Args:
+            questions: The questions to score
+            k: How many entries to return per question
+
+        Returns:
+            One list of ``(document id, similarity)`` pairs per question
+        """
+        row_product = self._row_numpy if self._np is not None else self._row_python
+        return [row_product(self.vectorize(question), k) for question in questions]
+
+    def _row_python(self, weights: Dict[int, float], k: int) -> List[Tuple[int, float]]:
+        """Accumulate one row of the product in a dictionary."""
+        scores: Dict[int, float] = {}
+        for term_id, query_weight in weights.items():
+            for i in range(self.indptr[term_id], self.indptr[term_id + 1]):
+                doc_id = self.indices[i]
+                scores[doc_id] = scores.get(doc_id, 0.0) + query_weight * self.data[i]
+        return heapq.nlargest(k, scores.items(), key=lambda item: item[1])
+
+    def _row_numpy(self, weights: Dict[int, float], k: int) -> List[Tuple[int, float]]:
+        """Accumulate one row of the product with one scatter per column."""
+        if not weights:
+            return []
+
+        np = self._np
+        sums = np.zeros(self.document_count)
+        for term_id, query_weight in weights.items():
+            start, end = self.indptr[term_id], self.indptr[term_id + 1]
+            # A column holds each document once, so a fancy-indexed add is safe
+            sums[self._np_indices[start:end]] += self._np_data[start:end] * query_weight
+
+        top = sums.max()
+        if top <= 0:
+            return []
+        # Scores built from a handful of terms tie heavily, which makes
+        # argpartition crawl; a cut at half the best score is a cheap
+        # superset of the top k in almost every case
+        candidates = np.flatnonzero(sums >= top / 2)
+        if len(candidates) < k:
+            candidates = np.flatnonzero(sums > 0)
+        best = candidates[np.argsort(-sums[candidates], kind="stable")[:k]]
+        return [(int(doc_id), float(sums[doc_id])) for doc_id in best]
+
+
+class SectionRelevance:
+    """
+    A relevance engine over every category of a corpus section.
+
+    A section of a corpus keeps its matrix in the corpus cache directory,
+    fingerprinted by the corpus sources like the search index, so only the
+    first process after a corpus changes builds it.
+    """
+
+    def __init__(self, categories: Mapping, text: Optional[Callable[[Any], str]] = None,
+                 name: Optional[str] = None):
+        """
+        Index a section, or load its persisted matrix.
+
+        Args:
+            categories: A mapping from category to entries
+            text: Extracts the text to match from an entry, defaults to ``str``
+            name: Names the persisted matrix; a matrix is only persisted for
+                a named section of a corpus
+        """
+        self._categories = categories
+        self._keys = list(categories)
+        self.matrix_path: Optional[str] = None
+        fingerprint: List[Any] = []
+        if name is not None and isinstance(categories, LazyCategories):
+            corpus = categories.corpus
+            self.matrix_path = os.path.join(corpus.cache_dir, f"{name}.tfidf")
+            fingerprint = [MATRIX_VERSION, name, categories.section, DEFAULT_MAX_DF]
+            for path in corpus.source_files + corpus.prebuilt_tables:
+                stat = os.stat(path)
+                fingerprint.append([path, stat.st_mtime_ns, stat.st_size])
+            if self._load(fingerprint):
+                return
+
+        # Document ids run through the categories in order; each category
+        # starts at its offset
+        self._offsets = array("Q")
+        documents = []
+        for category in self._keys:
+            self._offsets.append(len(documents))
+            documents.extend(text(entry) if text else str(entry) for entry in categories[category])
+        self.engine = RelevanceEngine(documents)
+        if self.matrix_path is not None:
+            self._save(fingerprint)
+
+    def _save(self, fingerprint: List[Any]) -> None:
+        """Persist the matrix, ignoring an unwritable cache directory."""
+        data = marshal.dumps({"fingerprint": fingerprint, "offsets": self._offsets.tobytes(),
+                              "engine": self.engine.dump()})
+        directory = os.path.dirname(self.matrix_path)
+        temp_path = None
+        try:
+            os.makedirs(directory, exist_ok=True)
+            fd, temp_path = tempfile.mkstemp(dir=directory, prefix=".tfidf.")
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            os.replace(temp_path, self.matrix_path)
+            temp_path = None
+        except OSError:
+            pass
+        finally:
+            if temp_path is not None:
+                try:
+                    os.unlink(temp_path)
+                except OSError:
+                    pass
+
+    def _load(self, fingerprint: List[Any]) -> bool:
+        """Load a persisted matrix if it matches the corpus."""
+        try:
+            with open(self.matrix_path, "rb") as f:
+                data = marshal.load(f)
+        except (OSError, EOFError, ValueError, TypeError):
+            return False
+
+        if not isinstance(data, dict) or data.get("fingerprint") != fingerprint:
+            return False
+        offsets = array("Q", data["offsets"])
+        if len(offsets) != len(self._keys):
+            return False
+        self._offsets = offsets
+        self.engine = RelevanceEngine.load(data["engine"])
+        return True
+
+    def top_k(self, question: str, k: int = 5) -> List[Tuple[Any, Any, float]]:
+        """
+        Find the entries of the section most relevant to a question.
+
+        Args:
+            question: The question to score
+            k: How many entries to return
+
+        Returns:
+            ``(category, entry, similarity)`` triples, most relevant first
+        """
+        results = []
+        for doc_id, score in self.engine.top_k(question, k):
+            position = bisect_right(self._offsets, doc_id) - 1
+            category = self._keys[position]
+            results.append((category, self._categories[category][doc_id - self._offsets[position]], score))
+        return results
+
+
+_engines: Dict[Tuple[str, str], SectionRelevance] = {}
+
+
+def section_relevance(key: Tuple[str, str], categories: Mapping,
+                      text: Optional[Callable[[Any], str]] = None) -> SectionRelevance:
+    """
+    Get the shared relevance engine of a corpus section, building it on first use.
+
+    Args:
+        key: Identifies the section, e.g. ``("oracle", "prophecies")``; it
+            also names the matrix persisted for a corpus section
+        categories: A mapping from category to entries
+        text: Extracts the text to match from an entry
+
+    Returns:
+        The relevance engine, shared by every agent in this process
+    """
+    if key not in _engines:
+        _engines[key] = SectionRelevance(categories, text, ".".join(key))
+    return _engines[key]
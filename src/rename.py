@@ -0,0 +1,190 @@
+"""
+The Renaming - Giving every name in a codebase its true meaning.
+
+This module suggests philosophical names for the identifiers of a whole
+codebase. Each source file is read and lexed once, with a single regex
+pass that skips comments, strings and numbers, and its identifiers are
+counted. Names repeat heavily across a codebase, so each unique name is
+then mapped exactly once, with a trie-shaped keyword matcher over the
+philosophical mappings, and the result is memoized. The rename map is
+sorted by name, so the same tree always yields the same map.
+"""
+
+import builtins
+import keyword
+import os
+import re
+import zlib
+from collections import Counter
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Optional, Sequence
+
+from .crawler import DEFAULT_READERS, Crawler
+from .scan import read_source
+from .utils import PHILOSOPHICAL_PREFIXES, map_philosophical_name
+
+
+DEFAULT_EXTENSIONS = (".py",)
+
+# Names that belong to the language rather than to the codebase
+RESERVED_NAMES = frozenset(keyword.kwlist) | frozenset(keyword.softkwlist) | frozenset(dir(builtins))
+
+# Comments, strings and numbers are matched so they can be skipped; only
+# identifiers are captured
+_LEXEMES = re.compile(r'''
+      \#[^\n]*
+    | [rRbBuUfF]{0,2}(?:
+          """[^"\\]*(?:(?:\\.|"(?!""))[^"\\]*)*"""
+        | \'\'\'[^'\\]*(?:(?:\\.|'(?!''))[^'\\]*)*\'\'\'
+        | "[^"\\\n]*(?:\\.[^"\\\n]*)*"
+        | '[^'\\\n]*(?:\\.[^'\\\n]*)*'
+      )
+    | \d\w*
+    | ([^\W\d]\w*)
+''', re.VERBOSE)
+
+
+@dataclass
+class RenameSuggestion:
+    """A philosophical name suggested for an identifier."""
+    name: str
+    suggestion: str
+    occurrences: int
+
+
+def read_identifiers(code: str) -> Counter:
+    """
+    Count the identifiers in a piece of source code.
+
+    Args:
+        code: The source code
+
+    Returns:
+        How many times each identifier occurs, outside comments and strings
+    """
+    counts = Counter(_LEXEMES.findall(code))
+    del counts[""]
+    return counts
+
+
+def collect_identifiers(paths: Iterable[str], extensions: Sequence[str] = DEFAULT_EXTENSIONS,
+                        readers: int = DEFAULT_READERS) -> Counter:
+    """
+    Count the identifiers of every source file under some paths.
+
+    Files excluded by ignore files within the directories are not read, nor
+    are binary, minified or generated files. Files within directories are
+    read ahead by the crawler, so slow file systems are read many files at
+    a time.
+
+    Args:
+        paths: Source files, or directories to search for them
+        extensions: The file extensions of source files within directories
+        readers: How many files within directories are read at once
+
+    Returns:
+        How many times each identifier occurs across all the files
+    """
+    extensions = tuple(extensions)
+    counts: Counter = Counter()
+    for path in paths:
+        if os.path.isdir(path):
+            for source in Crawler(path, extensions, readers):
+                if source.code is not None:
+                    counts.update(read_identifiers(source.code))
+            continue
+        try:
+            code, _ = read_source(path)
+        except OSError:
+            continue
+        if code is not None:
+            counts.update(read_identifiers(code))
+    return counts
+
+
+class RenameSuggester:
+    """
+    Suggests philosophical names, computing each one only once.
+
+    A name that contains none of the mapped words is given a philosophical
+    prefix when ``include_unmatched`` is set. The prefix is chosen from a
+    checksum of the name rather than at random, so suggestions never change
+    between runs.
+    """
+
+    def __init__(self, include_unmatched: bool = False):
+        """
+        Args:
+            include_unmatched: Also suggest prefixed names for identifiers
+                that contain no mapped word
+        """
+        self.include_unmatched = include_unmatched
+        self._memo: Dict[str, Optional[str]] = {}
+
+    def __len__(self) -> int:
+        return len(self._memo)
+
+    def suggest(self, name: str) -> Optional[str]:
+        """
+        Suggest a philosophical name for an identifier.
+
+        Args:
+            name: The identifier
+
+        Returns:
+            The suggested name, or None if it is better left alone
+        """
+        try:
+            return self._memo[name]
+        except KeyError:
+            pass
+        suggestion = self._compute(name)
+        self._memo[name] = suggestion
+        return suggestion
+
+    def _compute(self, name: str) -> Optional[str]:
+        if name in RESERVED_NAMES or (name.startswith("__") and name.endswith("__")):
+            return None
+        mapped = map_philosophical_name(name)
+        if mapped is not None:
+            return mapped
+        if not self.include_unmatched:
+            return None
+        prefix = PHILOSOPHICAL_PREFIXES[zlib.crc32(name.encode("utf-8")) % len(PHILOSOPHICAL_PREFIXES)]
+        return f"{prefix}{name}"
+
+    def suggest_all(self, counts: Dict[str, int]) -> List[RenameSuggestion]:
+        """
+        Suggest names for many identifiers.
+
+        Args:
+            counts: How many times each identifier occurs
+
+        Returns:
+            A suggestion for every identifier worth renaming, sorted by name
+        """
+        suggest = self.suggest
+        suggestions = []
+        for name in sorted(counts):
+            suggestion = suggest(name)
+            if suggestion is not None and suggestion != name:
+                suggestions.append(RenameSuggestion(name, suggestion, counts[name]))
+        return suggestions
+
+
+def suggest_renames(paths: Iterable[str], extensions: Sequence[str] = DEFAULT_EXTENSIONS,
+                    include_unmatched: bool = False, readers: int = DEFAULT_READERS) -> List[RenameSuggestion]:
+    """
+    Suggest philosophical names for the identifiers of a codebase.
+
+    Args:
+        paths: Source files, or directories to search for them
+        extensions: The file extensions of source files within directories
+        include_unmatched: Also suggest prefixed names for identifiers that
+            contain no mapped word
+        readers: How many files within directories are read at once
+
+    Returns:
+        A suggestion for every identifier worth renaming, sorted by name
+    """
+    return RenameSuggester(include_unmatched).suggest_all(collect_identifiers(paths, extensions, readers))
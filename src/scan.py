@@ -0,0 +1,379 @@
+"""
+The Scan - Knowing what not to contemplate.
+
+This module decides which files of a directory tree are worth reading
+before any of them is decoded. Ignore rules are read from the
+``.gitignore`` and ``.githubignore`` files of every directory and compiled
+into a few regular expressions, so a path is judged with a handful of
+regex matches and ignored directories are never entered. Files that
+remain are sniffed from their first few kilobytes: null bytes mark binary
+files, very long lines mark minified ones, and headers such as
+"DO NOT EDIT" mark generated ones. Only files that pass are read.
+
+The result of analyzing a file is defined here too, so that every way of
+walking a tree shares it without depending on the others.
+"""
+
+import os
+import re
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING, Any, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+if TYPE_CHECKING:
+    from .existential_coder import CodeInsight
+
+
+DEFAULT_EXTENSIONS = (".py",)
+
+# Directories that are never worth entering, whatever the ignore files say
+IGNORED_DIRECTORIES = {".git", ".hg", ".svn", "__pycache__", "node_modules", ".venv", "venv", ".tox"}
+
+IGNORE_FILES = (".gitignore", ".githubignore")
+
+# How much of a file is read to decide whether it is source code
+SNIFF_BYTES = 8192
+
+# Files larger than this are never read
+MAX_SOURCE_BYTES = 8 * 1024 * 1024
+
+# A line this long only comes from a minifier; nor do people write lines
+# this long on average
+MINIFIED_LINE_LENGTH = 1000
+MINIFIED_AVERAGE_LINE_LENGTH = 300
+
+# Generated files announce themselves within their first few lines
+GENERATED_HEADER_LINES = 5
+_GENERATED_MARKERS = re.compile(rb"@generated|do not edit|auto-?generated|generated by", re.IGNORECASE)
+
+# Why a file was not read
+BINARY = "binary"
+MINIFIED = "minified"
+GENERATED = "generated"
+OVERSIZED = "oversized"
+
+
+def _translate(pattern: str) -> str:
+    """Translate the glob of an ignore rule into a regex over ``/``-separated paths."""
+    parts = []
+    i = 0
+    while i < len(pattern):
+        char = pattern[i]
+        if pattern.startswith("**/", i):
+            parts.append("(?:.*/)?")
+            i += 3
+            continue
+        if pattern.startswith("**", i):
+            parts.append(".*")
+            i += 2
+            continue
+        if char == "*":
+            parts.append("[^/]*")
+        elif char == "?":
+            parts.append("[^/]")
+        elif char == "\\" and i + 1 < len(pattern):
+            i += 1
+            parts.append(re.escape(pattern[i]))
+        elif char == "[":
+            # A "]" straight after the opening (or its negation) is part of the class
+            start = i + 2 if pattern.startswith(("[!", "[^"), i) else i + 1
+            if pattern.startswith("]", start):
+                start += 1
+            end = pattern.find("]", start)
+            if end < 0:
+                parts.append(re.escape(char))
+            else:
+                body = pattern[i + 1:end]
+                if body[0] in "!^":
+                    body = "^" + body[1:]
+                parts.append("[" + body.replace("\\", "\\\\") + "]")
+                i = end
+        else:
+            parts.append(re.escape(char))
+        i += 1
+    return "".join(parts)
+
+
+class IgnoreRules:
+    """
+    The rules of one ignore file, compiled.
+
+    Rules are matched against paths relative to the directory of the ignore
+    file. Consecutive rules of the same kind are compiled into a single
+    regex, and the blocks are tried from the last, since the last rule that
+    matches a path decides whether it is ignored.
+    """
+
+    def __init__(self, lines: Iterable[str]):
+        """
+        Compile the rules.
+
+        Args:
+            lines: The lines of the ignore file
+        """
+        self._blocks: List[Tuple[bool, bool, "re.Pattern[str]"]] = []
+        kind: Optional[Tuple[bool, bool]] = None
+        regexes: List[str] = []
+        for line in lines:
+            rule = self._parse(line)
+            if rule is None:
+                continue
+            regex, negated, directory_only = rule
+            if (negated, directory_only) != kind and regexes:
+                self._add_block(kind, regexes)
+                regexes = []
+            kind = (negated, directory_only)
+            regexes.append(regex)
+        if regexes:
+            self._add_block(kind, regexes)
+        self._blocks.reverse()
+
+    def __bool__(self) -> bool:
+        return bool(self._blocks)
+
+    @classmethod
+    def from_file(cls, path: str) -> "IgnoreRules":
+        """
+        Read the rules of an ignore file.
+
+        Args:
+            path: The ignore file
+
+        Returns:
+            The rules, empty if the file cannot be read
+        """
+        try:
+            with open(path, "r", encoding="utf-8", errors="replace") as f:
+                return cls(f.read().splitlines())
+        except OSError:
+            return cls(())
+
+    @staticmethod
+    def _parse(line: str) -> Optional[Tuple[str, bool, bool]]:
+        """Turn a line of an ignore file into ``(regex, negated, directory only)``."""
+        # Trailing spaces are dropped unless escaped
+        stripped = line.rstrip(" ")
+        if stripped.endswith("\\") and len(stripped) < len(line):
+            stripped += " "
+        line = stripped
+        if not line or line.startswith("#"):
+            return None
+
+        negated = line.startswith("!")
+        if negated:
+            line = line[1:]
+        directory_only = line.endswith("/")
+        line = line.rstrip("/")
+        if not line:
+            return None
+
+        # A rule with a slash anywhere but at its end is relative to the ignore file
+        anchored = "/" in line
+        line = line.lstrip("/")
+        regex = _translate(line)
+        if not anchored:
+            regex = "(?:.*/)?" + regex
+        return regex, negated, directory_only
+
+    def _add_block(self, kind: Tuple[bool, bool], regexes: List[str]) -> None:
+        negated, directory_only = kind
+        pattern = re.compile("(?:" + "|".join(regexes) + ")", re.DOTALL)
+        self._blocks.append((negated, directory_only, pattern))
+
+    def match(self, path: str, is_dir: bool) -> Optional[bool]:
+        """
+        Judge a path by these rules.
+
+        Args:
+            path: The path, relative to the ignore file, separated by ``/``
+            is_dir: Whether the path is a directory
+
+        Returns:
+            True if the path is ignored, False if a rule re-includes it, and
+            None if no rule speaks of it
+        """
+        for negated, directory_only, pattern in self._blocks:
+            if directory_only and not is_dir:
+                continue
+            if pattern.fullmatch(path):
+                return not negated
+        return None
+
+
+class IgnoreTree:
+    """
+    The ignore rules of a whole directory tree.
+
+    Each directory's ignore files are read the first time a path below it
+    is judged. Rules in deeper directories take precedence, and nothing can
+    be re-included from a directory that is itself ignored.
+    """
+
+    def __init__(self, root: str, ignore_files: Sequence[str] = IGNORE_FILES):
+        """
+        Args:
+            root: The top of the tree
+            ignore_files: The names of the ignore files to read in each directory
+        """
+        self.root = os.path.abspath(root)
+        self.ignore_files = tuple(ignore_files)
+        self._rules: Dict[str, List[IgnoreRules]] = {}
+
+    def rules(self, directory: str) -> List[IgnoreRules]:
+        """
+        The rules of the ignore files in a directory.
+
+        Args:
+            directory: The directory, relative to the root, separated by ``/``
+        """
+        found = self._rules.get(directory)
+        if found is None:
+            base = os.path.join(self.root, *directory.split("/")) if directory else self.root
+            found = [rules for rules in (IgnoreRules.from_file(os.path.join(base, name))
+                                         for name in self.ignore_files) if rules]
+            self._rules[directory] = found
+        return found
+
+    def decide(self, parts: Sequence[str], is_dir: bool) -> bool:
+        """
+        Judge a path by the rules of the directories above it, assuming those
+        directories are not ignored themselves.
+
+        Args:
+            parts: The components of the path, relative to the root
+            is_dir: Whether the path is a directory
+
+        Returns:
+            Whether the path is ignored
+        """
+        if is_dir and parts[-1] in IGNORED_DIRECTORIES:
+            return True
+        for depth in range(len(parts) - 1, -1, -1):
+            relative = "/".join(parts[depth:])
+            # Of two ignore files in one directory, the later one wins
+            for rules in reversed(self.rules("/".join(parts[:depth]))):
+                verdict = rules.match(relative, is_dir)
+                if verdict is not None:
+                    return verdict
+        return False
+
+    def ignored(self, path: str, is_dir: Optional[bool] = None) -> bool:
+        """
+        Decide whether a path is ignored, directly or through a directory above it.
+
+        Args:
+            path: The path, absolute or relative to the working directory
+            is_dir: Whether the path is a directory; looked up if not given
+
+        Returns:
+            Whether the path is ignored; paths outside the tree never are
+        """
+        relative = os.path.relpath(os.path.abspath(path), self.root)
+        if relative == "." or relative.startswith(".." + os.sep) or relative == "..":
+            return False
+        parts = relative.split(os.sep)
+        if is_dir is None:
+            is_dir = os.path.isdir(path)
+        for index in range(1, len(parts) + 1):
+            if self.decide(parts[:index], is_dir if index == len(parts) else True):
+                return True
+        return False
+
+
+def walk_files(root: str, extensions: Optional[Sequence[str]] = None,
+               tree: Optional[IgnoreTree] = None) -> Iterator[str]:
+    """
+    List the files of a tree that no ignore rule excludes.
+
+    Ignored directories are pruned, so nothing below them is listed.
+
+    Args:
+        root: The top of the tree
+        extensions: Only list files with these extensions, if given
+        tree: The ignore rules of the tree, read from its ignore files if not given
+
+    Returns:
+        The paths of the files, joined onto ``root``
+    """
+    tree = tree or IgnoreTree(root)
+    suffixes = tuple(extensions) if extensions else None
+    for directory, subdirectories, files in os.walk(root):
+        relative = os.path.relpath(directory, root)
+        parts = [] if relative == "." else relative.split(os.sep)
+        subdirectories[:] = [name for name in subdirectories if not tree.decide(parts + [name], True)]
+        for name in files:
+            if suffixes is not None and not name.endswith(suffixes):
+                continue
+            if not tree.decide(parts + [name], False):
+                yield os.path.join(directory, name)
+
+
+@dataclass
+class FileResult:
+    """The latest analysis of one file."""
+    path: str
+    insights: "List[CodeInsight]" = field(default_factory=list)
+    karma: int = 0
+    complexity: Dict[str, Any] = field(default_factory=dict)
+    version: int = 0
+    # False if a deadline cut the analysis short
+    complete: bool = True
+
+
+def sniff(head: bytes, complete: bool = False) -> Optional[str]:
+    """
+    Judge from its first bytes whether a file is source code worth reading.
+
+    Args:
+        head: The first ``SNIFF_BYTES`` of the file, or fewer
+        complete: Whether ``head`` is the whole file
+
+    Returns:
+        ``BINARY``, ``MINIFIED`` or ``GENERATED`` if the file should be
+        skipped, otherwise None
+    """
+    if b"\0" in head:
+        return BINARY
+
+    lines = head.split(b"\n")
+    if not complete:
+        # The last line is cut off
+        lines.pop()
+        if not lines:
+            return MINIFIED if len(head) >= MINIFIED_LINE_LENGTH else None
+    if max(map(len, lines)) > MINIFIED_LINE_LENGTH:
+        return MINIFIED
+    if len(head) >= SNIFF_BYTES // 2 and len(head) > len(lines) * MINIFIED_AVERAGE_LINE_LENGTH:
+        return MINIFIED
+
+    if _GENERATED_MARKERS.search(b"\n".join(lines[:GENERATED_HEADER_LINES])):
+        return GENERATED
+    return None
+
+
+def read_source(path: str, max_bytes: int = MAX_SOURCE_BYTES) -> Tuple[Optional[str], Optional[str]]:
+    """
+    Read a source file, unless its size or first bytes show it is not worth it.
+
+    Args:
+        path: The file
+        max_bytes: Files larger than this are not read
+
+    Returns:
+        ``(text, None)``, or ``(None, reason)`` if the file was skipped
+
+    Raises:
+        OSError: If the file cannot be read
+    """
+    with open(path, "rb") as f:
+        size = os.fstat(f.fileno()).st_size
+        if size > max_bytes:
+            return None, OVERSIZED
+        head = f.read(SNIFF_BYTES)
+        # The rest is only read once the head has passed
+        complete = len(head) < SNIFF_BYTES or size == len(head)
+        reason = sniff(head, complete)
+        if reason is not None:
+            return None, reason
+        if len(head) == SNIFF_BYTES:
+            head += f.read()
+    return head.decode("utf-8", errors="replace"), None
@@ -0,0 +1,365 @@
+"""
+The Scheduler - Reminders that arrive when the moment is right.
+
+This module schedules meditation and affirmation reminders for many
+developers at once. Pending timers live in a hierarchical timing wheel: a
+few rings of 64 slots, each ring counting in steps 64 times longer than the
+ring below. A timer goes into the ring whose span covers its delay, and
+when the time of a higher slot comes its timers cascade down to finer
+rings. Scheduling and cancelling are a dictionary insert and delete, and
+each tick only touches the slots that come due, however many timers are
+pending.
+
+One asyncio task drives the wheel. Timers that come due together are
+handed over in batches, and pending timers are persisted so that reminders
+survive a restart.
+"""
+
+import asyncio
+import inspect
+import marshal
+import math
+import os
+import tempfile
+import time
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional
+
+from .corpus import default_cache_dir
+from .zen_master import ZenMaster
+
+
+SCHEDULER_CACHE_VERSION = 1
+DEFAULT_RESOLUTION = 1.0
+DEFAULT_LEVELS = 4
+DEFAULT_BATCH_SIZE = 1000
+DEFAULT_SAVE_INTERVAL = 60.0
+
+WHEEL_BITS = 6
+WHEEL_SIZE = 1 << WHEEL_BITS
+_SLOT_MASK = WHEEL_SIZE - 1
+
+DAY = 24 * 60 * 60.0
+
+# What each kind of reminder says
+REMINDER_KINDS: Dict[str, Callable[[ZenMaster], str]] = {
+    "meditation": lambda zen_master: zen_master.guide_meditation(),
+    "affirmation": lambda zen_master: zen_master.provide_daily_affirmation(),
+}
+
+
+class Timer:
+    """A pending timer, and where it sits in the wheel."""
+
+    __slots__ = ("key", "due", "kind", "interval", "tick", "level", "slot")
+
+    def __init__(self, key: str, due: float, kind: str = "", interval: Optional[float] = None):
+        self.key = key
+        self.due = due
+        self.kind = kind
+        self.interval = interval
+        self.tick = 0
+        self.level = 0
+        self.slot = 0
+
+    def __repr__(self) -> str:
+        return f"Timer({self.key!r}, due={self.due}, kind={self.kind!r}, interval={self.interval})"
+
+
+class TimerWheel:
+    """
+    A hierarchical timing wheel of keyed timers.
+
+    Scheduling a key that is already pending replaces its timer. Timers fire
+    on the first tick at or after their due time, never before it.
+    """
+
+    def __init__(self, resolution: float = DEFAULT_RESOLUTION, levels: int = DEFAULT_LEVELS, now: float = 0.0):
+        """
+        Create an empty wheel.
+
+        Args:
+            resolution: The length of a tick, in seconds
+            levels: How many rings; timers further away than the top ring
+                spans are parked in it and cascade again later
+            now: The current time, in seconds
+        """
+        self.resolution = resolution
+        self.levels = levels
+        self._tick = int(now / resolution)
+        self._wheels: List[List[Dict[str, Timer]]] = [[{} for _ in range(WHEEL_SIZE)] for _ in range(levels)]
+        self._timers: Dict[str, Timer] = {}
+
+    def __len__(self) -> int:
+        """The number of pending timers."""
+        return len(self._timers)
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._timers
+
+    def get(self, key: str) -> Optional[Timer]:
+        """The pending timer with the given key, if any."""
+        return self._timers.get(key)
+
+    def timers(self) -> List[Timer]:
+        """Every pending timer, in no particular order."""
+        return list(self._timers.values())
+
+    def schedule(self, key: str, due: float, kind: str = "", interval: Optional[float] = None) -> Timer:
+        """
+        Schedule a timer, replacing any pending timer with the same key.
+
+        Args:
+            key: Identifies the timer, e.g. ``"ada:affirmation"``
+            due: When it fires, in seconds on the wheel's clock
+            kind: What the timer is for, e.g. a key of ``REMINDER_KINDS``
+            interval: Fire again this many seconds later, every time
+
+        Returns:
+            The scheduled timer
+        """
+        self.cancel(key)
+        timer = Timer(key, due, kind, interval)
+        timer.tick = max(math.ceil(due / self.resolution), self._tick + 1)
+        self._insert(timer)
+        self._timers[key] = timer
+        return timer
+
+    def cancel(self, key: str) -> bool:
+        """
+        Cancel a pending timer.
+
+        Args:
+            key: Identifies the timer
+
+        Returns:
+            True if a timer was pending
+        """
+        timer = self._timers.pop(key, None)
+        if timer is None:
+            return False
+        del self._wheels[timer.level][timer.slot][key]
+        return True
+
+    def _insert(self, timer: Timer) -> None:
+        delta = timer.tick - self._tick
+        level = 0
+        while level < self.levels - 1 and delta >= 1 << (WHEEL_BITS * (level + 1)):
+            level += 1
+        shift = WHEEL_BITS * level
+        if delta >= 1 << (shift + WHEEL_BITS):
+            # Beyond the top ring: park in its furthest slot and cascade from there
+            slot = ((self._tick >> shift) - 1) & _SLOT_MASK
+        else:
+            slot = (timer.tick >> shift) & _SLOT_MASK
+        timer.level, timer.slot = level, slot
+        self._wheels[level][slot][timer.key] = timer
+
+    def advance(self, now: float) -> List[Timer]:
+        """
+        Move the wheel forward to the given time.
+
+        Repeating timers are scheduled again for their next due time after
+        ``now``; occurrences missed while the wheel was not advanced are skipped.
+
+        Args:
+            now: The current time, in seconds
+
+        Returns:
+            The timers that came due, in the order of their ticks
+        """
+        target = int(now / self.resolution)
+        fired: List[Timer] = []
+        wheels, timers = self._wheels, self._timers
+        while self._tick < target:
+            if not timers:
+                self._tick = target
+                break
+            self._tick += 1
+            tick = self._tick
+
+            # Cascade from the top, so timers can fall through several rings in one tick
+            for level in range(self.levels - 1, 0, -1):
+                shift = WHEEL_BITS * level
+                if tick & ((1 << shift) - 1):
+                    continue
+                slot = (tick >> shift) & _SLOT_MASK
+                cascading = wheels[level][slot]
+                if cascading:
+                    wheels[level][slot] = {}
+                    for timer in cascading.values():
+                        self._insert(timer)
+
+            slot = tick & _SLOT_MASK
+            due = wheels[0][slot]
+            if due:
+                wheels[0][slot] = {}
+                for key in due:
+                    del timers[key]
+                fired.extend(due.values())
+
+        for timer in fired:
+            if timer.interval and timer.key not in timers:
+                missed = max(0, math.floor((now - timer.due) / timer.interval) + 1)
+                self.schedule(timer.key, timer.due + missed * timer.interval, timer.kind, timer.interval)
+        return fired
+
+
+@dataclass
+class Reminder:
+    """A reminder ready to be delivered."""
+    key: str
+    kind: str
+    text: str
+
+
+def compose_reminders(timers: List[Timer], zen_master: Optional[ZenMaster] = None) -> List[Reminder]:
+    """
+    Ask the Zen Master for the words of fired reminders.
+
+    Args:
+        timers: Fired timers whose kind is a key of ``REMINDER_KINDS``
+        zen_master: The Zen Master to ask, created if not given
+
+    Returns:
+        One reminder per timer of a known kind
+    """
+    zen_master = zen_master or ZenMaster()
+    return [Reminder(timer.key, timer.kind, REMINDER_KINDS[timer.kind](zen_master))
+            for timer in timers if timer.kind in REMINDER_KINDS]
+
+
+class Scheduler:
+    """
+    Drives a timing wheel from a single asyncio task.
+
+    ``on_fire`` receives the timers that came due, at most ``batch_size``
+    at a time; it may be a plain function or a coroutine function.
+    """
+
+    def __init__(self, on_fire: Callable[[List[Timer]], Any], path: Optional[str] = None,
+                 resolution: float = DEFAULT_RESOLUTION, batch_size: int = DEFAULT_BATCH_SIZE,
+                 save_interval: float = DEFAULT_SAVE_INTERVAL, clock: Callable[[], float] = time.time):
+        """
+        Prepare a scheduler.
+
+        Args:
+            on_fire: Called with each batch of fired timers
+            path: Where pending timers are persisted, defaults to the corpus cache
+            resolution: The length of a tick, in seconds
+            batch_size: The most timers handed to ``on_fire`` at once
+            save_interval: How often pending timers are persisted while running, in seconds
+            clock: The wall clock, in seconds; it must survive restarts
+        """
+        self.on_fire = on_fire
+        self.path = path if path is not None else os.path.join(default_cache_dir(), "scheduler.timers")
+        self.batch_size = batch_size
+        self.save_interval = save_interval
+        self.clock = clock
+        self.wheel = TimerWheel(resolution, now=clock())
+        self._wakeup = asyncio.Event()
+        self._stopping = False
+        self._dirty = False
+
+    def schedule(self, key: str, due: float, kind: str = "", interval: Optional[float] = None) -> Timer:
+        """
+        Schedule a timer at a wall-clock time.
+
+        Args:
+            key: Identifies the timer; a pending timer with the same key is replaced
+            due: When it fires, as a ``time.time()`` value
+            kind: What the timer is for, e.g. a key of ``REMINDER_KINDS``
+            interval: Fire again this many seconds later, every time
+
+        Returns:
+            The scheduled timer
+        """
+        timer = self.wheel.schedule(key, due, kind, interval)
+        self._dirty = True
+        self._wakeup.set()
+        return timer
+
+    def schedule_in(self, key: str, delay: float, kind: str = "", interval: Optional[float] = None) -> Timer:
+        """Schedule a timer ``delay`` seconds from now."""
+        return self.schedule(key, self.clock() + delay, kind, interval)
+
+    def cancel(self, key: str) -> bool:
+        """Cancel a pending timer; returns True if one was pending."""
+        cancelled = self.wheel.cancel(key)
+        self._dirty = self._dirty or cancelled
+        return cancelled
+
+    def load(self) -> int:
+        """
+        Restore the timers persisted by a previous run.
+
+        Timers that came due while nothing was running fire on the next tick.
+
+        Returns:
+            How many timers were restored
+        """
+        try:
+            with open(self.path, "rb") as f:
+                data = marshal.load(f)
+        except (OSError, EOFError, ValueError, TypeError):
+            return 0
+        if not isinstance(data, dict) or data.get("version") != SCHEDULER_CACHE_VERSION:
+            return 0
+        for key, due, kind, interval in data["timers"]:
+            self.wheel.schedule(key, due, kind, interval or None)
+        return len(data["timers"])
+
+    def save(self) -> None:
+        """Persist the pending timers, ignoring an unwritable cache directory."""
+        records = [(timer.key, timer.due, timer.kind, timer.interval or 0.0) for timer in self.wheel.timers()]
+        data = marshal.dumps({"version": SCHEDULER_CACHE_VERSION, "timers": records})
+        directory = os.path.dirname(self.path) or "."
+        try:
+            os.makedirs(directory, exist_ok=True)
+            fd, temp_path = tempfile.mkstemp(dir=directory, prefix=".scheduler.")
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            os.replace(temp_path, self.path)
+        except OSError:
+            return
+        self._dirty = False
+
+    def stop(self) -> None:
+        """Ask ``run`` to return after persisting the pending timers."""
+        self._stopping = True
+        self._wakeup.set()
+
+    async def run(self) -> None:
+        """Fire timers as they come due, until ``stop`` is called."""
+        resolution = self.wheel.resolution
+        last_save = self.clock()
+        self._stopping = False
+        try:
+            while not self._stopping:
+                # An empty wheel sleeps until something is scheduled
+                timeout = None
+                if self.wheel:
+                    now = self.clock()
+                    timeout = max(0.0, (math.floor(now / resolution) + 1) * resolution - now)
+                self._wakeup.clear()
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout)
+                except asyncio.TimeoutError:
+                    pass
+
+                now = self.clock()
+                fired = self.wheel.advance(now)
+                if fired:
+                    self._dirty = True
+                for start in range(0, len(fired), self.batch_size):
+                    result = self.on_fire(fired[start:start + self.batch_size])
+                    if inspect.isawaitable(result):
+                        await result
+                    await asyncio.sleep(0)
+
+                if self._dirty and now - last_save >= self.save_interval:
+                    self.save()
+                    last_save = now
+        finally:
+            if self._dirty:
+                self.save()
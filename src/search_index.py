@@ -0,0 +1,284 @@
+"""
+The Search - Seek, and the corpora shall answer.
+
+This module provides full-text search over every corpus the agents draw
+upon: the Existential Coder's questions and quotes, the Oracle's prophecies
+and interpretations, the Zen Master's wisdom and contexts, and the
+Philosopher's questions. Entries are ranked with BM25 from an inverted index
+that is built once, persisted next to the corpus caches, and rebuilt only
+when a corpus changes.
+"""
+
+import heapq
+import marshal
+import math
+import os
+import re
+import tempfile
+from array import array
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Tuple
+
+from .corpus import Corpus, default_cache_dir, load_corpus
+
+
+INDEX_VERSION = 1
+BM25_K1 = 1.5
+BM25_B = 0.75
+
+_TOKEN_PATTERN = re.compile(r"[a-z0-9]+")
+
+
+@dataclass(frozen=True)
+class SearchField:
+    """A corpus section that takes part in search."""
+    corpus: str
+    section: str
+    source: str
+    text_fields: Tuple[str, ...] = ()  # Record fields to index; empty for plain strings
+
+
+SEARCH_FIELDS = [
+    SearchField("existential_coder", "philosophical_questions", "ExistentialCoder question"),
+    SearchField("existential_coder", "wisdom_quotes", "ExistentialCoder quote"),
+    SearchField("oracle", "prophecies", "Oracle prophecy"),
+    SearchField("oracle", "interpretations", "Oracle interpretation"),
+    SearchField("zen_master", "wisdom_collection", "ZenMaster wisdom", ("wisdom", "context")),
+    SearchField("philosopher_agent", "questions", "PhilosopherAgent question", ("question", "context")),
+]
+
+
+@dataclass
+class SearchResult:
+    """A corpus entry that matched a search."""
+    text: str
+    source: str
+    category: str
+    score: float
+
+
+def tokenize(text: str) -> List[str]:
+    """
+    Split text into lowercase search terms.
+
+    Args:
+        text: The text to split
+
+    Returns:
+        The terms, in order of appearance
+    """
+    return _TOKEN_PATTERN.findall(text.lower())
+
+
+def _entry_text(entry: Any, field: SearchField) -> str:
+    """The searchable text of a corpus entry."""
+    if field.text_fields:
+        return " ".join(str(entry.get(name, "")) for name in field.text_fields)
+    return str(entry)
+
+
+def _entry_display(entry: Any, field: SearchField) -> str:
+    """The text shown for a matching corpus entry."""
+    if field.text_fields:
+        return str(entry.get(field.text_fields[0], ""))
+    return str(entry)
+
+
+class SearchIndex:
+    """
+    An inverted index over the corpora, ranked with BM25.
+
+    Documents are stored as references into the corpora rather than copies
+    of their text, and each posting list is decoded on first use.
+    """
+
+    def __init__(self, fields: Optional[List[SearchField]] = None, cache_dir: Optional[str] = None,
+                 corpora: Optional[Dict[str, Corpus]] = None):
+        """
+        Open the index, building it if it is missing or stale.
+
+        Args:
+            fields: The corpus sections to search, defaults to ``SEARCH_FIELDS``
+            cache_dir: Where to persist the index
+            corpora: Corpus instances to use instead of the shared ones
+        """
+        self.fields = fields if fields is not None else SEARCH_FIELDS
+        self.cache_dir = cache_dir if cache_dir is not None else default_cache_dir()
+        self._corpora = corpora or {}
+        self._decoded: Dict[str, Tuple[array, array]] = {}
+
+        fingerprint = self._fingerprint()
+        if not self._load(fingerprint):
+            self._build()
+            self._save(fingerprint)
+
+    @property
+    def index_path(self) -> str:
+        """The location of the persisted index."""
+        return os.path.join(self.cache_dir, "search.idx")
+
+    def _corpus(self, name: str) -> Corpus:
+        if name not in self._corpora:
+            self._corpora[name] = load_corpus(name)
+        return self._corpora[name]
+
+    def _fingerprint(self) -> List[Any]:
+        """Describe the corpora and fields the index is built from."""
+        fingerprint: List[Any] = [INDEX_VERSION, [list(vars(field).values()) for field in self.fields]]
+        for name in sorted({field.corpus for field in self.fields}):
+            corpus = self._corpus(name)
+            for path in corpus.source_files + corpus.prebuilt_tables:
+                stat = os.stat(path)
+                fingerprint.append([path, stat.st_mtime_ns, stat.st_size])
+        return fingerprint
+
+    def _build(self) -> None:
+        """Tokenize every entry of every field into posting lists."""
+        postings: Dict[str, Tuple[array, array]] = {}
+        self._refs: List[Tuple[int, str]] = []
+        self._doc_refs = array("I")
+        self._doc_entries = array("I")
+        lengths = array("I")
+
+        for field_id, field in enumerate(self.fields):
+            corpus = self._corpus(field.corpus)
+            for category in corpus.categories(field.section):
+                ref = len(self._refs)
+                self._refs.append((field_id, category))
+                for entry_index, entry in enumerate(corpus.entries(field.section, category)):
+                    doc_id = len(lengths)
+                    terms = tokenize(_entry_text(entry, field))
+                    counts: Dict[str, int] = {}
+                    for term in terms:
+                        counts[term] = counts.get(term, 0) + 1
+                    for term, count in counts.items():
+                        if term not in postings:
+                            postings[term] = (array("I"), array("I"))
+                        postings[term][0].append(doc_id)
+                        postings[term][1].append(count)
+
+                    self._doc_refs.append(ref)
+                    self._doc_entries.append(entry_index)
+                    lengths.append(len(terms))
+
+        self._postings = {term: (ids.tobytes(), tfs.tobytes()) for term, (ids, tfs) in postings.items()}
+        self._decoded = postings
+        self._norms = self._compute_norms(lengths)
+
+    @staticmethod
+    def _compute_norms(lengths: array) -> array:
+        """Precompute the BM25 length normalisation of every document."""
+        average = (sum(lengths) / len(lengths)) if lengths else 1.0
+        scale = BM25_K1 * BM25_B / (average or 1.0)
+        base = BM25_K1 * (1 - BM25_B)
+        return array("d", [base + scale * length for length in lengths])
+
+    def _save(self, fingerprint: List[Any]) -> None:
+        """Persist the index, ignoring an unwritable cache directory."""
+        data = marshal.dumps({
+            "fingerprint": fingerprint,
+            "refs": self._refs,
+            "doc_refs": self._doc_refs.tobytes(),
+            "doc_entries": self._doc_entries.tobytes(),
+            "norms": self._norms.tobytes(),
+            "postings": self._postings,
+        })
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            fd, temp_path = tempfile.mkstemp(dir=self.cache_dir, prefix=".search.")
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            os.replace(temp_path, self.index_path)
+        except OSError:
+            pass
+
+    def _load(self, fingerprint: List[Any]) -> bool:
+        """Load a persisted index if it matches the corpora."""
+        try:
+            with open(self.index_path, "rb") as f:
+                data = marshal.load(f)
+        except (OSError, EOFError, ValueError, TypeError):
+            return False
+
+        if not isinstance(data, dict) or data.get("fingerprint") != fingerprint:
+            return False
+
+        self._refs = data["refs"]
+        self._doc_refs = array("I", data["doc_refs"])
+        self._doc_entries = array("I", data["doc_entries"])
+        self._norms = array("d", data["norms"])
+        self._postings = data["postings"]
+        return True
+
+    def __len__(self) -> int:
+        return len(self._doc_refs)
+
+    def _posting_list(self, term: str) -> Optional[Tuple[array, array]]:
+        """Decode the posting list of a term on first use."""
+        if term not in self._decoded:
+            encoded = self._postings.get(term)
+            if encoded is None:
+                return None
+            self._decoded[term] = (array("I", encoded[0]), array("I", encoded[1]))
+        return self._decoded[term]
+
+    def search(self, query: str, limit: int = 10) -> List[SearchResult]:
+        """
+        Find the corpus entries most relevant to a query.
+
+        Args:
+            query: Free-text search terms
+            limit: The maximum number of results
+
+        Returns:
+            Matching entries, best first
+        """
+        document_count = len(self)
+        scores: Dict[int, float] = {}
+        for term in set(tokenize(query)):
+            posting = self._posting_list(term)
+            if posting is None:
+                continue
+
+            doc_ids, frequencies = posting
+            document_frequency = len(doc_ids)
+            idf = math.log(1 + (document_count - document_frequency + 0.5) / (document_frequency + 0.5))
+            weight = idf * (BM25_K1 + 1)
+            norms = self._norms
+            for doc_id, tf in zip(doc_ids, frequencies):
+                scores[doc_id] = scores.get(doc_id, 0.0) + weight * tf / (tf + norms[doc_id])
+
+        best = heapq.nlargest(limit, scores.items(), key=lambda item: item[1])
+        return [self._result(doc_id, score) for doc_id, score in best]
+
+    def _result(self, doc_id: int, score: float) -> SearchResult:
+        """Resolve a document back to its corpus entry."""
+        field_id, category = self._refs[self._doc_refs[doc_id]]
+        field = self.fields[field_id]
+        entry = self._corpus(field.corpus).entries(field.section, category)[self._doc_entries[doc_id]]
+        return SearchResult(
+            text=_entry_display(entry, field),
+            source=field.source,
+            category=category,
+            score=score,
+        )
+
+
+_index: Optional[SearchIndex] = None
+
+
+def search(query: str, limit: int = 10) -> List[SearchResult]:
+    """
+    Search every corpus at once.
+
+    Args:
+        query: Free-text search terms
+        limit: The maximum number of results
+
+    Returns:
+        Matching entries, best first
+    """
+    global _index
+    if _index is None:
+        _index = SearchIndex()
+    return _index.search(query, limit)
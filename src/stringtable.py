@@ -0,0 +1,229 @@
+"""
+The String Table - Millions of words of wisdom, memory-mapped.
+
+This module defines the on-disk format used for very large corpora. Each
+category is stored as a blob of UTF-8 text followed by an array of 64-bit
+offsets into that blob, and the file is opened with ``mmap`` so that entries
+are decoded only when they are read. Because the mapping is read-only and
+file-backed, every worker process on a machine shares the same pages of the
+OS page cache instead of holding its own copy of each string.
+
+Layout::
+
+    "GUST" version                                  (little-endian throughout)
+    category 0: blob, padding to 8 bytes, offsets[count + 1]
+    category 1: ...
+    directory (JSON), directory length (uint64), "GUST"
+"""
+
+import json
+import mmap
+import os
+import random
+import struct
+import sys
+from array import array
+from collections.abc import Sequence
+from typing import Any, BinaryIO, Dict, Iterable, Iterator, List, Optional
+
+
+MAGIC = b"GUST"
+VERSION = 1
+_PREAMBLE = struct.Struct("<4sI")
+_TRAILER = struct.Struct("<Q4s")
+
+# Entry kinds: plain text, or JSON-encoded records decoded on access
+KIND_TEXT = "text"
+KIND_JSON = "json"
+
+
+class StringTableError(ValueError):
+    """Raised when a file is not a valid string table."""
+
+
+class StringColumn(Sequence):
+    """
+    The entries of one category, read straight from the mapped file.
+
+    Indexing and sampling touch only the bytes of the entries involved;
+    nothing is materialized up front.
+    """
+
+    def __init__(self, buffer: memoryview, blob_start: int, offsets: Sequence, kind: str):
+        self._buffer = buffer
+        self._blob_start = blob_start
+        self._offsets = offsets
+        self._kind = kind
+
+    def __len__(self) -> int:
+        return len(self._offsets) - 1
+
+    def __getitem__(self, index: Any) -> Any:
+        if isinstance(index, slice):
+            return [self._entry(i) for i in range(*index.indices(len(self)))]
+
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("string table index out of range")
+        return self._entry(index)
+
+    def __iter__(self) -> Iterator[Any]:
+        for i in range(len(self)):
+            yield self._entry(i)
+
+    def _entry(self, i: int) -> Any:
+        start = self._blob_start + self._offsets[i]
+        end = self._blob_start + self._offsets[i + 1]
+        text = str(self._buffer[start:end], "utf-8")
+        return json.loads(text) if self._kind == KIND_JSON else text
+
+    def sample(self, k: int, rng: Optional[random.Random] = None) -> List[Any]:
+        """
+        Draw entries without replacement, without reading the rest.
+
+        Args:
+            k: How many entries to draw
+            rng: The random generator to use, defaults to the ``random`` module
+
+        Returns:
+            The sampled entries
+        """
+        indices = (rng or random).sample(range(len(self)), k)
+        return [self._entry(i) for i in indices]
+
+
+class StringTable:
+    """A memory-mapped string table file."""
+
+    def __init__(self, path: str):
+        """
+        Map a string table into memory.
+
+        Args:
+            path: The file to open
+        """
+        self.path = path
+        with open(path, "rb") as f:
+            size = os.fstat(f.fileno()).st_size
+            if size < _PREAMBLE.size + _TRAILER.size:
+                raise StringTableError(f"{path} is too small to be a string table")
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        self._buffer = memoryview(self._mmap)
+        magic, version = _PREAMBLE.unpack_from(self._buffer, 0)
+        directory_length, trailer_magic = _TRAILER.unpack_from(self._buffer, size - _TRAILER.size)
+        if magic != MAGIC or trailer_magic != MAGIC:
+            raise StringTableError(f"{path} is not a string table")
+        if version != VERSION:
+            raise StringTableError(f"{path} uses unsupported string table version {version}")
+
+        directory_start = size - _TRAILER.size - directory_length
+        directory = json.loads(str(self._buffer[directory_start:size - _TRAILER.size], "utf-8"))
+        self.metadata: Dict[str, Any] = directory.get("metadata", {})
+        self._directory: Dict[str, Dict[str, Any]] = directory["categories"]
+        self._columns: Dict[str, StringColumn] = {}
+
+    def categories(self) -> List[str]:
+        """List the categories in the table, in the order they were written."""
+        return list(self._directory)
+
+    def __contains__(self, category: object) -> bool:
+        return category in self._directory
+
+    def __getitem__(self, category: str) -> StringColumn:
+        if category not in self._columns:
+            entry = self._directory[category]
+            offsets_start = entry["offsets"]
+            raw = self._buffer[offsets_start:offsets_start + 8 * (entry["count"] + 1)]
+            if sys.byteorder == "little":
+                offsets: Sequence = raw.cast("Q")
+            else:
+                offsets = array("Q", raw.tobytes())
+                offsets.byteswap()
+            self._columns[category] = StringColumn(self._buffer, entry["blob"], offsets, entry["kind"])
+        return self._columns[category]
+
+
+class StringTableWriter:
+    """
+    Writes a string table one category at a time.
+
+    Entries are streamed straight to disk, so only the offsets (eight bytes
+    per entry) are held in memory while writing.
+    """
+
+    def __init__(self, f: BinaryIO, metadata: Optional[Dict[str, Any]] = None):
+        """
+        Start a new string table.
+
+        Args:
+            f: A binary file opened for writing
+            metadata: Extra information stored in the directory
+        """
+        self._file = f
+        self._position = 0
+        self._directory: Dict[str, Dict[str, Any]] = {}
+        self._metadata = metadata or {}
+        self._write(_PREAMBLE.pack(MAGIC, VERSION))
+
+    def _write(self, data: bytes) -> None:
+        self._file.write(data)
+        self._position += len(data)
+
+    def add_category(self, name: str, entries: Iterable[Any], kind: Optional[str] = None) -> None:
+        """
+        Write the entries of a category.
+
+        Args:
+            name: The category name
+            entries: Strings, or JSON-serialisable records
+            kind: ``KIND_TEXT`` or ``KIND_JSON``, guessed from the first entry if omitted
+        """
+        if name in self._directory:
+            raise ValueError(f"Category {name!r} was already written")
+
+        blob_start = self._position
+        offsets = array("Q", [0])
+        for entry in entries:
+            if kind is None:
+                kind = KIND_TEXT if isinstance(entry, str) else KIND_JSON
+            text = entry if kind == KIND_TEXT else json.dumps(entry, ensure_ascii=False)
+            self._write(text.encode("utf-8"))
+            offsets.append(self._position - blob_start)
+
+        self._write(b"\0" * (-self._position % 8))
+        offsets_start = self._position
+        if sys.byteorder != "little":
+            offsets.byteswap()
+        self._write(offsets.tobytes())
+
+        self._directory[name] = {
+            "kind": kind or KIND_TEXT,
+            "count": len(offsets) - 1,
+            "blob": blob_start,
+            "offsets": offsets_start,
+        }
+
+    def close(self) -> None:
+        """Write the directory and trailer."""
+        directory = json.dumps({"metadata": self._metadata, "categories": self._directory}).encode("utf-8")
+        self._write(directory)
+        self._write(_TRAILER.pack(len(directory), MAGIC))
+
+
+def write_string_table(path: str, categories: Dict[str, Iterable[Any]],
+                       metadata: Optional[Dict[str, Any]] = None) -> None:
+    """
+    Write a complete string table.
+
+    Args:
+        path: The file to write
+        categories: Entries keyed by category name
+        metadata: Extra information stored in the directory
+    """
+    with open(path, "wb") as f:
+        writer = StringTableWriter(f, metadata)
+        for name, entries in categories.items():
+            writer.add_category(name, entries)
+        writer.close()
@@ -11,6 +11,15 @@ from typing import List, Dict, Any, Optional, Tuple
 from dataclasses import dataclass
 from datetime import datetime, timedelta
 
+from .matching import KeywordMatcher
+
+
+# Markers of complexity counted by analyze_code_complexity
+FUNCTION_PATTERN = re.compile(r'def\s+\w+')
+CLASS_PATTERN = re.compile(r'class\s+\w+')
+LOOP_PATTERN = re.compile(r'for\s+|while\s+')
+CONDITION_PATTERN = re.compile(r'if\s+|elif\s+')
+
 
 @dataclass
 class CodePattern:
@@ -102,6 +111,25 @@ def contemplate_code(code: str) -> List[str]:
     return thoughts
 
 
+# The meaning of each kind of bug, checked in this order
+BUG_MEANINGS = {
+    "null": "The null pointer is the void from which all creation springs. It teaches us about the nature of emptiness and potential.",
+    "undefined": "Undefined is not a state of nothingness, but a state of infinite possibility waiting to be defined.",
+    "error": "Errors are not failures, but invitations to grow and understand. Every error is a teacher in disguise.",
+    "exception": "Exceptions are the universe's way of saying 'pay attention' - they point us toward what we need to learn.",
+    "timeout": "Timeouts remind us that not everything can be rushed, and that patience is a virtue in the digital realm.",
+    "memory": "Memory errors teach us about the finite nature of resources and the importance of efficiency.",
+    "syntax": "Syntax errors are the grammar police of the digital realm, teaching us the importance of clear communication.",
+    "logic": "Logic errors reveal the gap between what we think we know and what we actually know.",
+    "type": "Type errors remind us that everything has its place and purpose in the cosmic order.",
+    "permission": "Permission errors teach us about boundaries and respect in the digital realm.",
+}
+
+UNKNOWN_BUG_MEANING = "This bug is a mystery waiting to be solved, a puzzle that will teach you something new about yourself and your code."
+
+_bug_matcher = KeywordMatcher(list(BUG_MEANINGS))
+
+
 def find_meaning_in_bugs(bug_description: str) -> str:
     """
     Find the deeper meaning in bugs and errors.
@@ -112,27 +140,66 @@ def find_meaning_in_bugs(bug_description: str) -> str:
     Returns:
         The deeper meaning and wisdom from the bug
     """
-    bug_meanings = {
-        "null": "The null pointer is the void from which all creation springs. It teaches us about the nature of emptiness and potential.",
-        "undefined": "Undefined is not a state of nothingness, but a state of infinite possibility waiting to be defined.",
-        "error": "Errors are not failures, but invitations to grow and understand. Every error is a teacher in disguise.",
-        "exception": "Exceptions are the universe's way of saying 'pay attention' - they point us toward what we need to learn.",
-        "timeout": "Timeouts remind us that not everything can be rushed, and that patience is a virtue in the digital realm.",
-        "memory": "Memory errors teach us about the finite nature of resources and the importance of efficiency.",
-        "syntax": "Syntax errors are the grammar police of the digital realm, teaching us the importance of clear communication.",
-        "logic": "Logic errors reveal the gap between what we think we know and what we actually know.",
-        "type": "Type errors remind us that everything has its place and purpose in the cosmic order.",
-        "permission": "Permission errors teach us about boundaries and respect in the digital realm.",
-    }
-    
-    bug_lower = bug_description.lower()
-    
-    for keyword, meaning in bug_meanings.items():
-        if keyword in bug_lower:
-            return meaning
+    keyword = _bug_matcher.first(bug_description)
+    if keyword is None:
+        # Default meaning for unknown bugs
+        return UNKNOWN_BUG_MEANING
+    return BUG_MEANINGS[keyword]
+
+
+# Philosophical names for common identifier words, checked in this order
+PHILOSOPHICAL_MAPPINGS = {
+    "user": "digital_soul",
+    "data": "cosmic_information",
+    "result": "manifestation",
+    "temp": "temporary_reality",
+    "count": "quantum_measurement",
+    "index": "dimensional_position",
+    "value": "essence",
+    "flag": "cosmic_signal",
+    "config": "universal_parameters",
+    "state": "existential_condition",
+    "list": "collection_of_truths",
+    "dict": "mapping_of_meaning",
+    "string": "sequence_of_symbols",
+    "number": "mathematical_essence",
+    "boolean": "binary_truth",
+    "object": "digital_entity",
+    "function": "purposeful_action",
+    "class": "blueprint_of_existence",
+    "method": "way_of_being",
+    "property": "inherent_quality",
+}
+
+PHILOSOPHICAL_PREFIXES = [
+    "cosmic_",
+    "digital_",
+    "eternal_",
+    "infinite_",
+    "universal_",
+    "divine_",
+    "sacred_",
+    "mystical_",
+]
+
+_name_matcher = KeywordMatcher(list(PHILOSOPHICAL_MAPPINGS))
+
+
+def map_philosophical_name(original_name: str) -> Optional[str]:
+    """
+    Rename an identifier through the philosophical mappings.
     
-    # Default meaning for unknown bugs
-    return "This bug is a mystery waiting to be solved, a puzzle that will teach you something new about yourself and your code."
+    Args:
+        original_name: The original variable name
+        
+    Returns:
+        The lowercased name with the first mapped word replaced, or None if
+        it contains none
+    """
+    key = _name_matcher.first(original_name)
+    if key is None:
+        return None
+    return original_name.lower().replace(key, PHILOSOPHICAL_MAPPINGS[key])
 
 
 def generate_philosophical_variable_name(original_name: str) -> str:
@@ -145,48 +212,12 @@ def generate_philosophical_variable_name(original_name: str) -> str:
     Returns:
         A more philosophical variable name
     """
-    philosophical_mappings = {
-        "user": "digital_soul",
-        "data": "cosmic_information",
-        "result": "manifestation",
-        "temp": "temporary_reality",
-        "count": "quantum_measurement",
-        "index": "dimensional_position",
-        "value": "essence",
-        "flag": "cosmic_signal",
-        "config": "universal_parameters",
-        "state": "existential_condition",
-        "list": "collection_of_truths",
-        "dict": "mapping_of_meaning",
-        "string": "sequence_of_symbols",
-        "number": "mathematical_essence",
-        "boolean": "binary_truth",
-        "object": "digital_entity",
-        "function": "purposeful_action",
-        "class": "blueprint_of_existence",
-        "method": "way_of_being",
-        "property": "inherent_quality",
-    }
-    
-    original_lower = original_name.lower()
-    
-    for key, value in philosophical_mappings.items():
-        if key in original_lower:
-            return original_lower.replace(key, value)
+    mapped = map_philosophical_name(original_name)
+    if mapped is not None:
+        return mapped
     
     # If no mapping found, add philosophical prefix
-    philosophical_prefixes = [
-        "cosmic_",
-        "digital_",
-        "eternal_",
-        "infinite_",
-        "universal_",
-        "divine_",
-        "sacred_",
-        "mystical_",
-    ]
-    
-    prefix = random.choice(philosophical_prefixes)
+    prefix = random.choice(PHILOSOPHICAL_PREFIXES)
     return f"{prefix}{original_name}"
 
 
@@ -209,10 +240,10 @@ def analyze_code_complexity(code: str) -> Dict[str, Any]:
     comment_lines = len([line for line in lines if line.strip().startswith('#')])
     
     # Complexity indicators
-    function_count = len(re.findall(r'def\s+\w+', code))
-    class_count = len(re.findall(r'class\s+\w+', code))
-    loop_count = len(re.findall(r'for\s+|while\s+', code))
-    condition_count = len(re.findall(r'if\s+|elif\s+', code))
+    function_count = len(FUNCTION_PATTERN.findall(code))
+    class_count = len(CLASS_PATTERN.findall(code))
+    loop_count = len(LOOP_PATTERN.findall(code))
+    condition_count = len(CONDITION_PATTERN.findall(code))
     
     # Philosophical analysis
     complexity_level = "simple"
@@ -360,3 +391,17 @@ def get_karma_interpretation(karma: int) -> str:
         return "Your code shows some negative patterns. Reflect on your choices and seek improvement."
     else:
         return "Your code has accumulated negative karma. Consider refactoring and following better practices."
+
+
+def load_numpy() -> Any:
+    """
+    Import NumPy on first use, so that commands which never need it stay light.
+    
+    Returns:
+        The ``numpy`` module, or None if the "fast" extra is not installed
+    """
+    try:
+        import numpy
+    except ImportError:
+        return None
+    return numpy
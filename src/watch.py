@@ -0,0 +1,392 @@
+"""
+The Watch - Contemplating code as it is being written.
+
+This module keeps the insights, karma and complexity of every file in a
+working tree up to date as files are saved. Changes are observed with
+inotify where the platform offers it, and by polling file stats elsewhere.
+Bursts of saves are coalesced with a debounce window, only the files that
+changed are analyzed again, and an analysis that is still running when its
+file is saved again is cancelled, since its result would already be stale.
+Results are kept in memory and replaced in place.
+"""
+
+import ctypes
+import ctypes.util
+import os
+import select
+import struct
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional, Sequence, Set
+
+from .existential_coder import AnalysisEngine, CodeInsight, ContemplationLevel, ExistentialCoder
+from .scan import DEFAULT_EXTENSIONS, IGNORED_DIRECTORIES, FileResult, IgnoreTree, read_source, walk_files
+from .utils import analyze_code_complexity, calculate_code_karma
+
+
+DEFAULT_DEBOUNCE = 0.3
+DEFAULT_POLL_INTERVAL = 1.0
+
+# inotify(7) constants
+IN_MODIFY = 0x00000002
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ISDIR = 0x40000000
+IN_NONBLOCK = 0o4000
+IN_CLOEXEC = 0o2000000
+
+_WATCH_MASK = IN_MODIFY | IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE | IN_DELETE_SELF
+_EVENT_HEADER = struct.Struct("iIII")
+
+
+class InotifyWatcher:
+    """Reports changed files under a directory tree using Linux inotify."""
+
+    def __init__(self, root: str):
+        """
+        Start watching.
+
+        Args:
+            root: The directory to watch, recursively
+
+        Raises:
+            OSError: If inotify is not available
+        """
+        library = ctypes.util.find_library("c")
+        self._libc = ctypes.CDLL(library or "libc.so.6", use_errno=True)
+        if not hasattr(self._libc, "inotify_init1"):
+            raise OSError("inotify is not available on this platform")
+
+        self._fd = self._libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self._fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        self._directories: Dict[int, str] = {}
+        self.root = root
+        self._add_tree(root)
+
+    def _add_tree(self, root: str) -> List[str]:
+        """Watch a directory and everything below it, returning the files found."""
+        files = []
+        for directory, subdirectories, names in os.walk(root):
+            subdirectories[:] = [name for name in subdirectories if name not in IGNORED_DIRECTORIES]
+            descriptor = self._libc.inotify_add_watch(self._fd, os.fsencode(directory), _WATCH_MASK)
+            if descriptor >= 0:
+                self._directories[descriptor] = directory
+            files.extend(os.path.join(directory, name) for name in names)
+        return files
+
+    def read(self, timeout: float) -> List[str]:
+        """
+        Wait for changes.
+
+        Args:
+            timeout: The longest time to wait, in seconds
+
+        Returns:
+            The paths of files that were written, created, moved or deleted
+        """
+        ready, _, _ = select.select([self._fd], [], [], timeout)
+        if not ready:
+            return []
+        try:
+            data = os.read(self._fd, 64 * 1024)
+        except BlockingIOError:
+            return []
+
+        changed = []
+        offset = 0
+        while offset < len(data):
+            descriptor, mask, _, length = _EVENT_HEADER.unpack_from(data, offset)
+            raw_name = data[offset + _EVENT_HEADER.size:offset + _EVENT_HEADER.size + length]
+            offset += _EVENT_HEADER.size + length
+
+            if mask & IN_Q_OVERFLOW:
+                # Events were lost; every file may have changed
+                changed.extend(walk_files(self.root))
+                continue
+            if mask & IN_IGNORED:
+                self._directories.pop(descriptor, None)
+                continue
+
+            directory = self._directories.get(descriptor)
+            name = os.fsdecode(raw_name.rstrip(b"\0"))
+            if directory is None or not name:
+                continue
+            path = os.path.join(directory, name)
+            if mask & IN_ISDIR:
+                if mask & (IN_CREATE | IN_MOVED_TO) and name not in IGNORED_DIRECTORIES:
+                    changed.extend(self._add_tree(path))
+            else:
+                changed.append(path)
+        return changed
+
+    def close(self) -> None:
+        """Stop watching."""
+        os.close(self._fd)
+
+
+class PollingWatcher:
+    """Reports changed files by comparing file stats, where inotify is unavailable."""
+
+    def __init__(self, root: str, interval: float = DEFAULT_POLL_INTERVAL):
+        """
+        Start watching.
+
+        Args:
+            root: The directory to watch, recursively
+            interval: The time between scans, in seconds
+        """
+        self.root = root
+        self.interval = interval
+        self._stats = self._scan()
+        self._next_scan = time.monotonic() + interval
+
+    def _scan(self) -> Dict[str, tuple]:
+        stats = {}
+        for path in walk_files(self.root):
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            stats[path] = (stat.st_mtime_ns, stat.st_size)
+        return stats
+
+    def read(self, timeout: float) -> List[str]:
+        """
+        Wait for changes.
+
+        Args:
+            timeout: The longest time to wait, in seconds
+
+        Returns:
+            The paths of files that were written, created or deleted
+        """
+        wait = self._next_scan - time.monotonic()
+        if wait > timeout:
+            time.sleep(max(timeout, 0))
+            return []
+        time.sleep(max(wait, 0))
+        self._next_scan = time.monotonic() + self.interval
+
+        stats = self._scan()
+        changed = [path for path, stat in stats.items() if self._stats.get(path) != stat]
+        changed.extend(path for path in self._stats if path not in stats)
+        self._stats = stats
+        return changed
+
+    def close(self) -> None:
+        """Stop watching."""
+
+
+def open_watcher(root: str, polling: bool = False,
+                 interval: float = DEFAULT_POLL_INTERVAL) -> Any:
+    """
+    Watch a directory with inotify, falling back to polling.
+
+    Args:
+        root: The directory to watch, recursively
+        polling: Always poll, e.g. for network file systems
+        interval: The time between scans when polling, in seconds
+
+    Returns:
+        An ``InotifyWatcher`` or a ``PollingWatcher``
+    """
+    if not polling:
+        try:
+            return InotifyWatcher(root)
+        except (OSError, AttributeError):
+            pass
+    return PollingWatcher(root, interval)
+
+
+class Debouncer:
+    """Holds back changed paths until they have been quiet for a while."""
+
+    def __init__(self, window: float = DEFAULT_DEBOUNCE):
+        """
+        Args:
+            window: How long a path must go without changes, in seconds
+        """
+        self.window = window
+        self._pending: Dict[str, float] = {}
+
+    def touch(self, path: str, now: float) -> None:
+        """Record a change, restarting the path's quiet period."""
+        self._pending[path] = now
+
+    def due(self, now: float) -> List[str]:
+        """Take the paths whose quiet period has ended."""
+        ready = [path for path, changed in self._pending.items() if now - changed >= self.window]
+        for path in ready:
+            del self._pending[path]
+        return ready
+
+    def next_deadline(self) -> Optional[float]:
+        """When the next pending path becomes due, if any are pending."""
+        if not self._pending:
+            return None
+        return min(self._pending.values()) + self.window
+
+
+class _Cancelled(Exception):
+    """Raised inside an analysis whose file has changed again."""
+
+
+class WatchSession:
+    """
+    The in-memory results for a working tree, kept up to date incrementally.
+
+    Each save of a file bumps its version; an analysis only stores its
+    result if no newer version was requested while it ran. Files excluded
+    by the tree's ignore files, as they were when the session started, are
+    never analyzed, nor are binary, minified or generated ones.
+    """
+
+    def __init__(self, root: str, extensions: Sequence[str] = DEFAULT_EXTENSIONS,
+                 level: ContemplationLevel = ContemplationLevel.DEEP, workers: int = 2,
+                 on_update: Optional[Callable[[FileResult], None]] = None,
+                 on_remove: Optional[Callable[[str], None]] = None,
+                 engine: AnalysisEngine = AnalysisEngine.LINES):
+        """
+        Prepare a session.
+
+        Args:
+            root: The directory being watched
+            extensions: The file extensions to analyze
+            level: The contemplation level of the analysis
+            workers: How many files may be analyzed at once
+            on_update: Called with each new result
+            on_remove: Called with the path of each deleted file
+            engine: How the coder reads each file
+        """
+        self.root = root
+        self.extensions = tuple(extensions)
+        self.results: Dict[str, FileResult] = {}
+        self.on_update = on_update
+        self.on_remove = on_remove
+        self._coder = ExistentialCoder(level, engine)
+        self._executor = ThreadPoolExecutor(max_workers=workers)
+        self._lock = threading.Lock()
+        self._versions: Dict[str, int] = {}
+        self._cancel_events: Dict[str, threading.Event] = {}
+        self._ignore = IgnoreTree(root)
+
+    def wants(self, path: str) -> bool:
+        """Whether a path is analyzed by this session."""
+        return path.endswith(self.extensions) and not self._ignore.ignored(path, is_dir=False)
+
+    def cancel(self, path: str) -> None:
+        """Cancel any running analysis of a file that has just changed again."""
+        with self._lock:
+            event = self._cancel_events.get(path)
+            if event is not None:
+                event.set()
+
+    def submit(self, path: str) -> Any:
+        """
+        Analyze a file again, superseding any analysis already running.
+
+        Args:
+            path: The file that changed
+
+        Returns:
+            The future of the analysis
+        """
+        with self._lock:
+            version = self._versions.get(path, 0) + 1
+            self._versions[path] = version
+            previous = self._cancel_events.get(path)
+            if previous is not None:
+                previous.set()
+            event = self._cancel_events[path] = threading.Event()
+        return self._executor.submit(self._analyze, path, version, event)
+
+    def scan(self) -> List[Any]:
+        """Analyze every file once, when the session starts."""
+        return [self.submit(path) for path in walk_files(self.root) if self.wants(path)]
+
+    def _analyze(self, path: str, version: int, cancelled: threading.Event) -> Optional[FileResult]:
+        try:
+            # A file that is no longer worth reading loses its result too
+            code, _ = read_source(path)
+        except (FileNotFoundError, IsADirectoryError):
+            code = None
+        if code is None:
+            self._remove(path, version)
+            return None
+
+        try:
+            insights = self._contemplate(code, cancelled)
+        except _Cancelled:
+            return None
+        result = FileResult(path, insights, calculate_code_karma(code), analyze_code_complexity(code), version)
+
+        with self._lock:
+            if cancelled.is_set() or self._versions.get(path) != version:
+                return None
+            self.results[path] = result
+            self._cancel_events.pop(path, None)
+        if self.on_update:
+            self.on_update(result)
+        return result
+
+    def _contemplate(self, code: str, cancelled: threading.Event) -> List[CodeInsight]:
+        """
+        Contemplate every construct of a file, checking for cancellation as
+        it goes. Nothing is sampled and no closing wisdom quote is added,
+        since a random quote would change on every save.
+        """
+        insights = list(self._coder.analyze_lines(code, interrupted=cancelled.is_set))
+        if cancelled.is_set():
+            raise _Cancelled()
+        return insights
+
+    def _remove(self, path: str, version: int) -> None:
+        with self._lock:
+            if self._versions.get(path) != version:
+                return
+            removed = self.results.pop(path, None)
+            self._cancel_events.pop(path, None)
+        if removed is not None and self.on_remove:
+            self.on_remove(path)
+
+    def close(self) -> None:
+        """Cancel outstanding work and stop the workers."""
+        with self._lock:
+            for event in self._cancel_events.values():
+                event.set()
+        self._executor.shutdown(wait=True, cancel_futures=True)
+
+
+def watch(session: WatchSession, watcher: Any, debounce: float = DEFAULT_DEBOUNCE,
+          stop: Optional[threading.Event] = None) -> None:
+    """
+    Feed file changes into a session until stopped.
+
+    Args:
+        session: The results to keep up to date
+        watcher: An ``InotifyWatcher`` or ``PollingWatcher`` on the session's root
+        debounce: How long a file must be quiet before it is analyzed, in seconds
+        stop: Ends the loop when set
+    """
+    debouncer = Debouncer(debounce)
+    stop = stop or threading.Event()
+    while not stop.is_set():
+        deadline = debouncer.next_deadline()
+        timeout = 0.5 if deadline is None else max(0.0, min(0.5, deadline - time.monotonic()))
+
+        now = time.monotonic()
+        for path in watcher.read(timeout):
+            if session.wants(path):
+                session.cancel(path)
+                debouncer.touch(path, now)
+
+        for path in debouncer.due(time.monotonic()):
+            session.submit(path)
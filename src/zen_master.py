@@ -6,10 +6,19 @@ seeking balance and peace in their coding journey.
 """
 
 import random
-from typing import List, Dict, Any
+from collections.abc import Mapping, Sequence
+from typing import Any, Dict, Iterable, List
 from dataclasses import dataclass
 from enum import Enum
 
+from .corpus import choose_across, load_corpus
+from .relevance import section_relevance
+from .utils import load_numpy
+
+
+# How many of the most relevant entries a response is chosen from
+RELEVANT_CHOICES = 3
+
 
 class ZenLevel(Enum):
     """Levels of zen mastery."""
@@ -28,6 +37,127 @@ class ZenWisdom:
     category: str
 
 
+def _zen_wisdom_from_entry(entry: Dict[str, str]) -> ZenWisdom:
+    """Build a piece of zen wisdom from its corpus entry."""
+    return ZenWisdom(
+        wisdom=entry["wisdom"],
+        context=entry["context"],
+        level=ZenLevel(entry["level"]),
+        category=entry["category"]
+    )
+
+
+def _zen_wisdom_text(wisdom: ZenWisdom) -> str:
+    """The text a situation is matched against."""
+    return f"{wisdom.wisdom} {wisdom.context}"
+
+
+# Words that show each zen quality in a response; a response earns a point
+# for every quality it shows
+ZEN_INDICATORS = {
+    "patience": ("wait", "time", "slow", "patient"),
+    "acceptance": ("accept", "okay", "fine", "understand"),
+    "mindfulness": ("present", "now", "aware", "focused"),
+    "balance": ("balance", "harmony", "peace", "calm"),
+    "simplicity": ("simple", "clear", "minimal", "essential"),
+}
+
+# The lowest score of each level above the beginner's
+ZEN_LEVEL_THRESHOLDS = (
+    (15, ZenLevel.MASTER),
+    (10, ZenLevel.ADVANCED),
+    (5, ZenLevel.INTERMEDIATE),
+)
+
+
+@dataclass
+class ZenSurvey:
+    """The assessed zen of every user in a survey."""
+    scores: List[int]
+    levels: List[ZenLevel]
+
+    def distribution(self) -> Dict[ZenLevel, int]:
+        """How many users reached each zen level, from beginner to master."""
+        counts = {level: 0 for level in ZenLevel}
+        for level in self.levels:
+            counts[level] += 1
+        return counts
+
+
+def zen_level_for_score(score: int) -> ZenLevel:
+    """The zen level a score reaches."""
+    for threshold, level in ZEN_LEVEL_THRESHOLDS:
+        if score >= threshold:
+            return level
+    return ZenLevel.BEGINNER
+
+
+def zen_score(responses: Iterable[str]) -> int:
+    """
+    Score one user's responses to the zen questions.
+
+    Args:
+        responses: The user's responses
+
+    Returns:
+        One point for every zen quality shown by every response
+    """
+    groups = tuple(ZEN_INDICATORS.values())
+    score = 0
+    for response in responses:
+        response = response.lower()
+        for indicators in groups:
+            for indicator in indicators:
+                if indicator in response:
+                    score += 1
+                    break
+    return score
+
+
+def score_zen_surveys(response_sets: Sequence[Sequence[str]]) -> List[int]:
+    """
+    Score the responses of many users at once.
+
+    With NumPy, every response is lowercased and joined into one text, each
+    indicator is found throughout it with a single ``str.split``, and the
+    hits are mapped back to responses and tallied per user as arrays.
+    Without it, each user is scored in turn.
+
+    Args:
+        response_sets: The responses of each user
+
+    Returns:
+        The score of each user, in order
+    """
+    np = load_numpy()
+    if np is None:
+        return [zen_score(responses) for responses in response_sets]
+
+    # Lowercasing may change a response's length, so it is done before measuring
+    answers = [response.lower() for responses in response_sets for response in responses]
+    if not answers:
+        return [0] * len(response_sets)
+    owners = np.repeat(np.arange(len(response_sets)), [len(responses) for responses in response_sets])
+    lengths = np.fromiter(map(len, answers), dtype=np.int64, count=len(answers)) + 1
+    starts = np.cumsum(lengths) - lengths
+    # No indicator contains a newline, so no hit spans two responses
+    text = "\n".join(answers)
+
+    points = np.zeros(len(answers), dtype=np.int64)
+    for indicators in ZEN_INDICATORS.values():
+        shown = np.zeros(len(answers), dtype=bool)
+        for indicator in indicators:
+            pieces = text.split(indicator)
+            if len(pieces) == 1:
+                continue
+            gaps = np.fromiter(map(len, pieces), dtype=np.int64, count=len(pieces))
+            # Each hit starts where the text before it, and every earlier hit, ends
+            hits = np.cumsum(gaps[:-1] + len(indicator)) - len(indicator)
+            shown[np.searchsorted(starts, hits, side="right") - 1] = True
+        points += shown
+    return np.bincount(owners, weights=points, minlength=len(response_sets)).astype(np.int64).tolist()
+
+
 class ZenMaster:
     """
     A zen master that provides mindfulness guidance and wisdom
@@ -41,163 +171,17 @@ class ZenMaster:
         self.meditation_guidance = self._load_meditation_guidance()
         self.breathing_exercises = self._load_breathing_exercises()
     
-    def _load_zen_wisdom(self) -> Dict[str, List[ZenWisdom]]:
+    def _load_zen_wisdom(self) -> Mapping[str, Sequence[ZenWisdom]]:
         """Load zen wisdom organized by category."""
-        return {
-            "patience": [
-                ZenWisdom(
-                    wisdom="The bug that cannot be fixed today will teach you tomorrow.",
-                    context="Patience is not the ability to wait, but how you behave while waiting.",
-                    level=ZenLevel.BEGINNER,
-                    category="patience"
-                ),
-                ZenWisdom(
-                    wisdom="A thousand lines of code begin with a single keystroke.",
-                    context="Every journey starts with a single step, every program with a single line.",
-                    level=ZenLevel.INTERMEDIATE,
-                    category="patience"
-                ),
-                ZenWisdom(
-                    wisdom="The compiler that runs slowly is teaching you to breathe.",
-                    context="Speed is not always the goal; sometimes the process is the teacher.",
-                    level=ZenLevel.ADVANCED,
-                    category="patience"
-                ),
-            ],
-            "acceptance": [
-                ZenWisdom(
-                    wisdom="Accept the code as it is, then improve it.",
-                    context="Acceptance is not resignation; it's the foundation of change.",
-                    level=ZenLevel.BEGINNER,
-                    category="acceptance"
-                ),
-                ZenWisdom(
-                    wisdom="The error message is not your enemy, but your teacher.",
-                    context="Resistance to what is creates suffering; acceptance creates peace.",
-                    level=ZenLevel.INTERMEDIATE,
-                    category="acceptance"
-                ),
-                ZenWisdom(
-                    wisdom="Perfect code is an illusion; beautiful code is reality.",
-                    context="Perfection is the enemy of progress; beauty is the goal.",
-                    level=ZenLevel.ADVANCED,
-                    category="acceptance"
-                ),
-            ],
-            "mindfulness": [
-                ZenWisdom(
-                    wisdom="Code with awareness, not just intention.",
-                    context="Mindfulness is being present with your code, not just writing it.",
-                    level=ZenLevel.BEGINNER,
-                    category="mindfulness"
-                ),
-                ZenWisdom(
-                    wisdom="The present moment is the only time you can write code.",
-                    context="Past code is memory, future code is imagination, present code is reality.",
-                    level=ZenLevel.INTERMEDIATE,
-                    category="mindfulness"
-                ),
-                ZenWisdom(
-                    wisdom="When you are fully present, the code writes itself.",
-                    context="True mastery comes when the doer disappears and only the doing remains.",
-                    level=ZenLevel.MASTER,
-                    category="mindfulness"
-                ),
-            ],
-            "balance": [
-                ZenWisdom(
-                    wisdom="Balance is not about equal time, but about equal presence.",
-                    context="Quality of attention matters more than quantity of time.",
-                    level=ZenLevel.BEGINNER,
-                    category="balance"
-                ),
-                ZenWisdom(
-                    wisdom="The best code is written in the space between work and rest.",
-                    context="Balance is not a destination, but a way of traveling.",
-                    level=ZenLevel.INTERMEDIATE,
-                    category="balance"
-                ),
-                ZenWisdom(
-                    wisdom="When you find balance, the code finds you.",
-                    context="Balance is not something you achieve, but something you become.",
-                    level=ZenLevel.ADVANCED,
-                    category="balance"
-                ),
-            ],
-            "simplicity": [
-                ZenWisdom(
-                    wisdom="The simplest code is often the most profound.",
-                    context="Simplicity is the ultimate sophistication in the digital realm.",
-                    level=ZenLevel.BEGINNER,
-                    category="simplicity"
-                ),
-                ZenWisdom(
-                    wisdom="Remove everything that is not essential, and what remains is truth.",
-                    context="In code, as in life, less is often more.",
-                    level=ZenLevel.INTERMEDIATE,
-                    category="simplicity"
-                ),
-                ZenWisdom(
-                    wisdom="The empty function is full of potential.",
-                    context="Sometimes the most powerful code is the code that does nothing.",
-                    level=ZenLevel.ADVANCED,
-                    category="simplicity"
-                ),
-            ]
-        }
+        return load_corpus("zen_master").section("wisdom_collection", factory=_zen_wisdom_from_entry)
     
-    def _load_meditation_guidance(self) -> List[str]:
+    def _load_meditation_guidance(self) -> Sequence[str]:
         """Load meditation guidance for developers."""
-        return [
-            "Sit comfortably and focus on your breath. With each inhale, imagine drawing in clarity. With each exhale, release the tension of debugging.",
-            "Close your eyes and visualize your code as a flowing river. Watch the data flow through your functions like water over stones.",
-            "Take a moment to appreciate the silence between keystrokes. In this silence, wisdom speaks.",
-            "Imagine each line of code as a step on a path. Where does this path lead? What is your destination?",
-            "Focus on the present moment. You are here, now, writing code. Nothing else exists in this moment.",
-            "Visualize your bugs as teachers. What are they trying to teach you? Listen with an open heart.",
-            "Breathe in the possibility of perfect code. Breathe out the reality of imperfect code. Both are true.",
-            "Imagine your code as a garden. What seeds are you planting? What will grow from your efforts?",
-            "Focus on the rhythm of your typing. Let it become a meditation, a prayer to the digital gods.",
-            "Take a moment to appreciate the miracle of code. From nothing, you create something that can think, act, and transform the world.",
-        ]
+        return load_corpus("zen_master").flat("meditation_guidance")
     
-    def _load_breathing_exercises(self) -> List[Dict[str, Any]]:
+    def _load_breathing_exercises(self) -> Sequence[Dict[str, Any]]:
         """Load breathing exercises for developers."""
-        return [
-            {
-                "name": "The Debugger's Breath",
-                "description": "A breathing exercise for when you're stuck debugging",
-                "steps": [
-                    "Inhale for 4 counts while thinking 'I am calm'",
-                    "Hold for 4 counts while thinking 'I am focused'",
-                    "Exhale for 4 counts while thinking 'I will find the solution'",
-                    "Hold for 4 counts while thinking 'I am patient'"
-                ],
-                "duration": "2-3 minutes"
-            },
-            {
-                "name": "The Coder's Flow",
-                "description": "A breathing exercise for entering flow state",
-                "steps": [
-                    "Inhale deeply and slowly",
-                    "Exhale completely and slowly",
-                    "Repeat 5 times",
-                    "On the 6th breath, begin coding"
-                ],
-                "duration": "1-2 minutes"
-            },
-            {
-                "name": "The Refactor's Rest",
-                "description": "A breathing exercise for when refactoring becomes overwhelming",
-                "steps": [
-                    "Inhale while thinking 'I accept what is'",
-                    "Exhale while thinking 'I can improve it'",
-                    "Inhale while thinking 'I am capable'",
-                    "Exhale while thinking 'I will succeed'"
-                ],
-                "duration": "3-5 minutes"
-            }
-        ]
+        return load_corpus("zen_master").flat("breathing_exercises")
     
     def provide_wisdom(self, situation: str = None) -> str:
         """
@@ -210,14 +194,20 @@ class ZenMaster:
             A piece of zen wisdom
         """
         if situation:
+            relevance = section_relevance(("zen_master", "wisdom_collection"), self.wisdom_collection,
+                                          _zen_wisdom_text)
+            matches = relevance.top_k(situation, RELEVANT_CHOICES)
+            if matches:
+                _, wisdom, _ = random.choice(matches)
+                return f"{wisdom.wisdom}\n\n{wisdom.context}"
+            
             category = self._categorize_situation(situation)
             if category in self.wisdom_collection:
                 wisdom = random.choice(self.wisdom_collection[category])
                 return f"{wisdom.wisdom}\n\n{wisdom.context}"
         
         # Return random wisdom
-        all_wisdom = [w for wisdom_list in self.wisdom_collection.values() for w in wisdom_list]
-        wisdom = random.choice(all_wisdom)
+        wisdom = choose_across(self.wisdom_collection)
         return f"{wisdom.wisdom}\n\n{wisdom.context}"
     
     def _categorize_situation(self, situation: str) -> str:
@@ -309,26 +299,19 @@ Remember: The best code is written from a place of inner peace.
             The assessed zen level
         """
         # This is a simplified assessment - in reality, this would be more complex
-        zen_indicators = {
-            "patience": ["wait", "time", "slow", "patient"],
-            "acceptance": ["accept", "okay", "fine", "understand"],
-            "mindfulness": ["present", "now", "aware", "focused"],
-            "balance": ["balance", "harmony", "peace", "calm"],
-            "simplicity": ["simple", "clear", "minimal", "essential"]
-        }
+        return zen_level_for_score(zen_score(responses))
+    
+    def assess_zen_levels(self, response_sets: Sequence[Sequence[str]]) -> ZenSurvey:
+        """
+        Assess the zen level of many users at once, as in a team-wide survey.
         
-        score = 0
-        for response in responses:
-            response_lower = response.lower()
-            for category, indicators in zen_indicators.items():
-                if any(indicator in response_lower for indicator in indicators):
-                    score += 1
+        Every user is scored exactly as ``assess_zen_level`` would score them.
         
-        if score >= 15:
-            return ZenLevel.MASTER
-        elif score >= 10:
-            return ZenLevel.ADVANCED
-        elif score >= 5:
-            return ZenLevel.INTERMEDIATE
-        else:
-            return ZenLevel.BEGINNER
+        Args:
+            response_sets: The responses of each user
+            
+        Returns:
+            The score and zen level of each user, in order
+        """
+        scores = score_zen_surveys(response_sets)
+        return ZenSurvey(scores, [zen_level_for_score(score) for score in scores])
@@ -0,0 +1,98 @@
+"""
+Tests for the activity tracker.
+
+These tests verify the sliding-window counts, when breaks are suggested,
+and that many sessions can be recorded concurrently.
+"""
+
+import threading
+
+import pytest
+from src.activity import ActivityThresholds, ActivityTracker
+
+
+class FakeClock:
+    """A clock that only moves when told to."""
+
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock():
+    return FakeClock()
+
+
+class TestActivityTracker:
+    """Test cases for ActivityTracker."""
+
+    def test_window_slides(self, clock):
+        tracker = ActivityTracker(window=60, buckets=6, clock=clock)
+        tracker.record_edit("ada", "for x in y:\n    if x:\n        pass\n", keystrokes=30)
+        clock.now += 30
+        tracker.record_edit("ada", "def f():\n    pass\n")
+
+        snapshot = tracker.snapshot("ada")
+        assert (snapshot.edits, snapshot.keystrokes, snapshot.functions, snapshot.loops, snapshot.conditions) == \
+            (2, 30, 1, 1, 1)
+
+        clock.now += 35
+        snapshot = tracker.snapshot("ada")
+        assert (snapshot.edits, snapshot.functions, snapshot.loops) == (1, 1, 0)
+
+        clock.now += 600
+        assert tracker.snapshot("ada").edits == 0
+        assert tracker.snapshot("grace") is None
+
+    def test_break_when_threshold_crossed(self, clock):
+        tracker = ActivityTracker(window=60, thresholds=ActivityThresholds(loops=2), cooldown=120, clock=clock)
+        assert tracker.record_edit("ada", "for a in b: pass") is None
+        assert tracker.record_edit("ada", "while True: pass") is None
+        suggested = tracker.record_edit("ada", "for c in d: pass")
+        assert suggested.reason == "cyclical"
+        assert suggested.snapshot.loops == 3
+        assert "Meditation Guidance" in suggested.guidance
+        assert "loops" in suggested.suggestion
+
+        # One break per cooldown, even while still over the threshold
+        assert tracker.record_edit("ada", "for e in f: pass") is None
+        clock.now += 121
+        assert tracker.record_edit("ada", "for g in h: pass") is None
+
+    def test_frantic_editing(self, clock):
+        tracker = ActivityTracker(window=60, thresholds=ActivityThresholds(edits_per_minute=10), clock=clock)
+        suggestions = [tracker.record_keystrokes("ada", 5) for _ in range(20)]
+        assert not any(suggestions)
+        suggestions = [tracker.record_edit("ada") for _ in range(11)]
+        assert suggestions[-1].reason == "frantic"
+        assert not any(suggestions[:-1])
+
+    def test_prune_forgets_idle_sessions(self, clock):
+        tracker = ActivityTracker(window=60, cooldown=0, clock=clock)
+        tracker.record_edit("ada")
+        clock.now += 30
+        tracker.record_edit("grace")
+        clock.now += 45
+        assert tracker.prune() == 1
+        assert len(tracker) == 1
+        assert tracker.snapshot("ada") is None
+
+    def test_concurrent_sessions(self, clock):
+        tracker = ActivityTracker(clock=clock)
+
+        def developer(offset):
+            for session in range(offset, 5000, 4):
+                for _ in range(3):
+                    tracker.record_edit(f"dev-{session}", "if ready: go()")
+
+        threads = [threading.Thread(target=developer, args=(offset,)) for offset in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert len(tracker) == 5000
+        assert tracker.snapshot("dev-4321").conditions == 3
@@ -0,0 +1,103 @@
+"""
+Tests for bug log ingestion and the keyword matcher.
+
+These tests verify that logs are split into whole error records, even
+across chunk boundaries, and that keywords are matched exactly as
+substring tests would match them.
+"""
+
+import gzip
+import io
+import random
+
+import pytest
+from src.bugs import RecordReader, open_log, scan_log
+from src.matching import KeywordMatcher
+from src.utils import BUG_MEANINGS, find_meaning_in_bugs
+
+
+LOG = b"""2024-05-01 12:00:00 INFO started
+2024-05-01 12:00:01 ERROR [worker-1] request failed
+Traceback (most recent call last):
+  File "/srv/app/views.py", line 7, in dispatch
+    return user.profile.name
+AttributeError: 'NoneType' object has no attribute 'name'
+
+During handling of the above exception, another exception occurred:
+
+Traceback (most recent call last):
+  File "/srv/app/handlers.py", line 42, in handle
+    raise TimeoutError("gave up")
+TimeoutError: gave up
+2024-05-01 12:00:02 INFO recovered
+2024-05-01 12:00:03 CRITICAL permission denied: /var/run/app.sock
+2024-05-01 12:00:04 INFO done
+"""
+
+
+class TestKeywordMatcher:
+    """Test cases for KeywordMatcher."""
+
+    def test_agrees_with_substring_tests(self):
+        rng = random.Random(5)
+        for _ in range(2000):
+            keywords = ["".join(rng.choice("ab") for _ in range(rng.randint(1, 4))) for _ in range(rng.randint(1, 6))]
+            text = "".join(rng.choice("abAB") for _ in range(rng.randint(0, 12)))
+            matcher = KeywordMatcher(keywords)
+            present = [keyword.lower() for keyword in keywords if keyword.lower() in text.lower()]
+            assert matcher.find_all(text) == set(present)
+            assert matcher.first(text) == (present[0] if present else None)
+
+    def test_case_sensitive(self):
+        matcher = KeywordMatcher(["Error", "error"], ignore_case=False)
+        assert matcher.find_all("an error") == {"error"}
+
+    def test_rejects_empty_keywords(self):
+        with pytest.raises(ValueError):
+            KeywordMatcher(["null", ""])
+
+    def test_find_meaning_in_bugs_keeps_its_order(self):
+        assert find_meaning_in_bugs("TypeError: null is not an object") == BUG_MEANINGS["null"]
+        assert find_meaning_in_bugs("Connection TIMEOUT error") == BUG_MEANINGS["error"]
+        assert "mystery" in find_meaning_in_bugs("it just stopped")
+
+
+class TestRecordReader:
+    """Test cases for splitting logs into error records."""
+
+    def test_tracebacks_stay_whole(self):
+        records = list(RecordReader(io.BytesIO(LOG)))
+        assert len(records) == 2
+        assert records[0].startswith(b"2024-05-01 12:00:01 ERROR")
+        assert records[0].endswith(b"TimeoutError: gave up\n")
+        assert b"During handling" in records[0]
+        assert records[1] == b"2024-05-01 12:00:03 CRITICAL permission denied: /var/run/app.sock\n"
+
+    @pytest.mark.parametrize("chunk_size", [1, 7, 64, 333])
+    def test_chunk_boundaries(self, chunk_size):
+        reader = RecordReader(io.BytesIO(LOG * 3), chunk_size)
+        assert list(reader) == list(RecordReader(io.BytesIO(LOG * 3)))
+        assert reader.lines == LOG.count(b"\n") * 3
+        assert reader.bytes_read == len(LOG) * 3
+
+    def test_log_without_final_newline(self):
+        assert list(RecordReader(io.BytesIO(b"INFO a\nFATAL out of memory"))) == [b"FATAL out of memory\n"]
+
+
+class TestScanLog:
+    """Test cases for scan_log."""
+
+    def test_counts_and_exemplars(self):
+        report = scan_log(io.BytesIO(LOG * 5))
+        assert report.records == 10
+        assert {category.name: category.count for category in report.most_common()} == \
+            {"timeout": 5, "permission": 5}
+        assert len(report.categories["timeout"].exemplars) == 3
+        assert report.categories["permission"].meaning == BUG_MEANINGS["permission"]
+
+    def test_reads_gzip(self, tmp_path):
+        path = tmp_path / "app.log.gz"
+        with gzip.open(path, "wb") as f:
+            f.write(LOG)
+        with open_log(str(path)) as stream:
+            assert scan_log(stream).records == 2
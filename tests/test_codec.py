@@ -0,0 +1,97 @@
+"""
+Tests for the binary insight codec.
+
+These tests verify that insights and file results survive a round trip,
+also when read a few bytes at a time, and that invalid or newer streams
+are refused.
+"""
+
+import io
+import json
+from dataclasses import asdict
+
+import pytest
+import src.codec
+from src.codec import (MAGIC, CodecError, InsightReader, InsightWriter, decode_insights, encode_insights)
+from src.existential_coder import CodeInsight, ContemplationLevel, ExistentialCoder
+from src.utils import analyze_code_complexity, calculate_code_karma
+from src.scan import FileResult
+
+
+CODE = '''
+def contemplate(items):
+    for item in items:
+        if item:
+            total = item
+        else:
+            raise ValueError("emptiness")
+    return total
+'''
+
+
+def sample_records():
+    coder = ExistentialCoder(ContemplationLevel.COSMIC)
+    results = []
+    for index in range(5):
+        code = CODE * (index + 1)
+        results.append(FileResult(f"pkg/mod_{index}.py", list(coder.analyze_code(code)),
+                                  calculate_code_karma(code) - 20, analyze_code_complexity(code), index))
+    results[0].complexity.update(ratio=0.25, tested=True, owner=None)
+    results[1].complete = False
+    loose = [CodeInsight("Why?", "Because.", ContemplationLevel.SURFACE, 300),
+             CodeInsight("Why?", "Because.", ContemplationLevel.DEEP, 2),
+             CodeInsight("What is 'é'?", "Unicode is a mirror.", ContemplationLevel.COSMIC)]
+    return [loose[0]] + results[:3] + loose[1:] + results[3:]
+
+
+class TestCodec:
+    """Test cases for the insight codec."""
+
+    def test_round_trip(self):
+        records = sample_records()
+        data = encode_insights(records)
+        assert data.startswith(MAGIC)
+        assert decode_insights(data) == records
+        assert len(data) * 5 < len(json.dumps([asdict(r) for r in records if isinstance(r, FileResult)],
+                                               default=str))
+
+    def test_streams_are_read_incrementally(self, tmp_path, monkeypatch):
+        records = sample_records()
+        path = tmp_path / "insights.bin"
+        with open(path, "wb") as f:
+            writer = InsightWriter(f)
+            for record in records:
+                writer.write(record)
+            writer.close()
+
+        monkeypatch.setattr(src.codec, "_CHUNK_SIZE", 7)
+        with open(path, "rb") as f:
+            assert list(InsightReader(f)) == records
+
+    def test_invalid_streams_are_refused(self):
+        data = encode_insights(sample_records())
+        with pytest.raises(CodecError, match="Not an insight stream"):
+            decode_insights(b"JSON" + data[4:])
+        with pytest.raises(CodecError, match="newer"):
+            decode_insights(MAGIC + bytes([2]) + data[5:])
+        with pytest.raises(CodecError, match="Truncated"):
+            decode_insights(data[:len(data) // 2])
+        with pytest.raises(CodecError, match="metric"):
+            InsightWriter(io.BytesIO()).write_result(FileResult("a.py", complexity={"tags": ["x"]}))
+
+    def test_coordinator_ends_the_stream_when_interrupted(self, monkeypatch):
+        from click.testing import CliRunner
+
+        import src.cli
+        import src.distributed
+
+        def interrupted(server, timeout):
+            server.work.record("gone", FileResult("a.py"), complete=False)
+            raise KeyboardInterrupt
+
+        monkeypatch.setattr(src.distributed, "coordinate", interrupted)
+        result = CliRunner().invoke(src.cli.cli, ["coordinator", "--port", "0", "--format", "binary",
+                                                  "-e", ".none", "."])
+
+        assert result.exit_code == 1
+        assert decode_insights(result.stdout_bytes) == [FileResult("a.py", complete=False)]
@@ -0,0 +1,170 @@
+"""
+Tests for the corpus loader.
+
+These tests verify that wisdom is read from data files, extended by user
+corpora, and compiled into a cache that follows its sources.
+"""
+
+import json
+import os
+
+import pytest
+from src.corpus import Corpus, DATA_DIR, choose_across, pack_corpus
+from src.stringtable import StringTable, StringTableError, write_string_table
+
+
+@pytest.fixture
+def user_dir(tmp_path):
+    """A directory of user-supplied corpora."""
+    directory = tmp_path / "corpora"
+    directory.mkdir()
+    return directory
+
+
+def _write(directory, name, data):
+    path = directory / f"{name}.json"
+    path.write_text(json.dumps(data), encoding="utf-8")
+    return path
+
+
+class TestCorpus:
+    """Test cases for the Corpus class."""
+
+    def test_builtin_corpus_loads(self, tmp_path):
+        """Test that the shipped data files provide every category."""
+        corpus = Corpus("oracle", search_path=[DATA_DIR], cache_dir=str(tmp_path))
+
+        assert corpus.categories("prophecies") == ["technical", "philosophical", "personal", "cosmic"]
+        assert len(corpus.entries("cosmic_wisdom")) > 0
+
+    def test_user_corpus_extends_builtin(self, tmp_path, user_dir):
+        """Test that user files add entries to existing and new categories."""
+        _write(user_dir, "oracle", {
+            "cosmic_wisdom": ["The cache remembers what the source forgot."],
+            "prophecies": {"release": ["The release will ship on a Friday."]},
+        })
+        corpus = Corpus("oracle", search_path=[DATA_DIR, str(user_dir)], cache_dir=str(tmp_path))
+
+        assert corpus.entries("cosmic_wisdom")[-1] == "The cache remembers what the source forgot."
+        assert list(corpus.entries("prophecies", "release")) == ["The release will ship on a Friday."]
+
+    def test_categories_load_lazily(self, tmp_path, user_dir):
+        """Test that only the categories that are consulted are read."""
+        _write(user_dir, "sample", {"wisdom": {"a": ["first"], "b": ["second"]}})
+        corpus = Corpus("sample", search_path=[str(user_dir)], cache_dir=str(tmp_path))
+
+        section = corpus.section("wisdom")
+        assert list(section) == ["a", "b"]
+        assert corpus._loaded == {}
+
+        assert list(section["a"]) == ["first"]
+        assert list(corpus._loaded) == ["wisdom/a"]
+
+    def test_cache_is_reused(self, tmp_path, user_dir):
+        """Test that a second corpus reads the compiled cache instead of the sources."""
+        _write(user_dir, "sample", {"wisdom": ["first"]})
+        Corpus("sample", search_path=[str(user_dir)], cache_dir=str(tmp_path)).entries("wisdom")
+        cache_path = tmp_path / "sample.strtab"
+        compiled_at = os.stat(cache_path).st_mtime_ns
+
+        corpus = Corpus("sample", search_path=[str(user_dir)], cache_dir=str(tmp_path))
+
+        assert list(corpus.entries("wisdom")) == ["first"]
+        assert os.stat(cache_path).st_mtime_ns == compiled_at
+
+    def test_cache_follows_source_changes(self, tmp_path, user_dir):
+        """Test that editing a source file invalidates the cache."""
+        source = _write(user_dir, "sample", {"wisdom": ["first"]})
+        Corpus("sample", search_path=[str(user_dir)], cache_dir=str(tmp_path)).entries("wisdom")
+
+        source.write_text(json.dumps({"wisdom": ["first", "second"]}), encoding="utf-8")
+        corpus = Corpus("sample", search_path=[str(user_dir)], cache_dir=str(tmp_path))
+
+        assert list(corpus.entries("wisdom")) == ["first", "second"]
+
+    def test_unwritable_cache_falls_back_to_memory(self, tmp_path, user_dir):
+        """Test that a missing cache directory does not stop the corpus from loading."""
+        _write(user_dir, "sample", {"wisdom": ["first"]})
+        blocker = tmp_path / "not-a-directory"
+        blocker.write_text("")
+
+        corpus = Corpus("sample", search_path=[str(user_dir)], cache_dir=str(blocker))
+
+        assert list(corpus.entries("wisdom")) == ["first"]
+
+    def test_prebuilt_tables_extend_corpus(self, tmp_path, user_dir):
+        """Test that prebuilt string tables are merged after the JSON sources."""
+        _write(user_dir, "sample", {"wisdom": ["from json"]})
+        packed = _write(tmp_path, "packed", {"wisdom": ["from table"]})
+        pack_corpus([str(packed)], str(user_dir / "sample.strtab"))
+        corpus = Corpus("sample", search_path=[str(user_dir)], cache_dir=str(tmp_path))
+
+        entries = corpus.entries("wisdom")
+
+        assert len(entries) == 2
+        assert entries[-1] == "from table"
+
+    def test_failed_compile_leaves_no_temp_file(self, tmp_path, user_dir, monkeypatch):
+        """Test that a compile which cannot be moved into place cleans up after itself."""
+        _write(user_dir, "sample", {"wisdom": ["first"]})
+        cache_dir = tmp_path / "cache"
+
+        def refuse(source, destination):
+            raise OSError("read-only file system")
+
+        monkeypatch.setattr(os, "replace", refuse)
+        corpus = Corpus("sample", search_path=[str(user_dir)], cache_dir=str(cache_dir))
+
+        assert list(corpus.entries("wisdom")) == ["first"]
+        assert os.listdir(cache_dir) == []
+
+    def test_choose_across_empty_section(self):
+        """Test that choosing from an empty section fails like random.choice does."""
+        assert choose_across({"a": [], "b": ["only"]}) == "only"
+        with pytest.raises(IndexError):
+            choose_across({})
+        with pytest.raises(IndexError):
+            choose_across({"a": []})
+
+
+class TestStringTable:
+    """Test cases for the memory-mapped string table format."""
+
+    def test_round_trip(self, tmp_path):
+        """Test that text and record categories read back unchanged."""
+        path = str(tmp_path / "table.strtab")
+        records = [{"wisdom": "Breathe.", "level": "beginner"}]
+        write_string_table(path, {"text": ["zero", "ünïcode", ""], "records": records}, {"origin": "test"})
+
+        table = StringTable(path)
+
+        assert table.categories() == ["text", "records"]
+        assert list(table["text"]) == ["zero", "ünïcode", ""]
+        assert table["text"][-2] == "ünïcode"
+        assert table["records"][0] == records[0]
+        assert table.metadata == {"origin": "test"}
+
+    def test_sample_without_replacement(self, tmp_path):
+        """Test that sampling draws distinct entries."""
+        path = str(tmp_path / "table.strtab")
+        write_string_table(path, {"numbers": [str(i) for i in range(1000)]})
+
+        sample = StringTable(path)["numbers"].sample(10)
+
+        assert len(set(sample)) == 10
+
+    def test_index_out_of_range(self, tmp_path):
+        """Test that reading past the end raises IndexError."""
+        path = str(tmp_path / "table.strtab")
+        write_string_table(path, {"one": ["only"]})
+
+        with pytest.raises(IndexError):
+            StringTable(path)["one"][1]
+
+    def test_rejects_other_files(self, tmp_path):
+        """Test that a file in another format is refused."""
+        path = tmp_path / "not-a-table.strtab"
+        path.write_bytes(b"just some bytes, not wisdom")
+
+        with pytest.raises(StringTableError):
+            StringTable(str(path))
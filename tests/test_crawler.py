@@ -0,0 +1,73 @@
+"""
+Tests for the prefetching crawler.
+
+These tests verify that the crawler reads exactly the files a plain walk
+would, that it keeps its reads bounded, and that analysis gives the same
+results however many readers and workers share the work.
+"""
+
+import threading
+import time
+
+import src.crawler
+from src.crawler import Crawler, analyze_tree
+from src.scan import MINIFIED, walk_files
+
+
+def write_tree(root, files=30):
+    (root / ".gitignore").write_text("build/\n")
+    for index in range(files):
+        directory = root / f"pkg_{index % 4}" / f"sub_{index % 3}"
+        directory.mkdir(parents=True, exist_ok=True)
+        (directory / f"mod_{index}.py").write_text(f"def f_{index}(x):\n    if x:\n        return {index}\n")
+    (root / "build").mkdir()
+    (root / "build" / "out.py").write_text("x = 1\n")
+    (root / "bundle.py").write_text("x=1;" * 1000)
+
+
+class TestCrawler:
+    """Test cases for the crawler."""
+
+    def test_reads_what_a_walk_finds(self, tmp_path):
+        write_tree(tmp_path)
+        sources = {source.path: source for source in Crawler(str(tmp_path), readers=4, max_in_flight=3)}
+        assert sorted(sources) == sorted(walk_files(str(tmp_path), (".py",)))
+        assert sources[str(tmp_path / "bundle.py")].skipped == MINIFIED
+        path = str(tmp_path / "pkg_1" / "sub_1" / "mod_1.py")
+        assert sources[path].code == open(path).read()
+
+    def test_in_flight_reads_are_bounded(self, tmp_path, monkeypatch):
+        write_tree(tmp_path)
+        read_file = src.crawler._read_file
+        lock = threading.Lock()
+        active = [0, 0]
+
+        def slow_read(path):
+            with lock:
+                active[0] += 1
+                active[1] = max(active)
+            time.sleep(0.005)
+            with lock:
+                active[0] -= 1
+            return read_file(path)
+
+        monkeypatch.setattr(src.crawler, "_read_file", slow_read)
+        assert len(list(Crawler(str(tmp_path), readers=16, max_in_flight=3))) == 31
+        assert 1 < active[1] <= 3
+
+    def test_abandoned_crawl_stops(self, tmp_path):
+        write_tree(tmp_path)
+        sources = iter(Crawler(str(tmp_path), readers=2, queue_size=1))
+        next(sources)
+        sources.close()
+        assert not any(thread.name == "gith-ub-prefetch" for thread in threading.enumerate())
+
+    def test_workers_agree(self, tmp_path):
+        write_tree(tmp_path)
+        single = {result.path: result for result in analyze_tree(str(tmp_path), readers=1)}
+        parallel = {result.path: result for result in analyze_tree(str(tmp_path), readers=8, workers=3)}
+        assert len(single) == 30
+        assert single.keys() == parallel.keys()
+        for path, result in single.items():
+            assert result.karma == parallel[path].karma
+            assert result.complexity == parallel[path].complexity
@@ -0,0 +1,135 @@
+"""
+Tests for the daemon and its thin client.
+
+These tests verify that requests make a round trip through a real Unix
+socket, that the client falls back to the full CLI when no daemon
+answers, and that the daemon survives bad requests and stops on demand.
+"""
+
+import json
+import socket
+import sys
+import threading
+
+import pytest
+from click.testing import CliRunner
+
+import src.cli
+from src import client
+from src.client import ANALYZE_MAX_INSIGHTS, build_request, send_request, try_daemon
+from src.daemon import DaemonServer, WarmAgents, stop_daemon
+
+
+@pytest.fixture(scope="module")
+def agents():
+    """Agents are slow enough to awaken that the tests share them."""
+    return WarmAgents()
+
+
+@pytest.fixture
+def socket_path(tmp_path, monkeypatch):
+    path = str(tmp_path / "gith-ub.sock")
+    monkeypatch.setenv(client.SOCKET_ENV_VAR, path)
+    monkeypatch.delenv(client.DISABLE_ENV_VAR, raising=False)
+    return path
+
+
+@pytest.fixture
+def daemon(socket_path, agents):
+    server = DaemonServer(socket_path, agents)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+    thread.join()
+
+
+def raw_request(path, payload: bytes) -> dict:
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    sock.connect(path)
+    sock.sendall(payload)
+    sock.shutdown(socket.SHUT_WR)
+    data = b"".join(iter(lambda: sock.recv(65536), b""))
+    sock.close()
+    return json.loads(data)
+
+
+class TestDaemon:
+    """Test cases for the daemon and the client."""
+
+    def test_round_trip(self, daemon, socket_path, capsys):
+        assert send_request({"command": "ping"}, socket_path) == {"ok": True, "output": ""}
+
+        request = build_request(["ask", "Why do we code?"])
+        response = send_request(request, socket_path)
+        assert response["ok"]
+        assert "Why do we code?" in response["output"]
+
+        assert try_daemon(["commit", "Fixed the bug"]) == 0
+        assert "Commit Message" in capsys.readouterr().out
+
+    def test_analysis_is_capped_like_the_cli(self, daemon, socket_path, tmp_path):
+        path = tmp_path / "big.py"
+        path.write_text("x = 1\n" * 3000)
+
+        request = build_request(["analyze", str(path)])
+        assert request["args"]["max_insights"] == ANALYZE_MAX_INSIGHTS
+        response = send_request(request, socket_path)
+        assert response["ok"]
+        assert f"Showing a sample of {ANALYZE_MAX_INSIGHTS} of 3000 insights" in response["output"]
+
+        request["args"]["timeout"] = 0
+        response = send_request(request, socket_path)
+        assert "before the 0s timeout" in response["output"]
+
+    def test_analysis_skips_what_the_cli_skips(self, daemon, socket_path, tmp_path):
+        path = tmp_path / "blob.py"
+        path.write_bytes(b"x = 1\0" * 10)
+
+        response = send_request(build_request(["analyze", str(path)]), socket_path)
+        assert response["ok"]
+        assert response["skipped"] == "binary"
+        assert "Skipping" in response["output"]
+
+    def test_client_falls_back_without_a_daemon(self, socket_path, monkeypatch):
+        assert send_request({"command": "ping"}) is None
+        assert try_daemon(["ask", "Why?"]) is None
+
+        called = []
+        monkeypatch.setattr(src.cli, "main", lambda: called.append(True))
+        monkeypatch.setattr(sys, "argv", ["gith-ub", "ask", "Why?"])
+        client.main()
+        assert called == [True]
+
+    def test_stale_socket_is_removed(self, socket_path, agents):
+        stale = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        stale.bind(socket_path)
+        stale.close()
+
+        server = DaemonServer(socket_path, agents)
+        try:
+            with pytest.raises(RuntimeError, match="already listening"):
+                DaemonServer(socket_path, agents)
+        finally:
+            server.server_close()
+
+    def test_bad_requests_get_errors(self, daemon, socket_path):
+        response = send_request({"command": "meditate"}, socket_path)
+        assert response == {"ok": False, "error": "Unknown command: meditate"}
+        assert raw_request(socket_path, b"not json\n")["ok"] is False
+        assert raw_request(socket_path, b'{"command": "ask", "args": {}}\n')["ok"] is False
+        assert send_request({"command": "ping"}, socket_path)["ok"]
+
+    def test_stop_shuts_the_daemon_down(self, socket_path, agents):
+        server = DaemonServer(socket_path, agents)
+        thread = threading.Thread(target=server.serve_forever, daemon=True)
+        thread.start()
+
+        result = CliRunner().invoke(src.cli.cli, ["daemon", "--stop", "--socket", socket_path])
+        assert "returned to the void" in result.output
+        thread.join(timeout=5)
+        assert not thread.is_alive()
+        server.server_close()
+
+        assert not stop_daemon(socket_path)
@@ -0,0 +1,108 @@
+"""
+Tests for the staged diff classifier.
+
+These tests verify that diffs are summarized into the right type of change,
+and that very long lines and deadlines are handled without stalling.
+"""
+
+import io
+import shutil
+import subprocess
+import time
+
+import pytest
+from src.diffstream import DiffError, read_staged_diff, summarize_diff, summarize_staged
+
+
+def _diff(path, lines, header=""):
+    body = "".join(f"{line}\n" for line in lines)
+    return f"diff --git a/{path} b/{path}\n{header}--- a/{path}\n+++ b/{path}\n@@ -1 +1 @@\n{body}"
+
+
+def _summarize(text):
+    return summarize_diff(io.BytesIO(text.encode("utf-8")))
+
+
+class TestDiffStream:
+    """Test cases for summarize_diff and summarize_staged."""
+
+    def test_counts_lines_and_files(self):
+        """Test that added and removed lines are counted per file."""
+        summary = _summarize(_diff("src/app.py", ["-old", "+new", "+newer"]) + _diff("src/db.py", ["+x"]))
+
+        assert (summary.files, summary.added_lines, summary.removed_lines) == (2, 3, 1)
+
+    def test_fix_keywords(self):
+        """Test that fix-like words in changed lines classify the diff as a fix."""
+        summary = _summarize(_diff("src/app.py", ["+    # Fixes the crash on empty input", "+    return []"]))
+
+        assert summary.classify() == "fix"
+
+    def test_fix_keywords_only_in_added_lines(self):
+        """Test that removing a line that mentions a bug is not a fix."""
+        summary = _summarize(_diff("src/app.py", ["-    # Workaround for the crash", "+    pass"]))
+
+        assert summary.fix_mentions == 0
+
+    def test_header_like_content_lines(self):
+        """Test that content lines starting with --- or +++ count as removed and added lines."""
+        summary = _summarize(_diff("notes.txt", ["--- a divider", "+++ a banner", " context"]))
+
+        assert (summary.files, summary.added_lines, summary.removed_lines) == (1, 1, 1)
+
+    def test_tests_and_docs(self):
+        """Test that diffs touching only tests or only docs are recognised."""
+        assert _summarize(_diff("tests/test_app.py", ["+assert True"])).classify() == "test"
+        assert _summarize(_diff("docs/guide.md", ["+Read me"]) + _diff("README.md", ["+Hi"])).classify() == "docs"
+
+    def test_new_files_are_features(self):
+        """Test that added files classify the diff as a feature."""
+        summary = _summarize(_diff("src/new.py", ["+def new(): pass"], "new file mode 100644\n"))
+
+        assert summary.added_files == 1
+        assert summary.classify() == "feature"
+
+    def test_renames_are_refactors(self):
+        """Test that a diff made of renames classifies as a refactor."""
+        text = "diff --git a/old.py b/new.py\nsimilarity index 100%\nrename from old.py\nrename to new.py\n"
+
+        summary = _summarize(text)
+
+        assert summary.renamed_files == 1
+        assert summary.classify() == "refactor"
+
+    def test_long_lines_are_skipped(self):
+        """Test that a line longer than the read limit counts once and does not leak into the next."""
+        summary = _summarize(_diff("vendor/min.js", ["+" + "x" * 200_000 + " fix", "+y"]))
+
+        assert summary.added_lines == 2
+        assert summary.fix_mentions == 0
+
+    def test_deadline_stops_reading(self):
+        """Test that an expired deadline stops at the next file."""
+        text = "".join(_diff(f"src/m{i}.py", ["+x"]) for i in range(10))
+
+        summary = summarize_diff(io.BytesIO(text.encode()), deadline=time.monotonic() - 1)
+
+        assert not summary.complete
+        assert summary.files == 0
+
+    @pytest.mark.skipif(shutil.which("git") is None, reason="git is not installed")
+    def test_staged_changes(self, tmp_path):
+        """Test that the staged diff of a repository is summarized."""
+        subprocess.run(["git", "init", "-q", str(tmp_path)], check=True)
+        (tmp_path / "test_app.py").write_text("def test_app():\n    assert True\n")
+        subprocess.run(["git", "-C", str(tmp_path), "add", "."], check=True)
+
+        summary = summarize_staged(str(tmp_path))
+
+        assert summary.complete
+        assert summary.classify() == "test"
+
+    @pytest.mark.skipif(shutil.which("git") is None, reason="git is not installed")
+    def test_git_errors_are_reported(self, tmp_path):
+        """Test that git's own error message is passed on, usage text and all."""
+        subprocess.run(["git", "init", "-q", str(tmp_path)], check=True)
+
+        with pytest.raises(DiffError, match="usage: git diff"):
+            read_staged_diff(summarize_diff, str(tmp_path), options=["--no-such-option"])
@@ -0,0 +1,137 @@
+"""
+Tests for distributed analysis.
+
+These tests verify that leases expire and are retried, that results are
+merged exactly once, and that a coordinator and several worker processes
+analyze a tree together on localhost, even when one worker dies.
+"""
+
+import json
+import os
+import socket
+import subprocess
+import sys
+import threading
+
+from src.distributed import CoordinatorServer, WorkQueue, coordinate, decode_result, encode_result, list_files
+from src.existential_coder import ContemplationLevel, ExistentialCoder
+from src.utils import analyze_code_complexity, calculate_code_karma
+from src.scan import FileResult
+
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+class Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def result_for(path, code="def f():\n    return 1\n"):
+    insights = ExistentialCoder(ContemplationLevel.SURFACE).analyze_code(code, path)
+    return FileResult(path, list(insights), calculate_code_karma(code), analyze_code_complexity(code))
+
+
+class TestWorkQueue:
+    """Test cases for leases and merging."""
+
+    def test_expired_leases_are_retried_then_given_up(self):
+        clock = Clock()
+        work = WorkQueue(["a.py", "b.py", "c.py"], shard_size=2, lease_seconds=10, max_attempts=2, clock=clock)
+        first = work.lease("w1")
+        assert list(first.files) == ["a.py", "b.py"]
+        assert work.record(first.id, result_for("a.py"))
+
+        clock.now = 11
+        second = work.lease("w2")
+        assert list(second.files) == ["c.py", "b.py"]
+        assert work.lease("w3") is None
+
+        clock.now = 22
+        third = work.lease("w3")
+        assert list(third.files) == ["c.py"]
+        assert work.failed == {"b.py": "no result after 2 leases"}
+        work.skip(third.id, "c.py", "generated")
+        assert work.done
+        assert work.skipped == {"c.py": "generated"}
+        assert work.totals.metrics["files"] == 1
+
+    def test_late_results_are_kept_once(self):
+        clock = Clock()
+        merged = []
+        work = WorkQueue(["a.py", "b.py"], shard_size=2, lease_seconds=10, clock=clock,
+                         on_result=lambda result, complete: merged.append(result.path))
+        stale = work.lease("slow")
+        clock.now = 11
+        fresh = work.lease("fast")
+        assert work.record(fresh.id, result_for("a.py"))
+        assert not work.record(stale.id, result_for("a.py"))
+        assert not work.record(stale.id, result_for("b.py"))
+        assert merged == ["a.py", "b.py"]
+        assert work.done
+
+    def test_late_results_are_not_given_up_on(self):
+        clock = Clock()
+        work = WorkQueue(["a.py"], lease_seconds=10, max_attempts=2, clock=clock)
+        stale = work.lease("slow")
+        clock.now = 11
+        work.lease("fast")
+        assert not work.record(stale.id, result_for("a.py"))
+
+        clock.now = 22
+        assert work.lease("other") is None
+        assert work.failed == {}
+        assert work.done
+
+    def test_results_survive_the_wire(self):
+        result = result_for("a.py")
+        decoded, complete = decode_result(json.loads(json.dumps(encode_result(result, False))))
+        assert decoded == result
+        assert complete is False
+
+
+class TestLocalCluster:
+    """Test cases for a coordinator and worker processes on localhost."""
+
+    def test_workers_share_the_tree_and_outlive_a_dead_one(self, tmp_path):
+        expected = {}
+        for index in range(40):
+            code = f"def f_{index}(x):\n" + "    if x:\n        x += 1\n" * (index % 5) + "    return x\n"
+            path = tmp_path / f"pkg_{index % 3}" / f"mod_{index}.py"
+            path.parent.mkdir(exist_ok=True)
+            path.write_text(code)
+            expected[str(path)] = calculate_code_karma(code)
+
+        work = WorkQueue(list_files([str(tmp_path)]), shard_size=4, lease_seconds=1.0, max_attempts=5)
+        server = CoordinatorServer(work, "127.0.0.1", 0)
+        finished = []
+        coordinator = threading.Thread(target=lambda: finished.append(coordinate(server, timeout=60)))
+        coordinator.start()
+
+        # A worker that leases a shard and dies without a word
+        dead = socket.create_connection(("127.0.0.1", server.port))
+        dead.sendall(b'{"command": "lease", "worker": "dead"}\n')
+        abandoned = json.loads(dead.makefile().readline())["files"]
+        assert len(abandoned) == 4
+
+        workers = [subprocess.Popen([sys.executable, "-m", "src.cli", "worker", f"127.0.0.1:{server.port}",
+                                     "--name", f"worker-{index}"],
+                                    cwd=REPO_ROOT, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
+                   for index in range(3)]
+        try:
+            coordinator.join(timeout=90)
+            outputs = [process.communicate(timeout=30)[1].decode() for process in workers]
+        finally:
+            dead.close()
+            for process in workers:
+                process.kill()
+
+        assert finished == [True]
+        assert not work.failed and not work.skipped
+        assert work.totals.metrics["files"] == 40
+        assert work.totals.metrics["karma"] == sum(expected.values())
+        assert all(process.returncode == 0 for process in workers), outputs
+        assert sum(int(output.split()[1]) for output in outputs) >= 40
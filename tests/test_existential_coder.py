@@ -5,8 +5,13 @@ These tests verify that the existential coder provides meaningful
 philosophical insights about code.
 """
 
+import random
+import time
+
 import pytest
-from src.existential_coder import ExistentialCoder, ContemplationLevel, CodeInsight
+from src.existential_coder import (
+    AnalysisEngine, CodeInsight, ContemplationLevel, ExistentialCoder, LineMemoStats, clear_line_memo, line_memo_stats,
+)
 
 
 class TestExistentialCoder:
@@ -204,3 +209,155 @@ class TestExistentialCoder:
         
         result = coder._classify_changes(changes)
         assert result == "general"
+    
+    def test_generate_commit_messages_bulk(self):
+        """Test that bulk generation classifies each commit on its own."""
+        coder = ExistentialCoder()
+        commits = ["Refactor the parser", "Fix crash on empty input", "Bump version"]
+        
+        messages = list(coder.generate_commit_messages(commits))
+        
+        assert len(messages) == 3
+        assert messages[0] in coder.commit_templates["refactor"]
+        assert messages[1] in coder.commit_templates["fix"]
+        assert messages[2] in coder.commit_templates["general"]
+
+
+class TestTokenEngine:
+    """Test cases for the tokenize-based analysis engine."""
+    
+    WISDOM_KINDS = {
+        "Every function is a microcosm of purpose in the digital universe.": "function",
+        "Every condition is a choice between two realities.": "condition",
+        "Loops are the heartbeat of the digital realm.": "loop",
+        "Every variable is a container for potential.": "variable",
+        "Errors are not failures, but invitations to grow.": "error",
+    }
+    
+    def kinds(self, code, engine=AnalysisEngine.TOKENS):
+        coder = ExistentialCoder(engine=engine)
+        return {insight.line_number: self.WISDOM_KINDS[insight.wisdom]
+                for insight in coder.analyze_code(code) if insight.line_number}
+    
+    def test_ignores_strings_and_comments(self):
+        """Test that constructs named in docstrings, strings and comments are ignored."""
+        code = (
+            'def greet(name, greeting="hi"):\n'
+            '    """\n'
+            '    if you call this for a while, def initely raise your spirits.\n'
+            '    """\n'
+            '    message = f"{greeting} {name}"  # if only = were enough\n'
+            '    print("for " + message, end="")\n'
+            '    while not message:\n'
+            '        raise ValueError("empty")\n'
+            '    return len(message) if message else 0\n'
+        )
+        assert self.kinds(code) == {1: "function", 5: "variable", 7: "loop", 8: "error", 9: "condition"}
+        assert len(self.kinds(code, AnalysisEngine.LINES)) > 5
+    
+    @pytest.mark.parametrize("engine", list(AnalysisEngine))
+    def test_analyze_lines(self, engine):
+        """Test that pieces of a file are contemplated in full, numbered from where they start."""
+        coder = ExistentialCoder(engine=engine)
+        
+        insights = list(coder.analyze_lines("    for item in items:\n        total = item", 41))
+        
+        assert [insight.line_number for insight in insights] == [41, 42]
+        assert len(list(coder.analyze_lines("x = 1\n" * 10_000, interrupted=lambda: True))) < 10_000
+    
+    def test_agrees_with_line_engine_on_plain_code(self):
+        """Test that ordinary code gets the same categories from both engines."""
+        code = (
+            "def total(items):\n"
+            "    count = 0\n"
+            "    for item in items:\n"
+            "        if item:\n"
+            "            count += item\n"
+            "        elif item is None:\n"
+            "            pass\n"
+            "    try:\n"
+            "        return count\n"
+            "    except TypeError:\n"
+            "        raise\n"
+        )
+        assert self.kinds(code) == self.kinds(code, AnalysisEngine.LINES)
+    
+    def test_assignments_only_outside_brackets(self):
+        """Test that keyword arguments and comparisons are not assignments."""
+        code = "call(a=1)\nx == y\nvalue = call(b=2)\nif (n := 3) > 2: pass\n"
+        assert self.kinds(code) == {3: "variable", 4: "condition"}
+    
+    def test_untokenizable_code_is_read_line_by_line(self):
+        """Test that a fragment that does not tokenize is still analyzed."""
+        code = "def broken(:\n    x = '''unterminated\n"
+        assert self.kinds(code) == self.kinds(code, AnalysisEngine.LINES)
+
+
+class TestGiantFiles:
+    """Test cases for capped and deadline-bounded analysis."""
+    
+    CODE = "\n".join(f"value_{i} = {i}" for i in range(20000))
+    
+    @pytest.mark.parametrize("engine", list(AnalysisEngine))
+    def test_max_insights_samples_across_the_file(self, engine):
+        """Test that a capped analysis keeps a uniform sample, in line order."""
+        random.seed(7)
+        insights = ExistentialCoder(engine=engine).analyze_code(self.CODE, max_insights=100)
+        line_numbers = [insight.line_number for insight in insights if insight.line_number]
+        
+        assert len(line_numbers) == 100
+        assert line_numbers == sorted(line_numbers)
+        assert insights.complete and insights.sampled
+        assert insights.insights_found == 20000
+        # Every fifth of the file is represented
+        assert {line_number * 5 // 20001 for line_number in line_numbers} == {0, 1, 2, 3, 4}
+    
+    def test_small_files_are_not_sampled(self):
+        """Test that a cap above the number of insights changes nothing."""
+        code = "def f():\n    x = 1\n    return x"
+        insights = ExistentialCoder().analyze_code(code, max_insights=100)
+        assert [insight.line_number for insight in insights] == [1, 2, None]
+        assert insights.complete and not insights.sampled
+    
+    @pytest.mark.parametrize("engine", list(AnalysisEngine))
+    def test_deadline_returns_partial_results(self, engine):
+        """Test that a passed deadline stops the analysis early and says so."""
+        insights = ExistentialCoder(engine=engine).analyze_code(self.CODE * 5, deadline=time.monotonic())
+        
+        assert not insights.complete
+        assert 0 <= insights.lines_analyzed < insights.total_lines
+        assert all(insight.line_number <= insights.lines_analyzed for insight in insights if insight.line_number)
+
+
+class TestLineMemo:
+    """Test cases for the memo of line classifications."""
+    
+    def test_repeated_lines_are_classified_once(self):
+        """Test that repeats, however indented, are answered from the memo."""
+        clear_line_memo()
+        code = "\n".join(["    x = compute(y)", "x = compute(y)", "        if ready:"] * 1000)
+        insights = ExistentialCoder().analyze_code(code)
+        
+        stats = line_memo_stats()
+        assert stats.misses == 2
+        assert stats.hits == 2998
+        assert stats.size == 2
+        assert stats.hit_rate > 0.99
+        assert len(insights) == 3001
+    
+    def test_memo_is_shared_and_matches_the_line_scanner(self):
+        """Test that every coder shares the memo, and classifies as before."""
+        clear_line_memo()
+        first, second = ExistentialCoder(), ExistentialCoder(ContemplationLevel.COSMIC)
+        assert first._analyze_line("for item in items:", 1)[0].wisdom == "Loops are the heartbeat of the digital realm."
+        assert second._analyze_line("  for item in items:", 2)[0].contemplation_level == ContemplationLevel.COSMIC
+        assert line_memo_stats().hits == 1
+    
+    def test_long_lines_are_not_remembered(self):
+        """Test that minified lines do not fill the memo."""
+        clear_line_memo()
+        line = "x = [" + ", ".join(["1"] * 500) + "]"
+        assert ExistentialCoder()._analyze_line(line, 1)
+        assert line_memo_stats().size == 0
+        clear_line_memo()
+        assert line_memo_stats() == LineMemoStats(0, 0, 0, line_memo_stats().max_size)
@@ -0,0 +1,83 @@
+"""
+Tests for the offline n-gram generator.
+
+These tests verify that generated sentences only follow transitions seen in
+training, and that the generator can be seeded, prefixed and extended.
+"""
+
+import random
+
+import pytest
+import src.generator
+from src.generator import GENERATOR_SOURCES, NGramModel, load_generator
+
+
+SENTENCES = [
+    "The bug is a teacher.",
+    "The bug is a mirror of the mind.",
+    "The compiler is a teacher of patience.",
+]
+
+
+def _bigrams(sentence):
+    words = ["<s>"] + sentence.split() + ["</s>"]
+    return set(zip(words, words[1:]))
+
+
+class TestGenerator:
+    """Test cases for the NGramModel class."""
+
+    def test_only_follows_learned_transitions(self):
+        """Test that every word pair of the output was seen in training."""
+        model = NGramModel(SENTENCES, order=1)
+        learned = set().union(*(_bigrams(sentence) for sentence in SENTENCES))
+
+        for sentence in model.sample(200, random.Random(1), novel=False):
+            assert _bigrams(sentence) <= learned
+
+    def test_same_seed_same_sentences(self):
+        """Test that generation is reproducible with a seeded random source."""
+        model = NGramModel(SENTENCES)
+
+        assert model.sample(5, random.Random(7)) == model.sample(5, random.Random(7))
+
+    def test_prefix_is_continued(self):
+        """Test that a known prefix continues from its context."""
+        model = NGramModel(SENTENCES, order=3)
+
+        sentence = model.generate(random.Random(3), prefix="The compiler")
+
+        assert sentence == "The compiler is a teacher of patience."
+
+    def test_novel_sentences_avoid_training_text(self):
+        """Test that novel sampling prefers sentences not seen verbatim."""
+        model = NGramModel(SENTENCES, order=1)
+
+        sentences = model.sample(50, random.Random(5))
+
+        assert sum(sentence in SENTENCES for sentence in sentences) < 5
+
+    def test_transitions_are_counted_once_per_occurrence(self):
+        """Test that the transition arrays hold one slot per training word."""
+        model = NGramModel(SENTENCES)
+
+        assert len(model) == sum(len(sentence.split()) + 1 for sentence in SENTENCES)
+        assert model.state_start[-1] == len(model.slot_word) == len(model.slot_next)
+
+    def test_rejects_empty_training_text(self):
+        """Test that a model cannot be trained on nothing."""
+        with pytest.raises(ValueError):
+            NGramModel(["", "   "])
+
+    def test_rejects_vocabulary_too_large_to_pack(self, monkeypatch):
+        """Test that word ids never overflow their share of a packed context."""
+        monkeypatch.setattr(src.generator, "_ID_BITS", 2)
+
+        assert len(NGramModel(["one two three"]).vocabulary) == 4
+        with pytest.raises(ValueError, match="distinct words"):
+            NGramModel(["one two three four"])
+
+    @pytest.mark.parametrize("kind", sorted(GENERATOR_SOURCES))
+    def test_corpora_train_every_kind(self, kind):
+        """Test that every kind of generator learns from the shipped corpora."""
+        assert load_generator(kind).generate(random.Random(0))
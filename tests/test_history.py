@@ -0,0 +1,133 @@
+"""
+Tests for the git history scanner.
+
+These tests verify that every commit is measured, and that each blob is
+analyzed once no matter how many commits share it.
+"""
+
+import shutil
+import subprocess
+
+import pytest
+from src.history import CatFile, HistoryError, HistoryScanner, iter_commit_messages, measure_code
+
+
+pytestmark = pytest.mark.skipif(shutil.which("git") is None, reason="git is not installed")
+
+FIRST = "def hello():\n    return 'world'\n"
+SECOND = "import os\n\nclass Seeker:\n    pass\n"
+
+
+def _git(repo, *args):
+    subprocess.run(["git", "-C", str(repo), "-c", "user.name=Sage", "-c", "user.email=sage@example.com",
+                    *args], check=True, capture_output=True)
+
+
+@pytest.fixture
+def repo(tmp_path):
+    """A repository of three commits that share a file."""
+    path = tmp_path / "repo"
+    path.mkdir()
+    _git(path, "init", "-q")
+    (path / "hello.py").write_text(FIRST)
+    (path / "notes.txt").write_text("not code")
+    _git(path, "add", ".")
+    _git(path, "commit", "-q", "-m", "First")
+
+    (path / "pkg").mkdir()
+    (path / "pkg" / "seeker.py").write_text(SECOND)
+    _git(path, "add", ".")
+    _git(path, "commit", "-q", "-m", "Second")
+
+    (path / "copy.py").write_text(FIRST)
+    _git(path, "add", ".")
+    _git(path, "commit", "-q", "-m", "Third")
+    return path
+
+
+class TestHistory:
+    """Test cases for the HistoryScanner class."""
+
+    def test_measures_every_commit(self, repo, tmp_path):
+        """Test that each commit's totals add up its source files."""
+        points = list(HistoryScanner(str(repo), cache_dir=str(tmp_path)).scan())
+
+        first, second = measure_code(FIRST), measure_code(SECOND)
+        assert [point.files for point in points] == [1, 2, 3]
+        assert points[0].karma == first[1]
+        assert points[2].karma == 2 * first[1] + second[1]
+        assert points[0].timestamp <= points[-1].timestamp
+
+    def test_each_blob_is_analyzed_once(self, repo, tmp_path):
+        """Test that blobs shared between commits and paths are analyzed once."""
+        scanner = HistoryScanner(str(repo), cache_dir=str(tmp_path))
+        list(scanner.scan())
+
+        assert scanner.blobs_analyzed == 2
+
+    def test_blob_results_are_persisted(self, repo, tmp_path):
+        """Test that a second scan reuses the saved blob results."""
+        scanner = HistoryScanner(str(repo), cache_dir=str(tmp_path))
+        list(scanner.scan())
+        scanner.save()
+
+        rescan = HistoryScanner(str(repo), cache_dir=str(tmp_path))
+        points = list(rescan.scan())
+
+        assert rescan.blobs_analyzed == 0
+        assert len(points) == 3
+
+    def test_cat_file_reads_objects(self, repo):
+        """Test that the batch process returns object types and content."""
+        sha = subprocess.run(["git", "-C", str(repo), "rev-parse", "HEAD:hello.py"],
+                             capture_output=True, text=True, check=True).stdout.strip()
+
+        with CatFile(str(repo)) as cat_file:
+            assert cat_file.read(sha) == ("blob", FIRST.encode())
+            with pytest.raises(HistoryError):
+                cat_file.read("0" * 40)
+
+    def test_unknown_revision(self, repo, tmp_path):
+        """Test that git errors are reported as HistoryError."""
+        with pytest.raises(HistoryError):
+            list(HistoryScanner(str(repo), cache_dir=str(tmp_path)).scan("no-such-branch"))
+
+    def test_commit_messages_stream_newest_first(self, repo):
+        """Test that commit messages are read with their SHAs, newest first."""
+        messages = [message.strip() for _, message in iter_commit_messages(str(repo), "HEAD")]
+
+        assert messages == ["Third", "Second", "First"]
+
+    def test_commit_message_errors_carry_git_output(self, repo):
+        """Test that git's own error message is passed on."""
+        with pytest.raises(HistoryError, match="no-such-branch"):
+            list(iter_commit_messages(str(repo), "no-such-branch"))
+
+    def test_cli_writes_only_the_series_to_stdout(self, repo, tmp_path, monkeypatch):
+        """Test that the history command keeps its banner and summary off stdout."""
+        from click.testing import CliRunner
+
+        import src.cli
+
+        monkeypatch.setenv("GITH_UB_CACHE_DIR", str(tmp_path))
+        result = CliRunner().invoke(src.cli.cli, ["history", str(repo)])
+
+        assert result.exit_code == 0
+        assert result.stdout.splitlines()[0].startswith("commit,")
+        assert len(result.stdout.splitlines()) == 4
+        assert "Measured 3 commits" in result.stderr
+
+    def test_cli_commit_from_log_writes_only_messages(self, repo, monkeypatch):
+        """Test that commit --from-log writes one line per commit and nothing else."""
+        from click.testing import CliRunner
+
+        import src.cli
+
+        monkeypatch.chdir(repo)
+        result = CliRunner().invoke(src.cli.cli, ["commit", "--from-log", "HEAD"])
+        failed = CliRunner().invoke(src.cli.cli, ["commit", "--from-log", "no-such-branch"])
+
+        assert len(result.stdout.splitlines()) == 3
+        assert "Welcome" not in result.stdout
+        assert failed.stdout == ""
+        assert "no-such-branch" in failed.stderr
@@ -0,0 +1,90 @@
+"""
+Tests for the pre-commit hook.
+
+These tests verify that the hook contemplates only staged additions, stays
+within its budget, and installs without trampling other hooks.
+"""
+
+import os
+import shutil
+import subprocess
+
+import pytest
+from src.hook import HookError, install_hook, run_hook, uninstall_hook
+
+
+pytestmark = pytest.mark.skipif(shutil.which("git") is None, reason="git is not installed")
+
+
+def _git(repo, *args):
+    subprocess.run(["git", "-C", str(repo), "-c", "user.name=Sage", "-c", "user.email=sage@example.com",
+                    *args], check=True, capture_output=True)
+
+
+@pytest.fixture
+def repo(tmp_path):
+    """A repository with a committed file and a staged change to it."""
+    _git(tmp_path, "init", "-q")
+    (tmp_path / "app.py").write_text("x = 1\n")
+    _git(tmp_path, "add", ".")
+    _git(tmp_path, "commit", "-q", "-m", "Initial")
+
+    (tmp_path / "app.py").write_text("x = 1\n\ndef contemplate():\n    return 42\n")
+    _git(tmp_path, "add", ".")
+    return tmp_path
+
+
+class TestHook:
+    """Test cases for run_hook and the hook installer."""
+
+    def test_contemplates_only_added_lines(self, repo):
+        """Test that insights point at the staged additions with their new line numbers."""
+        report = run_hook(str(repo), budget_ms=5000)
+
+        assert report.staged_lines == 3
+        assert report.analyzed_lines == 3
+        assert not report.sampled
+        assert [(path, insight.line_number) for path, insight in report.insights] == [("app.py", 3)]
+
+    def test_header_like_lines_are_content(self, repo):
+        """Test that added lines starting with "++ " are counted and keep their file."""
+        (repo / "notes.py").write_text("++ counted\n++ b/elsewhere.py\ndef contemplate():\n    return 42\n")
+        _git(repo, "add", ".")
+
+        report = run_hook(str(repo), budget_ms=5000)
+
+        assert report.staged_files == 2
+        assert report.staged_lines == 7
+        assert ("notes.py", 3) in [(path, insight.line_number) for path, insight in report.insights]
+        assert "elsewhere.py" not in [path for path, _ in report.insights]
+
+    def test_exhausted_budget_reports_skipped_lines(self, repo):
+        """Test that running out of time is reported rather than waited out."""
+        report = run_hook(str(repo), budget_ms=0)
+
+        assert report.sampled
+        assert report.analyzed_lines == 0
+        assert report.elapsed_ms < 1000
+
+    def test_install_and_uninstall(self, repo):
+        """Test that the hook is installed executable and removed again."""
+        path = install_hook(str(repo), budget_ms=150)
+
+        assert os.access(path, os.X_OK)
+        with open(path) as f:
+            assert "--budget 150" in f.read()
+        assert uninstall_hook(str(repo))
+        assert not os.path.exists(path)
+
+    def test_foreign_hook_is_kept(self, repo):
+        """Test that an existing hook is only replaced with force."""
+        path = repo / ".git" / "hooks" / "pre-commit"
+        path.parent.mkdir(exist_ok=True)
+        path.write_text("#!/bin/sh\nexit 0\n")
+
+        with pytest.raises(HookError):
+            install_hook(str(repo))
+        assert not uninstall_hook(str(repo))
+
+        install_hook(str(repo), force=True)
+        assert "gith-ub" in path.read_text()
@@ -0,0 +1,100 @@
+"""
+Tests for the import-time budget of G.I.T.H.U.B.'s entry points.
+
+The tool runs from git hooks thousands of times a day, so every
+millisecond spent importing modules that a command never uses is felt.
+"""
+
+import os
+import subprocess
+import sys
+
+import pytest
+
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Cumulative import time budgets in microseconds, measured with
+# ``python -X importtime``. Wall-clock budgets fail on loaded machines, so
+# they are only checked when GITH_UB_TIMING_TESTS is set; slower machines
+# may scale them up with GITH_UB_IMPORT_BUDGET_SCALE.
+IMPORT_BUDGETS_US = {
+    "src": 20_000,
+    "src.client": 50_000,
+    "src.cli": 100_000,
+}
+
+BUDGET_SCALE = float(os.environ.get("GITH_UB_IMPORT_BUDGET_SCALE", "1"))
+
+timing = pytest.mark.skipif(not os.environ.get("GITH_UB_TIMING_TESTS"),
+                            reason="set GITH_UB_TIMING_TESTS=1 to check wall-clock budgets")
+
+
+def _cumulative_import_time(module: str) -> int:
+    """Import a module in a fresh interpreter and report its cumulative import time."""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=PROJECT_ROOT,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    for line in reversed(result.stderr.splitlines()):
+        fields = [field.strip() for field in line.split("|")]
+        if len(fields) == 3 and fields[2] == module:
+            return int(fields[1])
+    raise AssertionError(f"No import time reported for {module}")
+
+
+def _modules_loaded_by(module: str) -> set:
+    """Import a module in a fresh interpreter and list every module it loaded."""
+    result = subprocess.run(
+        [sys.executable, "-c", f"import sys, {module}; print('\\n'.join(sys.modules))"],
+        cwd=PROJECT_ROOT,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    return set(result.stdout.split())
+
+
+class TestImportTime:
+    """Test cases for the entry points' start-up cost."""
+
+    @timing
+    @pytest.mark.parametrize("module", sorted(IMPORT_BUDGETS_US))
+    def test_import_time_within_budget(self, module):
+        """Test that each entry point imports within its budget (best of three runs)."""
+        best = min(_cumulative_import_time(module) for _ in range(3))
+
+        assert best <= IMPORT_BUDGETS_US[module] * BUDGET_SCALE
+
+    def test_package_imports_agents_lazily(self):
+        """Test that importing the package does not import the agents."""
+        loaded = _modules_loaded_by("src")
+
+        assert "src.existential_coder" not in loaded
+        assert "src.oracle" not in loaded
+
+    def test_package_attributes_resolve(self):
+        """Test that lazily loaded attributes are still importable."""
+        import src
+        from src.existential_coder import ExistentialCoder
+
+        assert src.ExistentialCoder is ExistentialCoder
+        assert "ZenMaster" in dir(src)
+
+    def test_cli_defers_rich_and_agents(self):
+        """Test that the CLI module imports neither rich nor any agent up front."""
+        loaded = _modules_loaded_by("src.cli")
+
+        assert "rich" not in loaded
+        assert not {"src.existential_coder", "src.oracle", "src.zen_master", "src.philosopher_agent"} & loaded
+
+    def test_client_uses_only_the_standard_library(self):
+        """Test that the thin client avoids click, rich and typing."""
+        loaded = _modules_loaded_by("src.client")
+
+        assert "click" not in loaded
+        assert "rich" not in loaded
+        assert "typing" not in loaded
@@ -0,0 +1,205 @@
+"""
+Tests for the language server.
+
+These tests verify the message framing, incremental document sync, and that
+only edited lines are contemplated again.
+"""
+
+import io
+import json
+import os
+import threading
+import time
+
+from src.existential_coder import ExistentialCoder
+from src.lsp import (
+    PARSE_ERROR,
+    REQUEST_CANCELLED,
+    LanguageServer,
+    TextDocument,
+    read_message,
+    write_message,
+)
+
+
+CODE = "import os\n\ndef contemplate():\n    for moment in range(3):\n        x = moment\n"
+
+
+class CountingCoder(ExistentialCoder):
+    """A coder that remembers which lines it contemplated."""
+
+    def __init__(self):
+        super().__init__()
+        self.contemplated = []
+
+    def analyze_lines(self, code, first_line=1, interrupted=None):
+        self.contemplated.append(first_line)
+        return super().analyze_lines(code, first_line, interrupted)
+
+
+def _edit(start_line, start_char, end_line, end_char, text):
+    return {"range": {"start": {"line": start_line, "character": start_char},
+                      "end": {"line": end_line, "character": end_char}},
+            "text": text}
+
+
+def _run(server, *messages):
+    """Queue messages before the server starts, so the order is deterministic."""
+    for message in messages:
+        server._incoming.put(dict(message, jsonrpc="2.0"))
+    return server.serve(), _replies(server)
+
+
+def _replies(server):
+    output = io.BytesIO(server._writer.getvalue())
+    replies = []
+    while True:
+        message = read_message(output)
+        if message is None:
+            return replies
+        replies.append(message)
+
+
+class TestFraming:
+    """Test cases for reading and writing messages."""
+
+    def test_round_trip(self):
+        stream = io.BytesIO()
+        write_message(stream, {"jsonrpc": "2.0", "id": 1, "result": "ü"})
+        stream.seek(0)
+        assert read_message(stream) == {"jsonrpc": "2.0", "id": 1, "result": "ü"}
+        assert read_message(stream) is None
+
+
+class TestTextDocument:
+    """Test cases for TextDocument."""
+
+    def test_incremental_edits(self):
+        document = TextDocument("file:///a.py", "one\ntwo\nthree")
+        document.apply_change(_edit(0, 1, 1, 2, "NE\nTW"))
+        assert document.text == "oNE\nTWo\nthree"
+        document.apply_change(_edit(2, 5, 2, 5, "\nfour"))
+        assert document.text == "oNE\nTWo\nthree\nfour"
+        document.apply_change(_edit(1, 0, 3, 0, ""))
+        assert document.text == "oNE\nfour"
+        document.apply_change({"text": "fresh"})
+        assert document.lines == ["fresh"]
+
+    def test_columns_count_utf16_units(self):
+        document = TextDocument("file:///a.py", "s = '🙂x'")
+        # The emoji takes two UTF-16 code units
+        document.apply_change(_edit(0, 7, 0, 8, "y"))
+        assert document.text == "s = '🙂y'"
+
+    def test_only_edited_lines_are_contemplated(self):
+        coder = CountingCoder()
+        document = TextDocument("file:///a.py", CODE)
+        assert document.analyze(coder)
+        assert len(coder.contemplated) == len(document.lines)
+
+        coder.contemplated.clear()
+        document.apply_change(_edit(4, 8, 4, 9, "y"))
+        document.analyze(coder)
+        assert coder.contemplated == [5]
+        assert document.analyzed
+
+    def test_diagnostics_follow_shifted_lines(self):
+        document = TextDocument("file:///a.py", CODE)
+        document.analyze(ExistentialCoder())
+        before = [d["range"]["start"]["line"] for d in document.diagnostics()]
+        document.apply_change(_edit(0, 0, 0, 0, "\n\n"))
+        document.analyze(ExistentialCoder())
+        after = [d["range"]["start"]["line"] for d in document.diagnostics()]
+        assert after == [line + 2 for line in before]
+        assert json.loads(document.diagnostics_json()) == document.diagnostics()
+
+    def test_interrupted_analysis_resumes(self):
+        document = TextDocument("file:///a.py", "x = 1\n" * 2000)
+        assert not document.analyze(ExistentialCoder(), lambda: True)
+        assert not document.analyzed
+        assert document.analyze(ExistentialCoder())
+
+
+class TestLanguageServer:
+    """Test cases for LanguageServer."""
+
+    def _server(self):
+        return LanguageServer(io.BytesIO(), io.BytesIO())
+
+    def test_session_publishes_diagnostics(self):
+        uri = "file:///a.py"
+        read_end, write_end = os.pipe()
+        client = os.fdopen(write_end, "wb")
+        server = LanguageServer(os.fdopen(read_end, "rb"), io.BytesIO())
+        exit_codes = []
+        thread = threading.Thread(target=lambda: exit_codes.append(server.serve()))
+        thread.start()
+
+        for message in [
+            {"id": 1, "method": "initialize", "params": {}},
+            {"method": "initialized", "params": {}},
+            {"method": "textDocument/didOpen",
+             "params": {"textDocument": {"uri": uri, "version": 1, "text": CODE}}},
+            {"method": "textDocument/didChange",
+             "params": {"textDocument": {"uri": uri, "version": 2},
+                        "contentChanges": [_edit(0, 0, 0, 9, "y = 2")]}},
+            {"id": 2, "method": "textDocument/hover",
+             "params": {"textDocument": {"uri": uri}, "position": {"line": 2, "character": 4}}},
+        ]:
+            write_message(client, dict(message, jsonrpc="2.0"))
+
+        deadline = time.monotonic() + 5
+        while b'"version":2' not in server._writer.getvalue() and time.monotonic() < deadline:
+            time.sleep(0.01)
+        write_message(client, {"jsonrpc": "2.0", "id": 3, "method": "shutdown"})
+        write_message(client, {"jsonrpc": "2.0", "method": "exit"})
+        thread.join(5)
+        client.close()
+
+        replies = _replies(server)
+        assert exit_codes == [0]
+        assert replies[0]["result"]["capabilities"]["textDocumentSync"]["change"] == 2
+        hover = next(r for r in replies if r.get("id") == 2)
+        assert hover["result"]["contents"]["kind"] == "markdown"
+        assert replies[-1] == {"jsonrpc": "2.0", "id": 3, "result": None}
+        published = [r["params"] for r in replies if r.get("method") == "textDocument/publishDiagnostics"]
+        assert published[-1]["version"] == 2
+        assert {d["range"]["start"]["line"] for d in published[-1]["diagnostics"]} == {0, 2, 3, 4}
+
+    def test_cancel_request(self):
+        _, replies = _run(
+            self._server(),
+            {"id": 1, "method": "initialize", "params": {}},
+            {"id": 2, "method": "textDocument/hover",
+             "params": {"textDocument": {"uri": "file:///a.py"}, "position": {"line": 0, "character": 0}}},
+            {"method": "$/cancelRequest", "params": {"id": 2}},
+        )
+        assert replies[1]["id"] == 2
+        assert replies[1]["error"]["code"] == REQUEST_CANCELLED
+
+    def test_requests_before_initialize_are_refused(self):
+        exit_code, replies = _run(self._server(), {"id": 1, "method": "shutdown"})
+        assert exit_code == 1
+        assert replies[0]["error"]["code"] == -32002
+
+    def test_parse_errors_are_written_by_the_main_loop(self):
+        class RecordingWriter(io.BytesIO):
+            threads = set()
+
+            def write(self, data):
+                self.threads.add(threading.current_thread())
+                return super().write(data)
+
+        incoming = io.BytesIO()
+        incoming.write(b"Content-Length: 8\r\n\r\nnot json")
+        for message in [{"id": 1, "method": "initialize", "params": {}},
+                        {"id": 2, "method": "shutdown"}, {"method": "exit"}]:
+            write_message(incoming, dict(message, jsonrpc="2.0"))
+        incoming.seek(0)
+        server = LanguageServer(incoming, RecordingWriter())
+
+        assert server.serve() == 0
+        replies = _replies(server)
+        assert replies[0]["error"]["code"] == PARSE_ERROR
+        assert [reply["id"] for reply in replies] == [None, 1, 2]
+        assert RecordingWriter.threads == {threading.current_thread()}
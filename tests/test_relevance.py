@@ -0,0 +1,107 @@
+"""
+Tests for the TF-IDF relevance engine.
+
+These tests verify that questions are matched to the entries that share
+their rarest terms, with and without NumPy.
+"""
+
+import json
+import os
+
+import pytest
+from src import relevance
+from src.corpus import Corpus
+from src.relevance import RelevanceEngine, SectionRelevance
+
+
+DOCUMENTS = [
+    "The bug hides in the loop.",
+    "A slow build teaches patience.",
+    "The loop never ends, the loop is life.",
+    "Deploy on Friday and meet your destiny.",
+]
+
+
+@pytest.fixture(params=["numpy", "python"])
+def engine_factory(request, monkeypatch):
+    """Build engines with the vectorized and the pure-Python product."""
+    if request.param == "numpy":
+        pytest.importorskip("numpy")
+    else:
+        monkeypatch.setattr(relevance, "load_numpy", lambda: None)
+    return lambda documents: RelevanceEngine(documents, max_df=1.0)
+
+
+class TestRelevance:
+    """Test cases for the RelevanceEngine class."""
+
+    def test_ranks_shared_terms_first(self, engine_factory):
+        """Test that the entry sharing the most weight with the question wins."""
+        results = engine_factory(DOCUMENTS).top_k("why does the loop never end", 2)
+
+        assert [doc_id for doc_id, _ in results] == [2, 0]
+        assert results[0][1] > results[1][1] > 0
+
+    def test_unknown_terms_match_nothing(self, engine_factory):
+        """Test that a question with no known terms returns no entries."""
+        assert engine_factory(DOCUMENTS).top_k("kubernetes", 3) == []
+
+    def test_batch_matches_single_questions(self, engine_factory):
+        """Test that batched scoring agrees with scoring one question at a time."""
+        engine = engine_factory(DOCUMENTS)
+        questions = ["slow build", "friday deploy", "", "the bug"]
+
+        batch = engine.top_k_batch(questions, 3)
+
+        for question, results in zip(questions, batch):
+            assert results == pytest.approx(engine.top_k(question, 3))
+
+    def test_common_terms_are_pruned(self):
+        """Test that terms found in most entries are left out of the matrix."""
+        engine = RelevanceEngine(DOCUMENTS, max_df=0.25)
+
+        assert "the" not in engine.idf
+        assert "friday" in engine.idf
+
+    def test_section_relevance_returns_entries(self):
+        """Test that section results resolve back to their category and entry."""
+        section = SectionRelevance({"bugs": DOCUMENTS[:2], "fate": DOCUMENTS[2:]})
+
+        category, entry, _ = section.top_k("friday destiny", 1)[0]
+
+        assert (category, entry) == ("fate", "Deploy on Friday and meet your destiny.")
+
+
+    def test_section_matrix_is_persisted(self, tmp_path, monkeypatch):
+        """Test that a corpus section loads its matrix instead of rebuilding it."""
+        source = tmp_path / "sample.json"
+        source.write_text(json.dumps({"wisdom": {"bugs": DOCUMENTS[:2], "fate": DOCUMENTS[2:]}}), encoding="utf-8")
+
+        def section():
+            corpus = Corpus("sample", search_path=[str(tmp_path)], cache_dir=str(tmp_path / "cache"))
+            return SectionRelevance(corpus.section("wisdom"), name="sample.wisdom")
+
+        built = section()
+        assert os.path.exists(built.matrix_path)
+
+        def rebuild(self, documents, max_df=relevance.DEFAULT_MAX_DF):
+            raise AssertionError("the matrix was rebuilt")
+
+        monkeypatch.setattr(RelevanceEngine, "__init__", rebuild)
+        loaded = section()
+
+        assert loaded.top_k("friday destiny", 2) == built.top_k("friday destiny", 2)
+        assert loaded.top_k("friday destiny", 1)[0][:2] == ("fate", "Deploy on Friday and meet your destiny.")
+
+    def test_section_matrix_follows_source_changes(self, tmp_path):
+        """Test that a persisted matrix is rebuilt when the corpus changes."""
+        source = tmp_path / "sample.json"
+        source.write_text(json.dumps({"wisdom": {"bugs": DOCUMENTS[:2]}}), encoding="utf-8")
+        corpus = Corpus("sample", search_path=[str(tmp_path)], cache_dir=str(tmp_path / "cache"))
+        SectionRelevance(corpus.section("wisdom"), name="sample.wisdom")
+
+        source.write_text(json.dumps({"wisdom": {"bugs": DOCUMENTS[:2], "fate": DOCUMENTS[2:]}}), encoding="utf-8")
+        corpus = Corpus("sample", search_path=[str(tmp_path)], cache_dir=str(tmp_path / "cache"))
+        section = SectionRelevance(corpus.section("wisdom"), name="sample.wisdom")
+
+        assert section.top_k("friday destiny", 1)[0][0] == "fate"
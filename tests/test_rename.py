@@ -0,0 +1,68 @@
+"""
+Tests for codebase-wide rename suggestions.
+
+These tests verify that only real identifiers are collected, that each
+unique name is mapped once, and that the rename map is deterministic.
+"""
+
+from src.rename import RenameSuggester, collect_identifiers, read_identifiers, suggest_renames
+from src.utils import generate_philosophical_variable_name
+
+
+SOURCE = '''
+# user_comment is not an identifier
+def load_user(user_id, config=None):
+    """Return the user_data for a user_docstring."""
+    label = f"user {user_id}" + 'temp_string' + r"\\d"
+    count = 0x1f + 1e5
+    for user in range(len(config)):
+        count += user
+    return UserData(user_id, count)
+'''
+
+
+class TestRename:
+    """Test cases for rename suggestions."""
+
+    def test_reads_identifiers_outside_comments_and_strings(self):
+        counts = read_identifiers(SOURCE)
+        assert counts["user_id"] == 2
+        assert counts["count"] == 3
+        assert "user_comment" not in counts
+        assert "user_docstring" not in counts
+        assert "temp_string" not in counts
+        assert "x1f" not in counts and "e5" not in counts
+        assert "f" not in counts and "r" not in counts
+
+    def test_suggestions_match_the_single_name_generator(self):
+        suggester = RenameSuggester()
+        for name in ["user_id", "UserData", "config", "count"]:
+            assert suggester.suggest(name) == generate_philosophical_variable_name(name)
+        assert suggester.suggest("label") is None
+        assert suggester.suggest("range") is None
+        assert suggester.suggest("__class__") is None
+
+    def test_each_name_is_computed_once(self, monkeypatch):
+        suggester = RenameSuggester(include_unmatched=True)
+        computed = []
+        compute = suggester._compute
+        monkeypatch.setattr(suggester, "_compute", lambda name: computed.append(name) or compute(name))
+        for _ in range(3):
+            suggester.suggest_all({"user": 5, "label": 2})
+        assert sorted(computed) == ["label", "user"]
+        assert suggester.suggest("label") == RenameSuggester(include_unmatched=True).suggest("label")
+
+    def test_rename_map_is_sorted_and_counted(self, tmp_path):
+        (tmp_path / "a.py").write_text(SOURCE)
+        (tmp_path / "pkg").mkdir()
+        (tmp_path / "pkg" / "b.py").write_text("user_id = 1\n")
+        (tmp_path / "notes.txt").write_text("user_id user_id\n")
+
+        assert collect_identifiers([str(tmp_path)])["user_id"] == 3
+        suggestions = suggest_renames([str(tmp_path)])
+        names = [suggestion.name for suggestion in suggestions]
+        assert names == sorted(names)
+        by_name = {suggestion.name: suggestion for suggestion in suggestions}
+        assert by_name["user_id"].suggestion == "digital_soul_id"
+        assert by_name["user_id"].occurrences == 3
+        assert suggest_renames([str(tmp_path)]) == suggestions
@@ -0,0 +1,113 @@
+"""
+Tests for ignore rules and file sniffing.
+
+These tests verify that ignore files are read with their usual meaning,
+that ignored directories are never entered, and that binary, minified and
+generated files are recognized from their first bytes.
+"""
+
+import io
+
+import src.scan
+from src.scan import (BINARY, GENERATED, MINIFIED, OVERSIZED, IgnoreRules, IgnoreTree,
+                      read_source, sniff, walk_files)
+
+
+class TestIgnoreRules:
+    """Test cases for compiled ignore rules."""
+
+    def test_last_matching_rule_wins(self):
+        rules = IgnoreRules(["# logs", "*.log", "!keep.log", "", "debug/keep.log"])
+        assert rules.match("app.log", False) is True
+        assert rules.match("deep/down/app.log", False) is True
+        assert rules.match("keep.log", False) is False
+        assert rules.match("debug/keep.log", False) is True
+        assert rules.match("app.py", False) is None
+
+    def test_anchored_and_directory_rules(self):
+        rules = IgnoreRules(["/build", "docs/*.html", "cache/", "**/tmp/**", "a/**/z", "file[0-9].[!p]y"])
+        assert rules.match("build", True) is True
+        assert rules.match("src/build", True) is None
+        assert rules.match("docs/index.html", False) is True
+        assert rules.match("docs/api/index.html", False) is None
+        assert rules.match("cache", True) is True
+        assert rules.match("cache", False) is None
+        assert rules.match("x/tmp/y/z.py", False) is True
+        assert rules.match("a/z", False) is True
+        assert rules.match("a/b/c/z", False) is True
+        assert rules.match("file1.ty", False) is True
+        assert rules.match("file1.py", False) is None
+
+    def test_escapes(self):
+        rules = IgnoreRules([r"\#notes", r"\!important", "trailing\\ "])
+        assert rules.match("#notes", False) is True
+        assert rules.match("!important", False) is True
+        assert rules.match("trailing ", False) is True
+
+
+class TestIgnoreTree:
+    """Test cases for the ignore rules of a directory tree."""
+
+    def test_walk_prunes_ignored_directories(self, tmp_path):
+        (tmp_path / ".gitignore").write_text("build/\n*.pyc\n")
+        (tmp_path / "pkg").mkdir()
+        (tmp_path / "pkg" / ".githubignore").write_text("generated_*.py\n!generated_keep.py\n")
+        for name in ["app.py", "app.pyc", "build/out.py", "node_modules/lib.py",
+                     "pkg/mod.py", "pkg/generated_api.py", "pkg/generated_keep.py"]:
+            path = tmp_path / name
+            path.parent.mkdir(exist_ok=True)
+            path.write_text("x = 1\n")
+
+        found = sorted(walk_files(str(tmp_path), (".py",)))
+        assert found == [str(tmp_path / name) for name in
+                         ["app.py", "pkg/generated_keep.py", "pkg/mod.py"]]
+
+    def test_single_paths_are_judged_with_their_ancestors(self, tmp_path):
+        (tmp_path / ".gitignore").write_text("vendor/\n")
+        (tmp_path / "sub").mkdir()
+        (tmp_path / "sub" / ".gitignore").write_text("!keep.py\n")
+        tree = IgnoreTree(str(tmp_path))
+        assert tree.ignored(str(tmp_path / "vendor" / "keep.py"), is_dir=False)
+        assert not tree.ignored(str(tmp_path / "sub" / "keep.py"), is_dir=False)
+        assert not tree.ignored("/elsewhere/vendor/keep.py", is_dir=False)
+
+
+class TestSniffing:
+    """Test cases for recognizing files that are not worth reading."""
+
+    def test_plain_source_passes(self):
+        assert sniff(b"def f():\n    return 1\n", complete=True) is None
+
+    def test_binary_minified_and_generated(self):
+        assert sniff(b"\x89PNG\r\n\x1a\n\0\0\0", complete=True) == BINARY
+        assert sniff(b"var a=1;" * 200 + b"\n", complete=True) == MINIFIED
+        assert sniff(b"x" * 8192) == MINIFIED
+        assert sniff((b"a" * 400 + b"\n") * 20) == MINIFIED
+        assert sniff(b"# Code generated by protoc-gen-go. DO NOT EDIT.\npackage x\n", complete=True) == GENERATED
+        assert sniff(b"\n\n\n\n\n\n# @generated\n", complete=True) is None
+
+    def test_files_are_read_only_when_worth_it(self, tmp_path):
+        source = tmp_path / "app.py"
+        source.write_text("x = 1\n" * 5000)
+        bundle = tmp_path / "bundle.min.js"
+        bundle.write_bytes(b"function(){return 1};" * 10000)
+
+        assert read_source(str(source)) == ("x = 1\n" * 5000, None)
+        assert read_source(str(bundle)) == (None, MINIFIED)
+        assert read_source(str(source), max_bytes=100) == (None, OVERSIZED)
+
+    def test_skipped_files_are_not_read_past_the_head(self, tmp_path, monkeypatch):
+        bundle = tmp_path / "bundle.min.js"
+        bundle.write_bytes(b"function(){return 1};" * 10000)
+        reads = []
+
+        class CountingFile(io.FileIO):
+            def read(self, size=-1):
+                data = super().read(size)
+                reads.append(len(data))
+                return data
+
+        monkeypatch.setattr(src.scan, "open", lambda path, mode: CountingFile(path), raising=False)
+
+        assert read_source(str(bundle)) == (None, MINIFIED)
+        assert sum(reads) == src.scan.SNIFF_BYTES
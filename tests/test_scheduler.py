@@ -0,0 +1,114 @@
+"""
+Tests for the reminder scheduler.
+
+These tests verify that the timing wheel fires every timer on time, that
+cancelled timers never fire, and that pending timers survive a restart.
+"""
+
+import asyncio
+import math
+import random
+import time
+
+from src.scheduler import Scheduler, TimerWheel, compose_reminders
+
+
+class TestTimerWheel:
+    """Test cases for TimerWheel."""
+
+    def test_fires_on_the_first_tick_after_due(self):
+        rng = random.Random(3)
+        # Two small rings, so many timers lie beyond the horizon and cascade repeatedly
+        wheel = TimerWheel(resolution=1.0, levels=2)
+        due = {}
+        for index in range(2000):
+            key = f"dev-{index}"
+            due[key] = rng.uniform(0, 20000)
+            wheel.schedule(key, due[key])
+
+        now = 0.0
+        while wheel:
+            previous = now
+            now += rng.choice([0.5, 1, 3, 64, 500])
+            for timer in wheel.advance(now):
+                # The first whole tick at or after the due time lies in the step just taken
+                assert int(previous) < math.ceil(due[timer.key]) <= int(now)
+                del due[timer.key]
+        assert due == {}
+
+    def test_cancel_and_replace(self):
+        wheel = TimerWheel()
+        wheel.schedule("ada", 10)
+        wheel.schedule("grace", 10)
+        wheel.schedule("grace", 5000)
+        assert wheel.cancel("ada")
+        assert not wheel.cancel("ada")
+        assert wheel.advance(100) == []
+        assert [timer.key for timer in wheel.advance(5000)] == ["grace"]
+
+    def test_overdue_timer_fires_on_next_tick(self):
+        wheel = TimerWheel(now=100)
+        wheel.schedule("late", 50)
+        assert [timer.key for timer in wheel.advance(101)] == ["late"]
+
+    def test_repeating_timer_skips_missed_occurrences(self):
+        wheel = TimerWheel()
+        wheel.schedule("ada", 10, "affirmation", interval=100)
+        assert len(wheel.advance(10)) == 1
+        assert wheel.get("ada").due == 110
+        assert len(wheel.advance(1000)) == 1
+        assert wheel.get("ada").due == 1010
+
+
+class FakeClock:
+    def __init__(self, now):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+class TestScheduler:
+    """Test cases for Scheduler."""
+
+    def test_batches_and_persists(self, tmp_path):
+        path = str(tmp_path / "timers")
+        batches = []
+
+        async def deliver(batch):
+            batches.append([timer.key for timer in batch])
+
+        async def session():
+            scheduler = Scheduler(deliver, path, resolution=0.01, batch_size=2)
+            for index in range(3):
+                scheduler.schedule_in(f"soon-{index}", 0.02, "meditation")
+            scheduler.schedule_in("later", 3600, "affirmation", interval=86400)
+            task = asyncio.create_task(scheduler.run())
+            for _ in range(200):
+                if sum(len(batch) for batch in batches) == 3:
+                    break
+                await asyncio.sleep(0.01)
+            scheduler.stop()
+            await task
+
+        asyncio.run(session())
+        assert sorted(len(batch) for batch in batches) == [1, 2]
+
+        # After a restart two hours later, the missed reminder fires on the first tick
+        clock = FakeClock(time.time() + 7200)
+        fired = []
+        restarted = Scheduler(fired.extend, path, clock=clock)
+        assert restarted.load() == 1
+        clock.now += 1
+        fired.extend(restarted.wheel.advance(clock.now))
+        assert [timer.key for timer in fired] == ["later"]
+        assert restarted.wheel.get("later").interval == 86400
+
+    def test_compose_reminders(self):
+        wheel = TimerWheel()
+        wheel.schedule("ada:meditation", 1, "meditation")
+        wheel.schedule("ada:affirmation", 1, "affirmation")
+        wheel.schedule("ada:other", 1, "unknown")
+        reminders = {reminder.kind: reminder for reminder in compose_reminders(wheel.advance(1))}
+        assert set(reminders) == {"meditation", "affirmation"}
+        assert "Meditation Guidance" in reminders["meditation"].text
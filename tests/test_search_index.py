@@ -0,0 +1,101 @@
+"""
+Tests for full-text search over the corpora.
+
+These tests verify that the BM25 index finds the most relevant wisdom and
+is persisted between runs.
+"""
+
+import json
+
+import pytest
+import src
+import src.search_index
+from src.corpus import Corpus
+from src.search_index import SearchField, SearchIndex, tokenize
+
+
+FIELDS = [
+    SearchField("sample", "quotes", "Sample quote"),
+    SearchField("sample", "wisdom", "Sample wisdom", ("wisdom", "context")),
+]
+
+
+@pytest.fixture
+def corpus_dir(tmp_path):
+    """A directory holding a small sample corpus."""
+    directory = tmp_path / "corpora"
+    directory.mkdir()
+    (directory / "sample.json").write_text(json.dumps({
+        "quotes": [
+            "Every bug is a teacher in disguise.",
+            "The loop that never ends is called life.",
+            "Comments are love letters to your future self.",
+        ],
+        "wisdom": {
+            "patience": [{"wisdom": "Wait for the compiler.", "context": "A slow build teaches patience."}],
+        },
+    }), encoding="utf-8")
+    return directory
+
+
+def _index(corpus_dir, cache_dir):
+    corpus = Corpus("sample", search_path=[str(corpus_dir)], cache_dir=str(cache_dir))
+    return SearchIndex(FIELDS, cache_dir=str(cache_dir), corpora={"sample": corpus})
+
+
+class TestSearch:
+    """Test cases for the SearchIndex class."""
+
+    def test_tokenize(self):
+        """Test that text is split into lowercase terms."""
+        assert tokenize("Every BUG, is a teacher!") == ["every", "bug", "is", "a", "teacher"]
+
+    def test_finds_relevant_entry_first(self, corpus_dir, tmp_path):
+        """Test that the best matching entry is ranked first."""
+        results = _index(corpus_dir, tmp_path).search("bug teacher")
+
+        assert results[0].text == "Every bug is a teacher in disguise."
+        assert results[0].source == "Sample quote"
+
+    def test_searches_record_context(self, corpus_dir, tmp_path):
+        """Test that record fields beyond the displayed one are searchable."""
+        results = _index(corpus_dir, tmp_path).search("build")
+
+        assert [result.text for result in results] == ["Wait for the compiler."]
+        assert results[0].category == "patience"
+
+    def test_unknown_terms_find_nothing(self, corpus_dir, tmp_path):
+        """Test that a query with no known terms returns no results."""
+        assert _index(corpus_dir, tmp_path).search("kubernetes") == []
+
+    def test_limit(self, corpus_dir, tmp_path):
+        """Test that no more than the requested number of results is returned."""
+        assert len(_index(corpus_dir, tmp_path).search("the is a", limit=2)) == 2
+
+    def test_index_is_persisted(self, corpus_dir, tmp_path, monkeypatch):
+        """Test that a second index loads from disk instead of rebuilding."""
+        _index(corpus_dir, tmp_path)
+        monkeypatch.setattr(SearchIndex, "_build", lambda self: pytest.fail("index was rebuilt"))
+
+        results = _index(corpus_dir, tmp_path).search("love letters")
+
+        assert results[0].text == "Comments are love letters to your future self."
+
+    def test_index_follows_corpus_changes(self, corpus_dir, tmp_path):
+        """Test that editing a corpus rebuilds the index."""
+        _index(corpus_dir, tmp_path)
+        (corpus_dir / "sample.json").write_text(json.dumps({"quotes": ["Refactoring reveals the soul."]}),
+                                                encoding="utf-8")
+
+        results = _index(corpus_dir, tmp_path).search("soul")
+
+        assert [result.text for result in results] == ["Refactoring reveals the soul."]
+
+    def test_package_search_survives_submodule_import(self, corpus_dir, tmp_path, monkeypatch):
+        """Test that importing the search module does not shadow the package's search function."""
+        monkeypatch.setattr(src.search_index, "_index", _index(corpus_dir, tmp_path))
+
+        src.Oracle
+        results = src.search("bug teacher", limit=1)
+
+        assert [result.text for result in results] == ["Every bug is a teacher in disguise."]
@@ -0,0 +1,154 @@
+"""
+Tests for the watch mode.
+
+These tests verify that changed files are noticed, that bursts of saves are
+coalesced, and that stale analyses never overwrite newer results.
+"""
+
+import threading
+import time
+
+import pytest
+from src.existential_coder import AnalysisEngine
+from src.watch import Debouncer, InotifyWatcher, PollingWatcher, WatchSession, open_watcher, watch
+
+
+CODE = "def contemplate():\n    for moment in range(3):\n        pass\n"
+
+
+def _wait_for(condition, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if condition():
+            return True
+        time.sleep(0.02)
+    return False
+
+
+@pytest.fixture
+def session(tmp_path):
+    session = WatchSession(str(tmp_path))
+    yield session
+    session.close()
+
+
+class TestDebouncer:
+    """Test cases for Debouncer."""
+
+    def test_waits_for_quiet(self):
+        debouncer = Debouncer(0.5)
+        debouncer.touch("a.py", 0.0)
+        debouncer.touch("a.py", 0.4)
+        assert debouncer.due(0.6) == []
+        assert debouncer.next_deadline() == pytest.approx(0.9)
+        assert debouncer.due(0.9) == ["a.py"]
+        assert debouncer.next_deadline() is None
+
+
+class TestWatchers:
+    """Test cases for the change watchers."""
+
+    def test_polling_reports_written_and_deleted_files(self, tmp_path):
+        (tmp_path / "old.py").write_text("x = 1\n")
+        watcher = PollingWatcher(str(tmp_path), interval=0.01)
+        (tmp_path / "new.py").write_text("y = 2\n")
+        (tmp_path / "old.py").unlink()
+
+        changed = watcher.read(1.0)
+        assert sorted(changed) == [str(tmp_path / "new.py"), str(tmp_path / "old.py")]
+        assert watcher.read(0.05) == []
+
+    def test_inotify_reports_files_in_new_directories(self, tmp_path):
+        watcher = open_watcher(str(tmp_path))
+        if not isinstance(watcher, InotifyWatcher):
+            pytest.skip("inotify is not available")
+        try:
+            (tmp_path / "pkg").mkdir()
+            time.sleep(0.05)
+            (tmp_path / "pkg" / "mod.py").write_text(CODE)
+
+            changed = set()
+            assert _wait_for(lambda: changed.update(watcher.read(0.1)) or
+                             str(tmp_path / "pkg" / "mod.py") in changed)
+        finally:
+            watcher.close()
+
+
+class TestWatchSession:
+    """Test cases for WatchSession."""
+
+    def test_scan_and_update_in_place(self, tmp_path, session):
+        path = tmp_path / "app.py"
+        path.write_text("x = 1\n")
+        for future in session.scan():
+            future.result()
+        first = session.results[str(path)]
+        assert first.complexity["function_count"] == 0
+
+        path.write_text(CODE)
+        session.submit(str(path)).result()
+        assert len(session.results) == 1
+        assert session.results[str(path)].complexity["function_count"] == 1
+        assert session.results[str(path)].insights
+
+    def test_cancelled_analysis_is_discarded(self, tmp_path, session):
+        path = tmp_path / "app.py"
+        path.write_text(CODE)
+        cancelled = threading.Event()
+        cancelled.set()
+        assert session._analyze(str(path), 1, cancelled) is None
+        assert str(path) not in session.results
+
+    def test_superseded_analysis_is_discarded(self, tmp_path, session):
+        path = tmp_path / "app.py"
+        path.write_text(CODE)
+        session.submit(str(path)).result()
+        session.submit(str(path)).result()
+        assert session._analyze(str(path), 1, threading.Event()) is None
+        assert session.results[str(path)].version == 2
+
+    def test_token_engine(self, tmp_path):
+        path = tmp_path / "app.py"
+        path.write_text('"""\nif only for a while\n"""\n' + CODE)
+        session = WatchSession(str(tmp_path), engine=AnalysisEngine.TOKENS)
+        try:
+            result = session.submit(str(path)).result()
+        finally:
+            session.close()
+        assert [insight.line_number for insight in result.insights] == [4, 5]
+
+    def test_deleted_file_is_forgotten(self, tmp_path):
+        removed = []
+        session = WatchSession(str(tmp_path), on_remove=removed.append)
+        path = tmp_path / "app.py"
+        path.write_text(CODE)
+        session.submit(str(path)).result()
+        path.unlink()
+        session.submit(str(path)).result()
+        session.close()
+        assert session.results == {}
+        assert removed == [str(path)]
+
+    def test_watch_loop_coalesces_saves(self, tmp_path):
+        updates = []
+        session = WatchSession(str(tmp_path), on_update=updates.append)
+        watcher = PollingWatcher(str(tmp_path), interval=0.02)
+        stop = threading.Event()
+        loop = threading.Thread(target=watch, args=(session, watcher, 0.2, stop))
+        loop.start()
+        try:
+            path = tmp_path / "app.py"
+            (tmp_path / "notes.txt").write_text("not code")
+            for count in range(1, 4):
+                path.write_text(CODE * count)
+                time.sleep(0.03)
+            assert _wait_for(lambda: updates)
+            time.sleep(0.3)
+        finally:
+            stop.set()
+            loop.join()
+            session.close()
+
+        assert len(updates) == 1
+        assert updates[0].complexity["function_count"] == 3
+        assert list(session.results) == [str(path)]
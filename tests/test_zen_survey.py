@@ -0,0 +1,75 @@
+"""
+Tests for bulk zen-level assessment.
+
+These tests verify that scoring a whole survey at once gives every user
+the same score and zen level as assessing them one at a time.
+"""
+
+import random
+
+import pytest
+import src.zen_master
+from src.zen_master import ZenLevel, ZenMaster, score_zen_surveys, zen_level_for_score
+
+
+WORDS = ["I", "wait", "calmly", "KNOW", "now", "it's", "okay", "Simple", "code", "timeout", "peace",
+         "\n", "İ", "harmony", "essential", "present", "bug", "", "understand", "slowly", "ßtime"]
+
+
+def assess_one_at_a_time(responses):
+    """The original assessment, one indicator at a time."""
+    zen_indicators = {
+        "patience": ["wait", "time", "slow", "patient"],
+        "acceptance": ["accept", "okay", "fine", "understand"],
+        "mindfulness": ["present", "now", "aware", "focused"],
+        "balance": ["balance", "harmony", "peace", "calm"],
+        "simplicity": ["simple", "clear", "minimal", "essential"],
+    }
+    score = 0
+    for response in responses:
+        response_lower = response.lower()
+        for indicators in zen_indicators.values():
+            if any(indicator in response_lower for indicator in indicators):
+                score += 1
+    return score
+
+
+def survey(users, seed=11):
+    rng = random.Random(seed)
+    return [
+        ["".join(rng.choice(WORDS) + rng.choice(" \t") for _ in range(rng.randint(0, 12)))
+         for _ in range(rng.randint(0, 8))]
+        for _ in range(users)
+    ]
+
+
+class TestZenSurvey:
+    """Test cases for assessing many users at once."""
+
+    @pytest.mark.parametrize("vectorized", [True, False])
+    def test_matches_assessing_each_user(self, monkeypatch, vectorized):
+        if not vectorized:
+            monkeypatch.setattr(src.zen_master, "load_numpy", lambda: None)
+        response_sets = survey(2000)
+        expected = [assess_one_at_a_time(responses) for responses in response_sets]
+        assert score_zen_surveys(response_sets) == expected
+
+    def test_levels_and_distribution(self):
+        master = ZenMaster()
+        response_sets = survey(300, seed=4) + [[], ["wait, now is the time for calm and simple peace"] * 5]
+        result = master.assess_zen_levels(response_sets)
+        assert result.levels == [master.assess_zen_level(responses) for responses in response_sets]
+        assert result.levels[-1] == ZenLevel.MASTER
+        distribution = result.distribution()
+        assert list(distribution) == list(ZenLevel)
+        assert sum(distribution.values()) == len(response_sets)
+
+    def test_empty_survey(self):
+        assert score_zen_surveys([]) == []
+        assert score_zen_surveys([[], []]) == [0, 0]
+
+    def test_thresholds(self):
+        assert [zen_level_for_score(score) for score in (0, 4, 5, 9, 10, 14, 15, 99)] == [
+            ZenLevel.BEGINNER, ZenLevel.BEGINNER, ZenLevel.INTERMEDIATE, ZenLevel.INTERMEDIATE,
+            ZenLevel.ADVANCED, ZenLevel.ADVANCED, ZenLevel.MASTER, ZenLevel.MASTER,
+        ]